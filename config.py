@@ -2,6 +2,7 @@
 إعدادات وتكوين الأداة - إصدار Python
 """
 import json
+import multiprocessing
 from pathlib import Path
 from datetime import datetime
 
@@ -12,9 +13,10 @@ BUNDLES_DIR = BASE_DIR / "bundles"
 LOGS_DIR = BASE_DIR / "logs"
 UPLOAD_DIR = BASE_DIR / "uploads"
 TEMP_DIR = BASE_DIR / "temp"
+CACHE_DIR = BASE_DIR / "cache"
 
 # إنشاء المجلدات إذا لم تكن موجودة
-for directory in [REPORTS_DIR, BUNDLES_DIR, LOGS_DIR, UPLOAD_DIR, TEMP_DIR]:
+for directory in [REPORTS_DIR, BUNDLES_DIR, LOGS_DIR, UPLOAD_DIR, TEMP_DIR, CACHE_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
 # ==================== الإعدادات العامة ====================
@@ -92,10 +94,80 @@ class Config:
         'output_dir': 'custom_builds',
         'minify_js': True,
         'minify_css': True,
+        'mangle_js': True,  # إعادة تسمية المتغيرات المحلية عند تصغير JS
+        'minify_workers': 0,  # 0 = عدد المعالجات
+        'incremental_builds': True,  # إعادة بناء المخرجات التي تغيرت مدخلاتها فقط (build_manifest.json)
+        'precompress': True,  # نسخ ‎.gz و ‎.br (إن توفر brotli) بجانب ملفات JS/CSS
+        'source_maps': True,  # خرائط مصدر ‎.map لملفات JS المصغرة والنسخ المخصصة
+        'hashed_filenames': True,  # نسخ name.<hash8>.min.js و manifest.json لتخزين الحزم في المتصفح بلا انتهاء
+        'split_chunks': True,  # أجزاء JS/CSS لكل صفحة حسب مراجع HTML (chunks/ و split_plan.json)
+        'min_shared_chunk_kb': 10,  # الأجزاء المشتركة الأصغر تُدمج في أجزاء الصفحات
+        'critical_css': True,  # CSS الحرج لكل صفحة في critical/ (يُضمن في نسخ site/ مع تأجيل باقي الأنماط)
+        'critical_fold_elements': 100,  # عدد العناصر الأولى في body التي تُعتبر فوق حد التمرير
+        'css_flatten_imports': True,  # دمج سلاسل @import المحلية في ملف CSS واحد (الروابط تُعدل)
+        'css_inline_limit_kb': 8,  # الصور الأصغر في url() تُضمن كـ data URI (مجموع تكراراتها؛ 0 = بدون تضمين)
+        'budget_file': 'bundle_budget.json',  # ميزانية الأحجام في جذر المشروع (اختيارية)
+        'self_host': False,  # تنزيل ملفات CDN إلى vendor/ ونسخ الصفحات معدلة إلى site/
+        'self_host_base_url': '',  # بادئة روابط الصفحات المعدلة (فارغة = مسارات نسبية لكل صفحة)
         'create_zip': True,
         'include_readme': True
     }
     
+    # إعدادات التنزيل (جلسة مشتركة واتصالات متوازية محدودة لكل مضيف)
+    DOWNLOAD_SETTINGS = {
+        'max_workers': 8,
+        'per_host_limit': 4,
+        'retries': 3,
+        'backoff_factor': 0.5,
+        'timeout': 30,
+        'chunk_size': 64 * 1024,
+        'user_agent': 'WebScanner/1.0'
+    }
+    
+    # ذاكرة الملفات المنزلة (معنونة بالمحتوى)
+    CACHE_SETTINGS = {
+        'dir': str(CACHE_DIR / 'artifacts'),
+        'max_bytes': 200 * 1024 * 1024,
+        'max_age': 24 * 3600,
+        'minify_dir': str(CACHE_DIR / 'minify'),
+        'usage_index_dir': str(CACHE_DIR / 'usage_index'),
+        'aggregate_cache_dir': str(CACHE_DIR / 'aggregates')  # تجميع تحليل لكل مجلد (AggregateCache)
+    }
+    
+    # حذف قواعد CSS غير المستخدمة (أصناف تضيفها JavaScript لا تظهر في HTML)
+    PURGE_SETTINGS = {
+        'enabled': True,
+        'safelist': ['show', 'showing', 'hiding', 'fade', 'collapse', 'collapsing', 'active',
+                     'disabled', 'was-validated', 'is-valid', 'is-invalid', 'modal-open',
+                     'modal-backdrop', 'modal-static', 'offcanvas-backdrop', 'dropdown-menu-end',
+                     'dropup', 'dropend', 'dropstart', 'tooltip-inner', 'popover-header',
+                     'popover-body', 'arrow', 'tooltip-arrow', 'popover-arrow', 'odd', 'even'],
+        'safelist_patterns': [r'^bs-', r'^tooltip', r'^popover', r'^carousel-item-',
+                              r'^dataTables?_', r'^dt-', r'^dtr-', r'^sorting', r'^paginate_',
+                              r'^select2', r'^ui-']
+    }
+    
+    # مخزن الحزم المشترك بين المشاريع (روابط صلبة إلى bundles/.objects)
+    STORAGE_SETTINGS = {
+        'dedupe_bundles': True,
+        'objects_dirname': '.objects',
+        'max_storage_mb': 500  # عند التجاوز تُحذف حزم المشاريع الأقدم
+    }
+    
+    # عامل الخلفية: المسح والتحليل (حساب) في مجمع عمليات، الحزم والتقارير (إدخال/إخراج) في مجمع خيوط
+    WORKER_SETTINGS = {
+        'max_queue_size': 100,  # المهام المنتظرة؛ عند الامتلاء يرفض الطلب الجديد
+        'thread_workers': 4,
+        'process_workers': 2,
+        'task_types': {
+            'scan_project': {'pool': 'process', 'max_concurrent': 2},
+            'analyze_project': {'pool': 'process', 'max_concurrent': 2},
+            'create_bundles': {'pool': 'thread', 'max_concurrent': 2},
+            'generate_report': {'pool': 'thread', 'max_concurrent': 4},
+            'cleanup_project': {'pool': 'thread', 'max_concurrent': 1}
+        }
+    }
+    
     @classmethod
     def to_dict(cls):
         """تحويل الإعدادات إلى قاموس"""
@@ -114,13 +186,19 @@ class Config:
             'library_patterns': cls.LIBRARY_PATTERNS,
             'known_cdns': cls.KNOWN_CDNS,
             'bundle_settings': cls.BUNDLE_SETTINGS,
+            'download_settings': cls.DOWNLOAD_SETTINGS,
+            'cache_settings': cls.CACHE_SETTINGS,
+            'purge_settings': cls.PURGE_SETTINGS,
+            'storage': cls.STORAGE_SETTINGS,
+            'worker_settings': cls.WORKER_SETTINGS,
             'paths': {
                 'base': str(BASE_DIR),
                 'reports': str(REPORTS_DIR),
                 'bundles': str(BUNDLES_DIR),
                 'logs': str(LOGS_DIR),
                 'uploads': str(UPLOAD_DIR),
-                'temp': str(TEMP_DIR)
+                'temp': str(TEMP_DIR),
+                'cache': str(CACHE_DIR)
             }
         }
     
@@ -136,8 +214,9 @@ class Config:
         
         return file_path
 
-# إنشاء ملف config.json للتوافق
-Config.save_to_json()
+# إنشاء ملف config.json للتوافق (في العملية الرئيسية فقط وليس في كل عملية من مجمع العمال)
+if multiprocessing.current_process().name == 'MainProcess':
+    Config.save_to_json()
 
 # دالة لتحميل الإعدادات
 def get_config():
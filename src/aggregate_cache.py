@@ -0,0 +1,90 @@
+"""
+ذاكرة مؤقتة لتجميعات التحليل الجزئية لكل مجلد (إعادة استخدامها في التشغيل التزايدي)
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from config import get_config
+except ImportError:
+    import sys
+    sys.path.append('.')
+    from config import get_config
+
+try:
+    from .analyzer import AnalysisAggregate
+except ImportError:
+    from analyzer import AnalysisAggregate
+
+
+class AggregateCache:
+    """تجميع AnalysisAggregate واحد لكل مجلد مع واردات ملفاته، مفتاحه أوقات تعديل الملفات"""
+
+    VERSION = 1
+    # ملفات على مستوى المشروع تغير نتيجة تحليل أي ملف (أسماء الحزم وإصداراتها)
+    PROJECT_FILES = ('package.json', 'package-lock.json')
+
+    def __init__(self, project_root: Path, cache_dir: Optional[Path] = None):
+        self.project_root = Path(project_root)
+        self.cache_dir = self.dir_for(self.project_root, cache_dir)
+        self._project_stamp = self._stamp(self.project_root / name for name in self.PROJECT_FILES)
+
+    @staticmethod
+    def dir_for(project_root: Path, cache_dir: Optional[Path] = None) -> Path:
+        """مجلد المشروع داخل ذاكرة التطبيق المؤقتة (لا يُكتب شيء داخل المشروع الممسوح)"""
+        if cache_dir is None:
+            cfg = get_config()
+            cache_dir = cfg.get('cache_settings', {}).get('aggregate_cache_dir') or \
+                Path(cfg['paths']['cache']) / 'aggregates'
+        project_root = Path(project_root).resolve()
+        key = hashlib.sha1(str(project_root).encode('utf-8')).hexdigest()[:12]
+        return Path(cache_dir) / f'{project_root.name}-{key}'
+
+    @staticmethod
+    def _stamp(paths) -> List[Tuple[str, int, int]]:
+        """(المسار، وقت التعديل، الحجم) لكل ملف موجود"""
+        stamp = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamp.append((Path(path).as_posix(), stat.st_mtime_ns, stat.st_size))
+        return stamp
+
+    def key_for(self, files: List[Path]) -> str:
+        """مفتاح المجلد: أوقات تعديل ملفاته المحللة وملفات المشروع"""
+        data = [self.VERSION, self._project_stamp, sorted(self._stamp(files))]
+        return hashlib.sha1(json.dumps(data).encode('utf-8')).hexdigest()
+
+    def _path(self, directory: str) -> Path:
+        name = hashlib.sha1(directory.encode('utf-8')).hexdigest()[:16]
+        return self.cache_dir / f'{name}.json'
+
+    def get(self, directory: str, key: str) -> Optional[Tuple[AnalysisAggregate, List[Dict[str, Any]]]]:
+        """التجميع وواردات الملفات المحفوظة للمجلد إذا لم يتغير مفتاحه"""
+        try:
+            with open(self._path(directory), 'r', encoding='utf-8') as f:
+                header, aggregate_text = f.read().split('\n', 1)
+            header = json.loads(header)
+            if header.get('key') != key:
+                return None
+            return AnalysisAggregate.loads(aggregate_text), header['files']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, directory: str, key: str, aggregate: AnalysisAggregate, files: List[Dict[str, Any]]):
+        """حفظ تجميع المجلد: سطر رأس (المفتاح والواردات) ثم التجميع المضغوط"""
+        path = self._path(directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {'directory': directory, 'key': key, 'files': files}
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')))
+            f.write('\n')
+            f.write(aggregate.dumps())
+        os.replace(tmp_path, path)
@@ -2,17 +2,185 @@
 محلل كود JavaScript
 """
 
+import os
 import re
+import json
 from pathlib import Path
-from typing import List, Dict, Set, Any, Tuple
-import esprima
+from typing import List, Dict, Set, Any, Tuple, Optional, Iterable
 from collections import defaultdict
-import networkx as nx
+
+try:
+    from .module_graph import ModuleGraph
+    from .library_index import LibraryIndex
+    from .resolver import ModuleResolver
+    from .js_lexer import extract_module_info, SCRIPT_EXTENSIONS
+    from .library_sizes import estimate_savings, chainable_members
+except ImportError:
+    from module_graph import ModuleGraph
+    from library_index import LibraryIndex
+    from resolver import ModuleResolver
+    from js_lexer import extract_module_info, SCRIPT_EXTENSIONS
+    from library_sizes import estimate_savings, chainable_members
+
+# مجلدات المكتبات المنسوخة كما هي (ليست كود المشروع)
+VENDOR_DIRS = {'node_modules', 'bower_components', 'vendor', 'vendors'}
+_MINIFIED_NAME_RE = re.compile(r'[.-]min\.[cm]?js$', re.IGNORECASE)
+
+
+def is_vendored_file(file_path: Path, content: str) -> bool:
+    """ملف مكتبة منسوخة أو مصغرة (أسماؤه الداخلية مثل _ و $ لا تعني lodash أو jQuery)"""
+    path = Path(file_path)
+    if _MINIFIED_NAME_RE.search(path.name) or VENDOR_DIRS.intersection(path.parts):
+        return True
+    # كود مصغر بدون .min في الاسم: أسطر طويلة جداً
+    sample = content[:64 * 1024]
+    return len(sample) > 2000 and len(sample) / (sample.count('\n') + 1) > 500
+
+
+class AnalysisAggregate:
+    """تجميع جزئي قابل للدمج والتسلسل (نمط map-reduce): قواميس ومجموعات عادية فقط لتمر عبر pickle"""
+    
+    def __init__(self):
+        self.total_files = 0
+        self.libraries: Dict[str, Dict[str, Any]] = {}
+        self.files_by_library: Dict[str, List[str]] = {}
+    
+    def _library(self, lib_name: str) -> Dict[str, Any]:
+        lib_data = self.libraries.get(lib_name)
+        if lib_data is None:
+            lib_data = {
+                'count': 0,
+                'files': set(),
+                'imports': set(),
+                'functions_used': set(),
+                'package': None,
+                'version': None,
+                'entry': None
+            }
+            self.libraries[lib_name] = lib_data
+            self.files_by_library[lib_name] = []
+        return lib_data
+    
+    def add(self, analysis: Dict) -> 'AnalysisAggregate':
+        """إضافة نتيجة تحليل ملف واحد"""
+        self.total_files += 1
+        
+        for lib_name, imports in analysis['libraries'].items():
+            lib_data = self._library(lib_name)
+            lib_data['count'] += 1
+            lib_data['files'].add(analysis['file'])
+            
+            for imp in imports:
+                lib_data['imports'].add(imp['original_import'])
+                self._merge_package_info(lib_data, imp)
+            
+            # أعضاء هذه المكتبة فقط (الملف قد يستخدم عدة مكتبات)
+            prefix = f'{lib_name}.'
+            lib_data['functions_used'].update(
+                symbol for symbol in analysis['functions_used'] if symbol.startswith(prefix)
+            )
+            
+            self.files_by_library[lib_name].append(analysis['file'])
+        
+        return self
+    
+    @staticmethod
+    def _merge_package_info(lib_data: Dict[str, Any], source: Dict[str, Any]):
+        """الاحتفاظ بأول اسم حزمة وإصدار وملف دخول معروف"""
+        for key in ('package', 'version', 'entry'):
+            if lib_data[key] is None and source.get(key):
+                lib_data[key] = source[key]
+    
+    def merge(self, other: 'AnalysisAggregate') -> 'AnalysisAggregate':
+        """دمج تجميع جزئي آخر في هذا التجميع"""
+        self.total_files += other.total_files
+        
+        for lib_name, other_data in other.libraries.items():
+            lib_data = self._library(lib_name)
+            lib_data['count'] += other_data['count']
+            lib_data['files'].update(other_data['files'])
+            lib_data['imports'].update(other_data['imports'])
+            lib_data['functions_used'].update(other_data['functions_used'])
+            self._merge_package_info(lib_data, other_data)
+            self.files_by_library[lib_name].extend(other.files_by_library.get(lib_name, []))
+        
+        return self
+    
+    @classmethod
+    def merge_all(cls, parts: Iterable['AnalysisAggregate']) -> 'AnalysisAggregate':
+        """دمج شجري لقائمة من التجميعات الجزئية (بالترتيب)"""
+        parts = list(parts)
+        if not parts:
+            return cls()
+        
+        while len(parts) > 1:
+            merged = []
+            for i in range(0, len(parts) - 1, 2):
+                merged.append(parts[i].merge(parts[i + 1]))
+            if len(parts) % 2:
+                merged.append(parts[-1])
+            parts = merged
+        
+        return parts[0]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """تحويل مضغوط إلى قاموس (قوائم مرتبة بدل المجموعات)"""
+        return {
+            'total_files': self.total_files,
+            'libraries': {
+                lib_name: {
+                    'count': data['count'],
+                    'files': sorted(data['files']),
+                    'imports': sorted(data['imports']),
+                    'functions_used': sorted(data['functions_used']),
+                    'package': data['package'],
+                    'version': data['version'],
+                    'entry': data['entry']
+                }
+                for lib_name, data in self.libraries.items()
+            },
+            'files_by_library': self.files_by_library
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AnalysisAggregate':
+        """إعادة البناء من قاموس to_dict"""
+        aggregate = cls()
+        aggregate.total_files = data.get('total_files', 0)
+        for lib_name, lib_data in data.get('libraries', {}).items():
+            target = aggregate._library(lib_name)
+            target['count'] = lib_data.get('count', 0)
+            target['files'].update(lib_data.get('files', []))
+            target['imports'].update(lib_data.get('imports', []))
+            target['functions_used'].update(lib_data.get('functions_used', []))
+            aggregate._merge_package_info(target, lib_data)
+            aggregate.files_by_library[lib_name] = list(data.get('files_by_library', {}).get(lib_name, []))
+        return aggregate
+    
+    def dumps(self) -> str:
+        """تسلسل JSON مضغوط"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+    
+    @classmethod
+    def loads(cls, text: str) -> 'AnalysisAggregate':
+        """تحميل من JSON"""
+        return cls.from_dict(json.loads(text))
+    
+    def finalize(self) -> Dict[str, Any]:
+        """النتيجة النهائية بنفس بنية aggregate_analysis"""
+        data = self.to_dict()
+        aggregated = {
+            'total_files': data['total_files'],
+            'libraries': data['libraries'],
+            'files_by_library': data['files_by_library'],
+            'total_functions': sum(len(lib['functions_used']) for lib in data['libraries'].values())
+        }
+        return aggregated
 
 class DependencyAnalyzer:
     """فئة تحليل التبعيات"""
     
-    def __init__(self):
+    def __init__(self, project_root: Optional[Path] = None):
         self.import_patterns = [
             # ES6 Imports
             (r"import\s+(?:\*\s+as\s+\w+|\{[^}]*\}|\w+)\s+from\s+['\"]([^'\"]+)['\"]", 'es6'),
@@ -24,28 +192,40 @@ class DependencyAnalyzer:
             # AMD/RequireJS
             (r"define\s*\([^)]*['\"]([^'\"]+)['\"]", 'amd'),
         ]
+        self._compiled_import_patterns = [
+            (re.compile(pattern), import_type) for pattern, import_type in self.import_patterns
+        ]
+        
+        # فهرس المكتبات الشائعة (أسماء دقيقة + بادئات + أنماط احتياطية)
+        self.library_index = LibraryIndex()
         
-        # أنماط المكتبات الشائعة
-        self.library_patterns = {
-            'lodash': [r'lodash', r'lodash-es', r'lodash\.'],
-            'jquery': [r'jquery', r'\$'],
-            'axios': [r'axios'],
-            'moment': [r'moment'],
-            'react': [r'react', r'react-dom'],
-            'vue': [r'vue', r'@vue/'],
-            'angular': [r'@angular/', r'angular'],
-            'express': [r'express'],
-            'underscore': [r'underscore']
+        # الحد الأدنى للتوفير (بالبايت) لاقتراح حزمة مخصصة
+        self.min_savings_bytes = 10 * 1024
+        
+        # المتغيرات العامة التي تعرّفها المكتبات عند تحميلها بوسم <script>
+        self.global_aliases = {
+            '$': 'jquery',
+            'jQuery': 'jquery',
+            '_': 'lodash',
+            'moment': 'moment',
+            'axios': 'axios',
+            'bootstrap': 'bootstrap'
         }
         
-        self.dependency_graph = nx.DiGraph()
+        # محلل الاستيرادات (package.json و node_modules) مع ذاكرة مؤقتة
+        self.resolver = ModuleResolver(project_root)
+        
+        self.dependency_graph = ModuleGraph()
+        
+        # وسوم <script src> في ملفات HTML لتحديد نقاط الدخول
+        self._script_src_pattern = re.compile(r'<script\b[^>]*?\bsrc\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
     
     def extract_imports(self, content: str) -> List[Tuple[str, str]]:
         """استخراج عبارات الاستيراد من المحتوى"""
         imports = []
         
-        for pattern, import_type in self.import_patterns:
-            matches = re.finditer(pattern, content)
+        for pattern, import_type in self._compiled_import_patterns:
+            matches = pattern.finditer(content)
             for match in matches:
                 if len(match.groups()) >= 1:
                     import_path = match.group(1)
@@ -56,113 +236,311 @@ class DependencyAnalyzer:
     def normalize_library_name(self, import_path: str) -> str:
         """تطبيع اسم المكتبة من مسار الاستيراد"""
         # إزالة المسار النسبي والتركيز على اسم المكتبة الرئيسي
-        parts = import_path.split('/')
+        return LibraryIndex.package_name(import_path)
+    
+    def identify_library(self, import_path: str) -> Tuple[str, str]:
+        """تحديد المكتبة من مسار الاستيراد"""
+        # إذا لم تكن مكتبة معروفة، يعيد الفهرس الاسم المطبيع
+        return self.library_index.lookup(import_path)
+    
+    def resolve_import(self, import_path: str, importer: Path, project_root: Path) -> Tuple[str, int]:
+        """حل مسار الاستيراد إلى ملف محلي أو حزمة"""
+        resolution = self.resolver.resolve(import_path, importer)
         
-        # التعامل مع نماذج scoped packages
-        if import_path.startswith('@'):
-            if len(parts) >= 2:
-                return f"{parts[0]}/{parts[1]}"
+        if resolution['kind'] == 'file':
+            try:
+                return Path(resolution['path']).relative_to(project_root).as_posix(), ModuleGraph.KIND_FILE
+            except ValueError:
+                return '', ModuleGraph.KIND_FILE
         
-        # العودة بالجزء الأول إذا لم يكن مساراً نسبياً
-        if parts and not parts[0].startswith('.'):
-            return parts[0]
+        if resolution['kind'] in ('package', 'builtin'):
+            return resolution['name'], ModuleGraph.KIND_PACKAGE
         
-        return ''
+        return '', ModuleGraph.KIND_FILE
     
-    def identify_library(self, import_path: str) -> Tuple[str, str]:
-        """تحديد المكتبة من مسار الاستيراد"""
-        normalized = self.normalize_library_name(import_path)
+    def build_module_graph(self, project_root: Path, files_analysis: List[Dict]) -> ModuleGraph:
+        """بناء رسم بياني للوحدات على مستوى المشروع من نتائج تحليل الملفات"""
+        project_root = Path(os.path.abspath(project_root))
+        graph = ModuleGraph()
         
-        for lib_name, patterns in self.library_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, import_path, re.IGNORECASE) or re.search(pattern, normalized, re.IGNORECASE):
-                    return lib_name, import_path
+        for analysis in files_analysis:
+            file_path = Path(analysis['file'])
+            if not file_path.is_absolute():
+                file_path = project_root / file_path
+            file_path = Path(os.path.normpath(file_path))
+            
+            try:
+                source = file_path.relative_to(project_root).as_posix()
+            except ValueError:
+                continue
+            graph.add_node(source)
+            
+            for import_path, _ in analysis.get('imports', []):
+                target, kind = self.resolve_import(import_path, file_path, project_root)
+                if target:
+                    graph.add_edge(source, target, kind)
         
-        # إذا لم تكن مكتبة معروفة، نعود بالاسم المطبيع
-        return normalized, import_path
+        graph.freeze()
+        self.dependency_graph = graph
+        return graph
+    
+    def detect_entry_points(self, project_root: Path, graph: ModuleGraph) -> List[str]:
+        """نقاط الدخول: سكربتات HTML، ثم حقول package.json، ثم الملفات التي لا يستوردها أحد"""
+        project_root = Path(os.path.abspath(project_root))
+        entries = []
+        
+        for root, dirs, filenames in os.walk(project_root):
+            dirs[:] = [d for d in dirs if d not in ('node_modules', '.git', 'bundles')]
+            for filename in filenames:
+                if not filename.lower().endswith(('.html', '.htm')):
+                    continue
+                html_path = Path(root) / filename
+                try:
+                    with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        html = f.read()
+                except OSError:
+                    continue
+                for src in self._script_src_pattern.findall(html):
+                    if src.startswith(('http://', 'https://', '//', 'data:')):
+                        continue
+                    target, kind = self.resolve_import(
+                        src if src.startswith(('.', '/')) else './' + src,
+                        html_path, project_root
+                    )
+                    if target and kind == ModuleGraph.KIND_FILE:
+                        entries.append(target)
+        
+        if not entries:
+            manifest = self.resolver.read_package_json(str(project_root)) or {}
+            for field in ('browser', 'module', 'main'):
+                value = manifest.get(field)
+                if isinstance(value, str) and value:
+                    specifier = value if value.startswith(('.', '/')) else './' + value
+                    target, kind = self.resolve_import(specifier, project_root / 'package.json', project_root)
+                    if target:
+                        entries.append(target)
+        
+        entries = [e for e in dict.fromkeys(entries) if graph.node_id(e) is not None]
+        return entries or graph.roots()
+    
+    def find_dead_code(self, project_root: Path, files_analysis: List[Dict],
+                       graph: Optional[ModuleGraph] = None,
+                       entry_points: Optional[List[str]] = None) -> Dict[str, Any]:
+        """الواردات غير المستخدمة والملفات التي لا تصل إليها أي نقطة دخول (زمن خطي)"""
+        project_root = Path(os.path.abspath(project_root))
+        if graph is None:
+            graph = self.build_module_graph(project_root, files_analysis)
+        if entry_points is None:
+            entry_points = self.detect_entry_points(project_root, graph)
+        
+        reachable = graph.reachable(entry_points)
+        
+        unused_imports = []
+        dead_files = []
+        for analysis in files_analysis:
+            file_path = Path(analysis['file'])
+            if file_path.is_absolute():
+                try:
+                    file_path = file_path.relative_to(project_root)
+                except ValueError:
+                    continue
+            rel_path = file_path.as_posix()
+            
+            for imp in analysis.get('unused_imports', []):
+                unused_imports.append({'file': rel_path, **imp})
+            
+            if rel_path not in reachable and file_path.suffix.lower() in SCRIPT_EXTENSIONS:
+                dead_files.append(rel_path)
+        
+        return {
+            'entry_points': entry_points,
+            'unused_imports': unused_imports,
+            'dead_files': sorted(dead_files)
+        }
     
     def analyze_file(self, file_path: Path, content: str) -> Dict[str, Any]:
         """تحليل ملف واحد"""
         analysis = {
             'file': str(file_path),
             'imports': [],
+            'type_imports': [],
             'libraries': defaultdict(list),
-            'functions_used': set()
+            'functions_used': set(),
+            'bindings': {},
+            'members': [],
+            'named_usages': [],
+            'usages': [],
+            'properties': set(),
+            'references': set(),
+            'declared': set(),
+            'unused_imports': [],
+            'vendored': is_vendored_file(file_path, content)
         }
         
         try:
-            # استخراج الواردات
-            imports = self.extract_imports(content)
+            # استخراج الواردات (المحلل المعجمي لملفات JS/TS/JSX، والأنماط كبديل)
+            module_info = self._extract_module_info(file_path, content)
+            if module_info is not None:
+                imports = self._apply_module_info(module_info, analysis)
+            else:
+                imports = self.extract_imports(content)
             analysis['imports'] = imports
             
             # تحديد المكتبات
             for import_path, import_type in imports:
                 lib_name, full_path = self.identify_library(import_path)
                 if lib_name:
-                    analysis['libraries'][lib_name].append({
+                    entry = {
                         'path': full_path,
                         'type': import_type,
                         'original_import': import_path
-                    })
+                    }
+                    
+                    # الإصدار الدقيق وملف الدخول من package.json/node_modules
+                    resolution = self.resolver.resolve(import_path, file_path)
+                    if resolution['kind'] == 'package':
+                        entry['package'] = resolution['name']
+                        entry['version'] = resolution['version']
+                        entry['entry'] = resolution['entry']
+                    
+                    analysis['libraries'][lib_name].append(entry)
             
-            # تحليل استخدام الدوال (مبسط)
-            self._analyze_function_usage(content, analysis)
+            # تحليل استخدام الدوال (استخدام المكتبات داخل مكتبة منسوخة لا يُنسب للمشروع)
+            if not analysis['vendored']:
+                self._analyze_function_usage(content, analysis)
             
         except Exception as e:
             print(f"⚠️  خطأ في تحليل {file_path}: {e}")
         
         return analysis
     
-    def _analyze_function_usage(self, content: str, analysis: Dict):
-        """تحليل استخدام الدوال (تنفيذ مبسط)"""
+    def _extract_module_info(self, file_path: Path, content: str) -> Optional[Dict[str, Any]]:
+        """تشغيل المحلل المعجمي على ملفات السكربت، وإرجاع None عند الفشل"""
+        if Path(file_path).suffix.lower() not in SCRIPT_EXTENSIONS:
+            return None
         try:
-            # استخدام esprima لتحليل AST
-            ast = esprima.parseScript(content, loc=True)
-            
-            # البحث عن استخدام الدوال من المكتبات المعروفة
-            for lib_name in analysis['libraries'].keys():
-                # نمط: library.function
-                pattern = rf'{lib_name}\.(\w+)'
-                matches = re.finditer(pattern, content)
-                for match in matches:
-                    analysis['functions_used'].add(match.group(0))
-        except:
-            # بديل بسيط في حالة فشل التحليل
-            pass
-    
-    def aggregate_analysis(self, files_analysis: List[Dict]) -> Dict[str, Any]:
-        """تجميع نتائج التحليل من جميع الملفات"""
-        aggregated = {
-            'total_files': len(files_analysis),
-            'libraries': defaultdict(lambda: {
-                'count': 0,
-                'files': set(),
-                'imports': set(),
-                'functions_used': set()
-            }),
-            'files_by_library': defaultdict(list),
-            'total_functions': 0
-        }
+            return extract_module_info(content, str(file_path))
+        except Exception as e:
+            print(f"⚠️  تعذر التحليل المعجمي لـ {file_path}، استخدام الأنماط بدلاً منه: {e}")
+            return None
+    
+    def _apply_module_info(self, module_info: Dict[str, Any], analysis: Dict) -> List[Tuple[str, str]]:
+        """نقل نتائج المحلل المعجمي إلى التحليل مع استبعاد واردات الأنواع"""
+        imports = []
+        for imp in module_info['imports']:
+            if imp['type_only']:
+                # واردات الأنواع تُحذف عند الترجمة فلا تدخل في الحزم
+                analysis['type_imports'].append(imp['source'])
+                continue
+            imports.append((imp['source'], imp['type']))
+            for binding in imp['bindings']:
+                if not binding['type_only']:
+                    analysis['bindings'][binding['local']] = (imp['source'], binding['imported'])
         
+        analysis['members'] = module_info['members']
+        analysis['named_usages'] = module_info['named_usages']
+        analysis['properties'] = module_info['properties']
+        analysis['references'] = module_info['references']
+        analysis['declared'] = module_info['declared']
+        analysis['unused_imports'] = self._find_unused_imports(module_info)
+        return imports
+    
+    def _find_unused_imports(self, module_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """الواردات التي لا يُستخدم أي من روابطها (أو بعضها) في الملف"""
+        references = module_info['references']
+        unused_imports = []
+        for imp in module_info['imports']:
+            # واردات الأنواع والآثار الجانبية وإعادة التصدير لا تُعتبر غير مستخدمة
+            if imp['type_only'] or imp['type'] == 'reexport' or not imp['bindings']:
+                continue
+            bindings = [b for b in imp['bindings'] if not b['type_only']]
+            unused = []
+            for binding in bindings:
+                local = binding['local']
+                if local in references:
+                    continue
+                # React مطلوب ضمنياً لتحويل JSX في وقت التشغيل الكلاسيكي
+                if local == 'React' and module_info.get('has_jsx'):
+                    continue
+                unused.append(local)
+            if unused:
+                unused_imports.append({
+                    'source': imp['source'],
+                    'line': imp['line'],
+                    'unused': unused,
+                    'whole_import': len(unused) == len(bindings)
+                })
+        return unused_imports
+    
+    def _analyze_function_usage(self, content: str, analysis: Dict):
+        """تحليل استخدام الدوال من الروابط واستخدام الأعضاء مع مواقعها"""
+        if analysis['bindings'] or analysis['members']:
+            namespaces = {}
+            named = {}
+            for local, (source, imported) in analysis['bindings'].items():
+                lib_name = self.identify_library(source)[0]
+                if not lib_name:
+                    continue
+                if imported in ('default', '*'):
+                    namespaces[local] = lib_name
+                else:
+                    # استيراد مسمى: import { debounce } from 'lodash'
+                    named[local] = f'{lib_name}.{imported}'
+            
+            usages = analysis['usages']
+            globals_used = set()
+            for obj, member, line, col in analysis['members']:
+                lib_name = namespaces.get(obj)
+                if lib_name is None and obj in analysis['libraries']:
+                    lib_name = obj
+                if lib_name is None and obj not in analysis['bindings'] and obj not in analysis['declared']:
+                    # متغيرات عامة معروفة مثل $ و jQuery و _ (إلا إذا عرّفها الملف محلياً)
+                    lib_name = self.global_aliases.get(obj)
+                    if lib_name:
+                        globals_used.add((lib_name, obj))
+                if lib_name:
+                    usages.append((f'{lib_name}.{member}', line, col))
+            
+            for local, line, col in analysis['named_usages']:
+                if local in named:
+                    usages.append((named[local], line, col))
+            
+            for lib_name, alias in sorted(globals_used):
+                if lib_name not in analysis['libraries']:
+                    analysis['libraries'][lib_name].append({
+                        'path': alias,
+                        'type': 'global',
+                        'original_import': alias
+                    })
+            
+            analysis['functions_used'].update(symbol for symbol, _, _ in usages)
+            
+            # أعضاء تستدعى على سلاسل مثل $(el).fadeIn() (تقدير محافظ لنموذج التكلفة)
+            for lib_name in list(analysis['libraries']):
+                for member in chainable_members(lib_name) & analysis['properties']:
+                    analysis['functions_used'].add(f'{lib_name}.{member}')
+            return
+        
+        # بديل بسيط: نمط library.function
+        for lib_name in analysis['libraries'].keys():
+            pattern = rf'{re.escape(lib_name)}\.(\w+)'
+            for match in re.finditer(pattern, content):
+                analysis['functions_used'].add(match.group(0))
+    
+    def aggregate_analysis(self, files_analysis: Iterable[Dict]) -> Dict[str, Any]:
+        """تجميع نتائج التحليل من جميع الملفات"""
+        aggregate = AnalysisAggregate()
         for analysis in files_analysis:
-            for lib_name, imports in analysis['libraries'].items():
-                lib_data = aggregated['libraries'][lib_name]
-                lib_data['count'] += 1
-                lib_data['files'].add(analysis['file'])
-                
-                for imp in imports:
-                    lib_data['imports'].add(imp['original_import'])
-                
-                lib_data['functions_used'].update(analysis['functions_used'])
-                
-                aggregated['files_by_library'][lib_name].append(analysis['file'])
-        
-        # تحويل المجموعات إلى قوائم للتسلسل
-        for lib_name, data in aggregated['libraries'].items():
-            data['files'] = list(data['files'])
-            data['imports'] = list(data['imports'])
-            data['functions_used'] = list(data['functions_used'])
-            aggregated['total_functions'] += len(data['functions_used'])
+            aggregate.add(analysis)
+        
+        return self.finalize_aggregate(aggregate)
+    
+    def finalize_aggregate(self, aggregate: 'AnalysisAggregate') -> Dict[str, Any]:
+        """تحويل التجميع الجزئي إلى النتيجة النهائية مع التوصيات"""
+        aggregated = aggregate.finalize()
+        
+        # نموذج التكلفة: البايتات المستخدمة مقابل المشحونة
+        aggregated['potential_savings'] = self._estimate_library_costs(aggregated)
         
         # إنشاء توصيات
         aggregated['recommendations'] = self._generate_recommendations(aggregated)
@@ -170,8 +548,9 @@ class DependencyAnalyzer:
         return aggregated
     
     def _generate_recommendations(self, analysis: Dict) -> List[Dict]:
-        """توليد توصيات بناءً على التحليل"""
+        """توليد توصيات مرتبة حسب التوفير المتوقع بالبايت"""
         recommendations = []
+        savings = []
         
         for lib_name, data in analysis['libraries'].items():
             # التحقق من الاستخدام المحدود
@@ -183,14 +562,40 @@ class DependencyAnalyzer:
                     'files': data['files']
                 })
             
-            # التحقق من المكتبات الكبيرة ذات الاستخدام المحدود
-            large_libs = ['lodash', 'moment', 'jquery']
-            if lib_name in large_libs and len(data['functions_used']) < 3:
-                recommendations.append({
+            # مقارنة الحجم المستخدم بالحجم المشحون من جدول الأحجام
+            cost = data.get('cost')
+            if cost and cost['saved_bytes'] >= self.min_savings_bytes:
+                functions = [f for f in data['functions_used'] if f.startswith(f'{lib_name}.')]
+                savings.append({
                     'type': 'suggestion',
                     'library': lib_name,
-                    'message': f'المكتبة {lib_name} كبيرة ولكنك تستخدم {len(data["functions_used"])} دوال فقط. يمكن إنشاء حزمة مخصصة أصغر.',
-                    'functions': data['functions_used']
+                    'message': (
+                        f'حزمة مخصصة من {lib_name} ({len(cost["modules"])} وحدة) توفر حوالي '
+                        f'{cost["saved_bytes"] // 1024} KB ({cost["saved_gzip_bytes"] // 1024} KB بعد gzip) '
+                        f'من أصل {cost["full_bytes"] // 1024} KB.'
+                    ),
+                    'functions': functions,
+                    'modules': cost['modules'],
+                    'saved_bytes': cost['saved_bytes'],
+                    'saved_gzip_bytes': cost['saved_gzip_bytes']
                 })
         
-        return recommendations
\ No newline at end of file
+        savings.sort(key=lambda rec: rec['saved_bytes'], reverse=True)
+        return savings + recommendations
+    
+    def _estimate_library_costs(self, analysis: Dict) -> Dict[str, Any]:
+        """إضافة تقدير الحجم المستخدم مقابل المشحون لكل مكتبة في جدول الأحجام"""
+        total_saved = 0
+        total_saved_gzip = 0
+        for lib_name, data in analysis['libraries'].items():
+            cost = estimate_savings(lib_name, data['functions_used'], data['imports'])
+            if cost is None:
+                continue
+            data['cost'] = cost
+            total_saved += cost['saved_bytes']
+            total_saved_gzip += cost['saved_gzip_bytes']
+        
+        return {
+            'saved_bytes': total_saved,
+            'saved_gzip_bytes': total_saved_gzip
+        }
@@ -0,0 +1,144 @@
+"""
+أسماء ملفات تحمل بصمة المحتوى (name.<hash8>.min.js) و manifest.json يربط الأسماء المنطقية بها
+"""
+
+import json
+import hashlib
+import posixpath
+from pathlib import Path
+from typing import Dict, Iterable, Tuple, Union
+
+try:
+    from .utils.compression import COMPRESSIBLE_EXTENSIONS, PRECOMPRESSED_SUFFIXES, remove_variants
+    from .utils.object_store import write_atomic
+except ImportError:
+    from src.utils.compression import COMPRESSIBLE_EXTENSIONS, PRECOMPRESSED_SUFFIXES, remove_variants
+    from src.utils.object_store import write_atomic
+
+
+HASH_LENGTH = 8
+
+# امتدادات مركبة تبقى بعد البصمة (jquery.min.js ← jquery.<hash>.min.js)
+_COMPOUND_SUFFIXES = ('.min', '.custom', '.slim', '.purged')
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(rel: str, digest: str) -> str:
+    """إدراج البصمة قبل الامتداد المركب: js/jquery-3.6.0.min.js ← js/jquery-3.6.0.<hash>.min.js"""
+    directory, name = posixpath.split(rel)
+    stem, ext = posixpath.splitext(name)
+    while True:
+        inner, suffix = posixpath.splitext(stem)
+        if suffix.lower() not in _COMPOUND_SUFFIXES or not inner:
+            break
+        stem, ext = inner, suffix + ext
+    return posixpath.join(directory, f'{stem}.{digest}{ext}')
+
+
+class AssetManifest:
+    """manifest.json في مجلد الحزمة: {الاسم المنطقي: الاسم بالبصمة}
+
+    النسخ بالبصمة تُكتب بجانب الملفات الأصلية (بنفس المحتوى، فيربطها مخزن الكائنات بنفس الكائن) مع نسخها
+    المضغوطة؛ الأسماء المنطقية تبقى كما هي للتوافق مع الروابط الحالية وخرائط المصدر
+    """
+
+    FILENAME = 'manifest.json'
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.assets: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, output_dir: Path) -> 'AssetManifest':
+        manifest = cls(output_dir)
+        try:
+            with open(manifest.output_dir / cls.FILENAME, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                manifest.assets = {str(k): str(v) for k, v in data.items()}
+        except (OSError, ValueError):
+            pass
+        return manifest
+
+    def add(self, rel: str) -> str:
+        """حساب الاسم بالبصمة لملف JS/CSS (نسبي لمجلد الحزمة)؛ الملفات الأخرى تبقى بأسمائها"""
+        if Path(rel).suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            return rel
+        self.assets[rel] = hashed_name(rel, content_hash((self.output_dir / rel).read_bytes()))
+        return self.assets[rel]
+
+    def resolve(self, name: str) -> str:
+        return self.assets.get(name, name)
+
+    def hashed_files(self) -> set:
+        return set(self.assets.values())
+
+    def write(self) -> Dict[str, int]:
+        """كتابة النسخ بالبصمة الناقصة (ونسخها المضغوطة الحديثة)، حذف نسخ البناء السابق، وحفظ manifest.json"""
+        previous = self.load(self.output_dir).hashed_files()
+        stats = {'written': 0, 'removed': 0}
+        for logical, hashed in self.assets.items():
+            source = self.output_dir / logical
+            target = self.output_dir / hashed
+            if not target.is_file():
+                # الاسم يحدد المحتوى: النسخة الموجودة لا تحتاج إعادة كتابة
+                write_atomic(target, source.read_bytes())
+                stats['written'] += 1
+            mtime = source.stat().st_mtime_ns
+            for suffix in PRECOMPRESSED_SUFFIXES:
+                variant = source.with_name(source.name + suffix)
+                hashed_variant = target.with_name(target.name + suffix)
+                if hashed_variant.is_file() or not variant.is_file() or variant.stat().st_mtime_ns < mtime:
+                    continue
+                write_atomic(hashed_variant, variant.read_bytes())
+
+        for stale in previous - self.hashed_files():
+            path = self.output_dir / stale
+            if path.is_file():
+                path.unlink()
+                stats['removed'] += 1
+            remove_variants(path)
+
+        write_atomic(self.output_dir / self.FILENAME, json.dumps(
+            dict(sorted(self.assets.items())), ensure_ascii=False, indent=2
+        ).encode('utf-8'))
+        return stats
+
+
+_loaded: Dict[str, Tuple[int, Dict[str, str]]] = {}
+
+
+def asset_url(name: str, manifest: Union[str, Path, Dict[str, str]], base_url: str = '') -> str:
+    """رابط الملف باسمه الذي يحمل البصمة (للاستخدام في القوالب)؛ الاسم كما هو إذا لم يكن في الملف
+
+    manifest: مسار manifest.json أو مجلد الحزمة أو القاموس نفسه (الملف يُعاد تحميله إذا تغير)
+    """
+    if isinstance(manifest, dict):
+        assets = manifest
+    else:
+        path = Path(manifest)
+        if path.is_dir():
+            path = path / AssetManifest.FILENAME
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = _loaded.get(str(path))
+        if cached is None or cached[0] != mtime:
+            cached = _loaded[str(path)] = (mtime, AssetManifest.load(path.parent).assets if mtime else {})
+        assets = cached[1]
+    resolved = assets.get(name.lstrip('/'), name.lstrip('/'))
+    return f"{base_url.rstrip('/')}/{resolved}" if base_url else resolved
+
+
+def fingerprint(output_dir: Path, files: Iterable[str]) -> Tuple[AssetManifest, Dict[str, int]]:
+    """البصمة لقائمة ملفات ثم الكتابة (بعد الضغط المسبق حتى تُنسخ النسخ المضغوطة)"""
+    manifest = AssetManifest(output_dir)
+    previous = AssetManifest.load(output_dir).hashed_files()
+    for rel in files:
+        if rel not in previous:
+            manifest.add(rel)
+    return manifest, manifest.write()
@@ -0,0 +1,141 @@
+"""
+ميزانيات أحجام الحزم: حد أقصى (KB) للحجم الأصلي و gzip لكل ملف ولكل مكتبة وللمجموع
+"""
+
+import json
+import fnmatch
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .utils.compression import gzip_bytes
+except ImportError:
+    from src.utils.compression import gzip_bytes
+
+
+METRICS = ('raw', 'gzip')
+
+# عدد المساهمين المعروضين لكل تجاوز
+BREAKDOWN_LIMIT = 5
+
+
+class BudgetError(ValueError):
+    """ملف ميزانية غير صالح"""
+
+
+def measure(path: Path) -> Dict[str, int]:
+    """الحجم الأصلي وحجم gzip (بنفس مستوى النسخ المضغوطة مسبقاً)"""
+    data = Path(path).read_bytes()
+    return {'raw': len(data), 'gzip': len(gzip_bytes(data))}
+
+
+class BundleBudget:
+    """ميزانية المشروع من bundle_budget.json:
+
+    {"total": {"gzip_kb": 150, "files": ["chunks/*"]},
+     "bundles": {"*.js": {"raw_kb": 300, "gzip_kb": 90}},
+     "libraries": {"lodash": {"gzip_kb": 10}}}
+
+    أنماط bundles و total.files تُطابق مسارات الملفات داخل مجلد الحزمة (fnmatch)
+    """
+
+    FILENAME = 'bundle_budget.json'
+
+    def __init__(self, data: Dict[str, Any], source: Optional[Path] = None):
+        if not isinstance(data, dict):
+            raise BudgetError('ملف الميزانية يجب أن يكون كائن JSON')
+        self.source = source
+        total = data.get('total') or {}
+        self.total = self._limits(total, 'total')
+        self.total_files = list(total.get('files') or ['*'])
+        self.bundles = {pattern: self._limits(spec, pattern) for pattern, spec in (data.get('bundles') or {}).items()}
+        self.libraries = {name: self._limits(spec, name) for name, spec in (data.get('libraries') or {}).items()}
+
+    @staticmethod
+    def _limits(spec: Dict[str, Any], name: str) -> Dict[str, int]:
+        if not isinstance(spec, dict):
+            raise BudgetError(f'ميزانية {name} يجب أن تكون كائناً مثل {{"gzip_kb": 50}}')
+        limits = {}
+        for metric in METRICS:
+            value = spec.get(f'{metric}_kb')
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                raise BudgetError(f'قيمة غير صالحة لـ {name}.{metric}_kb: {value!r}')
+            limits[metric] = int(value * 1024)
+        return limits
+
+    @classmethod
+    def load(cls, path: Path) -> 'BundleBudget':
+        path = Path(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except OSError as e:
+            raise BudgetError(f'تعذر قراءة ملف الميزانية {path}: {e}')
+        except ValueError as e:
+            raise BudgetError(f'ملف الميزانية {path} ليس JSON صالحاً: {e}')
+        return cls(data, path)
+
+    @classmethod
+    def find(cls, project_path: Optional[Path] = None, explicit: Optional[Path] = None,
+             filename: Optional[str] = None) -> Optional['BundleBudget']:
+        """الملف المحدد صراحة، وإلا ملف الميزانية في جذر المشروع إن وجد"""
+        if explicit:
+            return cls.load(explicit)
+        if project_path is not None:
+            path = Path(project_path) / (filename or cls.FILENAME)
+            if path.is_file():
+                return cls.load(path)
+        return None
+
+    # ==================== التحقق ====================
+    def check(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """files: [{'file', 'raw', 'gzip', 'library'?, 'contributors'?: [{'name', 'raw', ...}]}]"""
+        violations = []
+        for pattern, limits in self.bundles.items():
+            for entry in files:
+                if fnmatch.fnmatch(entry['file'], pattern):
+                    violations += self._compare('bundle', pattern, [entry], limits, entry.get('contributors'))
+
+        for library, limits in self.libraries.items():
+            owned = [entry for entry in files if entry.get('library') == library]
+            if owned:
+                contributors = [c for entry in owned for c in entry.get('contributors') or []]
+                violations += self._compare('library', library, owned, limits, contributors or None)
+
+        counted = [entry for entry in files if any(fnmatch.fnmatch(entry['file'], p) for p in self.total_files)]
+        violations += self._compare('total', 'total', counted, self.total, None)
+
+        return {
+            'ok': not violations,
+            'budget': str(self.source) if self.source else None,
+            'totals': {metric: sum(entry[metric] for entry in counted) for metric in METRICS},
+            'violations': violations
+        }
+
+    @staticmethod
+    def _compare(scope: str, name: str, entries: List[Dict[str, Any]], limits: Dict[str, int],
+                 contributors: Optional[Iterable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """تجاوز لكل مقياس مع أكبر المساهمين (وحدات الملف إن عُرفت، وإلا الملفات نفسها)"""
+        violations = []
+        for metric, limit in limits.items():
+            size = sum(entry[metric] for entry in entries)
+            if size <= limit:
+                continue
+            if contributors:
+                items = [dict(c) for c in contributors]
+            else:
+                items = [{'name': entry['file'], 'raw': entry['raw'], 'gzip': entry['gzip']} for entry in entries]
+            items.sort(key=lambda c: c.get(metric) if c.get(metric) is not None else c.get('raw', 0), reverse=True)
+            violations.append({
+                'scope': scope,
+                'name': name,
+                'metric': metric,
+                'size': size,
+                'limit': limit,
+                'over': size - limit,
+                'files': [entry['file'] for entry in entries],
+                'breakdown': items[:BREAKDOWN_LIMIT]
+            })
+        return violations
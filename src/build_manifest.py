@@ -0,0 +1,132 @@
+"""
+بيان البناء (build manifest) لإعادة البناء التدريجي: بصمة مدخلات كل مخرج لإعادة بناء ما تغير فقط
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# يُغيَّر عند تعديل طريقة إنتاج المخرجات لإبطال البيانات القديمة
+MANIFEST_VERSION = '1'
+
+
+def digest(value: Any) -> str:
+    """بصمة sha256 لقيمة JSON بترتيب ثابت للمفاتيح"""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """بصمة sha256 لمحتوى ملف"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class BuildManifest:
+    """build_manifest.json داخل مجلد المخرجات: لكل هدف بصمة مدخلاته ومخرجاته وتقريره"""
+
+    FILENAME = 'build_manifest.json'
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / self.FILENAME
+        self.previous = self._load()
+        self.targets: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, List] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data
+
+    # ==================== بصمات الملفات ====================
+    def source_digest(self, path: Path, key: str) -> str:
+        """بصمة ملف مصدر؛ يعاد استخدام البصمة السابقة إذا لم يتغير الحجم ووقت التعديل"""
+        if key in self.files:
+            return self.files[key][2]
+        stat = Path(path).stat()
+        previous = self.previous.get('files', {}).get(key)
+        if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+            sha = previous[2]
+        else:
+            sha = file_digest(path)
+        self.files[key] = [stat.st_size, stat.st_mtime_ns, sha]
+        return sha
+
+    # ==================== الأهداف ====================
+    def is_up_to_date(self, build_digest: str) -> bool:
+        """هل تطابق بصمة البناء كاملة البناء السابق مع وجود كل مخرجاته"""
+        if self.previous.get('digest') != build_digest:
+            return False
+        return all(self._outputs_exist(target) for target in self.previous.get('targets', {}).values())
+
+    def reusable(self, key: str, target_digest: str) -> Optional[Dict[str, Any]]:
+        """الهدف السابق إذا لم تتغير مدخلاته وما زالت مخرجاته موجودة"""
+        target = self.previous.get('targets', {}).get(key)
+        if not target or target.get('digest') != target_digest or not self._outputs_exist(target):
+            return None
+        self.targets[key] = target
+        return target
+
+    def record(self, key: str, target_digest: Optional[str], outputs: Iterable[str], report: Dict[str, Any]):
+        """تسجيل هدف تم بناؤه (المخرجات نسبية إلى مجلد المخرجات؛ بصمة None تعني إعادة البناء لاحقاً)"""
+        self.targets[key] = {'digest': target_digest, 'outputs': sorted(outputs), 'report': report}
+
+    def mark_failed(self, key: str):
+        """إبقاء مخرجات الهدف السابق (إن وجد) مع إجبار إعادة بنائه في المرة القادمة"""
+        target = self.previous.get('targets', {}).get(key)
+        if target:
+            self.targets[key] = dict(target, digest=None)
+
+    def _outputs_exist(self, target: Dict[str, Any]) -> bool:
+        return all((self.output_dir / output).exists() for output in target.get('outputs', []))
+
+    def remove_stale_outputs(self) -> List[str]:
+        """حذف مخرجات الأهداف السابقة التي لم تعد ضمن البناء الحالي"""
+        current = {output for target in self.targets.values() for output in target['outputs']}
+        removed = []
+        for target in self.previous.get('targets', {}).values():
+            for output in target.get('outputs', []):
+                path = self.output_dir / output
+                if output in current or not path.is_file():
+                    continue
+                path.unlink()
+                removed.append(output)
+        return removed
+
+    def reports(self, prefix: str) -> Dict[str, Dict[str, Any]]:
+        """تقارير الأهداف الحالية التي يبدأ مفتاحها بالبادئة"""
+        return {key[len(prefix):]: target['report'] for key, target in self.targets.items()
+                if key.startswith(prefix)}
+
+    def save(self, build_digest: Optional[str], bundles: Dict[str, str]):
+        """كتابة البيان بشكل ذري"""
+        data = {
+            'version': MANIFEST_VERSION,
+            'digest': build_digest,
+            'bundles': bundles,
+            'files': self.files,
+            'targets': self.targets
+        }
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self.previous = data
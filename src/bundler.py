@@ -2,122 +2,324 @@
 إنشاء حزم مخصصة
 """
 import os
-import re
 import json
-import shutil
-import tempfile
+import fnmatch
 from pathlib import Path
 from typing import Dict, List
-import requests
-from . import config
-from .utils import setup_logger, get_safe_filename
+
+# استيراد الأدوات المساعدة
+try:
+    from utils import setup_logger, get_safe_filename, format_file_size
+    from config import get_config
+except ImportError:
+    # استيراد بديل للتوافق
+    import sys
+    sys.path.append('.')
+    from utils import setup_logger, get_safe_filename, format_file_size
+    from config import get_config
+
+try:
+    from .utils.http_client import get_http_client, HttpClient
+    from .utils.artifact_cache import ArtifactCache
+    from .tree_shaker import TreeShaker, TreeShakeError
+    from .minifier import Minifier, MINIFIER_VERSION
+    from .css_purge import CSSPurger, SelectorUsage
+    from .utils.zip_stream import ZipStream
+    from .build_manifest import BuildManifest, digest
+    from .utils.compression import (precompress_files, summarize_sizes, remove_variants, brotli_available,
+                                    COMPRESSIBLE_EXTENSIONS)
+    from .utils.object_store import ObjectStore, write_atomic
+    from .source_map import source_mapping_comment
+    from .code_splitter import CodeSplitter, PageAssets, summarize_plan, is_external, KINDS
+    from .budget import BundleBudget, measure
+    from .self_host import SelfHoster, PageRewriter, collect_external, page_files, VENDOR_DIRNAME, SITE_DIRNAME
+    from .asset_manifest import AssetManifest, fingerprint
+    from .css_bundler import CSSBundler, summarize_css_bundles
+    from .critical_css import CriticalCSS, critical_path, CRITICAL_DIRNAME
+except ImportError:
+    from src.utils.http_client import get_http_client, HttpClient
+    from src.utils.artifact_cache import ArtifactCache
+    from src.tree_shaker import TreeShaker, TreeShakeError
+    from src.minifier import Minifier, MINIFIER_VERSION
+    from src.css_purge import CSSPurger, SelectorUsage
+    from src.utils.zip_stream import ZipStream
+    from src.build_manifest import BuildManifest, digest
+    from src.utils.compression import (precompress_files, summarize_sizes, remove_variants, brotli_available,
+                                       COMPRESSIBLE_EXTENSIONS)
+    from src.utils.object_store import ObjectStore, write_atomic
+    from src.source_map import source_mapping_comment
+    from src.code_splitter import CodeSplitter, PageAssets, summarize_plan, is_external, KINDS
+    from src.budget import BundleBudget, measure
+    from src.self_host import SelfHoster, PageRewriter, collect_external, page_files, VENDOR_DIRNAME, SITE_DIRNAME
+    from src.asset_manifest import AssetManifest, fingerprint
+    from src.css_bundler import CSSBundler, summarize_css_bundles
+    from src.critical_css import CriticalCSS, critical_path, CRITICAL_DIRNAME
 
 logger = setup_logger(__name__)
 
+
+def purge_stylesheets(jobs: List, usage: SelectorUsage, cfg: Dict, contents: Dict = None) -> List[Dict]:
+    """كتابة نسخ من ملفات CSS بدون القواعد غير المستخدمة: jobs = [(المصدر، الهدف)]
+
+    contents: نص بديل لبعض المصادر {المسار: bytes} (مثل CSS بعد دمج @import)
+    """
+    contents = contents or {}
+    settings = cfg.get('purge_settings', {})
+    purger = CSSPurger(usage, settings.get('safelist', []), settings.get('safelist_patterns', []))
+    minify = cfg.get('bundle_settings', {}).get('minify_css', True)
+    report = []
+    for source, target in jobs:
+        source, target = Path(source), Path(target)
+        try:
+            data = contents[source] if source in contents else source.read_bytes()
+            css, stats = purger.purge(data.decode('utf-8', errors='replace'), minify=minify)
+        except Exception as e:
+            logger.warning(f"تعذر تنظيف {source.name}: {e}")
+            report.append({'source': str(source), 'error': str(e)})
+            continue
+        write_atomic(target, css.encode('utf-8'))
+        stats.update(source=str(source), file=str(target))
+        report.append(stats)
+        logger.info(
+            f"تنظيف {source.name}: {stats['rules_before']} ← {stats['rules_after']} قاعدة، "
+            f"{format_file_size(stats['size_before'])} ← {format_file_size(stats['size_after'])}"
+        )
+    return report
+
+
+def output_files(paths: List) -> List[Path]:
+    """الملفات المذكورة مباشرة وكل ملفات المجلدات"""
+    files = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.is_file()))
+        elif path.is_file():
+            files.append(path)
+    return files
+
+
+def precompress_outputs(paths: List, base_dir: Path, cfg: Dict, exclude=()) -> List[Dict]:
+    """نسخ ‎.gz و ‎.br (إن توفر brotli) بأعلى مستوى لكل ملف JS/CSS؛ المجلدات تُضغط ملفاتها بالكامل
+
+    exclude: مسارات نسبية لا تُضغط ولا تظهر في الجدول (النسخ بالبصمة تنسخ نسخ أصلها المضغوطة)
+    """
+    settings = cfg.get('bundle_settings', {})
+    if not settings.get('precompress', True):
+        return []
+    exclude = set(exclude)
+    files = [path for path in output_files(paths) if path.relative_to(base_dir).as_posix() not in exclude]
+    rows = precompress_files(files, max_workers=settings.get('minify_workers') or None)
+    for row in rows:
+        row['file'] = Path(row['file']).relative_to(base_dir).as_posix()
+        if row.get('error'):
+            logger.warning(f"تعذر ضغط {row['file']}: {row['error']}")
+    return rows
+
+
+def fingerprint_outputs(base_dir: Path, files: List[str], cfg: Dict) -> Dict[str, str]:
+    """نسخ name.<hash8>.min.js لملفات JS/CSS و manifest.json (بعد الضغط المسبق لتُنسخ النسخ المضغوطة معها)"""
+    if not cfg.get('bundle_settings', {}).get('hashed_filenames', True):
+        return {}
+    manifest, _ = fingerprint(base_dir, files)
+    return manifest.assets
+
+
+def store_bundle_dir(directory: Path, cfg: Dict, exclude=()) -> Dict:
+    """استبدال ملفات الحزمة بروابط إلى bundles/.objects ثم حذف الكائنات غير المستخدمة وتطبيق حد المساحة"""
+    settings = cfg.get('storage', {})
+    if not settings.get('dedupe_bundles', True):
+        return {}
+    directory = Path(directory)
+    store = ObjectStore(directory.parent, settings.get('objects_dirname'))
+    stats = store.adopt_tree(directory, exclude=set(exclude) | {'README.md'})
+    # وقت تعديل المجلد = آخر بناء (يُستخدم لاختيار الحزم الأقدم عند تجاوز الحد)
+    os.utime(directory)
+
+    max_mb = settings.get('max_storage_mb')
+    if max_mb:
+        budget = store.enforce_budget(max_mb * 1024 * 1024, protected=[directory])
+        for name in budget['removed']:
+            logger.info(f"حذف الحزم القديمة للمشروع {name} لتجاوز حد المساحة")
+        stats['usage'] = budget['usage']
+        if budget['usage'] > max_mb * 1024 * 1024:
+            logger.warning(f"مساحة الحزم {format_file_size(budget['usage'])} تتجاوز الحد ({max_mb} MB)")
+    else:
+        stats['gc'] = store.gc()
+    if stats['deduplicated']:
+        logger.info(f"إزالة التكرار: {stats['deduplicated']} ملف ({format_file_size(stats['saved_bytes'])})")
+    return stats
+
+
+def check_budget(budget: BundleBudget, entries: List[Dict]) -> Dict:
+    """التحقق من الميزانية وتسجيل كل تجاوز مع أكبر المساهمين فيه"""
+    report = budget.check(entries)
+    for violation in report['violations']:
+        largest = ', '.join(c['name'] for c in violation['breakdown'][:3])
+        label = violation['name'] if violation['scope'] == 'total' else f"{violation['scope']} {violation['name']}"
+        logger.error(
+            f"تجاوز الميزانية ({label}، {violation['metric']}): "
+            f"{format_file_size(violation['size'])} > {format_file_size(violation['limit'])}؛ الأكبر: {largest}"
+        )
+    if report['ok']:
+        logger.info(f"الأحجام ضمن الميزانية ({budget.source})")
+    return report
+
+
+def size_table(rows: List[Dict]) -> str:
+    """جدول Markdown بالأحجام: الأصلي / gzip / brotli"""
+    def cell(size):
+        return format_file_size(size) if size is not None else '-'
+
+    valid = [r for r in rows if r.get('raw') is not None]
+    if not valid:
+        return ''
+    lines = ['| الملف | الأصلي | gzip | brotli |', '|---|---:|---:|---:|']
+    for row in valid:
+        lines.append(f"| {row['file']} | {cell(row['raw'])} | {cell(row['gzip'])} | {cell(row['brotli'])} |")
+    total = summarize_sizes(valid)
+    lines.append(f"| **المجموع** | **{cell(total['raw'])}** | **{cell(total['gzip'])}** | **{cell(total['brotli'])}** |")
+    if not brotli_available():
+        lines.append('\nلم تُنشأ نسخ brotli (الوحدة brotli غير مثبتة).')
+    return '\n'.join(lines) + '\n'
+
+
 class CustomBundler:
-    def __init__(self, output_dir: str = "bundles"):
-        self.cfg = config.get_config()
+    # روابط مكتبات JS
+    LIB_URLS = {
+        'jquery': 'https://code.jquery.com/jquery-3.6.0.min.js',
+        'axios': 'https://cdnjs.cloudflare.com/ajax/libs/axios/1.6.0/axios.min.js'
+    }
+
+    # روابط أطر العمل CSS (مع ملفات JS المرافقة)
+    FRAMEWORK_URLS = {
+        'bootstrap': {
+            'css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+            'js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js'
+        },
+        'tailwind': {
+            'css': 'https://cdn.tailwindcss.com/3.3.0/tailwind.min.css'
+        }
+    }
+
+    # قيم SRI معروفة لروابط محددة (يتم التحقق منها عند التنزيل ومن الذاكرة)؛ بدونها تُسجل
+    # ArtifactCache بصمة الروابط ذات الإصدار الثابت عند أول تنزيل وترفض أي محتوى مختلف لاحقاً
+    INTEGRITY: Dict[str, str] = {}
+
+    def __init__(self, output_dir: str = "bundles", offline: bool = False):
+        self.cfg = get_config()
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-    
+        self.offline = offline
+        # عميل HTTP مشترك: اتصالات دائمة وتنزيل متوازٍ محدود لكل مضيف
+        self.http = get_http_client(self.cfg.get('download_settings'))
+        # ذاكرة محلية معنونة بالمحتوى (وضع عدم الاتصال يبني منها فقط)
+        cache_settings = self.cfg.get('cache_settings', {})
+        self.cache = ArtifactCache(
+            Path(cache_settings.get('dir', 'cache/artifacts')),
+            http_client=self.http,
+            max_bytes=cache_settings.get('max_bytes', 200 * 1024 * 1024),
+            max_age=cache_settings.get('max_age', 24 * 3600),
+            offline=offline
+        )
+
     def create_bundle(self, dependencies: Dict, bundle_name: str) -> Dict:
         """إنشاء حزمة"""
         logger.info(f"إنشاء حزمة: {bundle_name}")
-        
+
         bundle_path = self.output_dir / get_safe_filename(bundle_name)
         bundle_path.mkdir(exist_ok=True)
-        
+
         results = {
             'bundle_name': bundle_name,
             'bundle_path': str(bundle_path),
             'successful': [],
             'failed': [],
-            'files': []
+            'files': [],
+            'owners': {}
         }
-        
-        # معالجة المكتبات
+
+        # تجميع مهام التنزيل ثم تنفيذها معاً
+        jobs = []
         if 'js_libraries' in dependencies:
-            self._download_js_libs(dependencies['js_libraries'], bundle_path, results)
-        
+            jobs.extend(self._js_lib_jobs(dependencies['js_libraries'], bundle_path))
+
         if 'css_frameworks' in dependencies:
-            self._download_css_frameworks(dependencies['css_frameworks'], bundle_path, results)
-        
+            jobs.extend(self._css_framework_jobs(dependencies['css_frameworks'], bundle_path))
+
+        self._download_all(jobs, results)
+        results['sizes'] = precompress_outputs([bundle_path / f for f in results['files']], bundle_path, self.cfg)
+        results['manifest'] = fingerprint_outputs(bundle_path, results['files'], self.cfg)
+
         # إنشاء ملف README
         self._create_readme(bundle_path, dependencies, results)
-        
+
         # ضغط إذا لزم الأمر
         if self._get_size(bundle_path) > 10 * 1024 * 1024:
             self._create_zip(bundle_path)
-        
+
         return results
-    
-    def _download_js_libs(self, libraries: List[str], output_path: Path, results: Dict):
-        """تنزيل مكتبات JS"""
-        lib_urls = {
-            'jquery': 'https://code.jquery.com/jquery-3.6.0.min.js',
-            'axios': 'https://cdnjs.cloudflare.com/ajax/libs/axios/1.6.0/axios.min.js'
-        }
-        
+
+    def _js_lib_jobs(self, libraries: List[str], output_path: Path) -> List[Dict]:
+        """مهام تنزيل مكتبات JS"""
         js_dir = output_path / "js"
-        js_dir.mkdir(exist_ok=True)
-        
+        jobs = []
         for lib in libraries:
-            if lib in lib_urls:
-                try:
-                    filename = self._download_file(lib_urls[lib], js_dir)
-                    if filename:
-                        results['successful'].append(lib)
-                        results['files'].append(f"js/{filename}")
-                        logger.info(f"تم تنزيل {lib}")
-                except Exception as e:
-                    results['failed'].append(lib)
-                    logger.error(f"فشل تنزيل {lib}: {e}")
-    
-    def _download_css_frameworks(self, frameworks: List[str], output_path: Path, results: Dict):
-        """تنزيل أطر العمل CSS"""
-        framework_urls = {
-            'bootstrap': {
-                'css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
-                'js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js'
-            },
-            'tailwind': {
-                'css': 'https://cdn.tailwindcss.com/3.3.0/tailwind.min.css'
-            }
-        }
-        
-        css_dir = output_path / "css"
-        css_dir.mkdir(exist_ok=True)
-        
+            if lib in self.LIB_URLS:
+                url = self.LIB_URLS[lib]
+                jobs.append({
+                    'name': lib,
+                    'url': url,
+                    'filename': HttpClient.filename_from_url(url),
+                    'integrity': self.INTEGRITY.get(url),
+                    'output_dir': js_dir,
+                    'folder': 'js'
+                })
+        return jobs
+
+    def _css_framework_jobs(self, frameworks: List[str], output_path: Path) -> List[Dict]:
+        """مهام تنزيل أطر العمل CSS"""
+        jobs = []
         for fw in frameworks:
-            if fw in framework_urls:
-                urls = framework_urls[fw]
-                for file_type, url in urls.items():
-                    try:
-                        filename = self._download_file(url, css_dir if file_type == 'css' else output_path / "js")
-                        if filename:
-                            results['successful'].append(f"{fw}_{file_type}")
-                            results['files'].append(f"{'css' if file_type == 'css' else 'js'}/{filename}")
-                    except Exception as e:
-                        results['failed'].append(f"{fw}_{file_type}")
-                        logger.error(f"فشل تنزيل {fw} {file_type}: {e}")
-    
+            if fw in self.FRAMEWORK_URLS:
+                for file_type, url in self.FRAMEWORK_URLS[fw].items():
+                    folder = 'css' if file_type == 'css' else 'js'
+                    jobs.append({
+                        'name': f"{fw}_{file_type}",
+                        'url': url,
+                        'filename': HttpClient.filename_from_url(url),
+                        'integrity': self.INTEGRITY.get(url),
+                        'output_dir': output_path / folder,
+                        'folder': folder
+                    })
+        return jobs
+
+    def _download_all(self, jobs: List[Dict], results: Dict):
+        """جلب جميع الملفات (من الذاكرة أو بالتنزيل المتوازي) وتسجيل النتائج بنفس ترتيب المهام"""
+        max_workers = self.http.settings['max_workers']
+        for download in self.cache.fetch_many(jobs, max_workers=max_workers):
+            job = download['job']
+            if download['success']:
+                results['successful'].append(job['name'])
+                results['files'].append(f"{job['folder']}/{download['filename']}")
+                results['owners'][results['files'][-1]] = job['name'].split('_')[0]
+                logger.info(f"تم تجهيز {job['name']} ({download['status']})")
+            else:
+                results['failed'].append(job['name'])
+                logger.error(f"فشل تنزيل {job['name']}: {download['error']}")
+
     def _download_file(self, url: str, output_dir: Path) -> str:
         """تنزيل ملف"""
+        filename = HttpClient.filename_from_url(url)
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            filename = url.split('/')[-1]
-            filepath = output_dir / filename
-            
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
-            return filename
+            self.cache.copy_to(url, output_dir, filename, self.INTEGRITY.get(url))
         except Exception as e:
             logger.error(f"خطأ في التنزيل: {e}")
             raise
-    
+        finally:
+            self.cache.save()
+        return filename
+
     def _create_readme(self, bundle_path: Path, dependencies: Dict, results: Dict):
         """إنشاء README"""
         readme_content = f"""# حزمة مخصصة - {results['bundle_name']}
@@ -129,145 +331,923 @@ class CustomBundler:
 أضف الملفات التالية إلى مشروعك:
 
 """
-        
+
+        # الأسماء التي تحمل البصمة يمكن تخزينها في المتصفح بلا انتهاء (Cache-Control: immutable)
+        manifest = results.get('manifest') or {}
         for file in results['files']:
             if file.endswith('.js'):
                 readme_content += f"""```html
-<script src="{file}"></script>
+<script src="{manifest.get(file, file)}"></script>
+```
+"""
+            elif file.endswith('.css'):
+                readme_content += f"""```html
+<link rel="stylesheet" href="{manifest.get(file, file)}">
+```
 """
-elif file.endswith('.css'):
-readme_content += f"""```html
-<link rel="stylesheet" href="{file}"> ``` """
-    (bundle_path / "README.md").write_text(readme_content, encoding='utf-8')
-    results['files'].append("README.md")
-
-def _get_size(self, path: Path) -> int:
-    """حساب الحجم"""
-    total = 0
-    for file in path.rglob("*"):
-        if file.is_file():
-            total += file.stat().st_size
-    return total
-
-def _create_zip(self, folder_path: Path):
-    """إنشاء ZIP"""
-    import zipfile
-    
-    zip_path = folder_path.parent / f"{folder_path.name}.zip"
-    
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file in folder_path.rglob("*"):
+        if manifest:
+            readme_content += f"""
+الأسماء المنطقية وما يقابلها في {AssetManifest.FILENAME} (تتغير البصمة عند تغير المحتوى فقط).
+"""
+
+        table = size_table(results.get('sizes', []))
+        if table:
+            readme_content += f"""
+## الأحجام
+نسخ ‎.gz و ‎.br بجانب كل ملف لخدمتها مباشرة (مثل gzip_static / brotli_static في nginx).
+
+{table}"""
+
+        (bundle_path / "README.md").write_text(readme_content, encoding='utf-8')
+        if "README.md" not in results['files']:
+            results['files'].append("README.md")
+
+    def _get_size(self, path: Path) -> int:
+        """حساب الحجم"""
+        total = 0
+        for file in path.rglob("*"):
             if file.is_file():
-                arcname = file.relative_to(folder_path)
-                zipf.write(file, arcname)
-    
-    logger.info(f"تم إنشاء الأرشيف: {zip_path}")
+                total += file.stat().st_size
+        return total
 
-### **5. ملف `webui.py` محدث**
+    def _create_zip(self, folder_path: Path):
+        """إنشاء ZIP (يُكتب متدفقاً مع ضغط الملفات بالتوازي)"""
+        zip_path = folder_path.parent / f"{folder_path.name}.zip"
+        stream = ZipStream()
+        stream.add_path(folder_path, '')
+        stream.write_to(zip_path)
 
-```python
-"""
-واجهة الويب باستخدام Flask
-"""
-from flask import Flask, render_template, request, jsonify, send_file
-import os
-from pathlib import Path
-import json
-from datetime import datetime
-from scanner import WebProjectScanner
-from bundler import CustomBundler
-from utils import setup_logger, save_json
-import config
-
-app = Flask(__name__)
-logger = setup_logger('webui')
-
-# التحقق من المجلدات
-cfg = config.get_config()
-for path in cfg['paths'].values():
-    Path(path).mkdir(exist_ok=True)
-
-@app.route('/')
-def index():
-    """الصفحة الرئيسية"""
-    return render_template('index.html')
-
-@app.route('/scan', methods=['POST'])
-def scan_project():
-    """مسح مشروع"""
-    try:
-        data = request.get_json()
-        project_path = data.get('project_path', '').strip()
-        
-        if not project_path:
-            return jsonify({'error': 'مسار المشروع مطلوب'}), 400
-        
-        # المسح
-        scanner = WebProjectScanner(project_path)
-        results = scanner.scan()
-        
-        # حفظ النتائج
-        report_file = Path(cfg['paths']['reports']) / f"scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        save_json(results, report_file)
-        
-        return jsonify(results)
-        
-    except Exception as e:
-        logger.error(f"خطأ في المسح: {e}")
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/bundle', methods=['POST'])
-def create_bundle():
-    """إنشاء حزمة"""
-    try:
-        data = request.get_json()
-        bundle_name = data.get('bundle_name', 'custom_bundle').strip()
-        dependencies = data.get('dependencies', {})
-        
-        if not bundle_name:
-            return jsonify({'error': 'اسم الحزمة مطلوب'}), 400
-        
-        # الإنشاء
-        bundler = CustomBundler(cfg['paths']['bundles'])
-        results = bundler.create_bundle(dependencies, bundle_name)
-        
-        return jsonify(results)
-        
-    except Exception as e:
-        logger.error(f"خطأ في إنشاء الحزمة: {e}")
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/reports')
-def list_reports():
-    """قائمة التقارير"""
-    reports_dir = Path(cfg['paths']['reports'])
-    reports = []
-    
-    for file in reports_dir.glob("*.json"):
+        logger.info(f"تم إنشاء الأرشيف: {zip_path}")
+
+
+class Bundler:
+    """إنشاء نسخ مخصصة (tree-shaken) من المكتبات بناءً على نتائج التحليل"""
+
+    def __init__(self, analysis: Dict, project_path: str, output_dir: str = None, offline: bool = False,
+                 budget_file: str = None, self_host: bool = None):
+        self.analysis = analysis
+        self.project_path = Path(project_path)
+        self.cfg = get_config()
+        bundles_dir = Path(output_dir or self.cfg['paths']['bundles'])
+        self.output_dir = self.output_dir_for(self.project_path.name, bundles_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        # نعيد استخدام الذاكرة والعميل المشترك من CustomBundler
+        self.downloader = CustomBundler(str(bundles_dir), offline=offline)
+        self.shaker = TreeShaker(self.downloader.cache, self.project_path)
+        self.minifier = self._create_minifier(self.cfg)
+        self.source_maps = self.cfg.get('bundle_settings', {}).get('source_maps', True)
+        # نسخ من الصفحات تشير إلى ملفات CDN بعد استضافتها محلياً (site/ و vendor/)
+        self.self_host = self.cfg.get('bundle_settings', {}).get('self_host', False) if self_host is None else self_host
+        self.hoster = None
+        self.split_plan: Dict = {}
+        self.asset_manifest = AssetManifest(self.output_dir)
+        self.report: Dict[str, Dict] = {}
+        self.assets_report: Dict = {}
+        self.purge_report: List[Dict] = []
+        # CSS بعد دمج @import المحلية وتضمين الصور الصغيرة (في الذاكرة، تستخدمه مرحلتا التصغير والتنظيف)
+        self.flattened_css: Dict[Path, bytes] = {}
+        self.css_report: Dict = {}
+        self.split_report: Dict = {}
+        # CSS الحرج لكل صفحة {الصفحة: {'file', 'sources', ...}} (يُضمن في نسخ site/)
+        self.critical: Dict[str, Dict] = {}
+        self.critical_report: Dict = {}
+        self.self_host_report: Dict = {}
+        self.budget_report: Dict = {}
+        self.budget_file = budget_file
+        self.compression_report: List[Dict] = []
+        self.storage_report: Dict = {}
+
+    @staticmethod
+    def output_dir_for(project_name: str, bundles_dir: Path = None) -> Path:
+        """مجلد مخرجات المشروع (يستخدمه التنزيل لإيجاد الحزم)"""
+        return Path(bundles_dir or get_config()['paths']['bundles']) / get_safe_filename(project_name)
+
+    @staticmethod
+    def _create_minifier(cfg: Dict) -> Minifier:
+        """مرحلة التصغير حسب BUNDLE_SETTINGS"""
+        settings = cfg.get('bundle_settings', {})
+        cache_settings = cfg.get('cache_settings', {})
+        return Minifier(
+            Path(cache_settings.get('minify_dir') or Path(cfg['paths']['cache']) / 'minify'),
+            minify_js=settings.get('minify_js', True),
+            minify_css=settings.get('minify_css', True),
+            mangle=settings.get('mangle_js', True),
+            max_workers=settings.get('minify_workers') or None
+        )
+
+    def create_bundles(self, force: bool = False) -> Dict[str, str]:
+        """بناء نسخة مخصصة لكل مكتبة مدعومة وإرجاع {المكتبة: المسار}
+
+        البناء تدريجي: إذا لم تتغير المدخلات تُعاد الحزم السابقة فوراً، وإلا يُعاد بناء المخرجات المتأثرة فقط
+        """
+        self.incremental = self.cfg.get('bundle_settings', {}).get('incremental_builds', True) and not force
+        # ملف ميزانية غير صالح يوقف البناء قبل أن يبدأ
+        budget = BundleBudget.find(self.project_path, self.budget_file,
+                                   self.cfg.get('bundle_settings', {}).get('budget_file'))
+        manifest = BuildManifest(self.output_dir)
+        if not self.incremental:
+            manifest.previous = {}
+
+        inputs = self._build_inputs(manifest)
+        build_digest = digest({key: value for key, value in inputs.items()
+                               if key not in ('assets', 'stylesheets', 'usage', 'pages', 'rewrite_pages')})
+        if manifest.is_up_to_date(build_digest):
+            logger.info("لم تتغير مدخلات البناء؛ إعادة استخدام الحزم السابقة")
+            manifest.targets = dict(manifest.previous['targets'])
+            self.report = manifest.reports('library:')
+            self.assets_report = self.minifier.summarize(
+                [dict(r, cached=True) for r in manifest.reports('asset:').values()]
+            ) if inputs['assets'] else {}
+            self.purge_report = list(manifest.reports('purged:').values())
+            self.css_report = summarize_css_bundles(manifest.reports('css:'))
+            self.split_report = manifest.reports('split:').get('pages', {})
+            self.critical_report = manifest.reports('critical:').get('pages', {})
+            self.self_host_report = manifest.reports('site:').get('pages', {})
+            bundles = dict(manifest.previous['bundles'])
+            self.asset_manifest = AssetManifest.load(self.output_dir)
+            # النسخ المضغوطة الحديثة لا يُعاد ضغطها، لكن الأحجام تُقرأ لجدول النتائج
+            self.compression_report = precompress_outputs(list(bundles.values()), self.output_dir, self.cfg,
+                                                          exclude=self.asset_manifest.hashed_files())
+            if budget is not None:
+                self.budget_report = check_budget(budget, self._budget_entries(bundles))
+            return bundles
+
+        bundles = {}
         try:
-            with open(file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                reports.append({
-                    'file': file.name,
-                    'scan_id': data.get('scan_id', ''),
-                    'project': data.get('project_path', ''),
-                    'time': data.get('scan_time', ''),
-                    'files': data.get('files_scanned', 0)
-                })
-        except:
-            continue
-    
-    return jsonify({'reports': reports})
-
-@app.route('/download/<path:filename>')
-def download_file(filename):
-    """تحميل ملف"""
-    file_path = Path(cfg['paths']['bundles']) / filename
-    
-    if file_path.exists() and file_path.is_file():
-        return send_file(str(file_path), as_attachment=True)
-    
-    return jsonify({'error': 'الملف غير موجود'}), 404
-
-if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+            for lib_name, lib_inputs in inputs['libraries'].items():
+                key = f'library:{lib_name}'
+                target_digest = digest([inputs['settings']['libraries'], lib_inputs])
+                target = manifest.reusable(key, target_digest) if self.incremental else None
+                if target is not None:
+                    bundles[lib_name] = str(self.output_dir / target['report']['file'])
+                    self.report[lib_name] = target['report']
+                    continue
+
+                data = self.analysis['libraries'][lib_name]
+                try:
+                    try:
+                        build = self.shaker.build(lib_name, data.get('functions_used', []), data.get('version'))
+                    except TreeShakeError as e:
+                        logger.warning(f"تعذر بناء نسخة مخصصة من {lib_name}: {e}، استخدام النسخة الكاملة")
+                        build = self.shaker.build_full(lib_name, data.get('version'))
+                        build['fallback'] = str(e)
+                except Exception as e:
+                    logger.warning(f"تعذر بناء نسخة من {lib_name}: {e}")
+                    self.report[lib_name] = {'error': str(e)}
+                    manifest.mark_failed(key)
+                    continue
+                if build.get('unknown'):
+                    logger.warning(f"{lib_name}: أسماء غير موجودة في المكتبة تم تجاهلها: {', '.join(build['unknown'])}")
+
+                source_map = build.get('map') if self.source_maps else None
+                if build['variant'] == 'custom' and self.minifier.enabled['js']:
+                    # النسخ المخصصة تُبنى من مصادر غير مصغرة؛ خريطة التصغير تُركب مع خريطة الربط
+                    if source_map is not None:
+                        build['code'], source_map, _ = self.minifier.minify_text_with_map(
+                            'js', build['code'], self._bundle_filename(build), source_map
+                        )
+                    else:
+                        build['code'], _ = self.minifier.minify_text('js', build['code'])
+                    sizes = TreeShaker._sizes(build['code'])
+                    build['size_after'], build['gzip_after'] = sizes['bytes'], sizes['gzip_bytes']
+
+                bundle_file = self.output_dir / self._bundle_filename(build)
+                outputs = [bundle_file.name]
+                if source_map is not None:
+                    map_file = bundle_file.with_name(bundle_file.name + '.map')
+                    write_atomic(map_file, json.dumps(
+                        dict(source_map, file=bundle_file.name), ensure_ascii=False, separators=(',', ':')
+                    ).encode('utf-8'))
+                    build['code'] += source_mapping_comment(map_file.name, 'js')
+                    outputs.append(map_file.name)
+                write_atomic(bundle_file, build['code'].encode('utf-8'))
+                bundles[lib_name] = str(bundle_file)
+
+                report = {k: v for k, v in build.items() if k not in ('code', 'map')}
+                report['file'] = bundle_file.name
+                if source_map is not None:
+                    report['map'] = outputs[1]
+                # النسخ الجاهزة (slim/full) ليست tree-shaking فلا يُسجل لها توفير
+                report['saved_bytes'] = max(build['size_before'] - build['size_after'], 0) \
+                    if build['variant'] == 'custom' else 0
+                self.report[lib_name] = report
+                manifest.record(key, target_digest, outputs, report)
+                logger.info(
+                    f"{lib_name}: {format_file_size(build['size_before'])} ← "
+                    f"{format_file_size(build['size_after'])} ({build['variant']})"
+                )
+        finally:
+            self.downloader.cache.save()
+
+        css_digests = self._bundle_stylesheets(inputs, manifest)
+
+        assets_dir = self._bundle_project_assets(inputs, manifest, css_digests)
+        if assets_dir is not None:
+            bundles['assets'] = str(assets_dir)
+
+        purged_dir = self._purge_project_css(inputs, manifest, css_digests)
+        if purged_dir is not None:
+            bundles['purged_css'] = str(purged_dir)
+
+        vendor_dir = self._self_host_cdn(inputs, manifest)
+        if vendor_dir is not None:
+            bundles['vendor'] = str(vendor_dir)
+
+        chunks_dir = self._split_pages(inputs, manifest)
+        if chunks_dir is not None:
+            bundles['chunks'] = str(chunks_dir)
+
+        # الأسماء بالبصمة تُحسب قبل إعادة كتابة الصفحات (لتشير إليها) وتُكتب بعد الضغط المسبق
+        previous_hashed = AssetManifest.load(self.output_dir).hashed_files()
+        self.asset_manifest = self._fingerprint(bundles, previous_hashed)
+
+        critical_dir = self._extract_critical_css(inputs, manifest)
+        if critical_dir is not None:
+            bundles['critical'] = str(critical_dir)
+
+        site_dir = self._rewrite_pages(inputs, manifest)
+        if site_dir is not None:
+            bundles['site'] = str(site_dir)
+
+        for output in manifest.remove_stale_outputs():
+            remove_variants(self.output_dir / output)
+            logger.info(f"حذف مخرج قديم: {output}")
+
+        self.compression_report = precompress_outputs(
+            list(bundles.values()), self.output_dir, self.cfg,
+            exclude=previous_hashed | self.asset_manifest.hashed_files()
+        )
+        if self.asset_manifest.assets:
+            stats = self.asset_manifest.write()
+            bundles['manifest'] = str(self.output_dir / AssetManifest.FILENAME)
+            logger.info(f"أسماء بالبصمة: {len(self.asset_manifest.assets)} ملف "
+                        f"({stats['written']} جديد، {stats['removed']} محذوف)")
+        self.storage_report = store_bundle_dir(
+            self.output_dir, self.cfg, exclude={BuildManifest.FILENAME, 'bundle_report.json'}
+        )
+        if budget is not None:
+            self.budget_report = check_budget(budget, self._budget_entries(bundles))
+        self._write_report()
+        self._write_readme()
+        # البناء الذي فشل فيه أي هدف لا يُعتبر مكتملاً حتى يُعاد في المرة القادمة
+        complete = not any('error' in r for r in self.report.values()) and \
+            not (self.assets_report or {}).get('errors') and \
+            not any('error' in r for r in self.purge_report)
+        manifest.save(build_digest if complete else None, bundles)
+        return bundles
+
+    def _build_inputs(self, manifest: BuildManifest) -> Dict:
+        """مدخلات البناء: المكتبات وإصداراتها، الإعدادات، بصمات ملفات المصدر، واستخدام المحددات"""
+        settings = self.cfg.get('bundle_settings', {})
+        minify = {
+            'minify_js': settings.get('minify_js', True),
+            'minify_css': settings.get('minify_css', True),
+            'mangle_js': settings.get('mangle_js', True),
+            'source_maps': self.source_maps,
+            'minifier': MINIFIER_VERSION
+        }
+        purge_settings = self.cfg.get('purge_settings', {})
+
+        libraries = {}
+        for lib_name, data in self.analysis.get('libraries', {}).items():
+            if not self.shaker.supports(lib_name):
+                continue
+            libraries[lib_name] = {
+                'version': data.get('version'),
+                'functions_used': sorted(set(data.get('functions_used', []))),
+                'local_package': self._local_package_digest(lib_name, manifest)
+            }
+
+        assets = self._project_assets()
+        stylesheets = []
+        if purge_settings.get('enabled', True):
+            stylesheets = self._project_assets({'.css'}, skip_excluded_files=False)
+
+        files = {}
+        for path in assets + stylesheets:
+            rel = path.relative_to(self.project_path).as_posix()
+            files[rel] = manifest.source_digest(path, rel)
+
+        # الملفات المستوردة والصور المضمنة في البناء السابق: تغيرها يغير CSS الناتج
+        css_settings = self._css_bundle_settings()
+        if css_settings['flatten_imports'] or css_settings['inline_limit']:
+            for report in self._previous_reports(manifest, 'css:').values():
+                for rel in report.get('dependencies', []):
+                    path = self.project_path / rel
+                    if rel not in files and path.is_file():
+                        files[rel] = manifest.source_digest(path, rel)
+
+        usage = self._selector_usage() if stylesheets else None
+
+        critical = settings.get('critical_css', True)
+        pages = self._page_assets() if settings.get('split_chunks', True) or critical else None
+        if pages is not None:
+            for rel in pages.references():
+                if rel not in files:
+                    files[rel] = manifest.source_digest(self.project_path / rel, rel)
+            if critical:
+                # CSS الحرج يعتمد على بنية الصفحات نفسها
+                for rel in pages.pages:
+                    if rel not in files and (self.project_path / rel).is_file():
+                        files[rel] = manifest.source_digest(self.project_path / rel, rel)
+
+        # الصفحات التي تُعاد كتابتها جزء من المدخلات (بما فيها قوالب PHP)
+        rewrite_pages = page_files(self.project_path, self._excluded_dirs()) if self.self_host else []
+        for path in rewrite_pages:
+            rel = path.relative_to(self.project_path).as_posix()
+            if rel not in files:
+                files[rel] = manifest.source_digest(path, rel)
+        return {
+            'settings': {
+                'libraries': digest(minify),
+                'assets': digest(minify),
+                'purge': digest([purge_settings, minify['minify_css']]),
+                'css': digest(css_settings),
+                'split': digest([settings.get('split_chunks', True), settings.get('min_shared_chunk_kb', 10)]),
+                'critical': digest([critical, settings.get('critical_fold_elements', 100)]),
+                'self_host': digest([self.self_host, settings.get('self_host_base_url', '')])
+            },
+            'libraries': libraries,
+            'files': files,
+            'selector_usage': digest(usage.to_dict()) if usage is not None else None,
+            'usage': usage,
+            'page_assets': digest(pages.to_dict()) if pages is not None else None,
+            'pages': pages,
+            'rewrite_pages': rewrite_pages,
+            'assets': assets,
+            'stylesheets': stylesheets
+        }
+
+    def _css_bundle_settings(self) -> Dict:
+        settings = self.cfg.get('bundle_settings', {})
+        return {
+            'flatten_imports': settings.get('css_flatten_imports', True),
+            'inline_limit': int(settings.get('css_inline_limit_kb', 8) * 1024)
+        }
+
+    @staticmethod
+    def _previous_reports(manifest: BuildManifest, prefix: str) -> Dict[str, Dict]:
+        return {key[len(prefix):]: target.get('report', {})
+                for key, target in manifest.previous.get('targets', {}).items() if key.startswith(prefix)}
+
+    def _local_package_digest(self, lib_name: str, manifest: BuildManifest):
+        """بصمة package.json للحزمة المحلية التي يبني منها TreeShaker (إن وجدت)"""
+        package_name = 'lodash-es' if lib_name == 'lodash' else lib_name
+        package_dir = self.shaker._local_package_dir(package_name)
+        if package_dir is None or not (package_dir / 'package.json').is_file():
+            return None
+        package_json = package_dir / 'package.json'
+        return manifest.source_digest(package_json, package_json.relative_to(self.project_path).as_posix())
+
+    def _excluded_dirs(self) -> set:
+        return set(self.cfg.get('exclusions', {}).get('dirs', [])) | {'bundles', 'reports'}
+
+    def _project_assets(self, suffixes=None, skip_excluded_files: bool = True) -> List[Path]:
+        """ملفات JS/CSS الخاصة بالمشروع (بدون المجلدات والملفات المستبعدة)"""
+        suffixes = suffixes or set(Minifier.EXTENSIONS)
+        excluded_dirs = self._excluded_dirs()
+        excluded_files = self.cfg.get('exclusions', {}).get('files', []) if skip_excluded_files else []
+        assets = []
+        for root, dirs, files in os.walk(self.project_path):
+            dirs[:] = sorted(d for d in dirs if d not in excluded_dirs and not d.startswith('.'))
+            for name in sorted(files):
+                if Path(name).suffix.lower() not in suffixes:
+                    continue
+                if any(fnmatch.fnmatch(name, pattern) for pattern in excluded_files):
+                    continue
+                assets.append(Path(root) / name)
+        return assets
+
+    def _selector_usage(self) -> SelectorUsage:
+        """الاستخدام من نتائج المسح إن وجدت، وإلا من ملفات المشروع مباشرة"""
+        if self.analysis.get('selector_usage'):
+            return SelectorUsage.from_dict(self.analysis['selector_usage'])
+        return SelectorUsage.collect(self.project_path, self._excluded_dirs())
+
+    def _changed_jobs(self, paths: List[Path], output_subdir: str, prefix: str, target_inputs: List,
+                      manifest: BuildManifest, extra_digests: Dict[str, str] = None):
+        """تقسيم الملفات إلى (تقارير قابلة لإعادة الاستخدام، مهام يجب إعادة بنائها)
+
+        extra_digests: بصمات إضافية لبعض الملفات (مثل الملفات المستوردة في CSS المدمج)
+        """
+        extra_digests = extra_digests or {}
+        reused, jobs = [], []
+        for path in paths:
+            rel = path.relative_to(self.project_path).as_posix()
+            key = f'{prefix}{rel}'
+            target_digest = digest(target_inputs + [manifest.files[rel][2]] +
+                                   ([extra_digests[rel]] if rel in extra_digests else []))
+            target = manifest.reusable(key, target_digest) if self.incremental else None
+            if target is not None:
+                reused.append(target['report'])
+                continue
+            jobs.append({
+                'key': key,
+                'digest': target_digest,
+                'output': f'{output_subdir}/{rel}',
+                'source': path,
+                'target': self.output_dir / output_subdir / rel
+            })
+        return reused, jobs
+
+    def _bundle_stylesheets(self, inputs: Dict, manifest: BuildManifest) -> Dict[str, str]:
+        """دمج @import المحلية وتضمين الصور الصغيرة لكل ملفات CSS وإرجاع {الملف: بصمة ما دمج فيه}
+
+        النص الناتج يبقى في الذاكرة لمرحلتي assets/ و purged/؛ الملفات التي لم تتغير لا تظهر في النتيجة
+        """
+        self.flattened_css = {}
+        settings = self._css_bundle_settings()
+        if not settings['flatten_imports'] and not settings['inline_limit']:
+            return {}
+        paths = {path for path in inputs['assets'] + inputs['stylesheets'] if path.suffix.lower() == '.css'}
+        if not paths:
+            return {}
+
+        css_bundler = CSSBundler(self.project_path, settings['inline_limit'], settings['flatten_imports'])
+        digests = {}
+        reports = {}
+        for path in sorted(paths):
+            rel = path.relative_to(self.project_path).as_posix()
+            try:
+                result = css_bundler.bundle(rel)
+            except (OSError, ValueError) as e:
+                logger.warning(f"تعذر دمج {rel}: {e}")
+                continue
+            css = result.pop('css')
+            if result['error']:
+                logger.warning(f"لم تُدمج @import في {rel}: {result['error']}")
+            dependencies = {}
+            for dependency in result['dependencies']:
+                dependency_path = self.project_path / dependency
+                dependencies[dependency] = manifest.source_digest(dependency_path, dependency) \
+                    if dependency_path.is_file() else None
+            if css is not None:
+                self.flattened_css[path] = css.encode('utf-8')
+                digests[rel] = digest([inputs['settings']['css'], dependencies])
+            # بدون مخرجات: يُعاد في كل بناء (تقريره يحدد ملفات البناء القادم)
+            manifest.record(f'css:{rel}', None, [], result)
+            reports[rel] = result
+
+        self.css_report = summarize_css_bundles(reports)
+        if self.css_report['files']:
+            logger.info(
+                f"دمج CSS: {self.css_report['files']} ملف، {self.css_report['imports']} @import مدمج، "
+                f"{self.css_report['inlined']} صورة مضمنة ({format_file_size(self.css_report['inlined_bytes'])})"
+            )
+        return digests
+
+    def _purge_project_css(self, inputs: Dict, manifest: BuildManifest, css_digests: Dict[str, str] = None):
+        """نسخ ملفات CSS (بما فيها المكتبات المضمنة ‎.min.css) إلى purged/ بدون القواعد غير المستخدمة"""
+        stylesheets = inputs['stylesheets']
+        if not stylesheets:
+            return None
+
+        reused, jobs = self._changed_jobs(
+            stylesheets, 'purged', 'purged:',
+            [inputs['settings']['purge'], inputs['selector_usage']], manifest, css_digests
+        )
+        report = purge_stylesheets([(job['source'], job['target']) for job in jobs], inputs['usage'], self.cfg,
+                                   self.flattened_css)
+        for job, stats in zip(jobs, report):
+            if 'error' in stats:
+                manifest.mark_failed(job['key'])
+            else:
+                manifest.record(job['key'], job['digest'], [job['output']], stats)
+        if reused:
+            logger.info(f"تنظيف CSS: {len(reused)} ملف لم يتغير")
+        self.purge_report = reused + report
+        return self.output_dir / 'purged'
+
+    def _bundle_project_assets(self, inputs: Dict, manifest: BuildManifest, css_digests: Dict[str, str] = None):
+        """نسخ ملفات المشروع إلى assets/ مع تصغيرها بالتوازي (الملفات التي لم تتغير لا يُعاد بناؤها)"""
+        assets = inputs['assets']
+        if not assets:
+            return None
+
+        reused, jobs = self._changed_jobs(assets, 'assets', 'asset:', [inputs['settings']['assets']], manifest,
+                                          css_digests)
+        results = self.minifier.minify_files(
+            [(job['source'], job['target']) for job in jobs],
+            source_maps=self.source_maps,
+            contents=self.flattened_css
+        )
+        for job, result in zip(jobs, results):
+            outputs = [job['output']]
+            if result['map']:
+                outputs.append(job['output'] + '.map')
+            # الملفات التي تعذر تصغيرها نُسخت كما هي ولا تُعاد إلا في البناء القادم
+            manifest.record(job['key'], None if result['error'] else job['digest'], outputs, result)
+
+        self.assets_report = self.minifier.summarize([dict(r, cached=True) for r in reused] + results)
+        for error in self.assets_report['errors']:
+            logger.warning(f"تعذر تصغير {error['file']}: {error['error']}")
+
+        logger.info(
+            f"ملفات المشروع: {self.assets_report['files']} ملف، "
+            f"{format_file_size(self.assets_report['size_before'])} ← "
+            f"{format_file_size(self.assets_report['size_after'])} "
+            f"({self.assets_report['cached']} من الذاكرة)"
+        )
+        return self.output_dir / 'assets'
+
+    def _page_assets(self) -> PageAssets:
+        """مراجع الصفحات من نتائج المسح إن وجدت، وإلا من صفحات HTML في المشروع مباشرة"""
+        if self.analysis.get('page_assets'):
+            return PageAssets.from_dict(self.analysis['page_assets'], self.project_path)
+        return PageAssets.collect(self.project_path, self._excluded_dirs())
+
+    def _built_file(self, kind: str, rel: str):
+        """أصغر نسخة مبنية من الملف: CSS المنظف، ثم المصغر في assets/، ثم الأصلي؛ ولروابط CDN نسختها في vendor/"""
+        if is_external(rel):
+            hosted = self.hoster.hosted if self.hoster is not None else {}
+            return self.output_dir / hosted[rel] if rel in hosted else None
+        candidates = ['purged', 'assets'] if kind == 'styles' else ['assets']
+        for subdir in candidates:
+            path = self.output_dir / subdir / rel
+            if path.is_file():
+                return path
+        return self.project_path / rel
+
+    def _split_pages(self, inputs: Dict, manifest: BuildManifest):
+        """أجزاء JS/CSS لكل صفحة (جزء مشترك وأجزاء لمجموعات الصفحات) بدل حزمة واحدة للمشروع"""
+        pages = inputs['pages']
+        settings = self.cfg.get('bundle_settings', {})
+        if pages is None or not pages.pages or not settings.get('split_chunks', True):
+            return None
+        splitter = CodeSplitter(pages, self._built_file, settings.get('min_shared_chunk_kb', 10) * 1024,
+                                self.hoster.hosted if self.hoster is not None else None)
+        result = splitter.build(self.output_dir)
+        self.split_plan = result['plan']
+        self.split_report = summarize_plan(result['plan'])
+        # الأجزاء تعتمد على مخرجات الأهداف الأخرى لذلك تُعاد كتابتها في كل بناء
+        manifest.record('split:pages', None, result['outputs'], self.split_report)
+
+        for kind, summary in self.split_report.items():
+            if not summary['chunks']:
+                continue
+            largest = max(summary['first_load'].values())
+            logger.info(
+                f"تقسيم {kind}: {summary['chunks']} جزء لـ {len(summary['first_load'])} صفحة، "
+                f"أكبر تحميل أول {format_file_size(largest)} مقابل {format_file_size(summary['single_bundle'])} "
+                f"لحزمة واحدة (مكرر {format_file_size(summary['duplicated'])})"
+            )
+            if summary['fallback']:
+                logger.warning(f"ترتيب {kind} في {', '.join(summary['fallback'])} يتعارض مع الأجزاء المشتركة؛ "
+                               f"استُخدمت أجزاء خاصة بها")
+        return self.output_dir / CodeSplitter.CHUNKS_DIRNAME
+
+    def _extract_critical_css(self, inputs: Dict, manifest: BuildManifest):
+        """CSS الحرج لكل صفحة في critical/: القواعد التي تطابق العناصر الأولى في الصفحة من ملفات أنماطها المبنية"""
+        pages = inputs['pages']
+        settings = self.cfg.get('bundle_settings', {})
+        if pages is None or not pages.pages or not settings.get('critical_css', True):
+            return None
+
+        hosted = self.hoster.hosted if self.hoster is not None else {}
+        extractor = CriticalCSS(settings.get('critical_fold_elements', 100), settings.get('minify_css', True))
+        self.critical = {}
+        outputs = []
+        for page in sorted(pages.pages):
+            stylesheets = []
+            for ref in pages.pages[page]['styles']:
+                path = self._built_file('styles', ref) if ref else None
+                if path is None or not path.is_file():
+                    continue
+                # ملفات CDN المستضافة تُعامل بموقعها في vendor/ (لتعديل روابطها)
+                stylesheets.append((ref, hosted.get(ref, ref), path))
+            if not stylesheets:
+                continue
+            try:
+                html = (self.project_path / page).read_text(encoding='utf-8', errors='replace')
+                result = extractor.extract(page, html, [(location, path) for _, location, path in stylesheets])
+            except (OSError, ValueError) as e:
+                logger.warning(f"تعذر استخراج CSS الحرج لـ {page}: {e}")
+                continue
+            output = critical_path(page)
+            write_atomic(self.output_dir / output, result.pop('css').encode('utf-8'))
+            outputs.append(output)
+            self.critical[page] = dict(result, file=output, sources=[ref for ref, _, _ in stylesheets])
+
+        self.critical_report = self.critical
+        # يعتمد على مخرجات الأهداف الأخرى لذلك يُعاد في كل بناء
+        manifest.record('critical:pages', None, outputs, self.critical_report)
+        if not outputs:
+            return None
+        largest = max(self.critical.values(), key=lambda r: r['size'])
+        logger.info(f"CSS الحرج: {len(outputs)} صفحة في {CRITICAL_DIRNAME}/، أكبرها "
+                    f"{format_file_size(largest['size'])} من {format_file_size(largest['total'])}")
+        return self.output_dir / CRITICAL_DIRNAME
+
+    def _fingerprint(self, bundles: Dict[str, str], previous_hashed: set) -> AssetManifest:
+        """الأسماء بالبصمة لملفات JS/CSS الناتجة (ملفات vendor/ تحمل البصمة أصلاً)"""
+        asset_manifest = AssetManifest(self.output_dir)
+        if not self.cfg.get('bundle_settings', {}).get('hashed_filenames', True):
+            return asset_manifest
+        paths = [path for name, path in bundles.items() if name not in ('vendor', 'site', 'critical')]
+        for path in output_files(paths):
+            rel = path.relative_to(self.output_dir).as_posix()
+            if rel not in previous_hashed:
+                asset_manifest.add(rel)
+        return asset_manifest
+
+    def _self_host_cdn(self, inputs: Dict, manifest: BuildManifest):
+        """تنزيل ملفات CDN التي تحملها الصفحات (ومراجع CDN من المسح) إلى vendor/ بأسماء تحمل بصمة المحتوى"""
+        if not self.self_host:
+            return None
+        references = collect_external(inputs['rewrite_pages'], self.analysis.get('cdn_links', []))
+        if not references:
+            return None
+
+        max_workers = self.cfg.get('download_settings', {}).get('max_workers', 8)
+        self.hoster = SelfHoster(self.downloader.cache, self.output_dir, max_workers=max_workers)
+        self.hoster.host(references)
+        for url, error in self.hoster.errors.items():
+            logger.warning(f"تعذرت استضافة {url} محلياً (يبقى الرابط كما هو): {error}")
+        # الملفات تُعاد كتابتها من الذاكرة في كل بناء؛ الأسماء ثابتة ما دام المحتوى لم يتغير
+        manifest.record('vendor:cdn', None, sorted(set(self.hoster.hosted.values())), self.hoster.report())
+        logger.info(f"استضافة ذاتية: {len(self.hoster.hosted)} ملف من CDN "
+                    f"({format_file_size(sum(self.hoster.sizes.values()))})")
+        return self.output_dir / VENDOR_DIRNAME
+
+    def _rewrite_pages(self, inputs: Dict, manifest: BuildManifest):
+        """نسخ الصفحات إلى site/ مع وسوم تشير إلى الأجزاء وملفات vendor/ بدل CDN"""
+        if not self.self_host or not inputs['rewrite_pages']:
+            return None
+        settings = self.cfg.get('bundle_settings', {})
+        hosted = self.hoster.hosted if self.hoster is not None else {}
+        rewriter = PageRewriter(
+            inputs['pages'] or PageAssets(self.project_path), hosted, self.split_plan,
+            self.hoster.fully_hosted_hosts() if self.hoster is not None else (),
+            settings.get('self_host_base_url', ''), self.asset_manifest.assets,
+            {page: dict(entry, css=(self.output_dir / entry['file']).read_text(encoding='utf-8'))
+             for page, entry in self.critical.items()}
+        )
+        pages, outputs = [], []
+        for path in inputs['rewrite_pages']:
+            rel = path.relative_to(self.project_path).as_posix()
+            output = f'{SITE_DIRNAME}/{rel}'
+            try:
+                pages.append(rewriter.rewrite(rel, path, self.output_dir / output))
+            except OSError as e:
+                logger.warning(f"تعذرت إعادة كتابة {rel}: {e}")
+                continue
+            outputs.append(output)
+
+        self.self_host_report = dict(self.hoster.report() if self.hoster is not None else
+                                     {'hosted': {}, 'errors': {}, 'size': 0}, pages=pages)
+        manifest.record('site:pages', None, outputs, self.self_host_report)
+        logger.info(f"إعادة كتابة الصفحات: {len(outputs)} صفحة في {SITE_DIRNAME}/ "
+                    f"({sum(p['rewritten'] for p in pages)} وسم معدل، {sum(p['removed'] for p in pages)} محذوف)")
+        return self.output_dir / SITE_DIRNAME
+
+    def _budget_entries(self, bundles: Dict[str, str]) -> List[Dict]:
+        """ملفات JS/CSS الناتجة بأحجامها، مع المكتبة ووحداتها أو ملفات المشروع في كل جزء (لتفصيل التجاوز)"""
+        libraries = {r['file']: (name, r) for name, r in self.report.items() if r.get('file')}
+        chunk_assets = {}
+        plan_path = self.output_dir / CodeSplitter.PLAN_FILENAME
+        if 'chunks' in bundles and plan_path.is_file():
+            with open(plan_path, 'r', encoding='utf-8') as f:
+                plan = json.load(f)
+            for kind in KINDS:
+                sizes = plan[kind]['sizes'].get('assets', {})
+                for name, assets in plan[kind]['chunks'].items():
+                    chunk_assets[plan[kind]['files'][name]] = [{'name': a, 'raw': sizes.get(a, 0)} for a in assets]
+
+        entries = []
+        hashed = self.asset_manifest.hashed_files()
+        for path in output_files(list(bundles.values())):
+            if path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            rel = path.relative_to(self.output_dir).as_posix()
+            if rel in hashed:
+                # النسخ بالبصمة لا تُحسب مرتين
+                continue
+            entry = dict(measure(path), file=rel)
+            if rel in libraries:
+                name, report = libraries[rel]
+                entry['library'] = name
+                entry['contributors'] = [{'name': module, 'raw': size}
+                                         for module, size in (report.get('module_sizes') or {}).items()]
+            elif rel in chunk_assets:
+                entry['contributors'] = chunk_assets[rel]
+            entries.append(entry)
+        return entries
+
+    @staticmethod
+    def _bundle_filename(build: Dict) -> str:
+        """اسم ملف النسخة المخصصة"""
+        if build['variant'] == 'custom':
+            return f"{build['library']}-{build['version']}.custom.js"
+        suffix = '.slim' if build['variant'] == 'slim' else ''
+        return f"{build['library']}-{build['version']}{suffix}.min.js"
+
+    def _write_report(self):
+        """حفظ تقرير الأحجام قبل وبعد"""
+        total_before = sum(r.get('size_before', 0) for r in self.report.values())
+        total_after = sum(r.get('size_after', 0) for r in self.report.values())
+        report = {
+            'project': self.project_path.name,
+            'libraries': self.report,
+            'assets': self.assets_report,
+            'purged_css': self.purge_report,
+            'css_bundles': self.css_report,
+            'split': self.split_report,
+            'critical': self.critical_report,
+            'self_host': self.self_host_report,
+            'manifest': self.asset_manifest.assets,
+            'budget': self.budget_report,
+            'compressed': self.compression_report,
+            'compressed_total': summarize_sizes(self.compression_report),
+            'storage': self.storage_report,
+            'total_before': total_before,
+            'total_after': total_after,
+            'total_saved': max(total_before - total_after, 0)
+        }
+        with open(self.output_dir / 'bundle_report.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def _write_readme(self):
+        """README للحزم مع جدول الأحجام (الأصلي / gzip / brotli)"""
+        lines = [f"# حزم المشروع - {self.project_path.name}", '']
+        libraries = [r for r in self.report.values() if r.get('file')]
+        if libraries:
+            lines += ['## المكتبات المخصصة'] + [f"- {r['file']} ({r['variant']})" for r in libraries] + ['']
+        table = size_table(self.compression_report)
+        if table:
+            lines += ['## الأحجام',
+                      'نسخ ‎.gz و ‎.br بجانب كل ملف لخدمتها مباشرة (مثل gzip_static / brotli_static في nginx).',
+                      '', table]
+        if self.css_report.get('files'):
+            lines += ['## دمج CSS',
+                      f"{self.css_report['files']} ملف CSS دُمجت فيه {self.css_report['imports']} @import محلية "
+                      f"وضُمنت فيه {self.css_report['inlined']} صورة كـ data URI "
+                      f"({format_file_size(self.css_report['inlined_bytes'])}).", '']
+        pages = sorted({page for summary in self.split_report.values() for page in summary['first_load']})
+        if pages:
+            scripts, styles = self.split_report['scripts'], self.split_report['styles']
+
+            def cell(summary, page):
+                size = summary['first_load'].get(page)
+                return format_file_size(size) if size is not None else '-'
+
+            lines += ['## التحميل الأول لكل صفحة',
+                      f'أجزاء {CodeSplitter.CHUNKS_DIRNAME}/ وترتيب تحميلها لكل صفحة في {CodeSplitter.PLAN_FILENAME} '
+                      '(المجلد يُنشر في جذر المشروع).',
+                      '', '| الصفحة | JS | CSS |', '|---|---:|---:|']
+            lines += [f"| {page} | {cell(scripts, page)} | {cell(styles, page)} |" for page in pages]
+            lines.append(f"| حزمة واحدة | {format_file_size(scripts['single_bundle'])} | "
+                         f"{format_file_size(styles['single_bundle'])} |")
+            lines.append('')
+        if self.critical_report:
+            lines += ['## CSS الحرج',
+                      f'القواعد التي تطابق أعلى كل صفحة في {CRITICAL_DIRNAME}/ (روابط url() نسبية للصفحة): تُضمن في '
+                      '<style> داخل <head> ويُحمل باقي الأنماط بعد العرض الأول (نسخ site/ تفعل ذلك تلقائياً).', '',
+                      '| الصفحة | الحرج | كل الأنماط | القواعد |', '|---|---:|---:|---:|']
+            lines += [f"| {page} | {format_file_size(r['size'])} | {format_file_size(r['total'])} | {r['rules']} |"
+                      for page, r in sorted(self.critical_report.items())]
+            lines += ['', '```php',
+                      f"<style><?php readfile(__DIR__ . '/bundles/{CRITICAL_DIRNAME}/index.css'); ?></style>",
+                      '<link rel="preload" href="css/app.css" as="style" '
+                      'onload="this.onload=null;this.rel=\'stylesheet\'">',
+                      '<noscript><link rel="stylesheet" href="css/app.css"></noscript>',
+                      '```', '']
+        if self.asset_manifest.assets:
+            lines += ['## أسماء الملفات بالبصمة',
+                      f'كل ملف JS/CSS له نسخة name.<hash8>.js بنفس المحتوى؛ {AssetManifest.FILENAME} يربط الاسم '
+                      'المنطقي بها. خدمة هذه النسخ مع `Cache-Control: public, max-age=31536000, immutable` آمنة '
+                      'لأن الاسم يتغير مع المحتوى.', '',
+                      '```php',
+                      f"<?php $assets = json_decode(file_get_contents('{AssetManifest.FILENAME}'), true); ?>",
+                      '<script src="<?= $assets[\'chunks/common.js\'] ?? \'chunks/common.js\' ?>"></script>',
+                      '```', '']
+        if self.self_host_report.get('pages'):
+            hosted = self.self_host_report['hosted']
+            lines += ['## الاستضافة الذاتية',
+                      f'نسخ الصفحات في {SITE_DIRNAME}/ تشير إلى الأجزاء وإلى ملفات {VENDOR_DIRNAME}/ بدل CDN '
+                      f'({len(hosted)} ملف، {format_file_size(self.self_host_report["size"])}).', '']
+            lines += [f"- {url} ← {entry['file']}" for url, entry in hosted.items()]
+            lines += [f"- ⚠️ {url}: {error}" for url, error in self.self_host_report['errors'].items()]
+            lines.append('')
+        (self.output_dir / 'README.md').write_text('\n'.join(lines), encoding='utf-8')
+
+
+def self_host_project(project_path: Path, output_dir: Path, cache: ArtifactCache, cfg: Dict,
+                      cdn_links: List[str] = ()) -> Dict:
+    """استضافة ملفات CDN في output_dir/vendor وكتابة نسخ الصفحات المعدلة في output_dir/site"""
+    excluded = set(cfg.get('exclusions', {}).get('dirs', [])) | {'bundles', 'reports'}
+    pages = page_files(project_path, excluded)
+    references = collect_external(pages, cdn_links)
+
+    hoster = SelfHoster(cache, output_dir, max_workers=cfg.get('download_settings', {}).get('max_workers', 8))
+    if references:
+        hoster.host(references)
+    rewriter = PageRewriter(PageAssets(project_path), hoster.hosted, None, hoster.fully_hosted_hosts(),
+                            cfg.get('bundle_settings', {}).get('self_host_base_url', ''))
+    report = dict(hoster.report(), pages=[])
+    for path in pages:
+        rel = path.relative_to(project_path).as_posix()
+        report['pages'].append(rewriter.rewrite(rel, path, Path(output_dir) / SITE_DIRNAME / rel))
+    report['files'] = sorted(set(hoster.hosted.values())) + \
+        [f"{SITE_DIRNAME}/{page['page']}" for page in report['pages']]
+    return report
+
+
+def create_custom_bundle(scan_results: Dict, output_dir: str = None, offline: bool = False,
+                         budget_file: str = None, self_host: bool = False) -> Dict:
+    """إنشاء حزمة مخصصة من نتائج المسح (واجهة سطر الأوامر)
+
+    budget_file: ملف الميزانية (الافتراضي bundle_budget.json في مسار المشروع من نتائج المسح إن وجد)
+    self_host: تنزيل ملفات CDN التي تحملها صفحات المشروع إلى الحزمة ونسخ الصفحات معدلة إلى site/
+    """
+    cfg = get_config()
+    project_path = Path(scan_results['project_path']) if scan_results.get('project_path') else None
+    budget = BundleBudget.find(project_path, budget_file, cfg.get('bundle_settings', {}).get('budget_file'))
+    bundler = CustomBundler(output_dir or cfg['paths']['bundles'], offline=offline)
+
+    dependencies = scan_results.get('dependencies', {})
+    bundle_id = scan_results.get('scan_id') or 'bundle'
+    results = bundler.create_bundle({
+        'js_libraries': dependencies.get('javascript', []),
+        'css_frameworks': dependencies.get('css', [])
+    }, bundle_id)
+
+    bundle_path = Path(results['bundle_path'])
+    warnings = []
+    # الملفات التي حلت محلها نسخ منظفة لا تُحسب في الميزانية
+    superseded = set()
+
+    # حذف قواعد Bootstrap/Tailwind غير المستخدمة في صفحات المشروع
+    usage = scan_results.get('selector_usage')
+    if usage and cfg.get('purge_settings', {}).get('enabled', True):
+        jobs = []
+        for file in results['files']:
+            if file.endswith('.css'):
+                source = bundle_path / file
+                stem = source.name[:-len('.min.css')] if source.name.endswith('.min.css') else source.stem
+                jobs.append((source, source.with_name(f"{stem}.purged.css")))
+        for stats in purge_stylesheets(jobs, SelectorUsage.from_dict(usage), cfg):
+            if stats.get('error'):
+                warnings.append(f"تعذر تنظيف {Path(stats['source']).name}: {stats['error']}")
+            else:
+                purged = Path(stats['file']).relative_to(bundle_path).as_posix()
+                results['files'].append(purged)
+                source = Path(stats['source']).relative_to(bundle_path).as_posix()
+                results['owners'][purged] = results['owners'].get(source)
+                superseded.add(source)
+        # ضغط النسخ المنظفة وتحديث جدول الأحجام في README
+        results['sizes'] = precompress_outputs([bundle_path / f for f in results['files']], bundle_path, cfg)
+        results['manifest'] = fingerprint_outputs(bundle_path, results['files'], cfg)
+        bundler._create_readme(bundle_path, {}, results)
+
+    self_host_report = None
+    if self_host:
+        if project_path is None or not project_path.is_dir():
+            warnings.append('الاستضافة الذاتية تحتاج مسار المشروع في نتائج المسح')
+        else:
+            self_host_report = self_host_project(project_path, bundle_path, bundler.cache, cfg,
+                                                 scan_results.get('cdn_links', []))
+            results['files'] += self_host_report['files']
+            warnings += [f"تعذرت استضافة {url}: {error}" for url, error in self_host_report['errors'].items()]
+
+    if results.get('manifest'):
+        results['files'].append(AssetManifest.FILENAME)
+    store_bundle_dir(bundle_path, cfg)
+
+    budget_report = None
+    if budget is not None:
+        entries = []
+        for file in results['files']:
+            if Path(file).suffix.lower() in COMPRESSIBLE_EXTENSIONS and file not in superseded:
+                entries.append(dict(measure(bundle_path / file), file=file, library=results['owners'].get(file)))
+        budget_report = check_budget(budget, entries)
+
+    total_size = bundler._get_size(bundle_path)
+    detected = scan_results.get('detected_libraries', {})
+
+    libraries = []
+    for name in results['successful'] + results['failed']:
+        lib_name = name.split('_')[0]
+        libraries.append({
+            'name': name,
+            'version': (detected.get(lib_name) or {}).get('version') or 'أحدث',
+            'type': 'css' if name.endswith('_css') else 'js',
+            'status': 'downloaded' if name in results['successful'] else 'failed'
+        })
+
+    zip_path = bundle_path.parent / f"{bundle_path.name}.zip"
+    return {
+        'bundle_id': bundle_id,
+        'bundle_path': str(bundle_path),
+        'total_size': total_size,
+        'total_size_formatted': format_file_size(total_size),
+        'libraries': libraries,
+        'files_created': results['files'],
+        'zip_file': str(zip_path) if zip_path.exists() else None,
+        'sizes': results.get('sizes', []),
+        'manifest': results.get('manifest', {}),
+        'budget': budget_report,
+        'self_host': self_host_report,
+        'warnings': warnings,
+        'errors': [f"فشل تنزيل {name}" for name in results['failed']]
+    }
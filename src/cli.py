@@ -13,6 +13,7 @@ from typing import Optional, List, Dict
 try:
     from scanner import scan_project
     from bundler import create_custom_bundle
+    from usage_index import UsageIndex
     from utils import setup_logger, validate_path, format_file_size, save_json
     from config import get_config, Config
 except ImportError:
@@ -20,6 +21,7 @@ except ImportError:
     sys.path.append('.')
     from scanner import scan_project
     from bundler import create_custom_bundle
+    from usage_index import UsageIndex
     from utils import setup_logger, validate_path, format_file_size, save_json
     from config import get_config, Config
 
@@ -42,6 +44,9 @@ class CLI:
   %(prog)s scan /path/to/project --output scan_result.json
   %(prog)s bundle scan_result.json
   %(prog)s bundle --libraries jquery bootstrap tailwind
+  %(prog)s bundle -s scan_result.json --budget bundle_budget.json
+  %(prog)s bundle -s scan_result.json --self-host
+  %(prog)s usage /path/to/project lodash.debounce
   %(prog)s interactive
             """
         )
@@ -66,6 +71,17 @@ class CLI:
         bundle_parser.add_argument('-o', '--output-dir', help='مجلد الإخراج')
         bundle_parser.add_argument('-n', '--name', help='اسم الحزمة')
         bundle_parser.add_argument('--no-zip', action='store_true', help='عدم إنشاء ملف مضغوط')
+        bundle_parser.add_argument('--offline', action='store_true', help='البناء من الذاكرة المحلية فقط بدون اتصال')
+        bundle_parser.add_argument('--budget', help='ملف ميزانية الأحجام (الخروج برمز 1 عند تجاوزها)')
+        bundle_parser.add_argument('--self-host', action='store_true',
+                                   help='تنزيل ملفات CDN إلى الحزمة ونسخ صفحات المشروع معدلة إلى site/')
+        
+        # أمر البحث في فهرس الاستخدام
+        usage_parser = subparsers.add_parser('usage', help='البحث عن مواقع استخدام رمز مكتبة')
+        usage_parser.add_argument('path', help='مسار المشروع')
+        usage_parser.add_argument('symbol', help='الرمز المطلوب (مثل lodash.debounce أو $.ajax)')
+        usage_parser.add_argument('--prefix', action='store_true', help='عرض الرموز التي تبدأ بالقيمة المحددة')
+        usage_parser.add_argument('--no-refresh', action='store_true', help='استخدام الفهرس المحفوظ بدون تحديث')
         
         # أمر الوضع التفاعلي
         subparsers.add_parser('interactive', help='الوضع التفاعلي')
@@ -87,6 +103,8 @@ class CLI:
             self.handle_scan(args)
         elif args.command == 'bundle':
             self.handle_bundle(args)
+        elif args.command == 'usage':
+            self.handle_usage(args)
         elif args.command == 'interactive':
             self.handle_interactive()
         elif args.command == 'config':
@@ -122,6 +140,43 @@ class CLI:
             logger.exception("فشل المسح")
             sys.exit(1)
     
+    def handle_usage(self, args):
+        """معالجة أمر البحث عن استخدام رمز"""
+        is_valid, message = validate_path(args.path)
+        if not is_valid:
+            print(f"❌ خطأ: {message}")
+            sys.exit(1)
+        
+        try:
+            usage_index = UsageIndex.load(Path(args.path))
+            if not args.no_refresh:
+                stats = usage_index.refresh()
+                if stats['indexed'] or stats['removed']:
+                    usage_index.save()
+                    print(f"🗂️ تم تحديث الفهرس: {stats['indexed']} ملف، حذف {stats['removed']}")
+            
+            if args.prefix:
+                symbols = usage_index.symbols(args.symbol)
+                print(f"\n🔎 الرموز التي تبدأ بـ {args.symbol}: {len(symbols)}")
+                for symbol, count in symbols.items():
+                    print(f"  • {symbol} ({count})")
+                return
+            
+            locations = usage_index.lookup(args.symbol)
+            symbol = usage_index.normalize_symbol(args.symbol)
+            if not locations:
+                print(f"ℹ️ لم يتم العثور على استخدام لـ {symbol}")
+                return
+            
+            print(f"\n🔎 {symbol}: {len(locations)} استخدام")
+            for loc in locations:
+                print(f"  {loc['file']}:{loc['line']}:{loc['column']}")
+            
+        except Exception as e:
+            print(f"❌ خطأ في البحث: {e}")
+            logger.exception("فشل البحث في فهرس الاستخدام")
+            sys.exit(1)
+    
     def display_scan_results(self, results: Dict, verbose: bool = False):
         """عرض نتائج المسح"""
         print("\n" + "="*50)
@@ -256,12 +311,20 @@ class CLI:
             # إنشاء الحزمة
             bundle_results = create_custom_bundle(
                 scan_results,
-                args.output_dir
+                args.output_dir,
+                offline=args.offline,
+                budget_file=args.budget,
+                self_host=args.self_host
             )
             
             # عرض النتائج
             self.display_bundle_results(bundle_results)
             
+            # تجاوز الميزانية يفشل الأمر (للاستخدام في CI)
+            budget = bundle_results.get('budget')
+            if budget and not budget['ok']:
+                sys.exit(1)
+            
         except Exception as e:
             print(f"❌ خطأ في إنشاء الحزمة: {e}")
             logger.exception("فشل إنشاء الحزمة")
@@ -295,6 +358,31 @@ class CLI:
             for file in files_created:
                 print(f"  • {file}")
         
+        # الأحجام بعد الضغط المسبق (تفاصيل كل ملف في README الحزمة)
+        sizes = [row for row in results.get('sizes', []) if row.get('raw') is not None]
+        if sizes:
+            raw = sum(row['raw'] for row in sizes)
+            line = f"\n🗜️  النسخ المضغوطة: {format_file_size(raw)} ← gzip {format_file_size(sum(row['gzip'] or 0 for row in sizes))}"
+            if all(row.get('brotli') is not None for row in sizes):
+                line += f" / brotli {format_file_size(sum(row['brotli'] for row in sizes))}"
+            print(line)
+        
+        # الأسماء بالبصمة
+        manifest = results.get('manifest')
+        if manifest:
+            print(f"\n🔖 أسماء بالبصمة: {len(manifest)} ملف (manifest.json)")
+        
+        # الاستضافة الذاتية
+        self_host = results.get('self_host')
+        if self_host:
+            print(f"\n🏠 الاستضافة الذاتية: {len(self_host['hosted'])} ملف من CDN "
+                  f"({format_file_size(self_host['size'])})، {len(self_host['pages'])} صفحة في site/")
+        
+        # الميزانية
+        budget = results.get('budget')
+        if budget:
+            self.display_budget(budget)
+        
         # ملف ZIP إذا تم إنشاؤه
         zip_file = results.get('zip_file')
         if zip_file:
@@ -327,6 +415,26 @@ class CLI:
         if zip_file and Path(zip_file).exists():
             print(f"\n📥 يمكنك تحميل الحزمة من: {zip_file}")
     
+    def display_budget(self, budget: Dict):
+        """عرض نتيجة الميزانية مع تفصيل ما سبب كل تجاوز"""
+        totals = budget['totals']
+        if budget['ok']:
+            print(f"\n✅ الأحجام ضمن الميزانية ({format_file_size(totals['raw'])}، "
+                  f"gzip {format_file_size(totals['gzip'])})")
+            return
+        
+        print(f"\n🚫 تجاوز ميزانية الأحجام ({len(budget['violations'])}) - {budget.get('budget')}:")
+        for violation in budget['violations']:
+            label = violation['name'] if violation['scope'] == 'total' else f"{violation['scope']} {violation['name']}"
+            print(f"  • {label} ({violation['metric']}): "
+                  f"{format_file_size(violation['size'])} / {format_file_size(violation['limit'])} "
+                  f"(+{format_file_size(violation['over'])})")
+            for item in violation['breakdown']:
+                size = item.get(violation['metric'])
+                if size is None:
+                    size = item.get('raw', 0)
+                print(f"      - {item['name']}: {format_file_size(size)}")
+    
     def handle_interactive(self):
         """الوضع التفاعلي"""
         print("🎮 الوضع التفاعلي - أداة مسح مشاريع الويب")
@@ -422,7 +530,10 @@ class CLI:
             'libraries': None,
             'output_dir': output_dir if output_dir else None,
             'name': bundle_name if bundle_name else None,
-            'no_zip': False
+            'no_zip': False,
+            'offline': False,
+            'budget': None,
+            'self_host': False
         })()
         
         self.handle_bundle(args)
@@ -450,7 +561,10 @@ class CLI:
             'libraries': libraries,
             'output_dir': output_dir if output_dir else None,
             'name': bundle_name if bundle_name else None,
-            'no_zip': False
+            'no_zip': False,
+            'offline': False,
+            'budget': None,
+            'self_host': False
         })()
         
         self.handle_bundle(args)
@@ -0,0 +1,393 @@
+"""
+تقسيم الحزم حسب الصفحات: جزء مشترك وأجزاء لمجموعات الصفحات من مراجع <script> و <link> في HTML
+"""
+
+import re
+import json
+import posixpath
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urldefrag
+
+try:
+    from .build_manifest import digest
+    from .source_map import strip_source_mapping_url
+    from .utils.object_store import write_atomic
+except ImportError:
+    from src.build_manifest import digest
+    from src.source_map import strip_source_mapping_url
+    from src.utils.object_store import write_atomic
+
+
+PAGE_SUFFIXES = {'.html', '.htm'}
+KINDS = ('scripts', 'styles')
+CHUNK_EXTENSIONS = {'scripts': '.js', 'styles': '.css'}
+COMMON_CHUNK = 'common'
+
+# أنواع <script> التي ينفذها المتصفح كسكربت عادي (الأنواع الأخرى بيانات أو قوالب)
+_CLASSIC_SCRIPT_TYPES = {'', 'text/javascript', 'application/javascript', 'text/ecmascript',
+                         'application/ecmascript', 'module'}
+_EXTERNAL_RE = re.compile(r'^(?:[a-z][\w+.-]*:|//)', re.IGNORECASE)
+_TEMPLATE_RE = re.compile(r'<\?|\{\{|\{%')
+_CSS_URL_RE = re.compile(r'url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^)\s]*))\s*\)', re.IGNORECASE)
+_CSS_CHARSET_RE = re.compile(r'^\ufeff?\s*@charset\s+["\'][^"\']*["\']\s*;', re.IGNORECASE)
+_CSS_IMPORT_RE = re.compile(r'@import\b', re.IGNORECASE)
+
+
+def asset_reference(tag: str, attrs: Dict[str, Optional[str]]) -> Optional[Tuple[str, Optional[str], bool]]:
+    """(النوع، الرابط، قابل للنقل) لوسم يحمل سكربتاً أو أنماطاً، أو None لغيره
+
+    غير القابل للنقل فاصل في ترتيب الصفحة: كود مضمن، module، async/defer، media غير all
+    """
+    if tag == 'script':
+        script_type = (attrs.get('type') or '').strip().lower()
+        if script_type not in _CLASSIC_SCRIPT_TYPES:
+            return None
+        src = attrs.get('src')
+        movable = bool(src) and script_type != 'module' and not {'async', 'defer', 'nomodule'} & set(attrs)
+        return 'scripts', src, movable
+    if tag == 'style':
+        return 'styles', None, False
+    if tag == 'link':
+        rel = (attrs.get('rel') or '').lower().split()
+        if 'stylesheet' not in rel:
+            return None
+        media = (attrs.get('media') or 'all').strip().lower()
+        href = attrs.get('href')
+        movable = bool(href) and 'alternate' not in rel and 'disabled' not in attrs and media == 'all'
+        return 'styles', href, movable
+    return None
+
+
+def external_url(ref: str) -> Optional[str]:
+    """الرابط المطلق لملف على خادم آخر (http/https أو //) بدون #، أو None"""
+    ref = ref.strip()
+    if ref.startswith('//'):
+        ref = 'https:' + ref
+    if not re.match(r'^https?://', ref, re.IGNORECASE) or _TEMPLATE_RE.search(ref):
+        return None
+    return urldefrag(ref)[0]
+
+
+def is_external(ref: str) -> bool:
+    return bool(_EXTERNAL_RE.match(ref))
+
+
+class _PageAssetsParser(HTMLParser):
+    """مراجع الصفحة بالترتيب؛ None فاصل لا يمكن نقل الملفات عبره"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.scripts: List[Optional[str]] = []
+        self.styles: List[Optional[str]] = []
+
+    def handle_starttag(self, tag, attrs):
+        reference = asset_reference(tag.lower(), {name.lower(): value for name, value in attrs})
+        if reference is not None:
+            kind, ref, movable = reference
+            getattr(self, kind).append(ref if movable else None)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+
+class PageAssets:
+    """ملفات JS/CSS التي تحملها كل صفحة بالترتيب: مسارات نسبية لجذر المشروع أو روابط CDN مطلقة؛ None = فاصل"""
+
+    def __init__(self, project_path: Path):
+        self.project_path = Path(project_path)
+        self.pages: Dict[str, Dict[str, List[Optional[str]]]] = {}
+
+    def resolve(self, page: str, ref: str) -> Optional[str]:
+        """مسار الملف المحلي الذي يشير إليه الرابط، أو رابط CDN المطلق، أو None (قوالب، ملفات غير موجودة)"""
+        ref = ref.strip()
+        if _EXTERNAL_RE.match(ref):
+            return external_url(ref)
+        if not ref or _TEMPLATE_RE.search(ref):
+            return None
+        path = unquote(ref.split('#')[0].split('?')[0])
+        if path.startswith('/'):
+            rel = posixpath.normpath(path.lstrip('/'))
+        else:
+            rel = posixpath.normpath(posixpath.join(posixpath.dirname(page), path))
+        if rel == '.' or rel.startswith('../') or rel == '..' or not (self.project_path / rel).is_file():
+            return None
+        return rel
+
+    def feed_html(self, page: str, content: str):
+        parser = _PageAssetsParser()
+        parser.feed(content)
+        parser.close()
+        self.pages[page] = {
+            kind: [self.resolve(page, ref) if ref else None for ref in getattr(parser, kind)]
+            for kind in KINDS
+        }
+
+    def references(self) -> List[str]:
+        """كل الملفات المحلية المشار إليها من الصفحات"""
+        return sorted({ref for refs in self.pages.values() for kind in KINDS for ref in refs[kind]
+                       if ref and not is_external(ref)})
+
+    def external(self) -> List[str]:
+        """روابط CDN المشار إليها من الصفحات"""
+        return sorted({ref for refs in self.pages.values() for kind in KINDS for ref in refs[kind]
+                       if ref and is_external(ref)})
+
+    def to_dict(self) -> Dict[str, Dict[str, List[Optional[str]]]]:
+        return {page: self.pages[page] for page in sorted(self.pages)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, List[Optional[str]]]], project_path: Path) -> 'PageAssets':
+        assets = cls(project_path)
+        for page, refs in data.items():
+            assets.pages[page] = {kind: list(refs.get(kind, [])) for kind in KINDS}
+        return assets
+
+    @classmethod
+    def collect(cls, project_path: Path, excluded_dirs: Iterable[str] = ()) -> 'PageAssets':
+        """جمع المراجع من صفحات HTML في المشروع"""
+        assets = cls(project_path)
+        excluded = set(excluded_dirs)
+        for path in sorted(Path(project_path).rglob('*')):
+            if path.suffix.lower() not in PAGE_SUFFIXES or not path.is_file():
+                continue
+            rel = path.relative_to(project_path)
+            if excluded & set(rel.parts[:-1]):
+                continue
+            try:
+                assets.feed_html(rel.as_posix(), path.read_text(encoding='utf-8', errors='ignore'))
+            except OSError:
+                continue
+        return assets
+
+
+def _page_slug(page: str) -> str:
+    stem = posixpath.splitext(page)[0]
+    return re.sub(r'[^\w-]+', '_', stem).strip('_') or 'index'
+
+
+def split_chunks(pages: Dict[str, List[Optional[str]]], sizes: Dict[str, int],
+                 min_chunk_size: int = 0) -> Dict[str, Any]:
+    """تقسيم ملفات نوع واحد إلى أجزاء حسب مجموعة الصفحات التي تستخدم كل ملف
+
+    pages: {الصفحة: المراجع بالترتيب}؛ sizes: حجم كل ملف قابل للدمج (الملفات غير الموجودة فيه تبقى كما هي وتعمل كفاصل)
+    الملفات التي تستخدمها نفس مجموعة الصفحات تُوضع في جزء واحد فلا يتكرر أي بايت؛ الأجزاء المشتركة
+    الأصغر من min_chunk_size تُدمج في أجزاء الصفحات (تكرار صغير مقابل طلبات أقل)
+    """
+    # (الملف، رقم المقطع بين الفواصل) لكل صفحة
+    sequences: Dict[str, List] = {}
+    for page in sorted(pages):
+        items, seen, segment = [], set(), 0
+        for ref in pages[page]:
+            if ref is None or ref not in sizes:
+                segment += 1
+                continue
+            if ref not in seen:
+                seen.add(ref)
+                items.append((ref, segment))
+        if items:
+            sequences[page] = items
+
+    # توقيع الملف: (الصفحة، المقطع) لكل صفحة تستخدمه؛ الملفات ذات التوقيع الواحد لا يفصل بينها فاصل في أي صفحة
+    users: Dict[str, set] = {}
+    for page, items in sequences.items():
+        for asset, segment in items:
+            users.setdefault(asset, set()).add((page, segment))
+
+    all_pages = frozenset(sequences)
+    groups: Dict[frozenset, List[str]] = {}
+    for page, items in sequences.items():
+        for asset, _ in items:
+            group = groups.setdefault(frozenset(users[asset]), [])
+            if asset not in group:
+                group.append(asset)
+
+    for key in list(groups):
+        key_pages = {page for page, _ in key}
+        if 1 < len(key_pages) and key_pages != all_pages and sum(sizes[a] for a in groups[key]) < min_chunk_size:
+            for member in key:
+                groups.setdefault(frozenset([member]), []).extend(groups[key])
+            del groups[key]
+
+    # كل جزء يجب أن يكون متتالياً في كل صفحة تحمله: الأجزاء التي تتداخل مع غيرها تُقسم حتى تستقر
+    parts = [(frozenset(page for page, _ in key), assets) for key, assets in groups.items()]
+    changed = True
+    while changed:
+        changed = False
+        owner = {(page, asset): index for index, (key_pages, assets) in enumerate(parts)
+                 for page in key_pages for asset in assets}
+        for page, items in sequences.items():
+            runs: Dict[int, List[List[str]]] = {}
+            previous = None
+            for asset, _ in items:
+                index = owner[page, asset]
+                if index != previous:
+                    runs.setdefault(index, []).append([])
+                runs[index][-1].append(asset)
+                previous = index
+            split = {index: page_runs for index, page_runs in runs.items() if len(page_runs) > 1}
+            if split:
+                parts = [part for index, part in enumerate(parts) if index not in split] + \
+                        [(parts[index][0], run) for index, page_runs in split.items() for run in page_runs]
+                changed = True
+                break
+
+    chunks: Dict[str, List[str]] = {}
+    chunk_pages: Dict[str, frozenset] = {}
+
+    def add_chunk(name: str, assets: List[str]) -> str:
+        if name in chunks:
+            name = f'{name}-{digest(assets)[:6]}'
+        chunks[name] = assets
+        return name
+
+    for key_pages, assets in parts:
+        if key_pages == all_pages:
+            name = COMMON_CHUNK
+        elif len(key_pages) == 1:
+            name = f'page-{_page_slug(next(iter(key_pages)))}'
+        else:
+            name = f'shared-{digest(sorted(key_pages))[:8]}'
+        # الترتيب داخل الجزء حسب أول صفحة تستخدمه؛ التحقق أدناه يرفض التقسيم إذا خالف ترتيب صفحة أخرى
+        order = {asset: i for i, (asset, _) in enumerate(sequences[min(key_pages)])}
+        name = add_chunk(name, sorted(assets, key=order.__getitem__))
+        chunk_pages[name] = key_pages
+
+    page_chunks: Dict[str, List[str]] = {}
+    fallback = []
+    for page, items in sequences.items():
+        position = {asset: (i, segment) for i, (asset, segment) in enumerate(items)}
+        names = sorted((name for name, key in chunk_pages.items() if page in key),
+                       key=lambda name: min(position[a][0] for a in chunks[name]))
+        in_order = [a for name in names for a in chunks[name]] == [a for a, _ in items]
+        contiguous = all(len({position[a][1] for a in chunks[name]}) == 1 for name in names)
+        if in_order and contiguous:
+            page_chunks[page] = names
+            continue
+        # ترتيب الصفحة يتعارض مع الأجزاء المشتركة: جزء خاص لكل مقطع من الصفحة بترتيبها الأصلي
+        fallback.append(page)
+        page_chunks[page] = []
+        for segment in sorted({s for _, s in items}):
+            page_chunks[page].append(add_chunk(f'page-{_page_slug(page)}-{segment}',
+                                               [a for a, s in items if s == segment]))
+
+    used = {name for names in page_chunks.values() for name in names}
+    chunks = {name: assets for name, assets in chunks.items() if name in used}
+    chunk_sizes = {name: sum(sizes[a] for a in assets) for name, assets in chunks.items()}
+    total = sum(sizes[a] for a in users)
+    return {
+        'chunks': chunks,
+        'pages': page_chunks,
+        'fallback': fallback,
+        'sizes': {
+            'single_bundle': total,
+            'assets': {asset: sizes[asset] for asset in sorted(users)},
+            'chunks': chunk_sizes,
+            'duplicated': sum(chunk_sizes.values()) - total,
+            'first_load': {page: sum(chunk_sizes[n] for n in names) for page, names in page_chunks.items()}
+        }
+    }
+
+
+def rebase_css_urls(css: str, source: str, target_dir: str) -> str:
+    """تعديل روابط url() النسبية بعد نقل ملف CSS من مساره في المشروع إلى مجلد آخر"""
+    source_dir = posixpath.dirname(source)
+
+    def replace(match):
+        url = next(group for group in match.groups() if group is not None).strip()
+        if not url or url.startswith(('/', '#')) or _EXTERNAL_RE.match(url):
+            return match.group(0)
+        rebased = posixpath.relpath(posixpath.normpath(posixpath.join(source_dir, url)), target_dir or '.')
+        return f'url("{rebased}")'
+
+    return _CSS_URL_RE.sub(replace, css)
+
+
+class CodeSplitter:
+    """كتابة أجزاء JS/CSS لكل الصفحات وخطة تحميلها split_plan.json
+
+    الأجزاء تُكتب في chunks/ على افتراض أن مجلد المخرجات يُنشر في جذر المشروع (روابط CSS تُعدل على هذا الأساس)
+    """
+
+    CHUNKS_DIRNAME = 'chunks'
+    PLAN_FILENAME = 'split_plan.json'
+
+    def __init__(self, page_assets: PageAssets, built_file: Callable[[str, str], Optional[Path]],
+                 min_chunk_size: int = 10 * 1024, locations: Optional[Dict[str, str]] = None):
+        """built_file(kind, المرجع) يعيد الملف المبني (المصغر أو المنظف) أو الأصلي، أو None إذا لم يتوفر
+
+        locations: مسار النشر لمراجع CDN المستضافة محلياً (لتعديل روابط url() في CSS)
+        """
+        self.page_assets = page_assets
+        self.built_file = built_file
+        self.min_chunk_size = min_chunk_size
+        self.locations = locations or {}
+
+    def _read(self, kind: str, rel: str) -> Optional[str]:
+        path = self.built_file(kind, rel)
+        if path is None:
+            return None
+        try:
+            text = path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            return None
+        if kind == 'styles':
+            if _CSS_IMPORT_RE.search(text):
+                # @import يجب أن يكون في بداية الملف؛ الدمج يبطله
+                return None
+            return rebase_css_urls(_CSS_CHARSET_RE.sub('', text), self.locations.get(rel, rel), self.CHUNKS_DIRNAME)
+        return strip_source_mapping_url(text)
+
+    @staticmethod
+    def _join(kind: str, parts: List[str]) -> str:
+        if kind == 'scripts':
+            # السطر الجديد قبل ; يحمي من تعليق // في نهاية الملف السابق
+            return '\n;'.join(part.rstrip() for part in parts) + '\n'
+        return '\n'.join(part.strip() for part in parts) + '\n'
+
+    def build(self, output_dir: Path) -> Dict[str, Any]:
+        """كتابة الأجزاء والخطة وإرجاع {'plan': ..., 'outputs': [مسارات نسبية]}"""
+        output_dir = Path(output_dir)
+        plan: Dict[str, Any] = {'chunks_dir': self.CHUNKS_DIRNAME}
+        outputs = []
+        for kind in KINDS:
+            contents = {}
+            for page, refs in self.page_assets.pages.items():
+                for rel in refs[kind]:
+                    if rel and rel not in contents:
+                        contents[rel] = self._read(kind, rel)
+            contents = {rel: text for rel, text in contents.items() if text is not None}
+            sizes = {rel: len(text.encode('utf-8')) for rel, text in contents.items()}
+            result = split_chunks({page: refs[kind] for page, refs in self.page_assets.pages.items()},
+                                  sizes, self.min_chunk_size)
+
+            files = {}
+            for name, assets in result['chunks'].items():
+                output = f'{self.CHUNKS_DIRNAME}/{name}{CHUNK_EXTENSIONS[kind]}'
+                write_atomic(output_dir / output, self._join(kind, [contents[a] for a in assets]).encode('utf-8'))
+                files[name] = output
+                outputs.append(output)
+            result['files'] = files
+            plan[kind] = result
+
+        write_atomic(output_dir / self.PLAN_FILENAME,
+                     json.dumps(plan, ensure_ascii=False, indent=2).encode('utf-8'))
+        outputs.append(self.PLAN_FILENAME)
+        return {'plan': plan, 'outputs': outputs}
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """ملخص التقرير: عدد الأجزاء، الحجم المكرر، وحجم التحميل الأول لكل صفحة مقابل حزمة واحدة"""
+    summary = {}
+    for kind in KINDS:
+        result = plan.get(kind) or {}
+        sizes = result.get('sizes', {})
+        summary[kind] = {
+            'chunks': len(result.get('chunks', {})),
+            'single_bundle': sizes.get('single_bundle', 0),
+            'duplicated': sizes.get('duplicated', 0),
+            'first_load': sizes.get('first_load', {}),
+            'fallback': result.get('fallback', [])
+        }
+    return summary
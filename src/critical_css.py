@@ -0,0 +1,520 @@
+"""
+CSS الحرج لكل صفحة: القواعد التي تطابق العناصر في أعلى الصفحة (تقدير ثابت من بنية HTML) لتضمينها في <style>
+"""
+
+import re
+import posixpath
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .css_parser import parse_css, minify_nodes, serialize_css, split_top_level, iter_rules
+    from .css_purge import unescape_ident
+    from .code_splitter import rebase_css_urls
+except ImportError:
+    from src.css_parser import parse_css, minify_nodes, serialize_css, split_top_level, iter_rules
+    from src.css_purge import unescape_ident
+    from src.code_splitter import rebase_css_urls
+
+
+CRITICAL_DIRNAME = 'critical'
+
+# عناصر لا تُعرض ولا يُحسب ما بداخلها
+_SKIPPED_TAGS = {'head', 'script', 'style', 'template', 'noscript'}
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+              'track', 'wbr'}
+# وسوم يُغلقها تلقائياً بدء وسم من نفس المجموعة (الإغلاق الاختياري في HTML)
+_AUTO_CLOSE = {'li': {'li'}, 'dt': {'dt', 'dd'}, 'dd': {'dt', 'dd'}, 'p': {'p'}, 'option': {'option'},
+               'tr': {'tr'}, 'td': {'td', 'th'}, 'th': {'td', 'th'}}
+_HIDDEN_STYLE_RE = re.compile(r'display\s*:\s*none', re.IGNORECASE)
+_DYNAMIC_CLASS_RE = re.compile(r'<\?|\{\{|\$\{')
+
+_IDENT_RE = re.compile(r'(?:\\[0-9a-fA-F]{1,6}\s?|\\.|[\w\-\u00a0-\uffff])+')
+_ATTR_SELECTOR_RE = re.compile(
+    r'\[\s*(?:[\w*-]*\|)?([\w-]+)\s*(?:([~|^$*]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s\]]+))\s*([iIsS])?\s*)?\]'
+)
+_NTH_RE = re.compile(r'^\s*(?:([+-]?\d*)n\s*(?:([+-])\s*(\d+))?|([+-]?\d+)|(odd)|(even))\s*$', re.IGNORECASE)
+
+
+# ==================== DOM تقريبي ====================
+class Element:
+    """عنصر في شجرة الصفحة: ما يحتاجه مطابقة المحددات فقط"""
+
+    __slots__ = ('tag', 'id', 'classes', 'class_prefixes', 'attrs', 'parent', 'prev', 'index')
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional['Element'] = None,
+                 prev: Optional['Element'] = None):
+        self.tag = tag
+        self.parent = parent
+        self.prev = prev
+        self.index = prev.index + 1 if prev is not None else 1
+        self.attrs: Dict[str, str] = {}
+        self.id = None
+        self.classes: Set[str] = set()
+        self.class_prefixes: List[str] = []
+        self.update(attrs)
+
+    def update(self, attrs: Dict[str, str]):
+        self.attrs.update(attrs)
+        self.id = self.attrs.get('id') or self.id
+        for name in (attrs.get('class') or '').split():
+            match = _DYNAMIC_CLASS_RE.search(name)
+            if match:
+                # صنف يولده القالب (btn-<?= $type ?>): أي صنف يبدأ بالجزء الثابت
+                if match.start():
+                    self.class_prefixes.append(name[:match.start()])
+            else:
+                self.classes.add(name)
+
+    def has_class(self, name: str) -> bool:
+        return name in self.classes or any(name.startswith(prefix) for prefix in self.class_prefixes)
+
+
+class _FoldParser(HTMLParser):
+    """العناصر المرئية في body بترتيب المستند حتى حد العناصر (تقدير ثابت لما يظهر قبل التمرير)"""
+
+    def __init__(self, max_elements: int):
+        super().__init__(convert_charrefs=True)
+        self.max_elements = max_elements
+        self.html = Element('html', {})
+        self.body = Element('body', {}, self.html)
+        self.elements: List[Element] = [self.html, self.body]
+        self._stack: List[Element] = [self.body]
+        self._last_child: Dict[int, Element] = {}
+        self._skip: Optional[Tuple[str, int]] = None
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        tag = tag.lower()
+        if self._skip is not None:
+            if tag == self._skip[0]:
+                self._skip = (tag, self._skip[1] + 1)
+            return
+        values = {name.lower(): value if value is not None else '' for name, value in attrs}
+        if tag in ('html', 'body'):
+            getattr(self, tag).update(values)
+            return
+        hidden = 'hidden' in values or _HIDDEN_STYLE_RE.search(values.get('style', '')) or \
+            (tag == 'input' and values.get('type', '').lower() == 'hidden')
+        if tag in _SKIPPED_TAGS or hidden:
+            if tag not in _VOID_TAGS:
+                self._skip = (tag, 1)
+            return
+
+        closes = _AUTO_CLOSE.get(tag)
+        if closes and len(self._stack) > 1 and self._stack[-1].tag in closes:
+            self._stack.pop()
+        parent = self._stack[-1]
+        element = Element(tag, values, parent, self._last_child.get(id(parent)))
+        self._last_child[id(parent)] = element
+        self.elements.append(element)
+        if len(self.elements) - 2 >= self.max_elements:
+            self.done = True
+            return
+        if tag not in _VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        # ‎/> لا يغلق العناصر غير الفارغة في HTML (كما في المتصفح)
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        tag = tag.lower()
+        if self._skip is not None:
+            if tag == self._skip[0]:
+                depth = self._skip[1] - 1
+                self._skip = (tag, depth) if depth else None
+            return
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                break
+
+
+def fold_elements(html: str, max_elements: int = 100) -> List[Element]:
+    """أول max_elements عنصراً مرئياً في الصفحة (مع html و body)"""
+    parser = _FoldParser(max_elements)
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # HTML تالف: نكتفي بما قُرئ قبل الخطأ
+        pass
+    return parser.elements
+
+
+# ==================== المحددات ====================
+class Compound:
+    """محدد مركب واحد (بدون مجمعات): div.btn#x[type=button]:first-child"""
+
+    __slots__ = ('tag', 'ids', 'classes', 'attrs', 'pseudos')
+
+    def __init__(self):
+        self.tag: Optional[str] = None
+        self.ids: List[str] = []
+        self.classes: List[str] = []
+        self.attrs: List[Tuple[str, Optional[str], str, bool]] = []
+        self.pseudos: List[Tuple[str, Optional[str]]] = []
+
+    def empty(self) -> bool:
+        return self.tag is None and not (self.ids or self.classes or self.attrs or self.pseudos)
+
+    def key(self) -> Tuple[str, str]:
+        """مفتاح الفهرس: أكثر أجزاء المحدد المركب تمييزاً"""
+        if self.ids:
+            return ('id', self.ids[0])
+        if self.classes:
+            return ('class', self.classes[0])
+        if self.tag and self.tag != '*':
+            return ('tag', self.tag)
+        return ('*', '')
+
+    def matches(self, element: Element) -> bool:
+        if self.tag and self.tag != '*' and self.tag != element.tag:
+            return False
+        if any(element.id != name for name in self.ids):
+            return False
+        if not all(element.has_class(name) for name in self.classes):
+            return False
+        for name, op, value, ignore_case in self.attrs:
+            if name not in element.attrs:
+                return False
+            if op is not None and not _attr_matches(element.attrs[name], op, value, ignore_case):
+                return False
+        return all(_pseudo_matches(name, arg, element) for name, arg in self.pseudos)
+
+
+def _attr_matches(actual: str, op: str, expected: str, ignore_case: bool) -> bool:
+    if _DYNAMIC_CLASS_RE.search(actual):
+        # القيمة يولدها القالب: لا يمكن استبعادها
+        return True
+    if ignore_case:
+        actual, expected = actual.lower(), expected.lower()
+    if op == '=':
+        return actual == expected
+    if op == '~=':
+        return expected in actual.split()
+    if op == '|=':
+        return actual == expected or actual.startswith(expected + '-')
+    if op == '^=':
+        return bool(expected) and actual.startswith(expected)
+    if op == '$=':
+        return bool(expected) and actual.endswith(expected)
+    return bool(expected) and expected in actual
+
+
+def _nth_matches(arg: str, index: int) -> bool:
+    match = _NTH_RE.match(arg.split(' of ')[0])
+    if not match:
+        return True
+    if match.group(5):
+        a, b = 2, 1
+    elif match.group(6):
+        a, b = 2, 0
+    elif match.group(4):
+        a, b = 0, int(match.group(4))
+    else:
+        coefficient = match.group(1)
+        a = -1 if coefficient == '-' else 1 if coefficient in ('', '+') else int(coefficient)
+        b = int(match.group(3) or 0) * (-1 if match.group(2) == '-' else 1)
+    if a == 0:
+        return index == b
+    return (index - b) % a == 0 and (index - b) // a >= 0
+
+
+def _pseudo_matches(name: str, arg: Optional[str], element: Element) -> bool:
+    """الحالات التي يمكن حسابها من البنية فقط؛ غيرها (hover و ‎:not() وغيرها) تُعتبر مطابقة"""
+    if name == 'root':
+        return element.parent is None
+    if name == 'first-child':
+        return element.prev is None
+    if name == 'nth-child' and arg:
+        return _nth_matches(arg, element.index)
+    return True
+
+
+def compile_selector(selector: str) -> Optional[Tuple[List[Compound], List[str]]]:
+    """(المحددات المركبة من اليسار، المجمعات بينها) أو None لمحدد لا يمكن تحليله (مثل & في CSS المتداخل)"""
+    compounds: List[Compound] = []
+    combinators: List[str] = []
+    current = Compound()
+    i = 0
+    length = len(selector)
+    while i < length:
+        ch = selector[i]
+        if ch.isspace() or ch in '>+~':
+            combinator = ' '
+            while i < length and (selector[i].isspace() or selector[i] in '>+~'):
+                if selector[i] in '>+~':
+                    combinator = selector[i]
+                i += 1
+            if current.empty():
+                if not compounds:
+                    return None
+                combinators[-1] = combinator if combinator != ' ' else combinators[-1]
+                continue
+            compounds.append(current)
+            combinators.append(combinator)
+            current = Compound()
+            continue
+        if ch in '.#':
+            match = _IDENT_RE.match(selector, i + 1)
+            if not match:
+                return None
+            (current.classes if ch == '.' else current.ids).append(unescape_ident(match.group()))
+            i = match.end()
+        elif ch == '[':
+            end = selector.find(']', i)
+            match = _ATTR_SELECTOR_RE.match(selector, i)
+            if not match or end < 0:
+                return None
+            value = next((g for g in match.group(3, 4, 5) if g is not None), None)
+            current.attrs.append((match.group(1).lower(), match.group(2), value or '',
+                                  (match.group(6) or '').lower() == 'i'))
+            i = match.end()
+        elif ch == ':':
+            element_pseudo = selector.startswith('::', i)
+            i += 2 if element_pseudo else 1
+            match = _IDENT_RE.match(selector, i)
+            if not match:
+                return None
+            name = match.group().lower()
+            i = match.end()
+            arg = None
+            if i < length and selector[i] == '(':
+                depth, start = 0, i
+                while i < length:
+                    if selector[i] == '(':
+                        depth += 1
+                    elif selector[i] == ')':
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    i += 1
+                arg = selector[start + 1:i].strip()
+                i += 1
+            # العناصر الزائفة (‎::before) تتبع عنصرها؛ الأسماء القديمة ‎:before كذلك
+            if not element_pseudo and name not in ('before', 'after', 'first-line', 'first-letter'):
+                current.pseudos.append((name, arg))
+            elif current.empty():
+                current.tag = '*'
+        elif ch == '*':
+            current.tag = '*'
+            i += 1
+        elif ch == '|':
+            i += 1
+        elif ch == '&' or ch in '{};':
+            return None
+        else:
+            match = _IDENT_RE.match(selector, i)
+            if not match:
+                i += 1
+                continue
+            current.tag = unescape_ident(match.group()).lower()
+            i = match.end()
+    if current.empty():
+        if not compounds:
+            return None
+        combinators.pop()
+    else:
+        compounds.append(current)
+    return compounds, combinators
+
+
+def _matches(compounds: List[Compound], combinators: List[str], k: int, element: Element) -> bool:
+    """مطابقة المحدد من اليمين: المركب k على العنصر ثم ما قبله حسب المجمع"""
+    if not compounds[k].matches(element):
+        return False
+    if k == 0:
+        return True
+    combinator = combinators[k - 1]
+    if combinator in ('>', ' '):
+        candidate = element.parent
+        while candidate is not None:
+            if _matches(compounds, combinators, k - 1, candidate):
+                return True
+            if combinator == '>':
+                return False
+            candidate = candidate.parent
+        return False
+    candidate = element.prev
+    while candidate is not None:
+        if _matches(compounds, combinators, k - 1, candidate):
+            return True
+        if combinator == '+':
+            return False
+        candidate = candidate.prev
+    return False
+
+
+# ==================== الاستخراج ====================
+class _Stylesheet:
+    """ملف CSS محلل مع فهرس المحددات حسب المركب الأيمن: {('class', 'btn'): [رقم المحدد، ...]}"""
+
+    def __init__(self, css: str):
+        self.nodes = parse_css(css)
+        self.selectors: List[Optional[Tuple[List[Compound], List[str]]]] = []
+        self.rule_selectors: Dict[int, List[Tuple[str, int]]] = {}
+        self.index: Dict[Tuple[str, str], List[int]] = {}
+        self._visit(self.nodes)
+
+    def _visit(self, nodes: List[Dict[str, Any]]):
+        for node in nodes:
+            if node['type'] == 'rule':
+                parts = []
+                for part in split_top_level(node['selector'], ','):
+                    part = part.strip()
+                    selector_id = len(self.selectors)
+                    compiled = compile_selector(part)
+                    self.selectors.append(compiled)
+                    # المحدد الذي لا يمكن تحليله يبقى في CSS الحرج (الإبقاء أسلم من الحذف)
+                    key = compiled[0][-1].key() if compiled else ('*', '')
+                    self.index.setdefault(key, []).append(selector_id)
+                    parts.append((part, selector_id))
+                self.rule_selectors[id(node)] = parts
+            elif node.get('block') == 'rules' and not node['name'].endswith('keyframes'):
+                self._visit(node['children'])
+
+    def candidates(self, element: Element) -> Iterable[int]:
+        """المحددات التي قد تطابق العنصر: التي يطابق مفتاح مركبها الأيمن أحد أجزائه"""
+        index = self.index
+        yield from index.get(('*', ''), ())
+        yield from index.get(('tag', element.tag), ())
+        if element.id:
+            yield from index.get(('id', element.id), ())
+        for name in element.classes:
+            yield from index.get(('class', name), ())
+        if element.class_prefixes:
+            for kind, name in index:
+                if kind == 'class' and name not in element.classes and element.has_class(name):
+                    yield from index[(kind, name)]
+
+    def matched(self, elements: List[Element]) -> Set[int]:
+        matched: Set[int] = set()
+        for element in elements:
+            for selector_id in self.candidates(element):
+                if selector_id in matched:
+                    continue
+                compiled = self.selectors[selector_id]
+                if compiled is None or _matches(compiled[0], compiled[1], len(compiled[0]) - 1, element):
+                    matched.add(selector_id)
+        return matched
+
+    def select(self, matched: Set[int], nodes: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """نسخة من الشجرة بالقواعد المطابقة فقط (مع @font-face و @keyframes لتصفيتها لاحقاً)"""
+        result = []
+        for node in self.nodes if nodes is None else nodes:
+            if node['type'] == 'rule':
+                kept = [part for part, selector_id in self.rule_selectors[id(node)] if selector_id in matched]
+                if kept:
+                    result.append(dict(node, selector=','.join(kept)))
+            elif node['type'] == 'comment':
+                continue
+            elif node.get('block') == 'rules' and not node['name'].endswith('keyframes'):
+                children = self.select(matched, node['children'])
+                if children:
+                    result.append(dict(node, children=children))
+            elif node['name'] not in ('import', 'charset', 'page'):
+                result.append(node)
+        return result
+
+
+def _used_text(nodes: List[Dict[str, Any]], properties: Tuple[str, ...]) -> str:
+    parts = []
+    for node in nodes:
+        if node['type'] == 'rule':
+            parts += [d['value'] for d in node.get('declarations', [])
+                      if d['property'].startswith(properties) or d['property'].startswith('--')]
+            parts.append(node.get('raw', ''))
+        elif node.get('block') == 'rules' and not node['name'].endswith('keyframes'):
+            parts.append(_used_text(node['children'], properties))
+    return ' '.join(parts)
+
+
+def _font_family(node: Dict[str, Any]) -> str:
+    for declaration in node.get('declarations', []):
+        if declaration['property'] == 'font-family':
+            return declaration['value'].strip('\'" ')
+    return ''
+
+
+def _prune_unused(nodes: List[Dict[str, Any]], fonts: str, animations: str) -> List[Dict[str, Any]]:
+    """حذف @font-face و @keyframes التي لا تستخدمها القواعد الحرجة"""
+    def used(name: str, text: str) -> bool:
+        return bool(name) and re.search(r'(?<![\w-])' + re.escape(name) + r'(?![\w-])', text) is not None
+
+    result = []
+    for node in nodes:
+        if node['type'] == 'at-rule':
+            if node['name'] == 'font-face' and not used(_font_family(node), fonts):
+                continue
+            if node['name'].endswith('keyframes') and not used(node['prelude'].strip('\'"'), animations):
+                continue
+            if node.get('block') == 'rules' and not node['name'].endswith('keyframes'):
+                node = dict(node, children=_prune_unused(node['children'], fonts, animations))
+                if not node['children']:
+                    continue
+        result.append(node)
+    return result
+
+
+class CriticalCSS:
+    """CSS الحرج لصفحات تشترك في ملفات الأنماط: كل ملف يُحلل ويُفهرس مرة واحدة"""
+
+    def __init__(self, max_elements: int = 100, minify: bool = True):
+        self.max_elements = max_elements
+        self.minify = minify
+        self._sheets: Dict[str, _Stylesheet] = {}
+
+    def _sheet(self, path: Path) -> _Stylesheet:
+        key = str(path)
+        if key not in self._sheets:
+            self._sheets[key] = _Stylesheet(Path(path).read_text(encoding='utf-8', errors='replace'))
+        return self._sheets[key]
+
+    def extract(self, page: str, html: str, stylesheets: List[Tuple[str, Path]]) -> Dict[str, Any]:
+        """{'css', 'elements', 'rules', 'size', 'total'} لصفحة وملفات أنماطها بالترتيب [(الموقع، الملف المبني)]
+
+        الموقع مسار الملف نسبة لجذر النشر؛ روابط url() تُعدل لتصبح نسبية لمجلد الصفحة (للتضمين في <style>)
+        """
+        elements = fold_elements(html, self.max_elements)
+        selected = []
+        total = 0
+        for location, path in stylesheets:
+            sheet = self._sheet(path)
+            total += Path(path).stat().st_size
+            selected.append((location, sheet.select(sheet.matched(elements))))
+
+        fonts = ' '.join(_used_text(nodes, ('font',)) for _, nodes in selected)
+        animations = ' '.join(_used_text(nodes, ('animation',)) for _, nodes in selected)
+        parts = []
+        rules = 0
+        for location, nodes in selected:
+            nodes = _prune_unused(nodes, fonts, animations)
+            rules += sum(1 for _ in iter_rules(nodes))
+            css = serialize_css(minify_nodes(nodes) if self.minify else nodes)
+            if css:
+                parts.append(rebase_css_urls(css, location, posixpath.dirname(page)))
+        css = '\n'.join(parts)
+        return {
+            'css': css,
+            'elements': len(elements),
+            'rules': rules,
+            'size': len(css.encode('utf-8')),
+            'total': total
+        }
+
+
+def critical_path(page: str) -> str:
+    """critical/<الصفحة بدون الامتداد>.css"""
+    return f"{CRITICAL_DIRNAME}/{posixpath.splitext(page)[0]}.css"
+
+
+def inline_style(css: str) -> str:
+    """وسم <style> آمن للتضمين (لا ينهيه </style> داخل CSS)"""
+    return '<style>' + re.sub(r'</(style)', r'<\\/\1', css, flags=re.IGNORECASE) + '</style>'
@@ -0,0 +1,288 @@
+"""
+دمج سلاسل @import المحلية في ملف CSS واحد وتضمين الصور الصغيرة في url() كـ data URI
+"""
+
+import re
+import base64
+import posixpath
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+try:
+    from .code_splitter import rebase_css_urls, is_external
+except ImportError:
+    from src.code_splitter import rebase_css_urls, is_external
+
+
+# أنواع الصور التي تُضمن في CSS
+IMAGE_TYPES = {
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.svg': 'image/svg+xml',
+    '.ico': 'image/x-icon'
+}
+
+# سلاسل أعمق من هذا تُعامل كخطأ (حماية من التكرار غير المنتهي)
+MAX_IMPORT_DEPTH = 16
+
+_URL_RE = re.compile(r'url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^)\s]*))\s*\)', re.IGNORECASE)
+_COMMENT_RE = re.compile(r'/\*[\s\S]*?\*/')
+_CHARSET_RE = re.compile(r'@charset\s+["\'][^"\']*["\']\s*;', re.IGNORECASE)
+_LAYER_STATEMENT_RE = re.compile(r'@layer\s+[\w\s.,-]+;', re.IGNORECASE)
+_IMPORT_RE = re.compile(
+    r'@import\s+(?:url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^)\s]*))\s*\)|"([^"]*)"|\'([^\']*)\')\s*([^;]*);',
+    re.IGNORECASE
+)
+_LAYER_RE = re.compile(r'^layer(?:\(\s*([^)]*?)\s*\))?(?=\s|$)', re.IGNORECASE)
+
+
+class CSSImportError(Exception):
+    """سلسلة @import لا يمكن دمجها دون تغيير ترتيب القواعد أو معناها"""
+
+
+def _prelude(css: str) -> Tuple[List[Tuple[str, Any]], int]:
+    """العبارات في بداية الملف (@charset و @import و @layer بلا كتلة) وموضع نهايتها
+
+    العناصر: ('charset', نص) أو ('layer', نص) أو ('import', (الرابط، الشروط، النص))
+    """
+    items = []
+    pos = 0
+    end = 0
+    length = len(css)
+    while pos < length:
+        if css[pos] in ' \t\r\n\ufeff':
+            pos += 1
+            continue
+        match = _COMMENT_RE.match(css, pos)
+        if match:
+            pos = match.end()
+            continue
+        match = _CHARSET_RE.match(css, pos)
+        if match:
+            items.append(('charset', match.group()))
+        else:
+            match = _IMPORT_RE.match(css, pos)
+            if match:
+                url = next(group for group in match.groups()[:5] if group is not None).strip()
+                items.append(('import', (url, match.group(6).strip(), match.group())))
+            else:
+                match = _LAYER_STATEMENT_RE.match(css, pos)
+                if not match:
+                    break
+                items.append(('layer', match.group()))
+        pos = end = match.end()
+    return items, end
+
+
+def _split_conditions(conditions: str) -> Tuple[Optional[str], Optional[str], str]:
+    """(الطبقة، شرط supports، استعلام media) من شروط @import؛ الطبقة '' تعني طبقة بلا اسم"""
+    layer = supports = None
+    rest = conditions.strip()
+    match = _LAYER_RE.match(rest)
+    if match:
+        layer = match.group(1) or ''
+        rest = rest[match.end():].strip()
+    if rest.lower().startswith('supports('):
+        depth = 0
+        for i, ch in enumerate(rest):
+            if ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+                if depth == 0:
+                    supports = rest[len('supports('):i].strip()
+                    rest = rest[i + 1:].strip()
+                    break
+        else:
+            raise CSSImportError(f"شرط supports غير مكتمل: {conditions}")
+    return layer, supports, rest
+
+
+def _wrap(css: str, conditions: str) -> str:
+    """تغليف محتوى الملف المدمج بشروط @import التي كان يحملها"""
+    layer, supports, media = _split_conditions(conditions)
+    if layer is not None:
+        css = f"@layer {layer} {{\n{css}\n}}" if layer else f"@layer {{\n{css}\n}}"
+    if supports:
+        if not supports.startswith('('):
+            supports = f'({supports})'
+        css = f"@supports {supports} {{\n{css}\n}}"
+    if media and media.lower() != 'all':
+        css = f"@media {media} {{\n{css}\n}}"
+    return css
+
+
+def _local_path(url: str) -> Optional[str]:
+    """المسار بدون الاستعلام، أو None للروابط الخارجية والمطلقة و data:"""
+    url = url.strip()
+    if not url or url.startswith(('/', '#')) or is_external(url):
+        return None
+    return unquote(url.split('#', 1)[0].split('?', 1)[0])
+
+
+class CSSBundler:
+    """دمج ملفات CSS المستوردة محلياً في الملف الجذر وتضمين الصور الصغيرة
+
+    الروابط في الملفات المدمجة تُعدل لتبقى صحيحة من مجلد الملف الجذر؛ @import الخارجية تُرفع إلى البداية
+    (إذا سبقها محتوى مدمج يبقى الملف كما هو لأن رفعها يغير ترتيب القواعد)
+    """
+
+    def __init__(self, project_path: Path, inline_limit: int = 8 * 1024, flatten_imports: bool = True):
+        """inline_limit: أقصى حجم بالبايت لكل صورة (مجموع كل تكراراتها في الملف)؛ 0 يوقف التضمين"""
+        self.project_path = Path(project_path).resolve()
+        self.inline_limit = inline_limit
+        self.flatten_imports = flatten_imports
+
+    def bundle(self, rel: str) -> Dict[str, Any]:
+        """{'css': النص الناتج أو None إذا لم يتغير، 'imports', 'inlined', 'dependencies', 'external', 'error'}"""
+        path = self.project_path / rel
+        original = path.read_text(encoding='utf-8', errors='replace')
+        result = {
+            'css': None,
+            'imports': [],
+            'inlined': {},
+            'external': [],
+            'dependencies': [],
+            'size_before': len(original.encode('utf-8')),
+            'size_after': None,
+            'error': None
+        }
+        css = original
+        if self.flatten_imports:
+            try:
+                css = self._flatten(original, rel, posixpath.dirname(rel), [rel], result)
+            except CSSImportError as e:
+                # السلسلة تبقى كما هي؛ الصور ما زالت قابلة للتضمين
+                result.update(error=str(e), imports=[], external=[])
+                css = original
+        css = self._inline_images(css, posixpath.dirname(rel), result)
+        result['dependencies'] = sorted(set(result['dependencies']))
+        if css != original:
+            result['css'] = css
+            result['size_after'] = len(css.encode('utf-8'))
+        return result
+
+    # ==================== الدمج ====================
+    def _flatten(self, css: str, rel: str, root_dir: str, stack: List[str], result: Dict) -> str:
+        """نص الملف مع محتوى @import المحلية في مكانها (الروابط معدلة لمجلد الملف الجذر)
+
+        للملفات المدمجة تبقى @import الخارجية في بداية الناتج ليرفعها المستدعي إلى بداية ملفه
+        """
+        items, end = _prelude(css)
+        nested_file = len(stack) > 1
+        body = css[end:]
+        if nested_file:
+            body = rebase_css_urls(body, rel, root_dir)
+        if not any(kind == 'import' for kind, _ in items):
+            return css[:end] + body if nested_file else css
+
+        head: List[str] = []
+        parts: List[str] = []
+        merged = False
+        for kind, value in items:
+            if kind == 'charset':
+                if not nested_file:
+                    head.append(value)
+                continue
+            if kind == 'layer':
+                parts.append(value)
+                continue
+            url, conditions, statement = value
+            imported = _local_path(url)
+            if imported is None:
+                if merged:
+                    raise CSSImportError(f"@import خارجي بعد محتوى مدمج في {rel}: {url}")
+                head.append(statement)
+                result['external'].append(url)
+                continue
+
+            imported = posixpath.normpath(posixpath.join(posixpath.dirname(rel), imported))
+            path = (self.project_path / imported).resolve()
+            if imported.startswith('../') or self.project_path not in path.parents:
+                raise CSSImportError(f"@import خارج المشروع في {rel}: {url}")
+            result['dependencies'].append(imported)
+            if imported in stack:
+                # المتصفح يتجاهل الاستيراد الدائري
+                continue
+            if len(stack) >= MAX_IMPORT_DEPTH:
+                raise CSSImportError(f"سلسلة @import أعمق من {MAX_IMPORT_DEPTH} في {rel}")
+            if not path.is_file():
+                raise CSSImportError(f"ملف @import غير موجود في {rel}: {url}")
+
+            nested = self._flatten(path.read_text(encoding='utf-8', errors='replace'), imported, root_dir,
+                                   stack + [imported], result)
+            nested_items, nested_end = _prelude(nested)
+            externals = [v[2] for k, v in nested_items if k == 'import']
+            if externals and (merged or conditions):
+                # رفعها يغير ترتيب القواعد أو يسقط شروط الاستيراد
+                raise CSSImportError(f"@import خارجي داخل {imported} لا يمكن رفعه في {rel}")
+            head += externals
+            content = ''.join(v + '\n' for k, v in nested_items if k == 'layer') + nested[nested_end:].strip()
+            parts.append(_wrap(content, conditions) if conditions else content)
+            result['imports'].append(imported)
+            merged = True
+
+        return '\n'.join(head + parts + [body.lstrip('\r\n')])
+
+    # ==================== تضمين الصور ====================
+    def _inline_images(self, css: str, root_dir: str, result: Dict) -> str:
+        """استبدال روابط الصور الصغيرة بـ data URI (الصورة المكررة تُحسب بحجم كل تكراراتها)"""
+        if not self.inline_limit:
+            return css
+        counts: Dict[str, int] = {}
+        for match in _URL_RE.finditer(css):
+            rel = self._image_rel(match, root_dir)
+            if rel is not None:
+                counts[rel] = counts.get(rel, 0) + 1
+
+        encoded: Dict[str, Optional[str]] = {}
+        for rel, count in counts.items():
+            path = self.project_path / rel
+            if not path.is_file():
+                continue
+            result['dependencies'].append(rel)
+            size = path.stat().st_size
+            if size * count > self.inline_limit:
+                encoded[rel] = None
+                continue
+            data = base64.b64encode(path.read_bytes()).decode('ascii')
+            encoded[rel] = f'data:{IMAGE_TYPES[Path(rel).suffix.lower()]};base64,{data}'
+            result['inlined'][rel] = {'size': size, 'count': count}
+
+        def replace(match):
+            rel = self._image_rel(match, root_dir)
+            if rel is None or not encoded.get(rel):
+                return match.group(0)
+            return f'url("{encoded[rel]}")'
+
+        return _URL_RE.sub(replace, css) if result['inlined'] else css
+
+    def _image_rel(self, match, root_dir: str) -> Optional[str]:
+        url = next(group for group in match.groups() if group is not None)
+        # الروابط ذات # (مثل رموز SVG) تبقى ملفات منفصلة
+        if '#' in url:
+            return None
+        local = _local_path(url)
+        if local is None or Path(local).suffix.lower() not in IMAGE_TYPES:
+            return None
+        rel = posixpath.normpath(posixpath.join(root_dir, local))
+        if rel.startswith('../'):
+            return None
+        return rel
+
+
+def summarize_css_bundles(reports: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """ملخص الدمج لكل الملفات: الملفات المعدلة، عدد الاستيرادات والصور المضمنة وحجمها"""
+    changed = {rel: r for rel, r in reports.items() if r.get('size_after') is not None}
+    return {
+        'files': len(changed),
+        'imports': sum(len(r.get('imports', [])) for r in changed.values()),
+        'inlined': sum(len(r.get('inlined', {})) for r in changed.values()),
+        'inlined_bytes': sum(i['size'] for r in changed.values() for i in r.get('inlined', {}).values()),
+        'errors': {rel: r['error'] for rel, r in reports.items() if r.get('error')}
+    }
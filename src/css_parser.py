@@ -0,0 +1,474 @@
+"""
+محلل CSS بسيط: تحويل الأنماط إلى شجرة قواعد وإعادة كتابتها بشكل مصغر
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+
+# قواعد @ التي تحتوي قواعد متداخلة (وليس تعريفات مباشرة)
+NESTED_AT_RULES = {
+    'media', 'supports', 'document', '-moz-document', 'layer', 'container', 'scope', 'starting-style'
+}
+
+# الخصائص المختصرة ذات الجهات الأربع (أعلى، يمين، أسفل، يسار)
+TRBL_SHORTHANDS = {
+    'margin': 'margin-{}',
+    'padding': 'padding-{}',
+    'border-width': 'border-{}-width',
+    'border-style': 'border-{}-style',
+    'border-color': 'border-{}-color',
+}
+_SIDES = ('top', 'right', 'bottom', 'left')
+
+# أشباه الأصناف والعناصر المدعومة في كل المتصفحات (CSS 2.1 و Selectors 3): دمج محدداتها مع غيرها آمن
+SAFE_PSEUDOS = {
+    'link', 'visited', 'hover', 'active', 'focus', 'target', 'lang', 'root', 'empty',
+    'enabled', 'disabled', 'checked', 'first-child', 'last-child', 'only-child',
+    'first-of-type', 'last-of-type', 'only-of-type', 'nth-child', 'nth-last-child',
+    'nth-of-type', 'nth-last-of-type', 'not', 'before', 'after', 'first-line', 'first-letter'
+}
+
+_WS_RE = re.compile(r'\s+')
+_HEX_RE = re.compile(r'#([0-9a-fA-F]{6})\b')
+_ZERO_UNIT_RE = re.compile(r'(?<![\w.#-])0(?:\.0+)?(?:px|em|rem|pt|pc|cm|mm|in|ex|ch|vw|vh|vmin|vmax)(?![\w%])')
+_LEADING_ZERO_RE = re.compile(r'(?<![\w.])0+(\.\d)')
+_MATH_FUNCTIONS_RE = re.compile(r'\b(?:calc|clamp|min|max|var|env)\(', re.IGNORECASE)
+_COMBINATOR_RE = re.compile(r'\s*([>+~,])\s*')
+_PSEUDO_RE = re.compile(r'::?([a-zA-Z-]+)(?:\(([^()]*)\))?')
+# معامل :not() في Selectors 3: محدد بسيط واحد (بدون قوائم أو مجمعات)
+_SIMPLE_SELECTOR_RE = re.compile(r'^(?:[\w*.#-]+|\[[^\]]*\]|:[a-zA-Z-]+)$')
+
+
+def _skip_string(css: str, i: int) -> int:
+    """تجاوز نص بين علامتي تنصيص مع دعم الهروب"""
+    quote = css[i]
+    i += 1
+    while i < len(css):
+        ch = css[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == quote or ch == '\n':
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_comment(css: str, i: int) -> int:
+    end = css.find('*/', i + 2)
+    return len(css) if end == -1 else end + 2
+
+
+def _read_until(css: str, i: int, stops: str) -> int:
+    """التقدم حتى أحد المحارف stops خارج النصوص والتعليقات والأقواس"""
+    depth = 0
+    length = len(css)
+    while i < length:
+        ch = css[i]
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if ch == '/' and css.startswith('/*', i):
+            i = _skip_comment(css, i)
+            continue
+        if depth == 0 and ch in stops:
+            return i
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth = max(depth - 1, 0)
+        i += 1
+    return length
+
+
+def _matching_brace(css: str, i: int) -> int:
+    """موضع } المطابق لـ { في الموضع i"""
+    depth = 0
+    length = len(css)
+    while i < length:
+        ch = css[i]
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if ch == '/' and css.startswith('/*', i):
+            i = _skip_comment(css, i)
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return length
+
+
+def strip_comments(text: str) -> str:
+    """إزالة التعليقات مع الحفاظ على النصوص"""
+    out = []
+    i = 0
+    length = len(text)
+    while i < length:
+        ch = text[i]
+        if ch in '"\'':
+            end = _skip_string(text, i)
+            out.append(text[i:end])
+            i = end
+        elif ch == '/' and text.startswith('/*', i):
+            i = _skip_comment(text, i)
+            out.append(' ')
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def split_top_level(text: str, separator: str) -> List[str]:
+    """تقسيم النص على الفاصل خارج النصوص والأقواس"""
+    parts = []
+    start = 0
+    while True:
+        end = _read_until(text, start, separator)
+        parts.append(text[start:end])
+        if end >= len(text):
+            return parts
+        start = end + 1
+
+
+# ==================== التحليل ====================
+def parse_declarations(body: str) -> List[Dict[str, Any]]:
+    """تحليل كتلة التعريفات إلى [{'property', 'value', 'important'}]"""
+    declarations = []
+    for part in split_top_level(strip_comments(body), ';'):
+        prop, sep, value = part.partition(':')
+        prop = prop.strip()
+        if not sep or not prop:
+            continue
+        value = value.strip()
+        important = False
+        match = re.search(r'!\s*important\s*$', value, re.IGNORECASE)
+        if match:
+            important = True
+            value = value[:match.start()].strip()
+        # أسماء الخصائص غير حساسة لحالة الأحرف، عدا المتغيرات --name
+        declarations.append({
+            'property': prop if prop.startswith('--') else prop.lower(),
+            'value': value,
+            'important': important
+        })
+    return declarations
+
+
+def parse_css(css: str) -> List[Dict[str, Any]]:
+    """تحليل ملف CSS إلى قائمة عقد: rule / at-rule / comment"""
+    nodes: List[Dict[str, Any]] = []
+    i = 0
+    length = len(css)
+    while i < length:
+        ch = css[i]
+        if ch.isspace() or ch == ';':
+            i += 1
+            continue
+        if css.startswith('/*', i):
+            end = _skip_comment(css, i)
+            if css.startswith('/*!', i):
+                # تعليقات الترخيص تبقى
+                nodes.append({'type': 'comment', 'text': css[i:end]})
+            i = end
+            continue
+        if css.startswith('<!--', i) or css.startswith('-->', i):
+            i += 4 if ch == '<' else 3
+            continue
+
+        if ch == '@':
+            match = re.match(r'@([\w-]+)', css[i:])
+            name = match.group(1).lower() if match else ''
+            end = _read_until(css, i + 1 + len(name), ';{}')
+            prelude = strip_comments(css[i + 1 + len(name):end]).strip()
+            if end >= length or css[end] in ';}':
+                nodes.append({'type': 'at-rule', 'name': name, 'prelude': prelude, 'block': None})
+                i = end + 1
+                continue
+            close = _matching_brace(css, end)
+            body = css[end + 1:close]
+            node = {'type': 'at-rule', 'name': name, 'prelude': prelude}
+            if name in NESTED_AT_RULES or name.endswith('keyframes'):
+                node['block'] = 'rules'
+                node['children'] = parse_css(body)
+            else:
+                node['block'] = 'declarations'
+                node['declarations'] = parse_declarations(body)
+            nodes.append(node)
+            i = close + 1
+            continue
+
+        end = _read_until(css, i, '{};')
+        if end >= length or css[end] != '{':
+            # نص غير صالح: نتجاوزه كما يفعل المتصفح
+            i = end + 1
+            continue
+        close = _matching_brace(css, end)
+        selector = strip_comments(css[i:end]).strip()
+        body = css[end + 1:close]
+        node = {'type': 'rule', 'selector': selector}
+        if '{' in strip_comments(body):
+            # CSS متداخل: نحتفظ بالنص كما هو
+            node['raw'] = body
+        else:
+            node['declarations'] = parse_declarations(body)
+        nodes.append(node)
+        i = close + 1
+    return nodes
+
+
+def iter_rules(nodes: List[Dict[str, Any]]):
+    """المرور على جميع القواعد العادية بما فيها داخل @media وغيرها"""
+    for node in nodes:
+        if node['type'] == 'rule':
+            yield node
+        elif node.get('block') == 'rules':
+            yield from iter_rules(node['children'])
+
+
+# ==================== التصغير ====================
+def _map_unquoted(value: str, func) -> str:
+    """تطبيق تحويل على أجزاء القيمة خارج النصوص و url()"""
+    out = []
+    i = 0
+    start = 0
+    length = len(value)
+    while i < length:
+        ch = value[i]
+        if ch in '"\'':
+            out.append(func(value[start:i]))
+            end = _skip_string(value, i)
+            out.append(value[i:end])
+            i = start = end
+            continue
+        if value[i:i + 4].lower() == 'url(':
+            out.append(func(value[start:i]))
+            end = _read_until(value, i + 4, ')')
+            out.append('url(' + value[i + 4:end].strip() + ')')
+            i = start = end + 1
+            continue
+        i += 1
+    out.append(func(value[start:]))
+    return ''.join(out)
+
+
+def _compress_value_part(part: str) -> str:
+    part = _WS_RE.sub(' ', part)
+    part = re.sub(r'\s*,\s*', ',', part)
+    part = _HEX_RE.sub(lambda m: _short_hex(m.group(1)), part)
+    if not _MATH_FUNCTIONS_RE.search(part):
+        # 0px -> 0 غير صالح داخل calc()
+        part = _ZERO_UNIT_RE.sub('0', part)
+    return _LEADING_ZERO_RE.sub(r'\1', part)
+
+
+def _short_hex(digits: str) -> str:
+    digits = digits.lower()
+    if digits[0] == digits[1] and digits[2] == digits[3] and digits[4] == digits[5]:
+        return '#' + digits[0] + digits[2] + digits[4]
+    return '#' + digits
+
+
+def minify_value(prop: str, value: str) -> str:
+    """تصغير قيمة تعريف واحد"""
+    if prop.startswith('--'):
+        # قيم المتغيرات تُستخدم كما هي
+        return value.strip()
+    if _MATH_FUNCTIONS_RE.search(value):
+        # نحافظ على المسافات حول + و - داخل calc() ونكتفي بطي المسافات
+        value = _map_unquoted(value, lambda part: _WS_RE.sub(' ', part))
+        value = re.sub(r'\(\s+', '(', re.sub(r'\s+\)', ')', value))
+        return _map_unquoted(value, lambda part: _HEX_RE.sub(lambda m: _short_hex(m.group(1)), part)).strip()
+    value = _map_unquoted(value, _compress_value_part).strip()
+    if prop in TRBL_SHORTHANDS:
+        value = _compact_trbl(value.split(' '))
+    return value
+
+
+def _compact_trbl(parts: List[str]) -> str:
+    """margin: 0 0 0 0 -> margin: 0"""
+    if len(parts) not in (2, 3, 4):
+        return ' '.join(parts)
+    top, right = parts[0], parts[1]
+    bottom = parts[2] if len(parts) > 2 else top
+    left = parts[3] if len(parts) > 3 else right
+    if left == right:
+        if bottom == top:
+            return top if right == top else f'{top} {right}'
+        return f'{top} {right} {bottom}'
+    return f'{top} {right} {bottom} {left}'
+
+
+def minify_selector(selector: str) -> str:
+    """طي المسافات حول المجمعات والفواصل خارج النصوص"""
+    def compress(part):
+        part = _WS_RE.sub(' ', part)
+        return _COMBINATOR_RE.sub(r'\1', part)
+    return _map_unquoted(selector, compress).strip()
+
+
+def _minify_prelude(prelude: str) -> str:
+    prelude = _WS_RE.sub(' ', prelude).strip()
+    prelude = re.sub(r'\s*,\s*', ',', prelude)
+    prelude = re.sub(r'\(\s*([\w-]+)\s*:\s*', r'(\1:', prelude)
+    return re.sub(r'\s+\)', ')', prelude)
+
+
+def _dedupe_declarations(declarations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """حذف التعريفات المكررة تماماً مع الإبقاء على آخر ظهور (لا يغير النتيجة)"""
+    seen = set()
+    result = []
+    for decl in reversed(declarations):
+        key = (decl['property'], decl['value'], decl['important'])
+        if key in seen:
+            continue
+        seen.add(key)
+        result.append(decl)
+    result.reverse()
+    return result
+
+
+def _merge_shorthands(declarations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """دمج margin-top/right/bottom/left في margin عند وجودها كاملة"""
+    for shorthand, pattern in TRBL_SHORTHANDS.items():
+        longhands = [pattern.format(side) for side in _SIDES]
+        family = [d for d in declarations if d['property'] == shorthand or d['property'] in longhands]
+        if len(family) != 4 or any(d['property'] == shorthand for d in family):
+            continue
+        by_prop = {d['property']: d for d in family}
+        if len(by_prop) != 4 or len({d['important'] for d in family}) != 1:
+            continue
+        values = [by_prop[prop]['value'] for prop in longhands]
+        if any(' ' in v or not v or v.lower() in ('inherit', 'initial', 'unset', 'revert') for v in values):
+            continue
+        merged = {'property': shorthand, 'value': _compact_trbl(values), 'important': family[0]['important']}
+        first = declarations.index(family[0])
+        declarations = [d for d in declarations if all(d is not f for f in family)]
+        declarations.insert(first, merged)
+    return declarations
+
+
+def _minify_declarations(declarations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    result = [
+        {'property': d['property'], 'value': minify_value(d['property'], d['value']), 'important': d['important']}
+        for d in declarations
+    ]
+    return _merge_shorthands(_dedupe_declarations(result))
+
+
+def _declarations_key(declarations: List[Dict[str, Any]]) -> Tuple:
+    return tuple((d['property'], d['value'], d['important']) for d in declarations)
+
+
+def _mergeable_selector(selector: str) -> bool:
+    """المحدد يستخدم أشباه أصناف/عناصر من SAFE_PSEUDOS فقط
+
+    المتصفح يُسقط القاعدة كلها إذا لم يدعم أحد محددات القائمة (مثل :has() و :is() و ::-moz-…)
+    """
+    # النصوص والمحارف المهربة (مثل .sm\:flex) ليست أشباه أصناف
+    text = re.sub(r'\\.', '_', selector)
+    text = re.sub(r'"[^"]*"|\'[^\']*\'', '""', text)
+    for match in _PSEUDO_RE.finditer(text):
+        name, argument = match.group(1).lower(), match.group(2)
+        if name not in SAFE_PSEUDOS:
+            return False
+        if name == 'not':
+            argument = (argument or '').strip()
+            if not _SIMPLE_SELECTOR_RE.match(argument) or \
+                    (argument.startswith(':') and argument[1:].lower() not in SAFE_PSEUDOS - {'not'}):
+                return False
+    return True
+
+
+def _merge_adjacent(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """دمج القواعد المتجاورة ذات المحدد نفسه أو التعريفات نفسها"""
+    result: List[Dict[str, Any]] = []
+    for node in nodes:
+        prev = result[-1] if result else None
+        if prev is not None and node['type'] == 'rule' and prev['type'] == 'rule' \
+                and 'declarations' in node and 'declarations' in prev:
+            if prev['selector'] == node['selector']:
+                prev['declarations'] = _merge_shorthands(
+                    _dedupe_declarations(prev['declarations'] + node['declarations']))
+                continue
+            if _declarations_key(prev['declarations']) == _declarations_key(node['declarations']) \
+                    and _mergeable_selector(prev['selector']) and _mergeable_selector(node['selector']):
+                prev['selector'] = f"{prev['selector']},{node['selector']}"
+                continue
+        if prev is not None and node['type'] == 'at-rule' and prev['type'] == 'at-rule' \
+                and node.get('block') == 'rules' and prev.get('block') == 'rules' \
+                and node['name'] == prev['name'] and node['prelude'] == prev['prelude'] \
+                and node['name'] in ('media', 'supports'):
+            prev['children'] = _merge_adjacent(prev['children'] + node['children'])
+            continue
+        result.append(node)
+    return result
+
+
+def minify_nodes(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """تصغير شجرة العقد (تُنشئ عقداً جديدة)"""
+    result = []
+    for node in nodes:
+        if node['type'] == 'comment':
+            result.append(node)
+        elif node['type'] == 'rule':
+            minified = {'type': 'rule', 'selector': minify_selector(node['selector'])}
+            if 'raw' in node:
+                minified['raw'] = _WS_RE.sub(' ', strip_comments(node['raw'])).strip()
+            else:
+                minified['declarations'] = _minify_declarations(node['declarations'])
+                if not minified['declarations']:
+                    continue
+            result.append(minified)
+        else:
+            minified = {'type': 'at-rule', 'name': node['name'],
+                        'prelude': _minify_prelude(node['prelude']), 'block': node['block']}
+            if node['block'] == 'rules':
+                minified['children'] = minify_nodes(node['children'])
+                if not minified['children']:
+                    continue
+            elif node['block'] == 'declarations':
+                minified['declarations'] = [
+                    {'property': d['property'], 'value': minify_value(d['property'], d['value']),
+                     'important': d['important']}
+                    for d in node['declarations']
+                ]
+            result.append(minified)
+    return _merge_adjacent(result)
+
+
+# ==================== الكتابة ====================
+def _serialize_declarations(declarations: List[Dict[str, Any]]) -> str:
+    return ';'.join(
+        f"{d['property']}:{d['value']}{'!important' if d['important'] else ''}" for d in declarations
+    )
+
+
+def serialize_css(nodes: List[Dict[str, Any]]) -> str:
+    """كتابة الشجرة كنص CSS مضغوط"""
+    out = []
+    for node in nodes:
+        if node['type'] == 'comment':
+            out.append(node['text'] + '\n')
+        elif node['type'] == 'rule':
+            body = node['raw'] if 'raw' in node else _serialize_declarations(node['declarations'])
+            out.append(f"{node['selector']}{{{body}}}")
+        else:
+            head = f"@{node['name']}" + (f" {node['prelude']}" if node['prelude'] else '')
+            if node['block'] is None:
+                out.append(head + ';')
+            elif node['block'] == 'rules':
+                out.append(f"{head}{{{serialize_css(node['children'])}}}")
+            else:
+                out.append(f"{head}{{{_serialize_declarations(node['declarations'])}}}")
+    return ''.join(out)
+
+
+def minify_css(css: str) -> str:
+    """تصغير CSS: حذف التعليقات والمسافات، اختصار القيم، ودمج القواعد والخصائص"""
+    return serialize_css(minify_nodes(parse_css(css)))
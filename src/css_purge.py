@@ -0,0 +1,423 @@
+"""
+حذف قواعد CSS غير المستخدمة بناءً على الأصناف والمعرفات والوسوم المستخدمة في صفحات المشروع
+"""
+
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+try:
+    from .css_parser import parse_css, minify_nodes, serialize_css, split_top_level
+except ImportError:
+    from css_parser import parse_css, minify_nodes, serialize_css, split_top_level
+
+
+# وسوم موجودة في كل صفحة حتى لو لم تُكتب صراحة
+IMPLICIT_TAGS = {'html', 'body', 'head'}
+
+# علامة تحل محل كتل PHP داخل القيم (class="btn-<?= $type ?>" تعني أي صنف يبدأ بـ btn-)
+_PHP_MARK = '\x00'
+_PHP_BLOCK_RE = re.compile(r'<\?(?:php|=)?[\s\S]*?(?:\?>|$)')
+_PHP_CLASS_RE = re.compile(r'class\s*=\s*\\?["\']([^"\'\\]*)', re.IGNORECASE)
+
+# استخدام الأصناف والمحددات من JavaScript
+_JS_CLASS_CALL_RE = re.compile(
+    r'(?:addClass|removeClass|toggleClass|hasClass)\(\s*(["\'`])(.*?)\1', re.DOTALL)
+_JS_CLASSLIST_RE = re.compile(r'classList\.(?:add|remove|toggle|contains|replace)\(([^)]*)\)')
+_JS_CLASSNAME_RE = re.compile(r'className\s*[+]?=\s*(["\'`])(.*?)\1', re.DOTALL)
+_JS_SELECTOR_RE = re.compile(
+    r'(?:\$|jQuery|querySelector(?:All)?|closest|find|matches)\(\s*(["\'`])(.*?)\1', re.DOTALL)
+_JS_ID_RE = re.compile(r'getElementById\(\s*["\']([^"\']+)["\']')
+_JS_CLASS_LOOKUP_RE = re.compile(r'getElementsByClassName\(\s*["\']([^"\']+)["\']')
+_JS_TAG_RE = re.compile(r'(?:createElement|getElementsByTagName)\(\s*["\']([\w-]+)["\']')
+_STRING_RE = re.compile(r'(["\'`])((?:\\.|(?!\1).)*)\1')
+
+_IDENT_CHAR_RE = re.compile(r'[\w\-\u00a0-\uffff]')
+_ESCAPE_RE = re.compile(r'\\([0-9a-fA-F]{1,6}\s?|.)')
+
+
+def unescape_ident(ident: str) -> str:
+    """فك الهروب في أسماء CSS: md\\:flex -> md:flex"""
+    def replace(match):
+        value = match.group(1)
+        if re.fullmatch(r'[0-9a-fA-F]{1,6}\s?', value):
+            code = int(value.strip(), 16)
+            return chr(code) if 0 < code <= 0x10FFFF else '\ufffd'
+        return value
+    return _ESCAPE_RE.sub(replace, ident)
+
+
+def _read_ident(selector: str, i: int) -> Tuple[str, int]:
+    start = i
+    length = len(selector)
+    while i < length:
+        ch = selector[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if not _IDENT_CHAR_RE.match(ch):
+            break
+        i += 1
+    return unescape_ident(selector[start:i]), i
+
+
+def _skip_balanced(selector: str, i: int) -> int:
+    """تجاوز (...) أو [...] مع النصوص بداخلها"""
+    opening = selector[i]
+    closing = ')' if opening == '(' else ']'
+    depth = 0
+    length = len(selector)
+    while i < length:
+        ch = selector[i]
+        if ch in '"\'':
+            end = selector.find(ch, i + 1)
+            i = length if end == -1 else end + 1
+            continue
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == opening:
+            depth += 1
+        elif ch == closing:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return length
+
+
+def selector_tokens(selector: str) -> Set[Tuple[str, str]]:
+    """المتطلبات التي يجب وجودها في الصفحة ليطابق المحدد: {('class'|'id'|'tag'|'attr', الاسم)}
+
+    محتوى ‎:not() و ‎:is() وغيرها لا يُعتبر متطلباً (الإبقاء على قاعدة زائدة أفضل من حذف قاعدة مستخدمة)
+    """
+    tokens: Set[Tuple[str, str]] = set()
+    i = 0
+    length = len(selector)
+    while i < length:
+        ch = selector[i]
+        if ch == '.':
+            name, i = _read_ident(selector, i + 1)
+            if name:
+                tokens.add(('class', name))
+        elif ch == '#':
+            name, i = _read_ident(selector, i + 1)
+            if name:
+                tokens.add(('id', name))
+        elif ch == '[':
+            end = _skip_balanced(selector, i)
+            name = re.match(r'\[\s*(?:[\w*-]*\|)?([\w-]+)', selector[i:end])
+            if name:
+                tokens.add(('attr', name.group(1).lower()))
+            i = end
+        elif ch == ':':
+            i += 2 if selector.startswith('::', i) else 1
+            _, i = _read_ident(selector, i)
+            if i < length and selector[i] == '(':
+                i = _skip_balanced(selector, i)
+        elif ch.isalpha():
+            name, i = _read_ident(selector, i)
+            tokens.add(('tag', name.lower()))
+        elif ch == '\\':
+            _, i = _read_ident(selector, i)
+        else:
+            i += 1
+    return tokens
+
+
+class _UsageHTMLParser(HTMLParser):
+    """جمع الوسوم والأصناف والمعرفات والخصائص من HTML"""
+
+    def __init__(self, usage: 'SelectorUsage'):
+        super().__init__(convert_charrefs=True)
+        self.usage = usage
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        usage = self.usage
+        usage.tags.add(tag.lower())
+        self._in_script = tag.lower() == 'script'
+        for name, value in attrs:
+            name = name.lower()
+            usage.attributes.add(name)
+            if value is None:
+                continue
+            if name == 'class':
+                usage.add_classes(value)
+            elif name == 'id':
+                usage.add_id(value)
+            elif name.startswith('data-') and name.endswith('class'):
+                # data-bs-custom-class="x" يضيف أصنافاً عبر JavaScript
+                usage.add_classes(value)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self._in_script = False
+
+    def handle_endtag(self, tag):
+        if tag.lower() == 'script':
+            self._in_script = False
+
+    def handle_data(self, data):
+        if self._in_script:
+            self.usage.feed_js(data)
+
+
+class SelectorUsage:
+    """مجموعة الأصناف والمعرفات والوسوم والخصائص المستخدمة في المشروع"""
+
+    def __init__(self):
+        self.classes: Set[str] = set()
+        self.ids: Set[str] = set()
+        self.tags: Set[str] = set(IMPLICIT_TAGS)
+        self.attributes: Set[str] = set()
+        # أجزاء أصناف مولدة ديناميكياً (btn- من class="btn-<?= $type ?>")
+        self.class_prefixes: Set[str] = set()
+
+    # ==================== الإضافة ====================
+    def add_classes(self, value: str):
+        for name in value.split():
+            if _PHP_MARK in name:
+                prefix = name.split(_PHP_MARK)[0]
+                if prefix:
+                    self.class_prefixes.add(prefix)
+                continue
+            if '${' in name or '{{' in name:
+                prefix = re.split(r'\$\{|\{\{', name)[0]
+                if prefix:
+                    self.class_prefixes.add(prefix)
+                continue
+            self.classes.add(name)
+
+    def add_id(self, value: str):
+        value = value.strip()
+        if value and _PHP_MARK not in value:
+            self.ids.add(value)
+
+    def add_selector(self, selector: str):
+        """إضافة ما يستخدمه محدد CSS مكتوب في JavaScript ($('.foo'))"""
+        for kind, name in selector_tokens(selector):
+            if kind == 'class':
+                self.classes.add(name)
+            elif kind == 'id':
+                self.ids.add(name)
+            elif kind == 'tag':
+                self.tags.add(name)
+            else:
+                self.attributes.add(name)
+
+    # ==================== المصادر ====================
+    def feed_html(self, content: str):
+        parser = _UsageHTMLParser(self)
+        try:
+            parser.feed(content)
+            parser.close()
+        except Exception:
+            # HTML تالف: نكتفي بالبحث النصي عن الأصناف
+            for match in _PHP_CLASS_RE.finditer(content):
+                self.add_classes(match.group(1))
+
+    def feed_php(self, content: str):
+        """قوالب PHP: HTML بعد استبدال كتل PHP، مع الأصناف المكتوبة داخل echo"""
+        for block in _PHP_BLOCK_RE.findall(content):
+            for match in _PHP_CLASS_RE.finditer(block):
+                self.add_classes(match.group(1))
+        self.feed_html(_PHP_BLOCK_RE.sub(_PHP_MARK, content))
+
+    def feed_js(self, content: str):
+        """الأصناف والمحددات المستخدمة من JavaScript"""
+        for match in _JS_CLASS_CALL_RE.finditer(content):
+            self.add_classes(match.group(2))
+        for match in _JS_CLASSLIST_RE.finditer(content):
+            for string in _STRING_RE.finditer(match.group(1)):
+                self.add_classes(string.group(2))
+        for match in _JS_CLASSNAME_RE.finditer(content):
+            self.add_classes(match.group(2))
+        for match in _JS_SELECTOR_RE.finditer(content):
+            selector = match.group(2)
+            if '<' in selector:
+                # $('<div class="x">') ينشئ عناصر
+                self.feed_html(selector)
+            else:
+                self.add_selector(selector)
+        for match in _JS_ID_RE.finditer(content):
+            self.add_id(match.group(1))
+        for match in _JS_CLASS_LOOKUP_RE.finditer(content):
+            self.add_classes(match.group(1))
+        for match in _JS_TAG_RE.finditer(content):
+            self.tags.add(match.group(1).lower())
+        for match in _PHP_CLASS_RE.finditer(content):
+            # قوالب HTML داخل نصوص JavaScript
+            self.add_classes(match.group(1))
+
+    def feed_file(self, path: Path, content: str):
+        suffix = Path(path).suffix.lower()
+        if suffix in ('.php', '.phtml'):
+            self.feed_php(content)
+        elif suffix in ('.js', '.mjs', '.cjs', '.jsx', '.ts', '.tsx', '.vue'):
+            self.feed_js(content)
+        else:
+            self.feed_html(content)
+
+    # ==================== التحويل ====================
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {
+            'classes': sorted(self.classes),
+            'ids': sorted(self.ids),
+            'tags': sorted(self.tags),
+            'attributes': sorted(self.attributes),
+            'class_prefixes': sorted(self.class_prefixes)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Iterable[str]]) -> 'SelectorUsage':
+        usage = cls()
+        usage.classes.update(data.get('classes', []))
+        usage.ids.update(data.get('ids', []))
+        usage.tags.update(data.get('tags', []))
+        usage.attributes.update(data.get('attributes', []))
+        usage.class_prefixes.update(data.get('class_prefixes', []))
+        return usage
+
+    @classmethod
+    def collect(cls, project_path: Path, excluded_dirs: Iterable[str] = ()) -> 'SelectorUsage':
+        """جمع الاستخدام من ملفات HTML/PHP/JS في المشروع"""
+        usage = cls()
+        excluded = set(excluded_dirs)
+        suffixes = {'.html', '.htm', '.php', '.phtml', '.js', '.mjs', '.jsx', '.ts', '.tsx', '.vue'}
+        for path in Path(project_path).rglob('*'):
+            if path.suffix.lower() not in suffixes or not path.is_file():
+                continue
+            if excluded & set(path.relative_to(project_path).parts[:-1]):
+                continue
+            if path.name.endswith('.min.js'):
+                # كود المكتبات لا يحدد ما تستخدمه الصفحات
+                continue
+            try:
+                usage.feed_file(path, path.read_text(encoding='utf-8', errors='ignore'))
+            except OSError:
+                continue
+        return usage
+
+
+class CSSPurger:
+    """حذف القواعد غير المستخدمة باستخدام فهرس معكوس: رمز -> المحددات التي تتطلبه
+
+    بدلاً من فحص كل قاعدة مقابل كل الصفحات، يُبنى الفهرس مرة واحدة ثم تُحسب
+    المحددات المطابقة بالمرور على الرموز المستخدمة فقط
+    """
+
+    def __init__(self, usage: SelectorUsage, safelist: Iterable[str] = (),
+                 safelist_patterns: Iterable[str] = ()):
+        self.usage = usage
+        self.safelist = set(safelist)
+        self.safelist_patterns = [re.compile(p) for p in safelist_patterns]
+
+    def _token_used(self, kind: str, name: str) -> bool:
+        usage = self.usage
+        if kind == 'class':
+            if name in usage.classes or any(name.startswith(p) for p in usage.class_prefixes):
+                return True
+        elif kind == 'id':
+            if name in usage.ids:
+                return True
+        elif kind == 'tag':
+            if name in usage.tags:
+                return True
+        elif name in usage.attributes:
+            return True
+        return name in self.safelist or any(p.search(name) for p in self.safelist_patterns)
+
+    def _build_index(self, nodes: List[Dict[str, Any]]):
+        """تسجيل كل محدد مع عدد متطلباته وفهرس الرموز"""
+        selectors: List[List[str]] = []
+        missing: List[int] = []
+        index: Dict[Tuple[str, str], List[int]] = {}
+        rules = []
+
+        def visit(children):
+            for node in children:
+                if node['type'] == 'rule':
+                    parts = [p.strip() for p in split_top_level(node['selector'], ',')]
+                    ids = []
+                    for part in parts:
+                        selector_id = len(selectors)
+                        selectors.append(part)
+                        tokens = selector_tokens(part)
+                        missing.append(len(tokens))
+                        for token in tokens:
+                            index.setdefault(token, []).append(selector_id)
+                        ids.append(selector_id)
+                    rules.append((node, ids))
+                elif node.get('block') == 'rules' and not node['name'].endswith('keyframes'):
+                    visit(node['children'])
+
+        visit(nodes)
+        return selectors, missing, index, rules
+
+    def purge_nodes(self, nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """تعديل الشجرة في مكانها وإرجاع إحصائيات الحذف"""
+        selectors, missing, index, rules = self._build_index(nodes)
+
+        for token, selector_ids in index.items():
+            if self._token_used(*token):
+                for selector_id in selector_ids:
+                    missing[selector_id] -= 1
+
+        removed_selectors = 0
+        for node, ids in rules:
+            kept = [selectors[s] for s in ids if missing[s] == 0]
+            removed_selectors += len(ids) - len(kept)
+            node['selector'] = ','.join(kept)
+
+        rules_before = len(rules)
+        nodes[:] = self._prune(nodes)
+        kept_rules = sum(1 for _ in self._iter_rules(nodes))
+        return {
+            'rules_before': rules_before,
+            'rules_after': kept_rules,
+            'selectors_removed': removed_selectors
+        }
+
+    def _prune(self, nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """حذف القواعد الفارغة و ‎@media الفارغة و ‎@keyframes غير المستخدمة"""
+        result = []
+        for node in nodes:
+            if node['type'] == 'rule':
+                if node['selector']:
+                    result.append(node)
+            elif node.get('block') == 'rules' and not node['name'].endswith('keyframes'):
+                node['children'] = self._prune(node['children'])
+                if node['children']:
+                    result.append(node)
+            else:
+                result.append(node)
+
+        used_text = ' '.join(
+            d['value'] for rule in self._iter_rules(result) for d in rule.get('declarations', [])
+            if 'animation' in d['property'] or d['property'].startswith('--')
+        ) + ' '.join(rule.get('raw', '') for rule in self._iter_rules(result))
+        return [
+            node for node in result
+            if not (node['type'] == 'at-rule' and node['name'].endswith('keyframes')
+                    and not re.search(r'(?<![\w-])' + re.escape(node['prelude'].strip('\'"')) + r'(?![\w-])', used_text))
+        ]
+
+    @staticmethod
+    def _iter_rules(nodes):
+        for node in nodes:
+            if node['type'] == 'rule':
+                yield node
+            elif node.get('block') == 'rules':
+                yield from CSSPurger._iter_rules(node['children'])
+
+    def purge(self, css: str, minify: bool = True) -> Tuple[str, Dict[str, Any]]:
+        """حذف القواعد غير المستخدمة من نص CSS وإرجاع (النص الجديد، الإحصائيات)"""
+        nodes = parse_css(css)
+        stats = self.purge_nodes(nodes)
+        if minify:
+            nodes = minify_nodes(nodes)
+        output = serialize_css(nodes)
+        stats.update(size_before=len(css.encode('utf-8')), size_after=len(output.encode('utf-8')))
+        return output, stats
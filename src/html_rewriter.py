@@ -0,0 +1,242 @@
+"""
+إعادة كتابة وسوم HTML/PHP بشكل متدفق في مرور واحد: النص يمر كما هو عدا الوسوم التي يستبدلها المستدعي
+"""
+
+import re
+import html
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+
+_TAG_NAME_RE = re.compile(r'<([a-zA-Z][^\s/>\x00]*)')
+_ATTR_RE = re.compile(r'''\s*([^\s"'>/=\x00]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'=<>`]+))?''')
+_PHP_RE = re.compile(r'<\?[\s\S]*?(?:\?>|$)')
+
+# عناصر نصها الداخلي ليس HTML (لا يُبحث فيه عن وسوم)
+RAW_TEXT_TAGS = {'script', 'style', 'textarea', 'title'}
+
+# وسم أطول من هذا بدون > يُعامل كنص (HTML تالف)
+MAX_TAG_LENGTH = 64 * 1024
+
+
+class Tag:
+    """وسم بداية: الاسم والخصائص (القيم بعد فك الكيانات، None للخاصية المنطقية) والنص الأصلي"""
+
+    def __init__(self, name: str, raw: str):
+        self.name = name
+        self.raw = raw
+        self._spans: List[Tuple[str, int, int]] = []
+        self.attrs: Dict[str, Optional[str]] = {}
+
+        # كتل PHP داخل الوسم تُخفى حتى لا تكسر تحليل الخصائص (مع الحفاظ على المواضع)
+        masked = _PHP_RE.sub(lambda m: '\x00' * len(m.group()), raw)
+        end = len(raw) - (2 if raw.endswith('/>') else 1)
+        pos = 1 + len(name)
+        while pos < end:
+            match = _ATTR_RE.match(masked, pos, end)
+            if not match or match.end() == pos:
+                pos += 1
+                continue
+            attr = match.group(1).lower()
+            value = None
+            if match.group(2) is not None:
+                value = raw[match.start(2):match.end(2)]
+                if value[:1] in '"\'':
+                    value = value[1:-1]
+                value = html.unescape(value)
+            if attr not in self.attrs:
+                self.attrs[attr] = value
+                self._spans.append((attr, match.start(), match.end()))
+            pos = match.end()
+
+    def with_attrs(self, **changes: Optional[str]) -> str:
+        """نص الوسم بعد تعديل خصائص (القيمة None تحذف الخاصية)؛ بقية الوسم كما هو"""
+        changes = {name.replace('_', '-'): value for name, value in changes.items()}
+        parts = []
+        pos = 0
+        for attr, start, end in self._spans:
+            if attr not in changes:
+                continue
+            parts.append(self.raw[pos:start])
+            value = changes.pop(attr)
+            if value is not None:
+                parts.append(f' {attr}="{html.escape(value)}"')
+            pos = end
+        tail_start = len(self.raw) - (2 if self.raw.endswith('/>') else 1)
+        parts.append(self.raw[pos:tail_start])
+        for attr, value in changes.items():
+            if value is not None:
+                parts.append(f' {attr}="{html.escape(value)}"')
+        parts.append(self.raw[tail_start:])
+        return ''.join(parts)
+
+
+class StreamingTagRewriter:
+    """يقرأ النص على دفعات ويعيد الناتج أولاً بأول؛ لا يحتفظ إلا بالجزء غير المكتمل من آخر دفعة
+
+    handler(tag) يُستدعى لوسوم البداية المطلوبة فقط ويعيد None للإبقاء أو النص البديل لوسم البداية؛
+    النص الفارغ يحذف العنصر كله (ومع <script> و <style> محتواهما ووسم النهاية)
+    """
+
+    def __init__(self, handler: Callable[[Tag], Optional[str]], tags: Iterable[str]):
+        self.handler = handler
+        self.tags = {t.lower() for t in tags}
+        self._buffer = ''
+        self._raw_tag: Optional[str] = None
+        self._raw_end_re = None
+        self._dropping = False
+
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        return self._process(final=False)
+
+    def close(self) -> str:
+        return self._process(final=True)
+
+    # ==================== التحليل ====================
+    def _process(self, final: bool) -> str:
+        buf = self._buffer
+        length = len(buf)
+        out = []
+        pos = 0
+        while pos < length:
+            if self._raw_tag:
+                match = self._raw_end_re.search(buf, pos)
+                close = buf.find('>', match.end()) if match else -1
+                if close < 0:
+                    # قد ينقسم وسم النهاية بين دفعتين: نحتفظ بطرف يكفي لاكتشافه
+                    if match:
+                        safe = match.start()
+                    else:
+                        safe = length if final else max(pos, length - len(self._raw_tag) - 2)
+                    if final:
+                        safe = length
+                    if not self._dropping:
+                        out.append(buf[pos:safe])
+                    pos = safe
+                    break
+                if not self._dropping:
+                    out.append(buf[pos:close + 1])
+                pos = close + 1
+                self._raw_tag = None
+                self._dropping = False
+                continue
+
+            lt = buf.find('<', pos)
+            if lt < 0:
+                out.append(buf[pos:])
+                pos = length
+                break
+            out.append(buf[pos:lt])
+            pos = lt
+            end = self._construct_end(buf, lt, final)
+            if end < 0:
+                break
+            out.append(self._handle(buf[lt:end]))
+            pos = end
+
+        self._buffer = buf[pos:]
+        if final and self._buffer:
+            if not (self._raw_tag and self._dropping):
+                out.append(self._buffer)
+            self._buffer = ''
+        return ''.join(out)
+
+    def _construct_end(self, buf: str, lt: int, final: bool) -> int:
+        """نهاية البناء الذي يبدأ عند < أو ‎-1 إذا لم يكتمل بعد"""
+        length = len(buf)
+        if length - lt < 4 and not final:
+            return -1
+        if buf.startswith('<!--', lt):
+            end = buf.find('-->', lt + 4)
+            terminator = 3
+        elif buf.startswith('<?', lt):
+            end = buf.find('?>', lt + 2)
+            terminator = 2
+        elif buf.startswith('<!', lt) or buf.startswith('</', lt):
+            end = buf.find('>', lt + 2)
+            terminator = 1
+        elif lt + 1 < length and buf[lt + 1].isalpha():
+            end = self._tag_end(buf, lt)
+            terminator = 0
+        else:
+            return lt + 1
+        if end >= 0:
+            return end + terminator
+        if final:
+            return length
+        if length - lt > MAX_TAG_LENGTH:
+            return lt + 1
+        return -1
+
+    @staticmethod
+    def _tag_end(buf: str, lt: int) -> int:
+        """موضع ما بعد > لوسم البداية (مع تجاوز النصوص المقتبسة وكتل PHP)"""
+        i = lt + 1
+        length = len(buf)
+        while i < length:
+            ch = buf[i]
+            if ch == '>':
+                return i + 1
+            if ch == '<' and buf.startswith('<?', i):
+                end = buf.find('?>', i + 2)
+                if end < 0:
+                    return -1
+                i = end + 2
+                continue
+            if ch in '"\'' and buf[i - 1] in '= \t\n\r':
+                i = StreamingTagRewriter._quote_end(buf, i)
+                if i < 0:
+                    return -1
+                continue
+            i += 1
+        return -1
+
+    @staticmethod
+    def _quote_end(buf: str, start: int) -> int:
+        """موضع ما بعد علامة الاقتباس المغلقة (كتل PHP داخل القيمة قد تحتوي علامات اقتباس)"""
+        quote = buf[start]
+        i = start + 1
+        while True:
+            end = buf.find(quote, i)
+            php = buf.find('<?', i, end if end >= 0 else len(buf))
+            if php < 0:
+                return end + 1 if end >= 0 else -1
+            close = buf.find('?>', php + 2)
+            if close < 0:
+                return -1
+            i = close + 2
+
+    def _handle(self, piece: str) -> str:
+        match = _TAG_NAME_RE.match(piece)
+        if not match:
+            return piece
+        name = match.group(1).lower()
+        replacement = None
+        if name in self.tags:
+            replacement = self.handler(Tag(name, piece))
+        if name in RAW_TEXT_TAGS:
+            self._raw_tag = name
+            self._raw_end_re = re.compile(rf'</{name}(?=[\s/>])', re.IGNORECASE)
+            self._dropping = replacement == ''
+        return piece if replacement is None else replacement
+
+
+def rewrite_stream(source: TextIO, target: TextIO, handler: Callable[[Tag], Optional[str]],
+                   tags: Iterable[str], chunk_size: int = 64 * 1024):
+    """إعادة كتابة ملف كامل دفعة بدفعة"""
+    rewriter = StreamingTagRewriter(handler, tags)
+    for chunk in iter(lambda: source.read(chunk_size), ''):
+        target.write(rewriter.feed(chunk))
+    target.write(rewriter.close())
+
+
+def iter_tags(source: TextIO, tags: Iterable[str], chunk_size: int = 64 * 1024) -> Iterator[Tag]:
+    """وسوم البداية المطلوبة في ملف (بنفس قواعد إعادة الكتابة)"""
+    found: List[Tag] = []
+    rewriter = StreamingTagRewriter(lambda tag: found.append(tag), tags)
+    for chunk in iter(lambda: source.read(chunk_size), ''):
+        rewriter.feed(chunk)
+        yield from found
+        found.clear()
+    rewriter.close()
+    yield from found
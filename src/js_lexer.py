@@ -0,0 +1,714 @@
+"""
+محلل معجمي خفيف لـ JavaScript/TypeScript/JSX لاستخراج الواردات واستخدام الأعضاء
+"""
+
+import re
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Set
+
+# رمز معجمي: النوع، القيمة، السطر، العمود، وهل يسبقه سطر جديد
+Token = namedtuple('Token', ['type', 'value', 'line', 'col', 'nl'])
+
+_PUNCTUATORS = [
+    '>>>=', '...', '===', '!==', '**=', '<<=', '>>=', '>>>', '&&=', '||=', '??=',
+    '=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--', '+=', '-=',
+    '*=', '%=', '&=', '|=', '^=', '**', '<<', '>>',
+    '(', ')', '[', ']', ';', ',', '<', '>', '+', '-', '*', '%', '&', '|', '^',
+    '!', '~', '?', ':', '=', '.', '@', '#'
+]
+
+_TOKEN_RE = re.compile(
+    r'(?P<ws>\s+)'
+    r'|(?P<lc>//[^\n\r\u2028\u2029]*)'
+    r'|(?P<bc>/\*[\s\S]*?(?:\*/|\Z))'
+    r'|(?P<name>[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*)'
+    r'|(?P<num>0[xXoObB][\da-fA-F_]+n?|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?n?)'
+    r'|(?P<str>\'(?:[^\'\\\n\r]|\\[\s\S])*\'|"(?:[^"\\\n\r]|\\[\s\S])*")'
+    r'|(?P<punct>' + '|'.join(re.escape(p) for p in _PUNCTUATORS if p not in ('?.',)) + r'|\?\.(?!\d))'
+)
+_BROKEN_STR_RE = re.compile(r'[\'"][^\n\r]*')
+_REGEX_RE = re.compile(r'/(?![*/])(?:[^/\\\[\n\r]|\\[^\n\r]|\[(?:[^\]\\\n\r]|\\[^\n\r])*\])+/[A-Za-z]*')
+_TEMPLATE_CHUNK_RE = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+_JSX_TEXT_RE = re.compile(r'[^<{]+')
+_JSX_NAME_RE = re.compile(r'[A-Za-z_$][\w$.:-]*')
+_JSX_STR_RE = re.compile(r'"[^"]*"|\'[^\']*\'')
+_TS_GENERIC_RE = re.compile(r'<\s*[A-Za-z_$][\w$]*\s*(?:,|extends\b)')
+_NEWLINE_RE = re.compile(r'\r\n|[\n\r\u2028\u2029]')
+
+# الكلمات التي يمكن أن يليها تعبير (وبالتالي تعبير نمطي /re/ أو JSX)
+_EXPR_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await', 'extends'
+}
+
+# الكلمات المحجوزة (لا تعتبر مراجع لمتغيرات)
+KEYWORDS = {
+    'break', 'case', 'catch', 'class', 'const', 'continue', 'debugger', 'default',
+    'delete', 'do', 'else', 'export', 'extends', 'finally', 'for', 'function', 'if',
+    'import', 'in', 'instanceof', 'new', 'return', 'super', 'switch', 'this', 'throw',
+    'try', 'typeof', 'var', 'void', 'while', 'with', 'yield', 'let', 'static',
+    'enum', 'await', 'async', 'null', 'true', 'false', 'undefined', 'of'
+}
+
+# تبعيات AMD الخاصة التي يوفرها المحمّل نفسه وليست وحدات
+AMD_PSEUDO_DEPENDENCIES = {'require', 'exports', 'module'}
+
+SCRIPT_EXTENSIONS = {'.js', '.mjs', '.cjs', '.jsx', '.ts', '.tsx', '.mts', '.cts'}
+JSX_EXTENSIONS = {'.jsx', '.tsx'}
+
+
+def _expression_allowed(prev: Optional[Token]) -> bool:
+    """هل يمكن أن يبدأ تعبير بعد الرمز السابق (لتمييز / و < )"""
+    if prev is None:
+        return True
+    if prev.type == 'name':
+        return prev.value in _EXPR_KEYWORDS
+    if prev.type == 'punct':
+        return prev.value not in (')', ']', '}', '++', '--')
+    if prev.type in ('template_head', 'template_middle'):
+        return True
+    return False
+
+
+def tokenize(source: str, jsx: bool = False) -> List[Token]:
+    """تقسيم الكود إلى رموز مع دعم القوالب والتعابير النمطية و JSX"""
+    tokens: List[Token] = []
+    append = tokens.append
+    pos = 0
+    length = len(source)
+    line = 1
+    line_start = 0
+    newline = False
+    prev: Optional[Token] = None
+
+    # مكدس الأقواس والأنماط: '{' عادي، 'tpl' تعبير قالب، 'jsxexpr' تعبير JSX،
+    # 'jsx_tag' وسم مفتوح، 'jsx_children' محتوى عنصر، 'jsx_close' وسم إغلاق
+    stack: List[str] = []
+
+    if source.startswith('#!'):
+        end = source.find('\n')
+        pos = length if end == -1 else end
+
+    def advance_lines(text: str, start: int):
+        nonlocal line, line_start
+        count = 0
+        last = -1
+        for match in _NEWLINE_RE.finditer(text):
+            count += 1
+            last = match.end()
+        if count:
+            line += count
+            line_start = start + last
+        return count
+
+    while pos < length:
+        mode = stack[-1] if stack else '{'
+
+        # ==================== داخل وسم JSX ====================
+        if mode in ('jsx_tag', 'jsx_close'):
+            ch = source[pos]
+            if ch.isspace():
+                end = pos + 1
+                while end < length and source[end].isspace():
+                    end += 1
+                advance_lines(source[pos:end], pos)
+                pos = end
+                continue
+            col = pos - line_start
+            if ch == '/' and source.startswith('/>', pos):
+                stack.pop()
+                prev = Token('jsx_end', '/>', line, col, False)
+                append(prev)
+                pos += 2
+                continue
+            if ch == '>':
+                stack.pop()
+                if mode == 'jsx_close':
+                    # نهاية العنصر: الخروج من محتواه
+                    if stack and stack[-1] == 'jsx_children':
+                        stack.pop()
+                    prev = Token('jsx_end', '>', line, col, False)
+                else:
+                    stack.append('jsx_children')
+                    prev = Token('jsx', '>', line, col, False)
+                append(prev)
+                pos += 1
+                continue
+            if ch == '{':
+                stack.append('jsxexpr')
+                prev = Token('punct', '{', line, col, False)
+                append(prev)
+                pos += 1
+                continue
+            if ch in '"\'':
+                match = _JSX_STR_RE.match(source, pos)
+                value = match.group(0) if match else source[pos:]
+                prev = Token('str', value, line, col, False)
+                append(prev)
+                advance_lines(value, pos)
+                pos += len(value)
+                continue
+            match = _JSX_NAME_RE.match(source, pos)
+            if match:
+                value = match.group(0)
+                # اسم الوسم مرجع لمكوّن، وأسماء الخصائص ليست مراجع
+                kind = 'name' if prev is not None and prev.type == 'jsx' and prev.value in ('<', '</') else 'jsx_attr'
+                prev = Token(kind, value, line, col, False)
+                append(prev)
+                pos = match.end()
+                continue
+            prev = Token('punct', ch, line, col, False)
+            append(prev)
+            pos += 1
+            continue
+
+        # ==================== محتوى عنصر JSX ====================
+        if mode == 'jsx_children':
+            ch = source[pos]
+            col = pos - line_start
+            if ch == '{':
+                stack.append('jsxexpr')
+                prev = Token('punct', '{', line, col, False)
+                append(prev)
+                pos += 1
+                continue
+            if ch == '<':
+                j = pos + 1
+                while j < length and source[j].isspace():
+                    j += 1
+                if j < length and source[j] == '/':
+                    stack.append('jsx_close')
+                    prev = Token('jsx', '</', line, col, False)
+                    pos = j + 1
+                else:
+                    stack.append('jsx_tag')
+                    prev = Token('jsx', '<', line, col, False)
+                    pos += 1
+                append(prev)
+                continue
+            match = _JSX_TEXT_RE.match(source, pos)
+            value = match.group(0)
+            if value.strip():
+                append(Token('jsx_text', value, line, col, False))
+            advance_lines(value, pos)
+            pos = match.end()
+            continue
+
+        # ==================== كود JavaScript عادي ====================
+        ch = source[pos]
+        col = pos - line_start
+
+        if ch == '`' or (ch == '}' and mode == 'tpl'):
+            # قالب نصي: `...` أو استكمال بعد ${...}
+            if ch == '}':
+                stack.pop()
+            start = pos
+            pos += 1
+            match = _TEMPLATE_CHUNK_RE.match(source, pos)
+            pos = match.end()
+            if source.startswith('${', pos):
+                kind = 'template_head' if ch == '`' else 'template_middle'
+                pos += 2
+                stack.append('tpl')
+            else:
+                kind = 'template' if ch == '`' else 'template_tail'
+                pos = min(pos + 1, length)
+            value = source[start:pos]
+            prev = Token(kind, value, line, col, newline)
+            append(prev)
+            newline = False
+            advance_lines(value, start)
+            continue
+
+        if ch == '/' and pos + 1 < length and source[pos + 1] not in '/*' and _expression_allowed(prev):
+            match = _REGEX_RE.match(source, pos)
+            if match:
+                prev = Token('regex', match.group(0), line, col, newline)
+                append(prev)
+                newline = False
+                pos = match.end()
+                continue
+
+        if ch == '<' and jsx and _expression_allowed(prev) and pos + 1 < length and \
+                (source[pos + 1].isalpha() or source[pos + 1] in '>_$') and \
+                not _TS_GENERIC_RE.match(source, pos):
+            stack.append('jsx_tag')
+            prev = Token('jsx', '<', line, col, newline)
+            append(prev)
+            newline = False
+            pos += 1
+            continue
+
+        if ch == '{':
+            stack.append('{')
+            prev = Token('punct', '{', line, col, newline)
+            append(prev)
+            newline = False
+            pos += 1
+            continue
+
+        if ch == '}':
+            if stack:
+                stack.pop()
+            prev = Token('punct', '}', line, col, newline)
+            append(prev)
+            newline = False
+            pos += 1
+            continue
+
+        match = _TOKEN_RE.match(source, pos)
+        if match is None:
+            if ch in '\'"':
+                # نص غير مغلق: نتجاوز حتى نهاية السطر
+                match = _BROKEN_STR_RE.match(source, pos)
+                prev = Token('str', match.group(0), line, col, newline)
+                append(prev)
+                newline = False
+                pos = match.end()
+                continue
+            prev = Token('punct', ch, line, col, newline)
+            append(prev)
+            newline = False
+            pos += 1
+            continue
+
+        kind = match.lastgroup
+        value = match.group(0)
+        if kind == 'ws':
+            if advance_lines(value, pos):
+                newline = True
+        elif kind == 'lc':
+            pass
+        elif kind == 'bc':
+            if advance_lines(value, pos):
+                newline = True
+        else:
+            prev = Token(kind, value, line, col, newline)
+            append(prev)
+            newline = False
+        pos = match.end()
+
+    return tokens
+
+
+def string_value(token: Token) -> str:
+    """قيمة النص بدون علامات الاقتباس"""
+    value = token.value
+    if token.type == 'template':
+        return value[1:-1]
+    if len(value) >= 2 and value[0] in '\'"' and value[-1] == value[0]:
+        return value[1:-1]
+    return value[1:]
+
+
+def line_offsets(source: str) -> List[int]:
+    """موضع بداية كل سطر في النص (لتحويل سطر/عمود الرمز إلى موضع مطلق)"""
+    offsets = [0]
+    for match in _NEWLINE_RE.finditer(source):
+        offsets.append(match.end())
+    return offsets
+
+
+def token_offset(offsets: List[int], token: Token) -> int:
+    """الموضع المطلق لبداية الرمز في النص"""
+    return offsets[token.line - 1] + token.col
+
+
+class ModuleInfoExtractor:
+    """استخراج الواردات والروابط واستخدام الأعضاء من قائمة الرموز"""
+
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.imports: List[Dict[str, Any]] = []
+        self.members: List[tuple] = []
+        self.references: Set[str] = set()
+        self.named_usages: List[tuple] = []
+        self.properties: Set[str] = set()
+        # الأسماء المعرفة محلياً في الملف (var/let/const/function/class والمعاملات) على مستوى الملف كله
+        self.declared: Set[str] = set()
+        self._declaration_tokens: Set[int] = set()
+
+    def _tok(self, i: int) -> Optional[Token]:
+        return self.tokens[i] if 0 <= i < len(self.tokens) else None
+
+    def _is(self, i: int, value: str, kind: str = None) -> bool:
+        tok = self._tok(i)
+        return tok is not None and tok.value == value and (kind is None or tok.type == kind)
+
+    def _is_string(self, i: int) -> bool:
+        tok = self._tok(i)
+        return tok is not None and (tok.type == 'str' or tok.type == 'template')
+
+    def _is_property(self, i: int) -> bool:
+        prev = self._tok(i - 1)
+        return prev is not None and prev.type == 'punct' and prev.value in ('.', '?.')
+
+    def extract(self) -> Dict[str, Any]:
+        tokens = self.tokens
+        i = 0
+        count = len(tokens)
+        while i < count:
+            tok = tokens[i]
+            if tok.type == 'name' and not self._is_property(i):
+                if tok.value == 'import':
+                    i = self._parse_import(i)
+                    continue
+                if tok.value == 'export':
+                    i = self._parse_export(i)
+                    continue
+                if tok.value == 'require' and self._is(i + 1, '(') and self._is_string(i + 2) and self._is(i + 3, ')'):
+                    self._add_require(i)
+                    i += 4
+                    continue
+                if tok.value == 'define' and self._is(i + 1, '('):
+                    self._parse_amd(i)
+            i += 1
+
+        self._collect_usage()
+        self._collect_declarations()
+        return {
+            'imports': self.imports,
+            'members': self.members,
+            'named_usages': self.named_usages,
+            'properties': self.properties,
+            'references': self.references,
+            'declared': self.declared,
+            'has_jsx': any(tok.type == 'jsx' for tok in self.tokens)
+        }
+
+    # ==================== import ====================
+    def _parse_import(self, i: int) -> int:
+        start = self.tokens[i]
+        j = i + 1
+        if self._is(j, '.'):
+            return j  # import.meta
+        if self._is(j, '('):
+            if self._is_string(j + 1):
+                self._add_import(start, string_value(self.tokens[j + 1]), 'dynamic', [])
+            return j + 1
+        if self._is_string(j):
+            self._add_import(start, string_value(self.tokens[j]), 'es6_dynamic', [])
+            self._mark_declaration(i, j)
+            return j + 1
+
+        type_only = False
+        tok = self._tok(j)
+        if tok is not None and tok.value == 'type' and tok.type == 'name':
+            after = self._tok(j + 1)
+            is_default_named_type = after is not None and after.value == 'from' and self._is_string(j + 2)
+            is_alias_named_type = after is not None and after.value in (',', '=')
+            if not is_default_named_type and not is_alias_named_type:
+                type_only = True
+                j += 1
+
+        bindings = []
+        tok = self._tok(j)
+        if tok is not None and tok.type == 'name' and tok.value != 'from' or \
+                (tok is not None and tok.type == 'name' and tok.value == 'from' and self._is(j + 1, 'from')):
+            # TypeScript: import x = require('y')
+            if self._is(j + 1, '=') and self._is(j + 2, 'require') and self._is(j + 3, '(') and self._is_string(j + 4):
+                bindings.append({'local': tok.value, 'imported': 'default', 'type_only': type_only})
+                self._add_import(start, string_value(self.tokens[j + 4]), 'commonjs', bindings, type_only)
+                self._mark_declaration(i, j + 5)
+                return j + 6
+            bindings.append({'local': tok.value, 'imported': 'default', 'type_only': type_only})
+            j += 1
+            if self._is(j, ','):
+                j += 1
+
+        if self._is(j, '*') and self._is(j + 1, 'as'):
+            local = self._tok(j + 2)
+            if local is not None:
+                bindings.append({'local': local.value, 'imported': '*', 'type_only': type_only})
+            j += 3
+        elif self._is(j, '{'):
+            j, named = self._parse_named(j, type_only)
+            bindings.extend(named)
+
+        if self._is(j, 'from') and self._is_string(j + 1):
+            if bindings and all(b['type_only'] for b in bindings):
+                type_only = True
+            self._add_import(start, string_value(self.tokens[j + 1]), 'es6', bindings, type_only)
+            self._mark_declaration(i, j + 1)
+            return j + 2
+
+        return i + 1
+
+    def _parse_named(self, j: int, type_only: bool):
+        """تحليل { a, b as c, type d } وإرجاع الموضع التالي"""
+        bindings = []
+        j += 1
+        while j < len(self.tokens) and not self._is(j, '}'):
+            binding_type = type_only
+            tok = self.tokens[j]
+            nxt = self._tok(j + 1)
+            if tok.value == 'type' and nxt is not None and nxt.value not in (',', '}', 'as'):
+                binding_type = True
+                j += 1
+                tok = self.tokens[j]
+            imported = string_value(tok) if tok.type == 'str' else tok.value
+            local = imported
+            if self._is(j + 1, 'as') and self._tok(j + 2) is not None:
+                local = self.tokens[j + 2].value
+                j += 2
+            if tok.value != ',':
+                bindings.append({'local': local, 'imported': imported, 'type_only': binding_type})
+            j += 1
+            if self._is(j, ','):
+                j += 1
+        return j + 1, bindings
+
+    # ==================== export ... from ====================
+    def _parse_export(self, i: int) -> int:
+        start = self.tokens[i]
+        j = i + 1
+        type_only = False
+        if self._is(j, 'type') and (self._is(j + 1, '{') or self._is(j + 1, '*')):
+            type_only = True
+            j += 1
+
+        if self._is(j, '*'):
+            k = j + 1
+            bindings = []
+            if self._is(k, 'as') and self._tok(k + 1) is not None:
+                bindings.append({'local': self.tokens[k + 1].value, 'imported': '*', 'type_only': type_only})
+                k += 2
+            if self._is(k, 'from') and self._is_string(k + 1):
+                self._add_import(start, string_value(self.tokens[k + 1]), 'reexport', bindings, type_only)
+                self._mark_declaration(i, k + 1)
+                return k + 2
+            return j + 1
+
+        if self._is(j, '{'):
+            k, bindings = self._parse_named(j, type_only)
+            if self._is(k, 'from') and self._is_string(k + 1):
+                if bindings and all(b['type_only'] for b in bindings):
+                    type_only = True
+                self._add_import(start, string_value(self.tokens[k + 1]), 'reexport', bindings, type_only)
+                self._mark_declaration(i, k + 1)
+                return k + 2
+            # export { a, b } محلي: الأسماء مراجع وليست تعريفات
+            return j + 1
+
+        return i + 1
+
+    # ==================== CommonJS / AMD ====================
+    def _add_require(self, i: int):
+        start = self.tokens[i]
+        source = string_value(self.tokens[i + 2])
+        bindings = []
+
+        # const x = require('y')  أو  const { a, b: c } = require('y')
+        if self._is(i - 1, '='):
+            before = self._tok(i - 2)
+            if before is not None and before.type == 'name' and self._tok(i - 3) is not None and \
+                    self.tokens[i - 3].value in ('const', 'let', 'var'):
+                bindings.append({'local': before.value, 'imported': 'default', 'type_only': False})
+                self._mark_declaration(i - 2, i - 2)
+            elif before is not None and before.value == '}':
+                k = i - 3
+                while k >= 0 and not self._is(k, '{'):
+                    k -= 1
+                if k >= 1 and self.tokens[k - 1].value in ('const', 'let', 'var'):
+                    m = k + 1
+                    while m < i - 2:
+                        tok = self.tokens[m]
+                        if tok.type == 'name':
+                            if self._is(m + 1, ':') and self._tok(m + 2) is not None and self.tokens[m + 2].type == 'name':
+                                bindings.append({'local': self.tokens[m + 2].value, 'imported': tok.value, 'type_only': False})
+                                m += 3
+                                continue
+                            bindings.append({'local': tok.value, 'imported': tok.value, 'type_only': False})
+                        m += 1
+                    self._mark_declaration(k, i - 2)
+
+        self._add_import(start, source, 'commonjs', bindings)
+
+    def _parse_amd(self, i: int):
+        """define(['a', 'b'], function (a, b) { ... })"""
+        j = i + 2
+        if self._is_string(j) and self._is(j + 1, ','):
+            j += 2
+        if not self._is(j, '['):
+            return
+        sources = []
+        j += 1
+        while j < len(self.tokens) and not self._is(j, ']'):
+            if self._is_string(j):
+                sources.append((self.tokens[j], string_value(self.tokens[j])))
+            j += 1
+        params = []
+        if self._is(j + 1, ',') and self._is(j + 2, 'function') and self._is(j + 3, '('):
+            k = j + 4
+            while k < len(self.tokens) and not self._is(k, ')'):
+                if self.tokens[k].type == 'name':
+                    params.append(self.tokens[k].value)
+                    self._declaration_tokens.add(k)
+                k += 1
+        for index, (tok, source) in enumerate(sources):
+            if source in AMD_PSEUDO_DEPENDENCIES:
+                continue
+            bindings = []
+            if index < len(params):
+                bindings.append({'local': params[index], 'imported': 'default', 'type_only': False})
+            self._add_import(tok, source, 'amd', bindings)
+
+    # ==================== أدوات ====================
+    def _add_import(self, tok: Token, source: str, kind: str, bindings: List[Dict], type_only: bool = False):
+        self.imports.append({
+            'source': source,
+            'type': kind,
+            'type_only': type_only,
+            'bindings': bindings,
+            'line': tok.line,
+            'col': tok.col
+        })
+
+    def _mark_declaration(self, start: int, end: int):
+        self._declaration_tokens.update(range(start, end + 1))
+
+    def _collect_usage(self):
+        """جمع المراجع واستخدام الأعضاء (obj.member) ومواقع استخدام الواردات المسماة وأسماء الخصائص"""
+        tokens = self.tokens
+        declarations = self._declaration_tokens
+        named_locals = {
+            binding['local']
+            for imp in self.imports
+            for binding in imp['bindings']
+            if binding['imported'] not in ('default', '*')
+        }
+        for i, tok in enumerate(tokens):
+            if tok.type != 'name' or i in declarations:
+                continue
+            if self._is_property(i):
+                # أسماء الخصائص بعد أي تعبير (مثل $(el).fadeIn) لتقدير الوحدات المستخدمة
+                self.properties.add(tok.value)
+                continue
+            if tok.value in KEYWORDS:
+                continue
+            if '.' in tok.value:
+                # اسم مكوّن JSX مثل <Foo.Bar>
+                root, member = tok.value.split('.')[:2]
+                self.references.add(root)
+                self.members.append((root, member, tok.line, tok.col))
+                continue
+            self.references.add(tok.value)
+            if tok.value in named_locals:
+                self.named_usages.append((tok.value, tok.line, tok.col))
+            nxt = self._tok(i + 1)
+            if nxt is not None and nxt.type == 'punct' and nxt.value in ('.', '?.'):
+                member = self._tok(i + 2)
+                if member is not None and member.type == 'name':
+                    self.members.append((tok.value, member.value, tok.line, tok.col))
+
+
+    # ==================== التعريفات المحلية ====================
+    def _collect_declarations(self):
+        """الأسماء التي يعرفها الملف (تحجب المتغيرات العامة مثل $ و _ بنفس الاسم)"""
+        tokens = self.tokens
+        for i, tok in enumerate(tokens):
+            if tok.type == 'punct':
+                if tok.value == '=>':
+                    prev = self._tok(i - 1)
+                    if prev is not None and prev.type == 'name':
+                        self.declared.add(prev.value)
+                    elif prev is not None and prev.value == ')':
+                        start = self._matching_open(i - 1)
+                        if start is not None:
+                            self._declare_pattern(start)
+                continue
+            if tok.type != 'name' or self._is_property(i):
+                continue
+            if tok.value in ('var', 'let', 'const'):
+                self._declare_list(i + 1)
+            elif tok.value in ('function', 'class'):
+                j = i + 1
+                if self._is(j, '*'):
+                    j += 1
+                name = self._tok(j)
+                if name is not None and name.type == 'name' and name.value not in KEYWORDS:
+                    self.declared.add(name.value)
+                    j += 1
+                if tok.value == 'function' and self._is(j, '('):
+                    self._declare_pattern(j)
+            elif tok.value == 'catch' and self._is(i + 1, '('):
+                self._declare_pattern(i + 1)
+
+    def _declare_list(self, j: int):
+        """a = 1, {b, c: d} = e, [f] = g حتى ; أو نهاية العبارة"""
+        tokens = self.tokens
+        depth = 0
+        expect = True
+        while j < len(tokens):
+            tok = tokens[j]
+            if tok.type == 'punct':
+                if depth == 0 and expect and tok.value in ('{', '['):
+                    j = self._declare_pattern(j)
+                    expect = False
+                    continue
+                if tok.value in ('(', '[', '{'):
+                    depth += 1
+                elif tok.value in (')', ']', '}'):
+                    depth -= 1
+                    if depth < 0:
+                        return
+                elif depth == 0 and tok.value == ';':
+                    return
+                elif depth == 0 and tok.value == ',':
+                    expect = True
+                    j += 1
+                    continue
+            elif tok.type == 'name' and depth == 0:
+                if expect:
+                    self.declared.add(tok.value)
+                elif tok.value in ('in', 'of'):
+                    return
+                elif tok.nl and tokens[j - 1].type != 'punct':
+                    # نهاية العبارة بسطر جديد (إدراج الفاصلة المنقوطة تلقائياً)
+                    return
+            expect = False
+            j += 1
+
+    def _declare_pattern(self, start: int) -> int:
+        """الأسماء المربوطة داخل (a, b = 1, ...c) أو {a, b: c} أو [a, b]؛ يرجع الموضع بعد الإغلاق"""
+        tokens = self.tokens
+        opens = []
+        j = start
+        while j < len(tokens):
+            tok = tokens[j]
+            if tok.type == 'punct' and tok.value in ('(', '[', '{'):
+                opens.append(tok.value)
+            elif tok.type == 'punct' and tok.value in (')', ']', '}'):
+                opens.pop()
+                if not opens:
+                    return j + 1
+            elif tok.type == 'name' and opens:
+                prev = tokens[j - 1].value
+                if prev in ('(', '[', '{', ',', '...') and not self._is(j + 1, ':') or \
+                        prev == ':' and opens[-1] == '{':
+                    self.declared.add(tok.value)
+            j += 1
+        return j
+
+    def _matching_open(self, close: int) -> Optional[int]:
+        """موضع القوس المفتوح المقابل لـ ) في الموضع close"""
+        depth = 0
+        for j in range(close, -1, -1):
+            value = self.tokens[j].value
+            if self.tokens[j].type != 'punct':
+                continue
+            if value in (')', ']', '}'):
+                depth += 1
+            elif value in ('(', '[', '{'):
+                depth -= 1
+                if depth == 0:
+                    return j
+        return None
+
+
+def extract_module_info(source: str, filename: str = '') -> Dict[str, Any]:
+    """استخراج الواردات (مع تمييز واردات الأنواع) واستخدام الأعضاء من ملف JS/TS/JSX"""
+    lowered = filename.lower()
+    jsx = any(lowered.endswith(ext) for ext in JSX_EXTENSIONS)
+    tokens = tokenize(source, jsx=jsx)
+    return ModuleInfoExtractor(tokens).extract()
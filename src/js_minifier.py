@@ -0,0 +1,713 @@
+"""
+تصغير JavaScript: إزالة المسافات والتعليقات وإعادة تسمية المتغيرات المحلية بأمان
+"""
+
+import re
+from typing import Dict, List, Optional, Set
+
+try:
+    from .js_lexer import Token, tokenize, KEYWORDS
+except ImportError:
+    from js_lexer import Token, tokenize, KEYWORDS
+
+
+# كلمات محجوزة لا يجوز استخدامها كأسماء مختصرة
+RESERVED_NAMES = KEYWORDS | {
+    'implements', 'interface', 'package', 'private', 'protected', 'public',
+    'arguments', 'eval', 'NaN', 'Infinity', 'do', 'if', 'in', 'of', 'for', 'let', 'new', 'try', 'var'
+}
+
+# كلمات يليها سطر جديد له معنى (إدراج الفاصلة المنقوطة التلقائي)
+_RESTRICTED = {'return', 'throw', 'break', 'continue', 'yield', 'async', 'let'}
+
+_OPENING = {'(': ')', '[': ']', '{': '}'}
+_WORD_CHAR_RE = re.compile(r'[\w$\u0080-￿]')
+_LICENSE_RE = re.compile(r'\s*(/\*![\s\S]*?\*/)')
+
+
+def _can_end(tok: Token, before: Optional[Token] = None) -> bool:
+    """هل يمكن أن ينتهي تعبير أو عبارة بهذا الرمز (before: الرمز الذي يسبقه)"""
+    if tok.type == 'name' and before is not None and before.type == 'punct' and before.value in ('.', '?.'):
+        # اسم خاصية مثل obj.default
+        return True
+    if tok.type in ('name', 'num', 'str', 'template', 'template_tail', 'regex'):
+        return tok.type != 'name' or tok.value not in KEYWORDS or tok.value in ('this', 'super', 'null', 'true', 'false', 'undefined')
+    return tok.type == 'punct' and tok.value in (')', ']', '}', '++', '--')
+
+
+def _can_start(tok: Token) -> bool:
+    """هل يمكن أن تبدأ عبارة جديدة بهذا الرمز"""
+    if tok.type in ('name', 'num', 'str', 'template', 'template_head', 'regex'):
+        return tok.type != 'name' or tok.value not in ('in', 'of', 'instanceof')
+    return tok.type == 'punct' and tok.value in ('(', '[', '{', '++', '--', '+', '-', '!', '~', '...', '#')
+
+
+def _starts_statement(tokens: List[Token], i: int) -> bool:
+    """بداية عبارة جديدة بسبب سطر جديد (قاعدة ASI المبسطة)"""
+    tok = tokens[i]
+    if not tok.nl or i == 0 or tok.type not in ('name', 'num', 'str', 'template', 'regex'):
+        return False
+    return tok.value not in ('in', 'of', 'instanceof') and _can_end(tokens[i - 1], tokens[i - 2] if i > 1 else None)
+
+
+def _short_names():
+    """توليد الأسماء المختصرة: a..Z ثم aa, ab ..."""
+    first = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_$'
+    rest = first + '0123456789'
+    for ch in first:
+        yield ch
+    size = 2
+    while True:
+        def build(prefix, remaining):
+            if remaining == 0:
+                yield prefix
+                return
+            for ch in rest:
+                yield from build(prefix + ch, remaining - 1)
+        for ch in first:
+            yield from build(ch, size - 1)
+        size += 1
+
+
+class _Binding:
+    __slots__ = ('name', 'scope', 'fixed', 'tokens', 'refs', 'final')
+
+    def __init__(self, name: str, scope: '_Scope'):
+        self.name = name
+        self.scope = scope
+        self.fixed = False
+        self.tokens: List[int] = []
+        self.refs = 0
+        self.final = name
+
+
+class _Scope:
+    __slots__ = ('kind', 'parent', 'children', 'bindings', 'unsafe', 'free', 'outer', 'pinned')
+
+    def __init__(self, kind: str, parent: Optional['_Scope']):
+        self.kind = kind
+        self.parent = parent
+        self.children: List['_Scope'] = []
+        self.bindings: Dict[str, _Binding] = {}
+        self.unsafe = False
+        # أسماء عامة أو غير محلولة مستخدمة داخل هذا النطاق وفروعه
+        self.free: Set[str] = set()
+        # روابط من نطاقات خارجية مستخدمة داخل هذا النطاق وفروعه
+        self.outer: Set[_Binding] = set()
+        # أسماء روابط لن تتم إعادة تسميتها داخل هذا النطاق وفروعه
+        self.pinned: Set[str] = set()
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def function_scope(self) -> '_Scope':
+        scope = self
+        while scope.kind == 'block':
+            scope = scope.parent
+        return scope
+
+    def declare(self, name: str, token_index: int) -> _Binding:
+        binding = self.bindings.get(name)
+        if binding is None:
+            binding = self.bindings[name] = _Binding(name, self)
+        binding.tokens.append(token_index)
+        return binding
+
+    def mark_unsafe(self):
+        scope = self
+        while scope is not None and not scope.unsafe:
+            scope.unsafe = True
+            scope = scope.parent
+
+
+class ScopeAnalyzer:
+    """تحليل النطاقات على مستوى الرموز لإعادة تسمية المتغيرات المحلية"""
+
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.count = len(tokens)
+        self.opener: List[int] = [-1] * self.count
+        self.match = self._match_brackets()
+        self.global_scope = _Scope('function', None)
+        self.scope_of: List[Optional[_Scope]] = [None] * self.count
+        # رموز ليست مراجع: مفاتيح الكائنات والتسميات والخصائص
+        self.non_refs: Set[int] = set()
+        # رموز التصريح: الموضع -> (النطاق، هل هو مختصر في نمط {a})
+        self.decl_tokens: Dict[int, tuple] = {}
+
+    # ==================== أدوات ====================
+    def _match_brackets(self) -> List[int]:
+        """موضع القوس المغلق لكل قوس مفتوح (و opener للعكس)"""
+        match = [-1] * self.count
+        stack = []
+        for i, tok in enumerate(self.tokens):
+            if tok.type == 'punct':
+                if tok.value in _OPENING:
+                    stack.append(i)
+                elif tok.value in (')', ']', '}') and stack:
+                    opening = stack.pop()
+                    match[opening] = i
+                    self.opener[i] = opening
+            elif tok.type == 'template_head':
+                stack.append(i)
+            elif tok.type == 'template_tail' and stack:
+                opening = stack.pop()
+                match[opening] = i
+                self.opener[i] = opening
+        return match
+
+    def _is(self, i: int, value: str) -> bool:
+        return 0 <= i < self.count and self.tokens[i].value == value and self.tokens[i].type == 'punct'
+
+    def _value(self, i: int) -> Optional[str]:
+        return self.tokens[i].value if 0 <= i < self.count else None
+
+    # ==================== أنماط التفكيك ====================
+    def _pattern_target(self, i: int, scope: _Scope) -> int:
+        tok = self.tokens[i] if i < self.count else None
+        if tok is None:
+            return i
+        if tok.type == 'name':
+            self._declare(scope, i)
+            return i + 1
+        if self._is(i, '{'):
+            return self._object_pattern(i, scope)
+        if self._is(i, '['):
+            return self._array_pattern(i, scope)
+        return i + 1
+
+    def _skip_default(self, i: int) -> int:
+        if not self._is(i, '='):
+            return i
+        j = i + 1
+        while j < self.count:
+            tok = self.tokens[j]
+            if tok.type == 'punct':
+                if tok.value in _OPENING:
+                    j = self.match[j] + 1 if self.match[j] > 0 else j + 1
+                    continue
+                if tok.value in (',', ')', ']', '}'):
+                    return j
+            elif tok.type == 'template_head':
+                j = self.match[j] + 1 if self.match[j] > 0 else j + 1
+                continue
+            j += 1
+        return j
+
+    def _array_pattern(self, i: int, scope: _Scope) -> int:
+        """نمط مصفوفة [a, b = 1, ...c] أو قائمة معاملات (a, b)"""
+        j = i + 1
+        end = self.match[i] if self.match[i] > 0 else self.count
+        while j < end:
+            if self._is(j, ','):
+                j += 1
+                continue
+            if self._is(j, '...'):
+                j += 1
+            j = self._pattern_target(j, scope)
+            j = self._skip_default(j)
+            while j < end and not self._is(j, ','):
+                j += 1
+        return end + 1
+
+    def _object_pattern(self, i: int, scope: _Scope) -> int:
+        j = i + 1
+        end = self.match[i] if self.match[i] > 0 else self.count
+        while j < end:
+            if self._is(j, ','):
+                j += 1
+                continue
+            if self._is(j, '...'):
+                j = self._pattern_target(j + 1, scope)
+                continue
+            tok = self.tokens[j]
+            if tok.type == 'name' and (self._is(j + 1, ',') or self._is(j + 1, '=') or j + 1 == end):
+                # {a} أو {a = 1}: الاسم مفتاح ورابط في نفس الوقت
+                self._declare(scope, j, shorthand=True)
+                j = self._skip_default(j + 1)
+                continue
+            if self._is(j, '['):
+                j = self.match[j] + 1
+            else:
+                self.non_refs.add(j)
+                j += 1
+            if self._is(j, ':'):
+                j = self._pattern_target(j + 1, scope)
+                j = self._skip_default(j)
+            while j < end and not self._is(j, ','):
+                j += 1
+        return end + 1
+
+    def _declare(self, scope: _Scope, i: int, shorthand: bool = False):
+        self.decl_tokens[i] = (scope, shorthand)
+
+    # ==================== التحليل ====================
+    def analyze(self):
+        """بناء شجرة النطاقات وتسجيل التصريحات ثم حل المراجع"""
+        tokens = self.tokens
+        count = self.count
+        scope = self.global_scope
+        # مكدس المجموعات المفتوحة: (النوع، النطاق الذي يُستعاد عند الإغلاق)
+        groups: List[tuple] = []
+        # أقواس { معروفة مسبقاً كجسم لدالة أو catch أو for: الموضع -> النطاق
+        body_open: Dict[int, _Scope] = {}
+        # دوال الأسهم ذات الجسم التعبيري: [النطاق الأب، العمق، عدد ? المفتوحة]
+        arrow_bodies: List[tuple] = []
+        # نطاقات دوال الأسهم التي لم يصل رمز => الخاص بها بعد
+        arrow_pending: List[_Scope] = []
+        # نطاقات for بجسم بلا أقواس تنتهي عند ';' في نفس العمق: (النطاق الأب، العمق)
+        statement_scopes: List[tuple] = []
+        class_open: Optional[int] = None
+        class_depth = 0
+        # التصريح الجاري: (النطاق المستهدف، العمق)
+        declaring: Optional[tuple] = None
+        expect_binding = False
+
+        def new_scope(kind: str, parent: _Scope) -> _Scope:
+            created = _Scope(kind, parent)
+            if class_depth:
+                # كل ما داخل جسم الصنف لا يُعاد تسميته
+                created.unsafe = True
+            return created
+
+        def open_function(params_index: int, func_scope: _Scope):
+            """تسجيل المعاملات وجسم الدالة الذي يبدأ بعد قوس المعاملات"""
+            self._array_pattern(params_index, func_scope)
+            close = self.match[params_index]
+            if close > 0 and self._is(close + 1, '{'):
+                body_open[close + 1] = func_scope
+
+        i = 0
+        while i < count:
+            tok = tokens[i]
+            prev = tokens[i - 1] if i else None
+            depth = len(groups)
+            kind = tok.type
+            value = tok.value
+
+            # نهاية جسم دالة سهم تعبيري (':' تنهيه فقط إذا لم يكن جزءاً من ?: داخل الجسم)
+            while arrow_bodies:
+                body = arrow_bodies[-1]
+                if depth == body[1] and kind == 'punct' and value == ':' and body[2]:
+                    body[2] -= 1
+                    break
+                if not (depth < body[1] or (depth == body[1] and (
+                        (kind == 'punct' and value in (',', ';', ')', ']', '}', ':'))
+                        or _starts_statement(tokens, i)))):
+                    break
+                arrow_bodies.pop()
+                scope = body[0]
+            if arrow_bodies and kind == 'punct' and value == '?' and depth == arrow_bodies[-1][1]:
+                arrow_bodies[-1][2] += 1
+
+            # نهاية التصريح
+            if declaring is not None:
+                decl_depth = declaring[1]
+                if depth < decl_depth or (depth == decl_depth and (
+                        (kind == 'punct' and value == ';') or
+                        (kind == 'name' and value in ('in', 'of')) or
+                        (not expect_binding and _starts_statement(tokens, i)))):
+                    declaring = None
+                    expect_binding = False
+
+            self.scope_of[i] = scope
+
+            if kind == 'name':
+                if prev is not None and prev.type == 'punct' and prev.value in ('.', '?.', '#'):
+                    self.non_refs.add(i)
+                    i += 1
+                    continue
+                if i in self.decl_tokens:
+                    i += 1
+                    continue
+
+                in_object = bool(groups) and groups[-1][0] in ('object', 'class')
+                if in_object and self._at_key(i):
+                    if value in ('get', 'set', 'async', 'static') and i + 1 < count and \
+                            (tokens[i + 1].type in ('name', 'str', 'num') or self._value(i + 1) in ('[', '*')):
+                        self.non_refs.add(i)
+                        i += 1
+                        continue
+                    if self._is(i + 1, '('):
+                        # دالة مختصرة: foo(a) { ... }
+                        self.non_refs.add(i)
+                        method_scope = new_scope('function', scope)
+                        if groups[-1][0] == 'class':
+                            method_scope.unsafe = True
+                        open_function(i + 1, method_scope)
+                        scope = method_scope
+                        i += 1
+                        continue
+                    if self._is(i + 1, ':'):
+                        self.non_refs.add(i)
+                        i += 1
+                        continue
+
+                if declaring is not None and expect_binding:
+                    if value not in KEYWORDS:
+                        self._declare(declaring[0], i)
+                    expect_binding = False
+                    i += 1
+                    continue
+
+                if value in ('var', 'let', 'const') and (value != 'let' or (
+                        i + 1 < count and (tokens[i + 1].type == 'name' or self._value(i + 1) in ('[', '{')))):
+                    declaring = (scope.function_scope if value == 'var' else scope, depth)
+                    expect_binding = True
+                    i += 1
+                    continue
+
+                if value == 'function':
+                    j = i + 1
+                    if self._is(j, '*'):
+                        j += 1
+                    func_scope = new_scope('function', scope)
+                    if j < count and tokens[j].type == 'name':
+                        statement = prev is None or tok.nl or \
+                            (prev.type == 'punct' and prev.value in (';', '{', '}')) or \
+                            (prev.type == 'name' and prev.value in ('export', 'default', 'async'))
+                        # التصريح يُرفع إلى نطاق الدالة، أما اسم التعبير فيظهر داخلها فقط
+                        self._declare(scope.function_scope if statement else func_scope, j)
+                        j += 1
+                    if self._is(j, '('):
+                        open_function(j, func_scope)
+                        scope = func_scope
+                    for k in range(i + 1, j):
+                        self.scope_of[k] = scope
+                    i = j
+                    continue
+
+                if value == 'catch' and self._is(i + 1, '('):
+                    catch_scope = new_scope('block', scope)
+                    open_function(i + 1, catch_scope)
+                    scope = catch_scope
+                    i += 1
+                    continue
+
+                if value == 'for':
+                    paren = i + 2 if self._value(i + 1) == 'await' else i + 1
+                    if self._is(paren, '('):
+                        for_scope = new_scope('block', scope)
+                        close = self.match[paren]
+                        if close > 0 and self._is(close + 1, '{'):
+                            body_open[close + 1] = for_scope
+                        else:
+                            statement_scopes.append((scope, depth))
+                        scope = for_scope
+                    i += 1
+                    continue
+
+                if value == 'class':
+                    scope.mark_unsafe()
+                    class_open = depth
+                    if i + 1 < count and tokens[i + 1].type == 'name' and tokens[i + 1].value != 'extends':
+                        self._declare(scope, i + 1)
+                    i += 1
+                    continue
+
+                if value in ('eval', 'with'):
+                    # eval و with يمكنهما الوصول لأي اسم في السلسلة
+                    scope.mark_unsafe()
+
+                if self._is(i + 1, '=>') and value not in KEYWORDS:
+                    # دالة سهم بمعامل واحد: x => ...
+                    arrow_scope = new_scope('function', scope)
+                    self._declare(arrow_scope, i)
+                    arrow_pending.append(arrow_scope)
+                    scope = arrow_scope
+                    i += 1
+                    continue
+
+                if self._is(i + 1, ':') and not in_object and (
+                        prev is None or (prev.type == 'punct' and prev.value in (';', '{', '}'))
+                        or (tok.nl and _can_end(prev, tokens[i - 2] if i > 1 else None))):
+                    # تسمية: label:
+                    self.non_refs.add(i)
+                elif prev is not None and prev.type == 'name' and prev.value in ('break', 'continue') and not tok.nl:
+                    self.non_refs.add(i)
+                elif in_object and groups[-1][0] == 'object' and self._at_key(i) and \
+                        (self._is(i + 1, ',') or self._is(i + 1, '}') or self._is(i + 1, '=')):
+                    # {a} المختصر: مرجع يجب أن يبقى اسمه كما هو
+                    self.decl_tokens[i] = None
+
+                i += 1
+                continue
+
+            if kind == 'template_head':
+                groups.append(('template', scope))
+            elif kind == 'template_tail':
+                if groups:
+                    groups.pop()
+            elif kind == 'punct':
+                if value == '(':
+                    close = self.match[i]
+                    if close > 0 and self._is(close + 1, '=>'):
+                        arrow_scope = new_scope('function', scope)
+                        self._array_pattern(i, arrow_scope)
+                        arrow_pending.append(arrow_scope)
+                        scope = arrow_scope
+                    groups.append(('paren', scope))
+                elif value == '=>' and arrow_pending:
+                    arrow_scope = arrow_pending.pop()
+                    scope = arrow_scope
+                    if self._is(i + 1, '{'):
+                        body_open[i + 1] = arrow_scope
+                    else:
+                        arrow_bodies.append([arrow_scope.parent, depth, 0])
+                elif value == '[':
+                    if declaring is not None and expect_binding:
+                        self._array_pattern(i, declaring[0])
+                        expect_binding = False
+                    groups.append(('bracket', scope))
+                elif value == '{':
+                    if declaring is not None and expect_binding:
+                        self._object_pattern(i, declaring[0])
+                        expect_binding = False
+                        groups.append(('object', scope))
+                    elif i in body_open:
+                        body_scope = body_open.pop(i)
+                        groups.append(('body', body_scope.parent))
+                        scope = body_scope
+                    elif class_open is not None and class_open == depth:
+                        groups.append(('class', scope))
+                        class_open = None
+                        class_depth += 1
+                    elif self._is_object_brace(i, groups):
+                        groups.append(('object', scope))
+                    else:
+                        block = new_scope('block', scope)
+                        groups.append(('block', scope))
+                        scope = block
+                        self.scope_of[i] = scope
+                elif value in (')', ']', '}'):
+                    if groups:
+                        group_kind, restore = groups.pop()
+                        if group_kind in ('body', 'block'):
+                            scope = restore
+                        elif group_kind == 'class':
+                            class_depth -= 1
+                        # نطاقات for غير المغلقة داخل المجموعة تنتهي بانتهائها
+                        while statement_scopes and statement_scopes[-1][1] > len(groups):
+                            statement_scopes.pop()
+                    if value == ']' and groups and groups[-1][0] in ('object', 'class') and \
+                            self._is(i + 1, '(') and self._at_key(self.opener[i]):
+                        # دالة بمفتاح محسوب: [expr](a) { ... }
+                        method_scope = new_scope('function', scope)
+                        if groups[-1][0] == 'class':
+                            method_scope.unsafe = True
+                        open_function(i + 1, method_scope)
+                        scope = method_scope
+                elif value == ';':
+                    while statement_scopes and statement_scopes[-1][1] == depth:
+                        scope = statement_scopes.pop()[0]
+                elif value == ',' and declaring is not None and depth == declaring[1]:
+                    expect_binding = True
+
+            i += 1
+
+        self._resolve()
+
+    def _at_key(self, i: int) -> bool:
+        """هل الرمز في موضع مفتاح داخل كائن أو صنف"""
+        prev = self.tokens[i - 1] if i > 0 else None
+        if prev is None:
+            return False
+        if prev.type == 'punct' and prev.value in ('{', ',', ';', '}', '*'):
+            return True
+        return prev.type == 'name' and prev.value in ('get', 'set', 'async', 'static')
+
+    def _is_object_brace(self, i: int, groups: List[tuple]) -> bool:
+        """تمييز { الكائن عن { الكتلة حسب الرمز السابق"""
+        prev = self.tokens[i - 1] if i else None
+        if prev is None:
+            return False
+        if prev.type in ('template_head', 'template_middle'):
+            return True
+        if prev.type == 'name':
+            return prev.value in ('return', 'typeof', 'in', 'of', 'yield', 'await', 'void',
+                                  'delete', 'new', 'throw', 'case', 'instanceof')
+        if prev.type != 'punct':
+            return False
+        if prev.value in (')', ']', '{', '}', ';'):
+            return False
+        if prev.value == ':':
+            if groups and groups[-1][0] == 'object':
+                return True
+            # case x: { ... } كتلة، أما a ? b : { } فكائن
+            j = i - 2
+            level = 0
+            while j >= 0:
+                t = self.tokens[j]
+                if t.type == 'punct':
+                    if t.value in (')', ']', '}'):
+                        level += 1
+                    elif t.value in ('(', '[', '{'):
+                        if level == 0:
+                            break
+                        level -= 1
+                    elif level == 0 and t.value in (';',):
+                        break
+                    elif level == 0 and t.value == '?':
+                        return True
+                elif level == 0 and t.type == 'name' and t.value in ('case', 'default'):
+                    return False
+                j -= 1
+            return False
+        if prev.value == '=>':
+            return False
+        return True
+
+    # ==================== الحل ====================
+    def _resolve(self):
+        tokens = self.tokens
+        # التصريحات
+        for i, info in self.decl_tokens.items():
+            if info is None:
+                continue
+            scope, shorthand = info
+            binding = scope.declare(tokens[i].value, i)
+            if shorthand:
+                binding.fixed = True
+
+        # المراجع
+        for i, tok in enumerate(tokens):
+            if tok.type != 'name' or i in self.non_refs:
+                continue
+            info = self.decl_tokens.get(i, False)
+            if info is not False and info is not None:
+                continue
+            if tok.value in KEYWORDS and tok.value not in ('let', 'async', 'of', 'static'):
+                continue
+            scope = self.scope_of[i] or self.global_scope
+            binding = self._lookup(scope, tok.value)
+            if binding is None:
+                walk = scope
+                while walk is not None:
+                    walk.free.add(tok.value)
+                    walk = walk.parent
+                continue
+            binding.tokens.append(i)
+            binding.refs += 1
+            if info is None:
+                # مرجع مختصر {a}: يجب أن يبقى الاسم كما هو
+                binding.fixed = True
+            walk = scope
+            while walk is not None and walk is not binding.scope:
+                walk.outer.add(binding)
+                walk = walk.parent
+
+    @staticmethod
+    def _lookup(scope: _Scope, name: str) -> Optional[_Binding]:
+        while scope is not None:
+            binding = scope.bindings.get(name)
+            if binding is not None:
+                return binding
+            scope = scope.parent
+        return None
+
+    # ==================== إعادة التسمية ====================
+    def mangle(self) -> Dict[int, str]:
+        """اختيار أسماء قصيرة وإرجاع {موضع الرمز: الاسم الجديد}"""
+        self._collect_pinned(self.global_scope)
+        renames: Dict[int, str] = {}
+        self._assign(self.global_scope, renames)
+        return renames
+
+    def _collect_pinned(self, scope: _Scope) -> Set[str]:
+        pinned = set()
+        keep_all = scope.unsafe or scope is self.global_scope
+        for binding in scope.bindings.values():
+            if keep_all or binding.fixed:
+                pinned.add(binding.name)
+        for child in scope.children:
+            pinned |= self._collect_pinned(child)
+        scope.pinned = pinned
+        return pinned
+
+    def _assign(self, scope: _Scope, renames: Dict[int, str]):
+        if not scope.unsafe and scope is not self.global_scope and scope.bindings:
+            reserved = set(scope.free) | scope.pinned | RESERVED_NAMES
+            reserved |= {binding.final for binding in scope.outer}
+            generator = _short_names()
+            for binding in sorted(scope.bindings.values(), key=lambda b: -len(b.tokens)):
+                if binding.fixed:
+                    continue
+                name = next(generator)
+                while name in reserved:
+                    name = next(generator)
+                reserved.add(name)
+                binding.final = name
+                if name != binding.name:
+                    for i in binding.tokens:
+                        renames[i] = name
+        for child in scope.children:
+            self._assign(child, renames)
+
+
+def _needs_space(prev: str, current: str) -> bool:
+    """هل يلزم فاصل بين رمزين لتجنب دمجهما في رمز واحد"""
+    a, b = prev[-1], current[0]
+    if _WORD_CHAR_RE.match(a) and (_WORD_CHAR_RE.match(b) or b == '\\'):
+        return True
+    if a.isdigit() and b == '.':
+        return True
+    if (a == '+' and b == '+') or (a == '-' and b == '-'):
+        return True
+    if a == '/' and b in '/*':
+        return True
+    if (a == '<' and b == '!') or (a == '-' and b == '>'):
+        return True
+    return False
+
+
+def minify_js(source: str, mangle: bool = True, source_map=None, source_index: int = 0) -> str:
+    """تصغير كود JavaScript بالاعتماد على رموز المحلل المعجمي
+
+    source_map: كائن SourceMapBuilder (أو ComposedSourceMap) يُضاف إليه موضع كل رمز في الناتج
+    """
+    tokens = tokenize(source)
+    if not tokens:
+        return ''
+
+    renames: Dict[int, str] = {}
+    if mangle:
+        analyzer = ScopeAnalyzer(tokens)
+        analyzer.analyze()
+        renames = analyzer.mangle()
+
+    out: List[str] = []
+    license_match = _LICENSE_RE.match(source)
+    if license_match:
+        out.append(license_match.group(1) + '\n')
+
+    # موضع الكتابة الحالي في الناتج (يُتتبع فقط عند طلب خريطة المصدر)
+    gen_line = out[0].count('\n') if out else 0
+    gen_col = 0
+
+    last = ''
+    prev: Optional[Token] = None
+    for i, tok in enumerate(tokens):
+        text = renames.get(i, tok.value)
+        if prev is not None:
+            if tok.nl and (prev.value in _RESTRICTED and prev.type == 'name' or (_can_end(prev, tokens[i - 2] if i > 1 else None) and _can_start(tok))):
+                # الحفاظ على السطر الجديد حيث قد يُدرج ; تلقائياً
+                out.append('\n')
+                gen_line += 1
+                gen_col = 0
+            elif _needs_space(last, text):
+                out.append(' ')
+                gen_col += 1
+        if source_map is not None:
+            source_map.add_mapping(gen_line, gen_col, source_index, tok.line - 1, tok.col,
+                                   tok.value if i in renames else None)
+            newlines = text.count('\n')
+            if newlines:
+                gen_line += newlines
+                gen_col = len(text) - text.rfind('\n') - 1
+            else:
+                gen_col += len(text)
+        out.append(text)
+        last = text
+        prev = tok
+
+    return ''.join(out)
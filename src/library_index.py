@@ -0,0 +1,119 @@
+"""
+فهرس البحث عن المكتبات من مسارات الاستيراد
+"""
+
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+
+class LibraryIndex:
+    """فهرس مسبق الحساب: جدول أسماء دقيقة + شجرة بادئات + أنماط مترجمة احتياطية"""
+
+    # أسماء الحزم الدقيقة لكل مكتبة
+    DEFAULT_NAMES = {
+        'lodash': ['lodash', 'lodash-es'],
+        'jquery': ['jquery'],
+        'axios': ['axios'],
+        'moment': ['moment'],
+        'react': ['react', 'react-dom'],
+        'vue': ['vue'],
+        'angular': ['angular'],
+        'express': ['express'],
+        'underscore': ['underscore']
+    }
+
+    # بادئات scoped packages (تطابق أي حزمة تحت النطاق)
+    DEFAULT_SCOPES = {
+        'vue': ['@vue'],
+        'angular': ['@angular']
+    }
+
+    # أنماط احتياطية مثبتة على بداية الاسم لتجنب الإيجابيات الكاذبة
+    DEFAULT_FALLBACK = [
+        (r'^lodash\.[a-z]+$', 'lodash')
+    ]
+
+    def __init__(self, names: Dict[str, List[str]] = None,
+                 scopes: Dict[str, List[str]] = None,
+                 fallback: List[Tuple[str, str]] = None,
+                 cache_size: int = 4096):
+        self._exact: Dict[str, str] = {}
+        self._trie: Dict[str, dict] = {}
+        self._fallback: List[Tuple[Pattern, str]] = []
+        self._cache: Dict[str, Tuple[str, str]] = {}
+        self._cache_size = cache_size
+
+        for lib_name, packages in (names or self.DEFAULT_NAMES).items():
+            for package in packages:
+                self._exact[package.lower()] = lib_name
+                self._insert(package.lower().split('/'), lib_name)
+
+        for lib_name, prefixes in (scopes or self.DEFAULT_SCOPES).items():
+            for prefix in prefixes:
+                self._insert(prefix.lower().strip('/').split('/'), lib_name)
+
+        for pattern, lib_name in (fallback if fallback is not None else self.DEFAULT_FALLBACK):
+            self._fallback.append((re.compile(pattern, re.IGNORECASE), lib_name))
+
+    def _insert(self, segments: List[str], lib_name: str):
+        """إدراج مسار مقسم إلى أجزاء في شجرة البادئات"""
+        node = self._trie
+        for segment in segments:
+            node = node.setdefault(segment, {})
+        node[None] = lib_name
+
+    @staticmethod
+    def package_name(import_path: str) -> str:
+        """اسم الحزمة من مسار الاستيراد (مع دعم scoped packages)"""
+        parts = import_path.split('/')
+        if import_path.startswith('@'):
+            if len(parts) >= 2:
+                return f"{parts[0]}/{parts[1]}"
+            return ''
+        if parts and parts[0] and not parts[0].startswith('.'):
+            return parts[0]
+        return ''
+
+    def lookup(self, import_path: str) -> Tuple[str, str]:
+        """إرجاع (اسم المكتبة، المسار الكامل) بزمن يتناسب مع طول المسار"""
+        cached = self._cache.get(import_path)
+        if cached is not None:
+            return cached
+
+        result = (self._match(import_path) or self.package_name(import_path), import_path)
+
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[import_path] = result
+        return result
+
+    def _match(self, import_path: str) -> Optional[str]:
+        """البحث: تطابق دقيق ثم أطول بادئة في الشجرة ثم الأنماط الاحتياطية"""
+        lowered = import_path.lower()
+        package = self.package_name(lowered)
+        if not package:
+            return None
+
+        lib_name = self._exact.get(package)
+        if lib_name:
+            return lib_name
+
+        node = self._trie
+        matched = None
+        for segment in lowered.split('/'):
+            node = node.get(segment)
+            if node is None:
+                break
+            matched = node.get(None, matched)
+        if matched:
+            return matched
+
+        for pattern, lib_name in self._fallback:
+            if pattern.search(package):
+                return lib_name
+
+        return None
+
+    def clear_cache(self):
+        """مسح ذاكرة النتائج"""
+        self._cache.clear()
@@ -0,0 +1,346 @@
+"""
+نموذج تكلفة المكتبات: حجم الوحدات المستخدمة مقابل حجم المكتبة الكاملة
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# ==================== جدول الأحجام ====================
+# الأحجام تقريبية بالبايت للنسخ المصغرة (minified) من الإصدارات الشائعة:
+# lodash 4.17، jQuery 3.7، Bootstrap 5.3، moment 2.29
+# لكل وحدة: (الحجم، [التبعيات الداخلية]) وتُحسب التبعيات المشتركة مرة واحدة فقط
+LIBRARY_SIZES: Dict[str, Dict[str, Any]] = {
+    'lodash': {
+        'version': '4.17.21',
+        'full': 73015,
+        'gzip_ratio': 0.36,
+        'core': ['_runtime'],
+        'default_module': ('_unknown', ['_base', '_collection']),
+        'modules': {
+            '_runtime': (1800, []),
+            '_base': (2600, []),
+            '_lang': (1900, ['_base']),
+            '_collection': (6400, ['_base', '_lang']),
+            '_string': (2100, ['_base']),
+            '_clone': (4300, ['_base', '_lang']),
+            '_unknown': (900, []),
+            'debounce': (1100, ['_lang']),
+            'throttle': (350, ['debounce']),
+            'memoize': (450, []),
+            'once': (300, []),
+            'get': (650, ['_base']),
+            'set': (800, ['_base']),
+            'has': (500, ['_base']),
+            'pick': (700, ['_base']),
+            'omit': (1100, ['_clone']),
+            'merge': (2400, ['_clone']),
+            'cloneDeep': (300, ['_clone']),
+            'clone': (250, ['_clone']),
+            'isEqual': (3400, ['_base', '_lang']),
+            'isEmpty': (450, ['_lang']),
+            'isObject': (100, []),
+            'isString': (150, ['_base']),
+            'isArray': (50, []),
+            'isFunction': (200, ['_base']),
+            'map': (350, ['_collection']),
+            'filter': (350, ['_collection']),
+            'reduce': (400, ['_collection']),
+            'forEach': (300, ['_collection']),
+            'each': (300, ['_collection']),
+            'find': (550, ['_collection']),
+            'findIndex': (300, ['_collection']),
+            'groupBy': (300, ['_collection']),
+            'keyBy': (250, ['_collection']),
+            'sortBy': (1400, ['_collection']),
+            'orderBy': (1300, ['_collection']),
+            'uniq': (800, ['_base']),
+            'uniqBy': (300, ['uniq', '_collection']),
+            'flatten': (350, ['_base']),
+            'flattenDeep': (150, ['flatten']),
+            'chunk': (300, ['_base']),
+            'difference': (900, ['_base']),
+            'intersection': (700, ['_base']),
+            'range': (500, ['_base']),
+            'times': (300, ['_base']),
+            'random': (600, ['_base']),
+            'shuffle': (350, ['_base']),
+            'sample': (250, ['_base']),
+            'camelCase': (300, ['_string']),
+            'kebabCase': (150, ['_string']),
+            'snakeCase': (150, ['_string']),
+            'capitalize': (150, ['_string']),
+            'startCase': (150, ['_string']),
+            'trim': (400, ['_string']),
+            'escape': (300, ['_string']),
+            'template': (2600, ['_string', 'escape']),
+            'chain': (1900, ['_collection']),
+        },
+        'aliases': {}
+    },
+    'jquery': {
+        'version': '3.7.1',
+        'full': 87533,
+        'gzip_ratio': 0.35,
+        'core': ['core'],
+        'default_module': ('core', []),
+        'modules': {
+            'core': (24000, []),
+            'callbacks': (1200, []),
+            'deferred': (3500, ['callbacks']),
+            'data': (2800, []),
+            'queue': (1300, ['data', 'deferred']),
+            'attributes': (4200, []),
+            'traversing': (3500, []),
+            'event': (9000, ['data']),
+            'manipulation': (7500, ['traversing', 'data', 'event']),
+            'css': (6500, []),
+            'dimensions': (900, ['css']),
+            'offset': (1800, ['css']),
+            'effects': (8500, ['css', 'queue', 'deferred']),
+            'serialize': (1000, []),
+            'ajax': (10300, ['deferred', 'event', 'serialize']),
+            'wrap': (700, ['manipulation']),
+            'deprecated': (800, ['event']),
+        },
+        'members': {
+            'ajax': 'ajax', 'get': 'ajax', 'post': 'ajax', 'getJSON': 'ajax',
+            'getScript': 'ajax', 'ajaxSetup': 'ajax', 'load': 'ajax',
+            'ajaxPrefilter': 'ajax', 'ajaxTransport': 'ajax',
+            'param': 'serialize', 'serialize': 'serialize', 'serializeArray': 'serialize',
+            'Deferred': 'deferred', 'when': 'deferred', 'Callbacks': 'callbacks',
+            'animate': 'effects', 'fadeIn': 'effects', 'fadeOut': 'effects',
+            'fadeTo': 'effects', 'fadeToggle': 'effects', 'slideUp': 'effects',
+            'slideDown': 'effects', 'slideToggle': 'effects', 'show': 'effects',
+            'hide': 'effects', 'toggle': 'effects', 'stop': 'effects',
+            'finish': 'effects', 'delay': 'effects',
+            'queue': 'queue', 'dequeue': 'queue', 'clearQueue': 'queue', 'promise': 'queue',
+            'data': 'data', 'removeData': 'data', 'hasData': 'data',
+            'attr': 'attributes', 'removeAttr': 'attributes', 'prop': 'attributes',
+            'removeProp': 'attributes', 'addClass': 'attributes', 'removeClass': 'attributes',
+            'toggleClass': 'attributes', 'hasClass': 'attributes', 'val': 'attributes',
+            'find': 'traversing', 'closest': 'traversing', 'parent': 'traversing',
+            'parents': 'traversing', 'children': 'traversing', 'siblings': 'traversing',
+            'next': 'traversing', 'prev': 'traversing', 'has': 'traversing',
+            'on': 'event', 'off': 'event', 'one': 'event', 'trigger': 'event',
+            'triggerHandler': 'event', 'click': 'deprecated', 'bind': 'deprecated',
+            'unbind': 'deprecated', 'delegate': 'deprecated', 'hover': 'deprecated',
+            'html': 'manipulation', 'text': 'manipulation', 'append': 'manipulation',
+            'prepend': 'manipulation', 'after': 'manipulation', 'before': 'manipulation',
+            'remove': 'manipulation', 'empty': 'manipulation', 'clone': 'manipulation',
+            'replaceWith': 'manipulation', 'appendTo': 'manipulation',
+            'wrap': 'wrap', 'wrapAll': 'wrap', 'wrapInner': 'wrap', 'unwrap': 'wrap',
+            'css': 'css', 'width': 'dimensions', 'height': 'dimensions',
+            'innerWidth': 'dimensions', 'innerHeight': 'dimensions',
+            'outerWidth': 'dimensions', 'outerHeight': 'dimensions',
+            'offset': 'offset', 'position': 'offset', 'scrollTop': 'offset', 'scrollLeft': 'offset',
+        },
+        # أعضاء jQuery تستدعى غالباً على نتائج $() وليس على $ مباشرة
+        'chainable': True,
+        'aliases': {}
+    },
+    'bootstrap': {
+        'version': '5.3.3',
+        'full': 80721,
+        'gzip_ratio': 0.29,
+        'core': ['base'],
+        'default_module': ('base', []),
+        'modules': {
+            'base': (9000, []),
+            'popper': (20000, []),
+            'sanitizer': (1500, []),
+            'helpers': (3500, []),
+            'alert': (1300, []),
+            'button': (900, []),
+            'carousel': (6500, []),
+            'collapse': (4000, []),
+            'dropdown': (6500, ['popper']),
+            'modal': (7500, ['helpers']),
+            'offcanvas': (4500, ['helpers']),
+            'tooltip': (10500, ['popper', 'sanitizer']),
+            'popover': (1500, ['tooltip']),
+            'scrollspy': (4000, []),
+            'tab': (3500, []),
+            'toast': (2700, []),
+        },
+        'aliases': {'scrollSpy': 'scrollspy'}
+    },
+    'moment': {
+        'version': '2.29.4',
+        # moment مع جميع اللغات (ما تضمنه أدوات الحزم افتراضياً)
+        'full': 290000,
+        'gzip_ratio': 0.26,
+        'core': ['core'],
+        'default_module': ('core', []),
+        'modules': {
+            'core': (58900, []),
+        },
+        # كل ملف لغة (moment/locale/xx) حجمه التقريبي
+        'module_patterns': [(r'^locale/[\w-]+$', 2300)],
+        'aliases': {}
+    },
+}
+
+
+# الدوال العامة في lodash 4.17 (كل منها وحدة name.js في lodash-es)؛ أي اسم آخر ليس من lodash
+LODASH_EXPORTS: Set[str] = {
+    'after', 'ary', 'assign', 'assignIn', 'assignInWith', 'assignWith', 'at', 'attempt', 'before',
+    'bind', 'bindAll', 'bindKey', 'camelCase', 'capitalize', 'castArray', 'ceil', 'chain', 'chunk',
+    'clamp', 'clone', 'cloneDeep', 'cloneDeepWith', 'cloneWith', 'compact', 'concat', 'cond',
+    'conforms', 'conformsTo', 'constant', 'countBy', 'create', 'curry', 'curryRight', 'debounce',
+    'deburr', 'defaultTo', 'defaults', 'defaultsDeep', 'defer', 'delay', 'difference',
+    'differenceBy', 'differenceWith', 'divide', 'drop', 'dropRight', 'dropRightWhile', 'dropWhile',
+    'each', 'eachRight', 'endsWith', 'entries', 'entriesIn', 'eq', 'escape', 'escapeRegExp',
+    'every', 'extend', 'extendWith', 'fill', 'filter', 'find', 'findIndex', 'findKey', 'findLast',
+    'findLastIndex', 'findLastKey', 'first', 'flatMap', 'flatMapDeep', 'flatMapDepth', 'flatten',
+    'flattenDeep', 'flattenDepth', 'flip', 'floor', 'flow', 'flowRight', 'forEach', 'forEachRight',
+    'forIn', 'forInRight', 'forOwn', 'forOwnRight', 'fromPairs', 'functions', 'functionsIn', 'get',
+    'groupBy', 'gt', 'gte', 'has', 'hasIn', 'head', 'identity', 'inRange', 'includes', 'indexOf',
+    'initial', 'intersection', 'intersectionBy', 'intersectionWith', 'invert', 'invertBy', 'invoke',
+    'invokeMap', 'isArguments', 'isArray', 'isArrayBuffer', 'isArrayLike', 'isArrayLikeObject',
+    'isBoolean', 'isBuffer', 'isDate', 'isElement', 'isEmpty', 'isEqual', 'isEqualWith', 'isError',
+    'isFinite', 'isFunction', 'isInteger', 'isLength', 'isMap', 'isMatch', 'isMatchWith', 'isNaN',
+    'isNative', 'isNil', 'isNull', 'isNumber', 'isObject', 'isObjectLike', 'isPlainObject',
+    'isRegExp', 'isSafeInteger', 'isSet', 'isString', 'isSymbol', 'isTypedArray', 'isUndefined',
+    'isWeakMap', 'isWeakSet', 'iteratee', 'join', 'kebabCase', 'keyBy', 'keys', 'keysIn', 'last',
+    'lastIndexOf', 'lowerCase', 'lowerFirst', 'lt', 'lte', 'map', 'mapKeys', 'mapValues', 'matches',
+    'matchesProperty', 'max', 'maxBy', 'mean', 'meanBy', 'memoize', 'merge', 'mergeWith', 'method',
+    'methodOf', 'min', 'minBy', 'mixin', 'multiply', 'negate', 'noop', 'now', 'nth', 'nthArg',
+    'omit', 'omitBy', 'once', 'orderBy', 'over', 'overArgs', 'overEvery', 'overSome', 'pad',
+    'padEnd', 'padStart', 'parseInt', 'partial', 'partialRight', 'partition', 'pick', 'pickBy',
+    'property', 'propertyOf', 'pull', 'pullAll', 'pullAllBy', 'pullAllWith', 'pullAt', 'random',
+    'range', 'rangeRight', 'rearg', 'reduce', 'reduceRight', 'reject', 'remove', 'repeat',
+    'replace', 'rest', 'result', 'reverse', 'round', 'sample', 'sampleSize', 'set', 'setWith',
+    'shuffle', 'size', 'slice', 'snakeCase', 'some', 'sortBy', 'sortedIndex', 'sortedIndexBy',
+    'sortedIndexOf', 'sortedLastIndex', 'sortedLastIndexBy', 'sortedLastIndexOf', 'sortedUniq',
+    'sortedUniqBy', 'split', 'spread', 'startCase', 'startsWith', 'stubArray', 'stubFalse',
+    'stubObject', 'stubString', 'stubTrue', 'subtract', 'sum', 'sumBy', 'tail', 'take', 'takeRight',
+    'takeRightWhile', 'takeWhile', 'tap', 'template', 'templateSettings', 'throttle', 'thru',
+    'times', 'toArray', 'toFinite', 'toInteger', 'toLength', 'toLower', 'toNumber', 'toPairs',
+    'toPairsIn', 'toPath', 'toPlainObject', 'toSafeInteger', 'toString', 'toUpper', 'transform',
+    'trim', 'trimEnd', 'trimStart', 'truncate', 'unary', 'unescape', 'union', 'unionBy',
+    'unionWith', 'uniq', 'uniqBy', 'uniqWith', 'uniqueId', 'unset', 'unzip', 'unzipWith', 'update',
+    'updateWith', 'upperCase', 'upperFirst', 'values', 'valuesIn', 'without', 'words', 'wrap',
+    'xor', 'xorBy', 'xorWith', 'zip', 'zipObject', 'zipObjectDeep', 'zipWith'
+}
+
+
+def get_library_info(lib_name: str) -> Optional[Dict[str, Any]]:
+    """بيانات جدول الأحجام لمكتبة (أو None إذا لم تكن مدعومة)"""
+    return LIBRARY_SIZES.get(lib_name)
+
+
+def gzip_size(raw_size: int, lib_name: str) -> int:
+    """تقدير الحجم بعد gzip باستخدام نسبة الضغط الخاصة بالمكتبة"""
+    info = LIBRARY_SIZES.get(lib_name) or {}
+    return int(raw_size * info.get('gzip_ratio', 0.33))
+
+
+def _module_from_import(lib_name: str, import_path: str) -> Optional[str]:
+    """اسم الوحدة من مسار استيراد فرعي مثل lodash/debounce أو bootstrap/js/dist/modal"""
+    path = import_path.split('?')[0]
+    for prefix in (f'{lib_name}-es/', f'{lib_name}/js/dist/', f'{lib_name}/js/src/', f'{lib_name}/', f'{lib_name}.'):
+        if path.startswith(prefix):
+            module = path[len(prefix):]
+            return re.sub(r'\.(min\.)?js$', '', module) or None
+    return None
+
+
+def _resolve_member(info: Dict[str, Any], member: str) -> str:
+    """تحويل اسم عضو (مثل fadeIn أو Modal) إلى اسم الوحدة في الجدول"""
+    modules = info['modules']
+    members = info.get('members', {})
+    if member in members:
+        return members[member]
+    if member in modules:
+        return member
+    alias = info.get('aliases', {}).get(member)
+    if alias:
+        return alias
+    lowered = member.lower()
+    if lowered in modules:
+        return lowered
+    return info['default_module'][0]
+
+
+def _module_size(info: Dict[str, Any], module: str) -> Optional[tuple]:
+    """(الحجم، التبعيات) لوحدة مع دعم الوحدات الافتراضية والأنماط"""
+    entry = info['modules'].get(module)
+    if entry is not None:
+        return entry
+    for pattern, size in info.get('module_patterns', []):
+        if re.match(pattern, module):
+            return size, []
+    return None
+
+
+def chainable_members(lib_name: str) -> Set[str]:
+    """أعضاء المكتبة التي تُستدعى على سلاسل (مثل $(el).fadeIn)"""
+    info = LIBRARY_SIZES.get(lib_name)
+    if not info or not info.get('chainable'):
+        return set()
+    return set(info.get('members', {}))
+
+
+def estimate_savings(lib_name: str, functions_used: Iterable[str],
+                     imports: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+    """تقدير الحجم المستخدم مقابل الحجم المشحون لمكتبة، والتوفير المتوقع من حزمة مخصصة"""
+    info = LIBRARY_SIZES.get(lib_name)
+    if not info:
+        return None
+
+    requested: List[str] = list(info['core'])
+    uses_whole_library = False
+
+    prefix = f'{lib_name}.'
+    for function in functions_used:
+        if function.startswith(prefix):
+            member = function[len(prefix):].split('.')[0]
+            if member:
+                requested.append(_resolve_member(info, member))
+
+    for import_path in imports:
+        module = _module_from_import(lib_name, import_path)
+        if module is None:
+            continue
+        if module.startswith('dist/'):
+            # ملف توزيع جاهز (مثل jquery/dist/jquery.min.js) يشحن المكتبة كاملة
+            uses_whole_library = True
+        elif _module_size(info, module) is not None:
+            requested.append(module)
+        else:
+            requested.append(_resolve_member(info, module.split('/')[-1]))
+
+    # إغلاق التبعيات: كل وحدة تحسب مرة واحدة
+    included: Set[str] = set()
+    stack = list(requested)
+    used_raw = 0
+    while stack:
+        module = stack.pop()
+        if module in included:
+            continue
+        included.add(module)
+        entry = _module_size(info, module)
+        if entry is None:
+            entry = info['modules'].get(info['default_module'][0], (0, []))
+        size, deps = entry
+        used_raw += size
+        stack.extend(deps)
+
+    full_raw = info['full']
+    if uses_whole_library:
+        used_raw = full_raw
+    used_raw = min(used_raw, full_raw)
+    saved_raw = full_raw - used_raw
+
+    return {
+        'library': lib_name,
+        'reference_version': info['version'],
+        'modules': sorted(m for m in included if not m.startswith('_')),
+        'full_bytes': full_raw,
+        'full_gzip_bytes': gzip_size(full_raw, lib_name),
+        'used_bytes': used_raw,
+        'used_gzip_bytes': gzip_size(used_raw, lib_name),
+        'saved_bytes': saved_raw,
+        'saved_gzip_bytes': gzip_size(saved_raw, lib_name),
+        'used_ratio': round(used_raw / full_raw, 3) if full_raw else 1.0
+    }
@@ -0,0 +1,273 @@
+"""
+مرحلة التصغير في خط بناء الحزم: JS و CSS بالتوازي مع ذاكرة حسب بصمة المحتوى
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .js_minifier import minify_js
+    from .css_parser import minify_css
+    from .source_map import (SourceMapBuilder, SourceMapConsumer, ComposedSourceMap,
+                             load_input_map, source_mapping_comment)
+except ImportError:
+    from js_minifier import minify_js
+    from css_parser import minify_css
+    from source_map import (SourceMapBuilder, SourceMapConsumer, ComposedSourceMap,
+                            load_input_map, source_mapping_comment)
+
+
+# يُغيَّر عند تعديل خوارزميات التصغير لإبطال النتائج المخزنة القديمة
+MINIFIER_VERSION = '1'
+
+
+def minify_source_with_map(kind: str, text: str, mangle: bool = True, source_name: str = '',
+                           input_map: Optional[Dict] = None) -> Tuple[str, Optional[Dict]]:
+    """تصغير مع خريطة مصدر v3 (لـ JS)؛ input_map خريطة المرحلة السابقة وتُركب معها مباشرة"""
+    if kind != 'js':
+        return minify_source(kind, text, mangle), None
+    builder = SourceMapBuilder()
+    if input_map:
+        code = minify_js(text, mangle, ComposedSourceMap(builder, SourceMapConsumer(input_map)))
+    else:
+        code = minify_js(text, mangle, builder, builder.add_source(source_name, text))
+    return code, builder.to_dict()
+
+
+def minify_source(kind: str, text: str, mangle: bool = True) -> str:
+    """تصغير نص واحد (دالة على مستوى الوحدة لتعمل داخل عمليات منفصلة)"""
+    if kind == 'js':
+        return minify_js(text, mangle=mangle)
+    if kind == 'css':
+        return minify_css(text)
+    raise ValueError(f'نوع غير مدعوم للتصغير: {kind}')
+
+
+class Minifier:
+    """تصغير الملفات بالتوازي (عمليات منفصلة) مع تخزين النتائج حسب sha256 للمحتوى"""
+
+    EXTENSIONS = {'.js': 'js', '.mjs': 'js', '.cjs': 'js', '.css': 'css'}
+
+    def __init__(self, cache_dir: Path, minify_js: bool = True, minify_css: bool = True,
+                 mangle: bool = True, max_workers: Optional[int] = None):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = {'js': minify_js, 'css': minify_css}
+        self.mangle = mangle
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def kind_for(self, path: Path) -> Optional[str]:
+        """نوع الملف إذا كان تصغيره مفعلاً (الملفات ‎.min مصغرة مسبقاً)"""
+        path = Path(path)
+        kind = self.EXTENSIONS.get(path.suffix.lower())
+        if kind is None or not self.enabled[kind] or path.stem.lower().endswith('.min'):
+            return None
+        return kind
+
+    # ==================== الذاكرة ====================
+    def cache_key(self, kind: str, data: bytes) -> str:
+        """بصمة المحتوى مع خيارات التصغير"""
+        hasher = hashlib.sha256(f'{MINIFIER_VERSION}:{kind}:{int(self.mangle)}\0'.encode('ascii'))
+        hasher.update(data)
+        return hasher.hexdigest()
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._cache_path(key), 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _cache_put(self, key: str, text: str):
+        """كتابة ذرية حتى لا تُقرأ نتيجة ناقصة"""
+        target = self._cache_path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    # ==================== التصغير ====================
+    def minify_text(self, kind: str, text: str) -> Tuple[str, bool]:
+        """تصغير نص واحد وإرجاع (النتيجة، هل كانت من الذاكرة)"""
+        key = self.cache_key(kind, text.encode('utf-8'))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached, True
+        result = minify_source(kind, text, self.mangle)
+        self._cache_put(key, result)
+        return result, False
+
+    def _map_cache_key(self, kind: str, data: bytes, source_name: str, input_map: Optional[Dict]) -> str:
+        """الخريطة تعتمد أيضاً على اسم المصدر وخريطة المرحلة السابقة"""
+        extra = json.dumps([source_name, input_map], sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return self.cache_key(f'{kind}+map', data + b'\0' + extra)
+
+    def minify_text_with_map(self, kind: str, text: str, source_name: str,
+                             input_map: Optional[Dict] = None) -> Tuple[str, Optional[Dict], bool]:
+        """تصغير مع خريطة مصدر وإرجاع (النتيجة، الخريطة، هل كانت من الذاكرة)"""
+        key = self._map_cache_key(kind, text.encode('utf-8'), source_name, input_map)
+        cached = self._cache_get(key)
+        if cached is not None:
+            entry = json.loads(cached)
+            return entry['code'], entry['map'], True
+        code, source_map = minify_source_with_map(kind, text, self.mangle, source_name, input_map)
+        self._cache_put(key, json.dumps({'code': code, 'map': source_map}, ensure_ascii=False))
+        return code, source_map, False
+
+    def _run_parallel(self, pending: List[Dict[str, Any]]) -> List[Any]:
+        """تشغيل المهام غير المخزنة في عمليات منفصلة (أو مباشرة إذا كانت مهمة واحدة)"""
+        def call(job):
+            if job['with_map']:
+                return minify_source_with_map, (job['kind'], job['text'], self.mangle,
+                                                job['source_name'], job['input_map'])
+            return minify_source, (job['kind'], job['text'], self.mangle)
+
+        def run_inline():
+            results = []
+            for job in pending:
+                func, args = call(job)
+                try:
+                    results.append(func(*args))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        workers = min(self.max_workers, len(pending))
+        if workers <= 1:
+            return run_inline()
+
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            # بيئات لا تسمح بإنشاء عمليات
+            return run_inline()
+
+        with executor:
+            futures = [executor.submit(*call(job)) for job in pending]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    def minify_files(self, jobs: Iterable[Tuple[Path, Path]], source_maps: bool = False,
+                     contents: Optional[Dict[Path, bytes]] = None) -> List[Dict[str, Any]]:
+        """تصغير قائمة (المصدر، الهدف) وكتابة النتائج؛ الملفات التي يتعذر تصغيرها تُنسخ كما هي
+
+        source_maps: كتابة <الهدف>.map لملفات JS (مركبة مع خريطة المصدر إن أشار إليها الملف)
+        contents: نص بديل لبعض المصادر {المسار: bytes} (مثل CSS بعد دمج @import)
+        """
+        contents = contents or {}
+        results: List[Dict[str, Any]] = []
+        pending: List[Dict[str, Any]] = []
+
+        for source, target in jobs:
+            source, target = Path(source), Path(target)
+            data = contents[source] if source in contents else source.read_bytes()
+            result = {
+                'source': str(source),
+                'target': str(target),
+                'kind': self.kind_for(source),
+                'size_before': len(data),
+                'size_after': len(data),
+                'cached': False,
+                'map': None,
+                'error': None
+            }
+            results.append(result)
+
+            try:
+                text = data.decode('utf-8')
+            except UnicodeDecodeError:
+                result['kind'] = None
+            if result['kind'] is None:
+                self._write(target, data)
+                continue
+
+            with_map = source_maps and result['kind'] == 'js'
+            input_map = load_input_map(text, source) if with_map else None
+            if with_map:
+                key = self._map_cache_key(result['kind'], data, source.name, input_map)
+            else:
+                key = self.cache_key(result['kind'], data)
+            cached = self._cache_get(key)
+            if cached is not None:
+                result['cached'] = True
+                if with_map:
+                    entry = json.loads(cached)
+                    self._write_result(result, entry['code'], entry['map'])
+                else:
+                    self._write_result(result, cached)
+                continue
+            pending.append({'result': result, 'kind': result['kind'], 'text': text, 'key': key, 'data': data,
+                            'with_map': with_map, 'source_name': source.name, 'input_map': input_map})
+
+        for job, output in zip(pending, self._run_parallel(pending)):
+            result = job['result']
+            if isinstance(output, Exception):
+                result['error'] = str(output)
+                self._write(Path(result['target']), job['data'])
+                continue
+            if job['with_map']:
+                code, source_map = output
+                self._cache_put(job['key'], json.dumps({'code': code, 'map': source_map}, ensure_ascii=False))
+                self._write_result(result, code, source_map)
+            else:
+                self._cache_put(job['key'], output)
+                self._write_result(result, output)
+
+        return results
+
+    def _write_result(self, result: Dict[str, Any], text: str, source_map: Optional[Dict] = None):
+        target = Path(result['target'])
+        if source_map is not None:
+            map_path = target.with_name(target.name + '.map')
+            source_map = dict(source_map, file=target.name)
+            self._write(map_path, json.dumps(source_map, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            text += source_mapping_comment(map_path.name, result['kind'])
+            result['map'] = str(map_path)
+        data = text.encode('utf-8')
+        result['size_after'] = len(data)
+        self._write(target, data)
+
+    @staticmethod
+    def _write(target: Path, data: bytes):
+        """استبدال الملف بدل الكتابة فوقه (قد يكون رابطاً صلباً إلى مخزن الحزم)"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    @staticmethod
+    def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """ملخص الأحجام قبل وبعد للتقرير"""
+        before = sum(r['size_before'] for r in results)
+        after = sum(r['size_after'] for r in results)
+        return {
+            'files': len(results),
+            'minified': sum(1 for r in results if r['kind'] and not r['error']),
+            'cached': sum(1 for r in results if r['cached']),
+            'errors': [{'file': r['source'], 'error': r['error']} for r in results if r['error']],
+            'size_before': before,
+            'size_after': after,
+            'saved_bytes': max(before - after, 0)
+        }
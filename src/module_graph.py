@@ -0,0 +1,278 @@
+"""
+رسم بياني مضغوط لتبعيات الوحدات (تخزين CSR)
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Any
+
+
+class ModuleGraph:
+    """رسم بياني موجه للوحدات مخزن كمصفوفات أعداد صحيحة بنمط CSR"""
+
+    KIND_FILE = 0
+    KIND_PACKAGE = 1
+
+    def __init__(self):
+        self.nodes: List[str] = []
+        self.kinds = array('b')
+        self._index: Dict[str, int] = {}
+
+        # الحواف المؤقتة قبل التجميد
+        self._src = array('i')
+        self._dst = array('i')
+
+        # مصفوفات CSR (الاتجاه الأمامي والعكسي)
+        self._offsets = array('i', [0])
+        self._targets = array('i')
+        self._rev_offsets = array('i', [0])
+        self._rev_targets = array('i')
+        self._frozen = True
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        """عدد الحواف"""
+        if not self._frozen:
+            self.freeze()
+        return len(self._targets)
+
+    def add_node(self, name: str, kind: int = KIND_FILE) -> int:
+        """إضافة عقدة وإرجاع رقمها"""
+        node_id = self._index.get(name)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self._index[name] = node_id
+            self.nodes.append(name)
+            self.kinds.append(kind)
+            self._frozen = False
+        return node_id
+
+    def add_edge(self, source: str, target: str, target_kind: int = KIND_FILE):
+        """إضافة حافة من المستورد إلى الوحدة المستوردة"""
+        src = self.add_node(source)
+        dst = self.add_node(target, target_kind)
+        self._src.append(src)
+        self._dst.append(dst)
+        self._frozen = False
+
+    def node_id(self, name: str) -> Optional[int]:
+        """رقم العقدة حسب الاسم"""
+        return self._index.get(name)
+
+    def freeze(self):
+        """بناء مصفوفات CSR من الحواف المؤقتة (ترتيب بالعد)"""
+        if self._frozen:
+            return
+
+        # دمج الحواف الموجودة مع الجديدة وإزالة التكرار
+        src = array('i')
+        dst = array('i')
+        for node in range(len(self._offsets) - 1):
+            for pos in range(self._offsets[node], self._offsets[node + 1]):
+                src.append(node)
+                dst.append(self._targets[pos])
+        src.extend(self._src)
+        dst.extend(self._dst)
+
+        n = len(self.nodes)
+        self._offsets, self._targets = self._build_csr(n, src, dst)
+        self._rev_offsets, self._rev_targets = self._build_csr(n, dst, src)
+
+        self._src = array('i')
+        self._dst = array('i')
+        self._frozen = True
+
+    @staticmethod
+    def _build_csr(n: int, src: array, dst: array):
+        """ترتيب الحواف حسب المصدر بخطوتين (عد ثم توزيع)"""
+        counts = array('i', bytes(4 * (n + 1)))
+        seen: Set[int] = set()
+        unique_src = array('i')
+        unique_dst = array('i')
+        for s, d in zip(src, dst):
+            key = s * n + d
+            if key in seen:
+                continue
+            seen.add(key)
+            unique_src.append(s)
+            unique_dst.append(d)
+            counts[s + 1] += 1
+
+        for i in range(n):
+            counts[i + 1] += counts[i]
+
+        targets = array('i', bytes(4 * len(unique_src)))
+        cursor = array('i', counts[:n]) if n else array('i')
+        for s, d in zip(unique_src, unique_dst):
+            targets[cursor[s]] = d
+            cursor[s] += 1
+
+        return counts, targets
+
+    def successors(self, name: str) -> List[str]:
+        """الوحدات التي تستوردها العقدة مباشرة"""
+        return [self.nodes[i] for i in self._neighbors(name, reverse=False)]
+
+    def predecessors(self, name: str) -> List[str]:
+        """الوحدات التي تستورد العقدة مباشرة"""
+        return [self.nodes[i] for i in self._neighbors(name, reverse=True)]
+
+    def _neighbors(self, name: str, reverse: bool) -> array:
+        if not self._frozen:
+            self.freeze()
+        node = self._index.get(name)
+        if node is None:
+            return array('i')
+        offsets, targets = (self._rev_offsets, self._rev_targets) if reverse else (self._offsets, self._targets)
+        return targets[offsets[node]:offsets[node + 1]]
+
+    def _walk(self, start: Iterable[int], reverse: bool) -> bytearray:
+        """بحث بالعمق بدون استدعاء ذاتي يعيد مصفوفة الزيارة"""
+        if not self._frozen:
+            self.freeze()
+        offsets, targets = (self._rev_offsets, self._rev_targets) if reverse else (self._offsets, self._targets)
+        visited = bytearray(len(self.nodes))
+        stack = []
+        for node in start:
+            if not visited[node]:
+                visited[node] = 1
+                stack.append(node)
+        while stack:
+            node = stack.pop()
+            for pos in range(offsets[node], offsets[node + 1]):
+                nxt = targets[pos]
+                if not visited[nxt]:
+                    visited[nxt] = 1
+                    stack.append(nxt)
+        return visited
+
+    def reachable(self, entry_points: Iterable[str]) -> Set[str]:
+        """كل الوحدات التي يمكن الوصول إليها من نقاط الدخول"""
+        start = [self._index[e] for e in entry_points if e in self._index]
+        visited = self._walk(start, reverse=False)
+        return {self.nodes[i] for i, flag in enumerate(visited) if flag}
+
+    def dependents(self, name: str, transitive: bool = True) -> Set[str]:
+        """الوحدات التي تعتمد على العقدة (مباشرة أو بشكل متعد)"""
+        node = self._index.get(name)
+        if node is None:
+            return set()
+        if not transitive:
+            return set(self.predecessors(name))
+        visited = self._walk([node], reverse=True)
+        visited[node] = 0
+        return {self.nodes[i] for i, flag in enumerate(visited) if flag}
+
+    def roots(self) -> List[str]:
+        """ملفات لا يستوردها أي ملف آخر"""
+        if not self._frozen:
+            self.freeze()
+        return [
+            self.nodes[i] for i in range(len(self.nodes))
+            if self.kinds[i] == self.KIND_FILE and self._rev_offsets[i] == self._rev_offsets[i + 1]
+        ]
+
+    def find_cycles(self) -> List[List[str]]:
+        """اكتشاف الدورات باستخدام خوارزمية Tarjan (تكرارية)"""
+        if not self._frozen:
+            self.freeze()
+        n = len(self.nodes)
+        offsets, targets = self._offsets, self._targets
+        index = array('i', [-1]) * n
+        low = array('i', bytes(4 * n))
+        on_stack = bytearray(n)
+        stack: List[int] = []
+        cycles: List[List[str]] = []
+        counter = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, offsets[root])]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+
+            while work:
+                node, pos = work[-1]
+                if pos < offsets[node + 1]:
+                    work[-1] = (node, pos + 1)
+                    nxt = targets[pos]
+                    if index[nxt] == -1:
+                        index[nxt] = low[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = 1
+                        work.append((nxt, offsets[nxt]))
+                    elif on_stack[nxt]:
+                        low[node] = min(low[node], index[nxt])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    self_loop = node in targets[offsets[node]:offsets[node + 1]]
+                    if len(component) > 1 or self_loop:
+                        cycles.append(sorted(self.nodes[m] for m in component))
+
+        return cycles
+
+    def memory_bytes(self) -> int:
+        """الحجم التقريبي لمصفوفات الحواف بالبايت"""
+        arrays = [self._offsets, self._targets, self._rev_offsets, self._rev_targets, self.kinds]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """تحويل إلى قاموس قابل للتسلسل"""
+        if not self._frozen:
+            self.freeze()
+        return {
+            'nodes': list(self.nodes),
+            'kinds': self.kinds.tolist(),
+            'offsets': self._offsets.tolist(),
+            'targets': self._targets.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ModuleGraph':
+        """إعادة البناء من قاموس"""
+        graph = cls()
+        for name, kind in zip(data.get('nodes', []), data.get('kinds', [])):
+            graph.add_node(name, kind)
+        offsets = data.get('offsets', [0])
+        targets = data.get('targets', [])
+        for node in range(len(offsets) - 1):
+            for pos in range(offsets[node], offsets[node + 1]):
+                graph._src.append(node)
+                graph._dst.append(targets[pos])
+        graph._frozen = False
+        graph.freeze()
+        return graph
+
+    def summary(self) -> Dict[str, Any]:
+        """ملخص الرسم البياني للتقارير"""
+        if not self._frozen:
+            self.freeze()
+        files = sum(1 for k in self.kinds if k == self.KIND_FILE)
+        return {
+            'total_nodes': len(self.nodes),
+            'total_files': files,
+            'total_packages': len(self.nodes) - files,
+            'total_edges': len(self._targets),
+            'entry_points': self.roots(),
+            'cycles': self.find_cycles(),
+            'memory_bytes': self.memory_bytes()
+        }
@@ -0,0 +1,335 @@
+"""
+حل الاستيرادات مقابل package.json و node_modules المحلي
+"""
+
+import os
+import re
+import json
+import stat
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+# الوحدات المدمجة في Node.js (لا تحتاج إلى حل)
+NODE_BUILTINS = {
+    'assert', 'buffer', 'child_process', 'cluster', 'crypto', 'dgram', 'dns',
+    'events', 'fs', 'http', 'http2', 'https', 'net', 'os', 'path', 'perf_hooks',
+    'process', 'querystring', 'readline', 'stream', 'string_decoder', 'timers',
+    'tls', 'tty', 'url', 'util', 'v8', 'vm', 'worker_threads', 'zlib'
+}
+
+
+class ModuleResolver:
+    """محلل وحدات بدون اتصال مع ذاكرة تخزين مؤقت للنتائج ولنتائج stat"""
+
+    # الامتدادات التي تتم تجربتها للملفات المحلية
+    EXTENSIONS = ['.js', '.mjs', '.cjs', '.jsx', '.ts', '.tsx', '.json']
+
+    # شروط exports المفضلة (بناء المتصفح بصيغة ES أولاً)
+    CONDITIONS = ('browser', 'import', 'module', 'default', 'require')
+
+    # حقول package.json التي تحتوي على التبعيات المعلنة
+    DEPENDENCY_FIELDS = ('dependencies', 'devDependencies', 'peerDependencies', 'optionalDependencies')
+
+    def __init__(self, project_root: Optional[Path] = None):
+        self.project_root = Path(self.normalize_path(project_root)) if project_root else None
+        self._cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._stat_cache: Dict[str, Optional[str]] = {}
+        self._package_cache: Dict[str, Optional[Dict]] = {}
+        self._manifest_dir_cache: Dict[str, Optional[str]] = {}
+
+    # ==================== واجهة الحل ====================
+    def resolve(self, specifier: str, importer: Path) -> Dict[str, Any]:
+        """حل مسار الاستيراد إلى ملف محلي أو حزمة مع الإصدار وملف الدخول"""
+        importer_dir = os.path.dirname(self.normalize_path(importer))
+        key = (importer_dir, specifier)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        if specifier.startswith(('.', '/')):
+            result = self._resolve_relative(specifier, importer_dir)
+        else:
+            result = self._resolve_bare(specifier, importer_dir)
+
+        self._cache[key] = result
+        return result
+
+    def clear_cache(self):
+        """مسح جميع الذواكر المؤقتة"""
+        self._cache.clear()
+        self._stat_cache.clear()
+        self._package_cache.clear()
+        self._manifest_dir_cache.clear()
+
+    def _resolve_relative(self, specifier: str, importer_dir: str) -> Dict[str, Any]:
+        """حل استيراد نسبي أو مطلق داخل المشروع"""
+        clean = specifier.split('?')[0].split('#')[0]
+        if clean.startswith('/'):
+            root = str(self.project_root) if self.project_root else importer_dir
+            base = os.path.join(root, clean.lstrip('/'))
+        else:
+            base = os.path.join(importer_dir, clean)
+
+        target = self._resolve_file(os.path.normpath(base))
+        if target is None:
+            return {'kind': 'unresolved', 'specifier': specifier}
+        return {'kind': 'file', 'specifier': specifier, 'path': target}
+
+    def _resolve_bare(self, specifier: str, importer_dir: str) -> Dict[str, Any]:
+        """حل استيراد حزمة: node_modules أولاً ثم التبعيات المعلنة"""
+        bare = specifier[5:] if specifier.startswith('node:') else specifier
+        name, subpath = self.split_specifier(bare)
+        if not name:
+            return {'kind': 'unresolved', 'specifier': specifier}
+
+        if specifier.startswith('node:') or name in NODE_BUILTINS:
+            return {'kind': 'builtin', 'specifier': specifier, 'name': name}
+
+        result = {
+            'kind': 'package',
+            'specifier': specifier,
+            'name': name,
+            'subpath': subpath,
+            'version': None,
+            'declared': None,
+            'entry': None,
+            'installed': False
+        }
+
+        manifest_dir = self._find_manifest_dir(importer_dir)
+        if manifest_dir:
+            declared = self._declared_range(manifest_dir, name)
+            if declared:
+                result['declared'] = declared
+                result['version'] = self.clean_version(declared)
+
+        package_dir = self._find_package_dir(name, importer_dir)
+        if package_dir:
+            package_json = self.read_package_json(package_dir) or {}
+            result['installed'] = True
+            result['version'] = package_json.get('version') or result['version']
+            entry = self._package_entry(package_dir, package_json, subpath)
+            if entry:
+                result['entry'] = entry
+
+        return result
+
+    # ==================== أدوات المسارات ====================
+    @staticmethod
+    def normalize_path(path) -> str:
+        """مسار مطلق بدون تتبع الروابط الرمزية
+
+        جذر المشروع ومسارات المستوردين يُطبعان بالدالة نفسها وإلا لا يطابق الصعود
+        الجذرَ في مشروع عبر رابط رمزي ويستمر البحث في node_modules حتى /
+        """
+        return os.path.abspath(str(path))
+
+    @staticmethod
+    def split_specifier(specifier: str) -> Tuple[str, str]:
+        """فصل اسم الحزمة عن المسار الفرعي ('.' أو './x')"""
+        parts = specifier.split('/')
+        if specifier.startswith('@'):
+            if len(parts) < 2 or not parts[1]:
+                return '', '.'
+            name, rest = '/'.join(parts[:2]), parts[2:]
+        else:
+            name, rest = parts[0], parts[1:]
+        subpath = './' + '/'.join(rest) if rest and any(rest) else '.'
+        return name, subpath
+
+    @staticmethod
+    def clean_version(version_range: str) -> Optional[str]:
+        """استخراج رقم إصدار من نطاق مثل ^4.17.21 أو ~3.6"""
+        match = re.search(r'(\d+(?:\.\d+){0,2}(?:-[\w.]+)?)', version_range or '')
+        return match.group(1) if match else None
+
+    def _stat(self, path: str) -> Optional[str]:
+        """نوع المسار ('file' أو 'dir' أو None) مع تخزين مؤقت"""
+        if path in self._stat_cache:
+            return self._stat_cache[path]
+        try:
+            mode = os.stat(path).st_mode
+        except OSError:
+            mode = 0
+        if stat.S_ISDIR(mode):
+            kind = 'dir'
+        elif stat.S_ISREG(mode):
+            kind = 'file'
+        else:
+            kind = None
+        self._stat_cache[path] = kind
+        return kind
+
+    def _resolve_file(self, base: str) -> Optional[str]:
+        """تجربة المسار كما هو ثم مع الامتدادات ثم كمجلد"""
+        kind = self._stat(base)
+        if kind == 'file':
+            return base
+
+        for ext in self.EXTENSIONS:
+            candidate = base + ext
+            if self._stat(candidate) == 'file':
+                return candidate
+
+        if kind == 'dir':
+            package_json = self.read_package_json(base)
+            if package_json:
+                entry = self._package_entry(base, package_json, '.')
+                if entry:
+                    return entry
+            for ext in self.EXTENSIONS:
+                candidate = os.path.join(base, 'index' + ext)
+                if self._stat(candidate) == 'file':
+                    return candidate
+
+        return None
+
+    def _parents(self, start_dir: str):
+        """المجلدات من مجلد البداية صعوداً حتى جذر المشروع أو جذر النظام"""
+        current = start_dir
+        stop = str(self.project_root) if self.project_root else None
+        while True:
+            yield current
+            if stop is not None and current == stop:
+                return
+            parent = os.path.dirname(current)
+            if parent == current:
+                return
+            current = parent
+
+    def _find_manifest_dir(self, start_dir: str) -> Optional[str]:
+        """أقرب مجلد يحتوي على package.json"""
+        if start_dir in self._manifest_dir_cache:
+            return self._manifest_dir_cache[start_dir]
+        found = None
+        for directory in self._parents(start_dir):
+            if os.path.basename(directory) == 'node_modules':
+                continue
+            if self._stat(os.path.join(directory, 'package.json')) == 'file':
+                found = directory
+                break
+        self._manifest_dir_cache[start_dir] = found
+        return found
+
+    def _find_package_dir(self, name: str, start_dir: str) -> Optional[str]:
+        """البحث عن الحزمة في node_modules صعوداً من مجلد المستورد"""
+        for directory in self._parents(start_dir):
+            if os.path.basename(directory) == 'node_modules':
+                continue
+            candidate = os.path.join(directory, 'node_modules', name)
+            if self._stat(candidate) == 'dir':
+                return candidate
+        return None
+
+    def read_package_json(self, directory: str) -> Optional[Dict]:
+        """قراءة package.json في المجلد مع تخزين مؤقت (None إذا لم يوجد أو لم يكن كائن JSON)"""
+        if directory in self._package_cache:
+            return self._package_cache[directory]
+        data = None
+        path = os.path.join(directory, 'package.json')
+        if self._stat(path) == 'file':
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    data = None
+            except (OSError, ValueError):
+                data = None
+        self._package_cache[directory] = data
+        return data
+
+    def _declared_range(self, manifest_dir: str, name: str) -> Optional[str]:
+        """نطاق الإصدار المعلن للحزمة في package.json"""
+        manifest = self.read_package_json(manifest_dir) or {}
+        for field in self.DEPENDENCY_FIELDS:
+            deps = manifest.get(field)
+            if isinstance(deps, dict) and isinstance(deps.get(name), str):
+                return deps[name]
+        return None
+
+    def declared_dependencies(self, directory: Optional[Path] = None) -> Dict[str, str]:
+        """جميع التبعيات المعلنة في package.json الخاص بالمشروع"""
+        start = str(directory or self.project_root or Path.cwd())
+        manifest_dir = self._find_manifest_dir(self.normalize_path(start))
+        if not manifest_dir:
+            return {}
+        manifest = self.read_package_json(manifest_dir) or {}
+        declared = {}
+        for field in self.DEPENDENCY_FIELDS:
+            deps = manifest.get(field)
+            if isinstance(deps, dict):
+                for name, version in deps.items():
+                    declared.setdefault(name, version)
+        return declared
+
+    # ==================== ملف الدخول ====================
+    def _package_entry(self, package_dir: str, package_json: Dict, subpath: str) -> Optional[str]:
+        """ملف الدخول حسب exports ثم module ثم main ثم index"""
+        exports = package_json.get('exports')
+        if exports is not None:
+            target = self._resolve_exports(exports, subpath)
+            if target:
+                path = os.path.normpath(os.path.join(package_dir, target))
+                if self._stat(path) == 'file':
+                    return path
+            # exports تمنع الوصول إلى المسارات غير المعلنة
+            return None
+
+        if subpath != '.':
+            return self._resolve_file(os.path.normpath(os.path.join(package_dir, subpath)))
+
+        for field in ('module', 'main'):
+            value = package_json.get(field)
+            if isinstance(value, str) and value:
+                base = os.path.normpath(os.path.join(package_dir, value))
+                if base == os.path.normpath(package_dir):
+                    continue
+                target = self._resolve_file(base)
+                if target:
+                    return target
+
+        return self._resolve_file(os.path.join(package_dir, 'index'))
+
+    def _resolve_exports(self, exports: Any, subpath: str) -> Optional[str]:
+        """حل حقل exports (سلاسل، قوائم، شروط، وأنماط *)"""
+        is_subpath_map = isinstance(exports, dict) and any(k.startswith('.') for k in exports)
+        if not is_subpath_map:
+            return self._resolve_target(exports) if subpath == '.' else None
+
+        if subpath in exports:
+            return self._resolve_target(exports[subpath])
+
+        best = None
+        for key in exports:
+            if '*' not in key:
+                continue
+            prefix, suffix = key.split('*', 1)
+            if (subpath.startswith(prefix) and subpath.endswith(suffix)
+                    and len(subpath) >= len(prefix) + len(suffix)):
+                if best is None or len(prefix) > len(best[0]):
+                    best = (prefix, key, subpath[len(prefix):len(subpath) - len(suffix)])
+
+        if best:
+            target = self._resolve_target(exports[best[1]])
+            return target.replace('*', best[2]) if target else None
+
+        return None
+
+    def _resolve_target(self, target: Any) -> Optional[str]:
+        """اختيار الهدف حسب ترتيب المفاتيح والشروط المدعومة"""
+        if isinstance(target, str):
+            return target
+        if isinstance(target, list):
+            for item in target:
+                resolved = self._resolve_target(item)
+                if resolved:
+                    return resolved
+            return None
+        if isinstance(target, dict):
+            for condition, value in target.items():
+                if condition in self.CONDITIONS:
+                    resolved = self._resolve_target(value)
+                    if resolved:
+                        return resolved
+        return None
@@ -29,6 +29,13 @@ except ImportError:
     )
     from config import get_config, Config
 
+try:
+    from .css_purge import SelectorUsage
+    from .code_splitter import PageAssets
+except ImportError:
+    from css_purge import SelectorUsage
+    from code_splitter import PageAssets
+
 logger = setup_logger('scanner')
 
 class WebProjectScanner:
@@ -71,11 +78,18 @@ class WebProjectScanner:
                 'tailwind': {'version': None, 'files': []}
             },
             'cdn_links': [],
+            'css_imports': {},
             'local_libraries': [],
             'warnings': [],
             'errors': []
         }
         
+        # الأصناف والمعرفات والوسوم المستخدمة (لحذف CSS غير المستخدم)
+        self.selector_usage = SelectorUsage()
+        
+        # ملفات JS/CSS المحلية لكل صفحة بالترتيب (لتقسيم الحزم حسب الصفحات)
+        self.page_assets = PageAssets(self.project_path)
+        
         # إحصائيات
         self.stats = get_project_stats(self.project_path)
         
@@ -244,6 +258,9 @@ class WebProjectScanner:
     
     def _analyze_html_content(self, content: str, file_path: Path):
         """تحليل محتوى HTML"""
+        self.selector_usage.feed_html(content)
+        self.page_assets.feed_html(file_path.relative_to(self.project_path).as_posix(), content)
+        
         # اكتشاف jQuery
         jquery_patterns = [
             r'src=["\'][^"\']*jquery[^"\']*["\']',
@@ -313,14 +330,27 @@ class WebProjectScanner:
         
         # استخراج الاستيرادات
         imports = re.findall(r'@import\s+(?:url\()?["\']?([^"\';\)]+)["\']?', content)
+        local_imports = []
         for imp in imports:
             if imp.startswith('http'):
                 if any(cdn in imp for cdn in self.config['known_cdns']):
                     if imp not in self.results['cdn_links']:
                         self.results['cdn_links'].append(imp)
+            elif not imp.startswith(('//', '/', 'data:')):
+                # الاستيرادات المحلية تُدمج في الملف عند البناء (CSSBundler)
+                local_imports.append(imp.strip())
+        if local_imports:
+            try:
+                key = file_path.resolve().relative_to(self.project_path).as_posix()
+            except ValueError:
+                key = str(file_path)
+            self.results['css_imports'][key] = local_imports
     
     def _analyze_js_content(self, content: str, file_path: Path):
         """تحليل محتوى JavaScript"""
+        # أصناف تضاف عبر addClass/classList ومحددات $('.x')
+        self.selector_usage.feed_js(content)
+        
         # اكتشاف مكتبات JS
         library_patterns = {
             'jquery': [r'\$\.|\$\(|jQuery\(|\.ajax\(|\.get\('],
@@ -348,6 +378,9 @@ class WebProjectScanner:
     
     def _analyze_php_content(self, content: str, file_path: Path):
         """تحليل محتوى PHP"""
+        if file_path.suffix.lower() in ('.php', '.phtml'):
+            self.selector_usage.feed_php(content)
+        
         # اكتشاف Composer
         if 'composer.json' in str(file_path):
             try:
@@ -438,6 +471,9 @@ class WebProjectScanner:
             if key in self.results['dependencies']:
                 self.results['dependencies'][key] = list(set(self.results['dependencies'][key]))
         
+        self.results['selector_usage'] = self.selector_usage.to_dict()
+        self.results['page_assets'] = self.page_assets.to_dict()
+        
         # إضافة ملخص
         self.results['summary'] = {
             'total_dependencies': sum(len(deps) for deps in self.results['dependencies'].values()),
@@ -451,9 +487,13 @@ class WebProjectScanner:
     
     def _should_skip(self, file_path: Path) -> bool:
         """تحديد ما إذا كان يجب تخطي الملف"""
-        # التحقق من المجلدات المستبعدة
+        # التحقق من المجلدات المستبعدة (مقارنة أجزاء المسار: temp لا تستبعد template)
+        try:
+            parts = file_path.relative_to(self.project_path).parts[:-1]
+        except ValueError:
+            parts = file_path.parts[:-1]
         for excluded in self.config['exclusions']['dirs']:
-            if excluded in str(file_path):
+            if excluded in parts:
                 return True
         
         # التحقق من الملفات المستبعدة
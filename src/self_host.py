@@ -0,0 +1,332 @@
+"""
+الاستضافة الذاتية: تنزيل ملفات CDN إلى vendor/ وإعادة كتابة وسوم الصفحات لتشير إلى النسخ المحلية أو الأجزاء
+"""
+
+import re
+import hashlib
+import posixpath
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urljoin, urlsplit, unquote
+
+try:
+    from .html_rewriter import Tag, iter_tags, rewrite_stream
+    from .code_splitter import PageAssets, asset_reference, external_url, KINDS
+    from .critical_css import inline_style
+    from .utils.object_store import write_atomic
+except ImportError:
+    from src.html_rewriter import Tag, iter_tags, rewrite_stream
+    from src.code_splitter import PageAssets, asset_reference, external_url, KINDS
+    from src.critical_css import inline_style
+    from src.utils.object_store import write_atomic
+
+
+REWRITE_SUFFIXES = {'.html', '.htm', '.php', '.phtml'}
+REWRITE_TAGS = ('script', 'link')
+VENDOR_DIRNAME = 'vendor'
+SITE_DIRNAME = 'site'
+
+# عمق ملفات CSS المستوردة داخل ملفات CSS من CDN (@import)
+MAX_CSS_DEPTH = 3
+
+_CSS_REF_RE = re.compile(
+    r'url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^)\s]*))\s*\)|@import\s+(?:"([^"]*)"|\'([^\']*)\')',
+    re.IGNORECASE
+)
+_CSS_IMPORT_RE = re.compile(r'@import\b', re.IGNORECASE)
+_RESOURCE_HINTS = {'preconnect', 'dns-prefetch'}
+_DEFERRED_ONLOAD = "this.onload=null;this.rel='stylesheet'"
+
+
+def _safe_segment(segment: str) -> str:
+    return re.sub(r'[^\w.-]+', '_', unquote(segment)).strip('._') or '_'
+
+
+def _vendor_segments(url: str) -> List[str]:
+    parts = urlsplit(url)
+    return [VENDOR_DIRNAME, _safe_segment(parts.netloc)] + [_safe_segment(s) for s in parts.path.split('/') if s]
+
+
+def vendor_path(url: str, data: bytes, kind: Optional[str] = None) -> str:
+    """vendor/<المضيف>/<المسار>/<الاسم>.<بصمة المحتوى><الامتداد>"""
+    segments = _vendor_segments(url)
+    name = segments.pop() if len(segments) > 2 else 'index'
+    stem, ext = posixpath.splitext(name)
+    if kind == 'styles' and ext.lower() != '.css':
+        stem, ext = name, '.css'
+    elif kind == 'scripts' and ext.lower() not in ('.js', '.mjs'):
+        stem, ext = name, '.js'
+    content_hash = hashlib.sha256(data).hexdigest()[:8]
+    return posixpath.join(*segments, f'{stem}.{content_hash}{ext}')
+
+
+class SelfHoster:
+    """تنزيل ملفات CDN (أو جلبها من ArtifactCache) وكتابتها في vendor/ بأسماء تحمل بصمة المحتوى
+
+    ملفات CSS تُنزل معها الخطوط والصور وملفات @import التي تشير إليها، وتُعدل روابطها إلى النسخ المحلية
+    """
+
+    def __init__(self, cache, output_dir: Path, max_workers: int = 8):
+        self.cache = cache
+        self.output_dir = Path(output_dir)
+        self.max_workers = max_workers
+        # الرابط ← المسار داخل مجلد المخرجات
+        self.hosted: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.sizes: Dict[str, int] = {}
+        self._fetched: Dict[str, Dict[str, Any]] = {}
+
+    def host(self, references: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """references: {الرابط: {'kind': 'scripts'|'styles', 'integrity': ...}}؛ يعيد {الرابط: المسار المحلي}"""
+        pending = {url: ref for url, ref in references.items() if url not in self._fetched}
+        depth = 0
+        while pending:
+            self._fetch_all(pending)
+            depth += 1
+            # الجولة التالية: الملفات التي تشير إليها ملفات CSS المنزلة للتو
+            following = {}
+            for url, ref in pending.items():
+                fetched = self._fetched[url]
+                if fetched.get('css') is None:
+                    continue
+                for target, kind in self._css_dependencies(url, fetched['css']):
+                    if target not in self._fetched and target not in following and depth < MAX_CSS_DEPTH:
+                        following[target] = {'kind': kind}
+            pending = following
+
+        for url in list(self._fetched):
+            self._write(url, set())
+        return {url: self.hosted[url] for url in references if url in self.hosted}
+
+    def _fetch_all(self, pending: Dict[str, Dict[str, Any]]):
+        def run(item):
+            url, ref = item
+            try:
+                with self.cache.reading(url, ref.get('integrity')) as result:
+                    data = Path(result['path']).read_bytes()
+            except Exception as e:
+                return url, {'kind': ref.get('kind'), 'error': str(e)}
+            fetched = {'kind': ref.get('kind'), 'data': data, 'status': result['status'], 'css': None}
+            if ref.get('kind') == 'styles':
+                try:
+                    fetched['css'] = data.decode('utf-8')
+                except UnicodeDecodeError:
+                    pass
+            return url, fetched
+
+        items = list(pending.items())
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(items))),
+                                thread_name_prefix='self-host') as executor:
+            for url, fetched in executor.map(run, items):
+                self._fetched[url] = fetched
+                if 'error' in fetched:
+                    self.errors[url] = fetched['error']
+        self.cache.save()
+
+    @staticmethod
+    def _css_dependencies(url: str, css: str):
+        for match in _CSS_REF_RE.finditer(css):
+            ref = next(group for group in match.groups() if group is not None).strip()
+            target = external_url(urljoin(url, ref)) if ref and not ref.startswith(('data:', '#')) else None
+            if target:
+                is_import = match.group(4) is not None or match.group(5) is not None or \
+                    _CSS_IMPORT_RE.search(css, max(0, match.start() - 12), match.start())
+                yield target, 'styles' if is_import else None
+
+    def _write(self, url: str, visiting: set) -> Optional[str]:
+        """كتابة الملف (بعد كتابة ما يشير إليه إن كان CSS) وإرجاع مساره المحلي"""
+        if url in self.hosted or url in self.errors:
+            return self.hosted.get(url)
+        fetched = self._fetched.get(url)
+        if fetched is None or url in visiting:
+            return None
+        visiting.add(url)
+        data = fetched['data']
+        if fetched['css'] is not None:
+            data = self._rewrite_css(url, fetched['css'], visiting).encode('utf-8')
+        rel = vendor_path(url, data, fetched['kind'])
+        write_atomic(self.output_dir / rel, data)
+        self.hosted[url] = rel
+        self.sizes[url] = len(data)
+        fetched['data'] = None
+        return rel
+
+    def _rewrite_css(self, url: str, css: str, visiting: set) -> str:
+        # اسم ملف CSS يعتمد على محتواه بعد التعديل؛ لذلك تُكتب الملفات التي يشير إليها أولاً
+        segments = _vendor_segments(url)
+        base_dir = posixpath.join(*(segments[:-1] if len(segments) > 2 else segments))
+
+        def replace(match):
+            ref = next(group for group in match.groups() if group is not None).strip()
+            if not ref or ref.startswith(('data:', '#')):
+                return match.group(0)
+            absolute = urljoin(url, ref)
+            fragment = '#' + absolute.split('#', 1)[1] if '#' in absolute else ''
+            target = external_url(absolute)
+            local = self._write(target, visiting) if target else None
+            # الروابط النسبية التي تعذر تنزيلها تصبح مطلقة حتى تبقى صالحة من المسار الجديد
+            new = posixpath.relpath(local, base_dir) + fragment if local else absolute
+            if match.group(4) is not None or match.group(5) is not None:
+                return f'@import "{new}"'
+            return f'url("{new}")'
+
+        return _CSS_REF_RE.sub(replace, css)
+
+    def fully_hosted_hosts(self) -> set:
+        """المضيفون الذين استُضيفت كل ملفاتهم (تلميحات preconnect إليهم لم تعد مفيدة)"""
+        hosts = {urlsplit(url).netloc.lower() for url in self.hosted}
+        return hosts - {urlsplit(url).netloc.lower() for url in self.errors}
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'hosted': {url: {'file': rel, 'size': self.sizes.get(url, 0)} for url, rel in sorted(self.hosted.items())},
+            'errors': dict(sorted(self.errors.items())),
+            'size': sum(self.sizes.values())
+        }
+
+
+def page_files(project_path: Path, excluded_dirs: Iterable[str] = ()) -> List[Path]:
+    """صفحات HTML/PHP التي تُعاد كتابتها"""
+    excluded = set(excluded_dirs)
+    pages = []
+    for path in sorted(Path(project_path).rglob('*')):
+        if path.suffix.lower() not in REWRITE_SUFFIXES or not path.is_file():
+            continue
+        if excluded & set(path.relative_to(project_path).parts[:-1]):
+            continue
+        pages.append(path)
+    return pages
+
+
+def collect_external(pages: Iterable[Path], cdn_links: Iterable[str] = ()) -> Dict[str, Dict[str, Any]]:
+    """روابط CDN في وسوم <script src> و <link rel=stylesheet> لكل الصفحات: {الرابط: {'kind', 'integrity'}}
+
+    cdn_links: روابط CDN من نتائج المسح (ملفات ‎.js و ‎.css فقط) تُضاف إن لم تظهر في الوسوم
+    """
+    found: Dict[str, Dict[str, Any]] = {}
+    for path in pages:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                for tag in iter_tags(f, REWRITE_TAGS):
+                    reference = asset_reference(tag.name, tag.attrs)
+                    url = external_url(reference[1]) if reference and reference[1] else None
+                    if url and url not in found:
+                        found[url] = {'kind': reference[0], 'integrity': tag.attrs.get('integrity')}
+        except OSError:
+            continue
+    for link in cdn_links:
+        url = external_url(link)
+        suffix = posixpath.splitext(urlsplit(url).path)[1].lower() if url else ''
+        if url and url not in found and suffix in ('.js', '.css'):
+            found[url] = {'kind': 'scripts' if suffix == '.js' else 'styles'}
+    return found
+
+
+class PageRewriter:
+    """نسخة من كل صفحة تشير إلى الأجزاء (حسب خطة التقسيم) أو إلى ملفات vendor/ بدل CDN
+
+    الوسم الأول من كل جزء يصبح رابط الجزء ويُحذف الباقي؛ المسارات نسبية للصفحة على افتراض نشر مجلد
+    المخرجات في جذر المشروع، إلا إذا حُدد base_url. مع CSS الحرج يُضمن في <style> قبل أول ملف أنماط
+    وتُحمل الملفات التي يغطيها بعد العرض الأول (preload ثم stylesheet)
+    """
+
+    def __init__(self, page_assets: PageAssets, hosted: Dict[str, str], plan: Optional[Dict[str, Any]] = None,
+                 hosts: Iterable[str] = (), base_url: str = '', asset_names: Optional[Dict[str, str]] = None,
+                 critical: Optional[Dict[str, Dict[str, Any]]] = None):
+        """asset_names: الأسماء بالبصمة للأجزاء (من manifest.json)؛ critical: {الصفحة: {'css', 'sources'}}"""
+        self.page_assets = page_assets
+        self.hosted = hosted
+        self.plan = plan or {}
+        self.hosts = set(hosts)
+        self.base_url = base_url
+        self.asset_names = asset_names or {}
+        self.critical = critical or {}
+
+    def _url_for(self, page: str, target: str) -> str:
+        target = self.asset_names.get(target, target)
+        if self.base_url:
+            return self.base_url.rstrip('/') + '/' + target
+        return posixpath.relpath(target, posixpath.dirname(page) or '.')
+
+    def _page_chunks(self, page: str) -> Dict[str, Dict[str, str]]:
+        """{النوع: {المرجع: ملف الجزء}} للصفحة إن كانت في خطة التقسيم"""
+        chunks = {}
+        for kind in KINDS:
+            result = self.plan.get(kind) or {}
+            chunks[kind] = {asset: result['files'][name]
+                            for name in result.get('pages', {}).get(page, [])
+                            for asset in result['chunks'][name]}
+        return chunks
+
+    @staticmethod
+    def _deferred(link: str) -> str:
+        """تحميل ملف الأنماط دون حجب العرض (مع البديل عند تعطيل JavaScript)"""
+        preload = Tag('link', link).with_attrs(rel='preload', onload=_DEFERRED_ONLOAD, **{'as': 'style'})
+        return f'{preload}<noscript>{link}</noscript>'
+
+    def rewrite(self, page: str, source: Path, target: Path) -> Dict[str, Any]:
+        """كتابة الصفحة المعدلة في مرور واحد وإرجاع عدد الوسوم المعدلة والمحذوفة"""
+        chunks = self._page_chunks(page)
+        emitted = set()
+        stats = {'page': page, 'rewritten': 0, 'removed': 0}
+        critical = self.critical.get(page)
+        if critical is not None and not critical.get('css'):
+            # لا قواعد حرجة: تأجيل الأنماط يعرض الصفحة بدون تنسيق
+            critical = None
+        if critical is not None:
+            stats['critical'] = 0
+        covered = set(critical['sources']) if critical is not None else set()
+
+        def handle(tag: Tag) -> Optional[str]:
+            replacement = rewrite_tag(tag)
+            if critical is None or replacement == '' or tag.name != 'link':
+                return replacement
+            reference = asset_reference(tag.name, tag.attrs)
+            if not reference or not reference[1] or not reference[2] or \
+                    self.page_assets.resolve(page, reference[1]) not in covered:
+                return replacement
+            link = tag.raw if replacement is None else replacement
+            prefix = ''
+            if not stats['critical']:
+                prefix = inline_style(critical['css'])
+            stats['critical'] += 1
+            return prefix + self._deferred(link)
+
+        def rewrite_tag(tag: Tag) -> Optional[str]:
+            if tag.name == 'link' and _RESOURCE_HINTS & set((tag.attrs.get('rel') or '').lower().split()):
+                url = external_url(tag.attrs.get('href') or '')
+                if url and urlsplit(url).netloc.lower() in self.hosts:
+                    stats['removed'] += 1
+                    return ''
+                return None
+            reference = asset_reference(tag.name, tag.attrs)
+            if not reference or not reference[1]:
+                return None
+            kind, ref, movable = reference
+            attr = 'src' if kind == 'scripts' else 'href'
+            key = self.page_assets.resolve(page, ref)
+            chunk = chunks[kind].get(key) if movable else None
+            if chunk is not None:
+                if chunk in emitted:
+                    stats['removed'] += 1
+                    return ''
+                emitted.add(chunk)
+                stats['rewritten'] += 1
+                return tag.with_attrs(**{attr: self._url_for(page, chunk), 'integrity': None})
+            if key in self.hosted:
+                stats['rewritten'] += 1
+                # محتوى CSS تغير بتعديل روابطه فلم تعد قيمة integrity صالحة؛ JS يبقى كما هو
+                changes = {attr: self._url_for(page, self.hosted[key])}
+                if kind == 'styles':
+                    changes['integrity'] = None
+                return tag.with_attrs(**changes)
+            return None
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + '.tmp')
+        with open(source, 'r', encoding='utf-8', errors='surrogateescape', newline='') as src, \
+                open(tmp, 'w', encoding='utf-8', errors='surrogateescape', newline='') as dst:
+            rewrite_stream(src, dst, handle, REWRITE_TAGS)
+        tmp.replace(target)
+        return stats
@@ -0,0 +1,259 @@
+"""
+خرائط المصدر (Source Map v3): بناء تدريجي بترميز VLQ، قراءة، وتركيب الخرائط عبر مراحل البناء
+"""
+
+import io
+import re
+import json
+import base64
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+
+_BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+_BASE64_VALUES = {c: i for i, c in enumerate(_BASE64)}
+
+SOURCE_MAPPING_URL_RE = re.compile(r'[ \t]*(?://[#@]|/\*[#@])\s*sourceMappingURL=([^\s*]+)[^\n]*\s*$')
+
+
+def encode_vlq(value: int) -> str:
+    """ترميز عدد صحيح بـ Base64 VLQ (البت الأدنى للإشارة)"""
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    chars = []
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            digit |= 32
+        chars.append(_BASE64[digit])
+        if not value:
+            return ''.join(chars)
+
+
+def decode_vlq(segment: str) -> List[int]:
+    """فك ترميز مقطع VLQ كامل إلى قائمة أعداد"""
+    values = []
+    value = shift = 0
+    for char in segment:
+        digit = _BASE64_VALUES[char]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+            continue
+        values.append(-(value >> 1) if value & 1 else value >> 1)
+        value = shift = 0
+    return values
+
+
+def iter_mappings(mappings: str) -> Iterator[Tuple[int, ...]]:
+    """(سطر الناتج، عمود الناتج، المصدر، سطر المصدر، عمود المصدر، الاسم) بقيم مطلقة؛ -1 للحقل غير الموجود"""
+    source = src_line = src_col = name = 0
+    for line, text in enumerate(mappings.split(';')):
+        col = 0
+        for segment in text.split(','):
+            if not segment:
+                continue
+            values = decode_vlq(segment)
+            col += values[0]
+            if len(values) < 4:
+                yield line, col, -1, -1, -1, -1
+                continue
+            source += values[1]
+            src_line += values[2]
+            src_col += values[3]
+            if len(values) > 4:
+                name += values[4]
+                yield line, col, source, src_line, src_col, name
+            else:
+                yield line, col, source, src_line, src_col, -1
+
+
+class SourceMapBuilder:
+    """بناء خريطة v3 تدريجياً: كل مقطع يُرمز فوراً في مخزن نصي (StringIO) بدل قوائم من الصفوف
+
+    المقاطع يجب أن تُضاف بترتيب موضعها في الناتج (الأسطر والأعمدة تبدأ من 0)
+    """
+
+    def __init__(self, file: Optional[str] = None):
+        self.file = file
+        self.sources: List[str] = []
+        self.sources_content: List[Optional[str]] = []
+        self.names: List[str] = []
+        self._source_index: Dict[str, int] = {}
+        self._name_index: Dict[str, int] = {}
+        self._buffer = io.StringIO()
+        self._line = 0
+        self._col = 0
+        self._source = 0
+        self._src_line = 0
+        self._src_col = 0
+        self._name = 0
+        self._line_has_segment = False
+
+    def add_source(self, name: str, content: Optional[str] = None) -> int:
+        index = self._source_index.get(name)
+        if index is None:
+            index = self._source_index[name] = len(self.sources)
+            self.sources.append(name)
+            self.sources_content.append(content)
+        elif content is not None and self.sources_content[index] is None:
+            self.sources_content[index] = content
+        return index
+
+    def add_name(self, name: str) -> int:
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def add_mapping(self, gen_line: int, gen_col: int, source: int, src_line: int, src_col: int,
+                    name: Optional[str] = None):
+        if gen_line > self._line:
+            self._buffer.write(';' * (gen_line - self._line))
+            self._line = gen_line
+            self._col = 0
+            self._line_has_segment = False
+        elif self._line_has_segment:
+            self._buffer.write(',')
+
+        write = self._buffer.write
+        write(encode_vlq(gen_col - self._col))
+        write(encode_vlq(source - self._source))
+        write(encode_vlq(src_line - self._src_line))
+        write(encode_vlq(src_col - self._src_col))
+        if name is not None:
+            name_index = self.add_name(name)
+            write(encode_vlq(name_index - self._name))
+            self._name = name_index
+        self._col = gen_col
+        self._source = source
+        self._src_line = src_line
+        self._src_col = src_col
+        self._line_has_segment = True
+
+    @property
+    def mappings(self) -> str:
+        return self._buffer.getvalue()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'version': 3}
+        if self.file:
+            data['file'] = self.file
+        data.update(sources=self.sources, names=self.names, mappings=self.mappings)
+        if any(content is not None for content in self.sources_content):
+            data['sourcesContent'] = self.sources_content
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+
+class SourceMapConsumer:
+    """قراءة خريطة للبحث عن الموضع الأصلي؛ المقاطع مخزنة في مصفوفات رقمية لكل سطر"""
+
+    def __init__(self, data: Dict[str, Any]):
+        if data.get('version') != 3 or 'sections' in data:
+            raise ValueError('خريطة مصدر غير مدعومة (مطلوب الإصدار 3 بدون أقسام)')
+        root = data.get('sourceRoot') or ''
+        if root and not root.endswith('/'):
+            root += '/'
+        self.sources = [f'{root}{s}' if s is not None else '' for s in data.get('sources', [])]
+        self.sources_content = list(data.get('sourcesContent') or [None] * len(self.sources))
+        self.names = list(data.get('names', []))
+        self._columns: List[array] = []
+        self._segments: List[array] = []
+        for line, col, source, src_line, src_col, name in iter_mappings(data.get('mappings', '')):
+            while len(self._columns) <= line:
+                self._columns.append(array('l'))
+                self._segments.append(array('l'))
+            self._columns[line].append(col)
+            self._segments[line].extend((source, src_line, src_col, name))
+
+    @classmethod
+    def from_json(cls, text: str) -> 'SourceMapConsumer':
+        return cls(json.loads(text))
+
+    def lookup(self, line: int, col: int) -> Optional[Tuple[int, int, int, int]]:
+        """(المصدر، السطر، العمود، الاسم) لأقرب مقطع يبدأ عند العمود أو قبله في نفس السطر"""
+        if line >= len(self._columns):
+            return None
+        index = bisect_right(self._columns[line], col) - 1
+        if index < 0:
+            return None
+        segment = self._segments[line][index * 4:index * 4 + 4]
+        if segment[0] < 0:
+            return None
+        return segment[0], segment[1], segment[2], segment[3]
+
+
+class ComposedSourceMap:
+    """تركيب مرحلتين أثناء البناء: المقاطع المضافة (ناتج ← وسيط) تُترجم عبر inner (وسيط ← أصل) إلى target
+
+    لا تُخزن الخريطة الوسيطة؛ لذلك يمكن تمريرها لأي مرحلة تقبل SourceMapBuilder
+    """
+
+    def __init__(self, target: SourceMapBuilder, inner: SourceMapConsumer):
+        self.target = target
+        self.inner = inner
+        self._source_ids: Dict[int, int] = {}
+
+    def add_source(self, name: str, content: Optional[str] = None) -> int:
+        # المصدر الوسيط نفسه لا يظهر في الخريطة النهائية
+        return 0
+
+    def add_mapping(self, gen_line: int, gen_col: int, source: int, src_line: int, src_col: int,
+                    name: Optional[str] = None):
+        original = self.inner.lookup(src_line, src_col)
+        if original is None:
+            return
+        inner_source, line, col, inner_name = original
+        target_source = self._source_ids.get(inner_source)
+        if target_source is None:
+            content = self.inner.sources_content[inner_source] if inner_source < len(self.inner.sources_content) else None
+            target_source = self._source_ids[inner_source] = self.target.add_source(
+                self.inner.sources[inner_source], content
+            )
+        if inner_name >= 0:
+            name = self.inner.names[inner_name]
+        self.target.add_mapping(gen_line, gen_col, target_source, line, col, name)
+
+
+def find_source_mapping_url(code: str) -> Optional[str]:
+    """رابط الخريطة من تعليق sourceMappingURL في آخر الملف"""
+    match = SOURCE_MAPPING_URL_RE.search(code[-2048:])
+    return match.group(1) if match else None
+
+
+def strip_source_mapping_url(code: str) -> str:
+    return SOURCE_MAPPING_URL_RE.sub('', code)
+
+
+def load_input_map(code: str, path: Path) -> Optional[Dict[str, Any]]:
+    """الخريطة التي يشير إليها الملف (ملف محلي بجانبه أو data: URI)، أو None"""
+    url = find_source_mapping_url(code)
+    if not url:
+        return None
+    try:
+        if url.startswith('data:'):
+            header, _, payload = url.partition(',')
+            text = base64.b64decode(payload).decode('utf-8') if header.endswith(';base64') else unquote(payload)
+        elif '://' in url:
+            return None
+        else:
+            map_path = Path(path).parent / unquote(url.split('?')[0])
+            text = map_path.read_text(encoding='utf-8')
+        data = json.loads(text)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get('version') == 3 and 'sections' not in data else None
+
+
+def source_mapping_comment(map_name: str, kind: str) -> str:
+    """التعليق الذي يربط الملف بخريطته"""
+    if kind == 'css':
+        return f'\n/*# sourceMappingURL={map_name} */'
+    return f'\n//# sourceMappingURL={map_name}'
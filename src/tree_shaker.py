@@ -0,0 +1,400 @@
+"""
+بناء نسخ مخصصة من المكتبات تحتوي فقط على ما يستخدمه المشروع
+"""
+
+import gzip
+import posixpath
+from array import array
+from bisect import bisect_right
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    from .js_lexer import tokenize, string_value, line_offsets, token_offset
+    from .library_sizes import LIBRARY_SIZES, LODASH_EXPORTS, estimate_savings
+    from .source_map import SourceMapBuilder
+except ImportError:
+    from js_lexer import tokenize, string_value, line_offsets, token_offset
+    from library_sizes import LIBRARY_SIZES, LODASH_EXPORTS, estimate_savings
+    from source_map import SourceMapBuilder
+
+
+class TreeShakeError(Exception):
+    """تعذر بناء النسخة المخصصة"""
+
+
+class ESModuleLinker:
+    """ربط وحدات ES بسيطة (مثل lodash-es) في ملف واحد بنمط سجل وحدات داخلي"""
+
+    def __init__(self, loader: Callable[[str], str]):
+        # loader: يعيد نص الوحدة من مسارها النسبي داخل الحزمة (مثل 'debounce.js')
+        self.loader = loader
+        self.modules: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def module_id(name: str) -> str:
+        """مسار الوحدة مع الامتداد"""
+        return name if name.endswith('.js') else f'{name}.js'
+
+    def collect(self, entries: Iterable[str]) -> List[str]:
+        """إغلاق التبعيات الداخلية بالبحث بالعرض (كل وحدة تُحمّل مرة واحدة)"""
+        queue = deque(self.module_id(e) for e in entries)
+        order = []
+        while queue:
+            module_id = queue.popleft()
+            if module_id in self.modules:
+                continue
+            source = self.loader(module_id)
+            module = self._transform(module_id, source)
+            self.modules[module_id] = module
+            order.append(module_id)
+            queue.extend(dep for dep in module['deps'] if dep not in self.modules)
+        return order
+
+    def _transform(self, module_id: str, source: str) -> Dict[str, Any]:
+        """تحويل import/export إلى استدعاءات السجل الداخلي"""
+        tokens = tokenize(source)
+        offsets = line_offsets(source)
+        edits = []
+        deps = []
+        exports_tail = []
+        base_dir = posixpath.dirname(module_id)
+
+        def offset(i):
+            return token_offset(offsets, tokens[i])
+
+        def end_offset(i):
+            return offset(i) + len(tokens[i].value)
+
+        def is_punct(i, value):
+            return i < len(tokens) and tokens[i].type == 'punct' and tokens[i].value == value
+
+        i = 0
+        count = len(tokens)
+        while i < count:
+            tok = tokens[i]
+            prev = tokens[i - 1] if i else None
+            at_statement = prev is None or (prev.type == 'punct' and prev.value in (';', '}')) or tok.nl
+            if tok.type != 'name' or not at_statement:
+                i += 1
+                continue
+
+            if tok.value == 'import' and not is_punct(i + 1, '(') and not is_punct(i + 1, '.'):
+                # import X from './y.js' | import { a as b } from './y.js' | import * as ns from './y.js'
+                j = i + 1
+                while j < count and tokens[j].type not in ('str', 'template'):
+                    j += 1
+                if j >= count:
+                    raise TreeShakeError(f'استيراد غير مكتمل في {module_id}')
+                dep = self.module_id(posixpath.normpath(posixpath.join(base_dir, string_value(tokens[j]))))
+                end = j + 1 if is_punct(j + 1, ';') else j
+                deps.append(dep)
+                edits.append((offset(i), end_offset(end), self._import_code(tokens[i + 1:j], dep)))
+                i = end + 1
+                continue
+
+            if tok.value == 'export':
+                if i + 1 < count and tokens[i + 1].value == 'default':
+                    nxt = tokens[i + 2] if i + 2 < count else None
+                    if nxt is not None and nxt.value == 'function' and i + 3 < count:
+                        # export default function name() {} -> تصريح عادي + تصدير في النهاية
+                        name_tok = tokens[i + 3]
+                        if name_tok.type != 'name':
+                            raise TreeShakeError(f'صيغة تصدير غير مدعومة في {module_id}')
+                        edits.append((offset(i), offset(i + 2), ''))
+                        exports_tail.append(f'__exports.default = {name_tok.value};')
+                    else:
+                        edits.append((offset(i), end_offset(i + 1), '__exports.default ='))
+                    i += 2
+                    continue
+                raise TreeShakeError(f'صيغة تصدير غير مدعومة في {module_id}')
+
+            i += 1
+
+        code = source
+        for start, end, replacement in sorted(edits, reverse=True):
+            code = code[:start] + replacement + code[end:]
+        if exports_tail:
+            code = code.rstrip() + '\n' + '\n'.join(exports_tail) + '\n'
+
+        return {
+            'id': module_id,
+            'code': code,
+            'source': source,
+            'map': self._position_map(tokens, offsets, sorted(edits), code),
+            'deps': deps,
+            'source_size': len(source.encode('utf-8'))
+        }
+
+    @staticmethod
+    def _position_map(tokens: List, offsets: List[int], edits: List, code: str) -> array:
+        """مواضع الرموز بعد التحويل مقابل مواضعها في المصدر: [سطر، عمود، سطر المصدر، عمود المصدر]...
+
+        الرموز داخل عبارات import/export المستبدلة تُنسب إلى بداية العبارة الأصلية
+        """
+        code_offsets = line_offsets(code)
+        positions = array('l')
+        edit_index = 0
+        delta = 0
+
+        def add(source_offset: int, line: int, col: int):
+            target = source_offset + delta
+            target_line = bisect_right(code_offsets, target) - 1
+            positions.extend((target_line, target - code_offsets[target_line], line, col))
+
+        for tok in tokens:
+            start = token_offset(offsets, tok)
+            while edit_index < len(edits) and edits[edit_index][1] <= start:
+                edit_start, edit_end, replacement = edits[edit_index]
+                delta += len(replacement) - (edit_end - edit_start)
+                edit_index += 1
+            if edit_index < len(edits) and edits[edit_index][0] <= start:
+                # داخل عبارة مستبدلة: موضع واحد لبداية الاستبدال
+                edit_start = edits[edit_index][0]
+                if start == edit_start and edits[edit_index][2]:
+                    add(edit_start, tok.line - 1, tok.col)
+                continue
+            add(start, tok.line - 1, tok.col)
+        return positions
+
+    @staticmethod
+    def _import_code(clause: List, dep: str) -> str:
+        """تحويل عبارة الاستيراد إلى تعريفات var"""
+        names = [t for t in clause if t.type == 'name' and t.value != 'from']
+        if not names:
+            # استيراد للآثار الجانبية فقط
+            return f"__require('{dep}');"
+
+        parts = []
+        values = [t.value for t in clause]
+        if values and values[0] == '*':
+            # import * as ns
+            return f"var {values[2]} = __require('{dep}');"
+
+        k = 0
+        if clause[0].type == 'name' and values[0] != 'from':
+            parts.append(f"var {values[0]} = __require('{dep}').default;")
+            k = 1
+        if '{' in values:
+            start = values.index('{') + 1
+            end = values.index('}')
+            specifiers = [v for v in values[start:end]]
+            current = []
+            for value in specifiers + [',']:
+                if value == ',':
+                    if current:
+                        imported = current[0]
+                        local = current[2] if len(current) == 3 and current[1] == 'as' else imported
+                        parts.append(f"var {local} = __require('{dep}').{imported};")
+                    current = []
+                else:
+                    current.append(value)
+        elif '*' in values[k:]:
+            star = values.index('*')
+            parts.append(f"var {values[star + 2]} = __require('{dep}');")
+        return ' '.join(parts)
+
+    def link(self, exports: Dict[str, str], global_name: str, banner: str = '',
+             source_map=None, source_prefix: str = '') -> str:
+        """كتابة الملف النهائي: سجل وحدات كسول + كائن عام بالدوال المطلوبة
+
+        source_map: SourceMapBuilder تُضاف إليه مواضع رموز كل وحدة في مصدرها الأصلي
+        """
+        lines = []
+        counted = base_line = 0
+        if banner:
+            lines.append(f'/*! {banner} */')
+        lines.append('(function (root) {')
+        lines.append('  var __defs = {}, __cache = {};')
+        lines.append('  function __require(id) {')
+        lines.append('    var m = __cache[id];')
+        lines.append('    if (m) return m;')
+        lines.append('    m = __cache[id] = {};')
+        lines.append('    __defs[id](m, __require);')
+        lines.append('    return m;')
+        lines.append('  }')
+        for module_id, module in self.modules.items():
+            lines.append(f"  __defs['{module_id}'] = function (__exports, __require) {{")
+            if source_map is not None:
+                # السطر الذي تبدأ عنده الوحدة في الناتج (قد تحتوي الأسطر السابقة على \r\n داخلها)
+                base_line += sum(len(line_offsets(line)) for line in lines[counted:])
+                counted = len(lines)
+                index = source_map.add_source(source_prefix + module_id, module['source'])
+                positions = module['map']
+                for k in range(0, len(positions), 4):
+                    source_map.add_mapping(base_line + positions[k], positions[k + 1], index,
+                                           positions[k + 2], positions[k + 3])
+            lines.append(module['code'].rstrip())
+            lines.append('  };')
+        lines.append(f'  var {global_name} = {{}};')
+        for name, module_id in exports.items():
+            lines.append(f"  {global_name}.{name} = __require('{module_id}').default;")
+        lines.append(f"  if (typeof module === 'object' && module.exports) module.exports = {global_name};")
+        lines.append(f'  else root.{global_name} = {global_name};')
+        lines.append("})(typeof self !== 'undefined' ? self : this);")
+        return '\n'.join(lines) + '\n'
+
+
+class TreeShaker:
+    """محرك البناء: lodash من وحدات lodash-es، و jQuery بنسخة slim عند عدم استخدام ajax/effects"""
+
+    LODASH_ES_URL = 'https://cdn.jsdelivr.net/npm/lodash-es@{version}/{module}'
+    LODASH_URL = 'https://cdn.jsdelivr.net/npm/lodash@{version}/lodash.min.js'
+    JQUERY_URL = 'https://code.jquery.com/jquery-{version}{variant}.min.js'
+
+    # وحدات jQuery غير الموجودة في نسخة slim
+    JQUERY_SLIM_EXCLUDES = {'ajax', 'effects', 'deprecated'}
+
+    def __init__(self, cache=None, project_root: Optional[Path] = None):
+        self.cache = cache
+        self.project_root = Path(project_root) if project_root else None
+
+    # ==================== أدوات ====================
+    def _read_url(self, url: str) -> str:
+        if self.cache is None:
+            raise TreeShakeError(f'لا توجد ذاكرة تنزيل لجلب {url}')
+        with self.cache.reading(url) as result:
+            with open(result['path'], 'r', encoding='utf-8') as f:
+                return f.read()
+
+    def _local_package_dir(self, package: str) -> Optional[Path]:
+        """مجلد الحزمة في node_modules الخاص بالمشروع إن وجد"""
+        if self.project_root is None:
+            return None
+        package_dir = self.project_root / 'node_modules' / package
+        return package_dir if package_dir.is_dir() else None
+
+    @staticmethod
+    def _sizes(code: str) -> Dict[str, int]:
+        raw = code.encode('utf-8')
+        return {'bytes': len(raw), 'gzip_bytes': len(gzip.compress(raw, 9))}
+
+    @staticmethod
+    def members(lib_name: str, functions_used: Iterable[str]) -> List[str]:
+        """أسماء الأعضاء المستخدمة (debounce من lodash.debounce)"""
+        prefix = f'{lib_name}.'
+        found = set()
+        for function in functions_used:
+            if function.startswith(prefix):
+                member = function[len(prefix):].split('.')[0]
+                if member:
+                    found.add(member)
+        return sorted(found)
+
+    def supports(self, lib_name: str) -> bool:
+        return lib_name in ('lodash', 'jquery')
+
+    def build(self, lib_name: str, functions_used: Iterable[str],
+              version: Optional[str] = None) -> Dict[str, Any]:
+        """بناء نسخة مخصصة مع تقرير الحجم قبل وبعد"""
+        if lib_name == 'lodash':
+            return self.build_lodash(self.members('lodash', functions_used), version)
+        if lib_name == 'jquery':
+            return self.build_jquery(functions_used, version)
+        raise TreeShakeError(f'لا يوجد بناء مخصص للمكتبة {lib_name}')
+
+    def build_full(self, lib_name: str, version: Optional[str] = None) -> Dict[str, Any]:
+        """النسخة الكاملة من المكتبة (عندما يتعذر البناء المخصص)"""
+        if lib_name == 'lodash':
+            version = version or LIBRARY_SIZES['lodash']['version']
+            url = self.LODASH_URL.format(version=version)
+        elif lib_name == 'jquery':
+            version = version or '3.6.0'
+            url = self.JQUERY_URL.format(version=version, variant='')
+        else:
+            raise TreeShakeError(f'لا توجد نسخة كاملة معروفة للمكتبة {lib_name}')
+
+        code = self._read_url(url)
+        after = self._sizes(code)
+        return {
+            'library': lib_name,
+            'version': version,
+            'variant': 'full',
+            'functions': [],
+            'modules': [],
+            'code': code,
+            'source_url': url,
+            'size_before': after['bytes'],
+            'size_after': after['bytes'],
+            'gzip_after': after['gzip_bytes']
+        }
+
+    # ==================== lodash ====================
+    def build_lodash(self, functions: List[str], version: Optional[str] = None) -> Dict[str, Any]:
+        """lodash مع الدوال المستخدمة فقط وإغلاق تبعياتها الداخلية"""
+        version = version or LIBRARY_SIZES['lodash']['version']
+        # _.chain وما شابه يحتاج المكتبة كاملة
+        functions = [f for f in functions if not f.startswith('_')]
+        # أسماء ليست من lodash (مثل أعضاء كائن محلي باسم _) لا وحدة لها في lodash-es
+        unknown = [f for f in functions if f not in LODASH_EXPORTS]
+        functions = [f for f in functions if f in LODASH_EXPORTS]
+        if not functions:
+            raise TreeShakeError('لم يتم العثور على دوال lodash مستخدمة')
+        if 'chain' in functions:
+            raise TreeShakeError('_.chain يتطلب نسخة lodash الكاملة')
+
+        local_dir = self._local_package_dir('lodash-es')
+
+        def loader(module_id: str) -> str:
+            if local_dir is not None and (local_dir / module_id).is_file():
+                return (local_dir / module_id).read_text(encoding='utf-8')
+            return self._read_url(self.LODASH_ES_URL.format(version=version, module=module_id))
+
+        linker = ESModuleLinker(loader)
+        linker.collect(functions)
+        source_map = SourceMapBuilder()
+        code = linker.link(
+            {name: ESModuleLinker.module_id(name) for name in functions},
+            '_',
+            f'lodash {version} custom build: {", ".join(functions)} ({len(linker.modules)} modules)',
+            source_map=source_map,
+            source_prefix='lodash-es/'
+        )
+
+        full = LIBRARY_SIZES['lodash']['full']
+        after = self._sizes(code)
+        return {
+            'library': 'lodash',
+            'version': version,
+            'variant': 'custom',
+            'functions': functions,
+            'unknown': unknown,
+            'modules': sorted(linker.modules),
+            'module_sizes': {module_id: module['source_size'] for module_id, module in linker.modules.items()},
+            'code': code,
+            'map': source_map.to_dict(),
+            'size_before': full,
+            'size_after': after['bytes'],
+            'gzip_after': after['gzip_bytes']
+        }
+
+    # ==================== jQuery ====================
+    def build_jquery(self, functions_used: Iterable[str], version: Optional[str] = None) -> Dict[str, Any]:
+        """نسخة jQuery الجاهزة: slim إذا لم تُستخدم وحدات ajax/effects/deprecated، وإلا الكاملة
+
+        ليست بناءً على مستوى الوحدات (يتطلب أداة بناء jQuery من src/)، لذلك الحجم قبل = بعد ولا يُحسب توفيراً
+        """
+        version = version or '3.6.0'
+        cost = estimate_savings('jquery', functions_used) or {'modules': []}
+        needed = set(cost['modules'])
+        variant = '' if needed & self.JQUERY_SLIM_EXCLUDES else '.slim'
+
+        url = self.JQUERY_URL.format(version=version, variant=variant)
+        code = self._read_url(url)
+
+        after = self._sizes(code)
+        return {
+            'library': 'jquery',
+            'version': version,
+            'variant': 'slim' if variant else 'full',
+            'functions': self.members('jquery', functions_used),
+            'modules': [],
+            # الوحدات التي يستخدمها المشروع (سبب اختيار slim أو full فقط)
+            'modules_used': sorted(needed),
+            'code': code,
+            'source_url': url,
+            'size_before': after['bytes'],
+            'size_after': after['bytes'],
+            'gzip_after': after['gzip_bytes']
+        }
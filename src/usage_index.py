@@ -0,0 +1,205 @@
+"""
+فهرس مقلوب لاستخدام أعضاء المكتبات عبر ملفات المشروع
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from config import get_config
+except ImportError:
+    import sys
+    sys.path.append('.')
+    from config import get_config
+
+try:
+    from .analyzer import DependencyAnalyzer
+    from .js_lexer import SCRIPT_EXTENSIONS
+except ImportError:
+    from analyzer import DependencyAnalyzer
+    from js_lexer import SCRIPT_EXTENSIONS
+
+
+class UsageIndex:
+    """فهرس مقلوب: library.member -> {ملف: [(سطر، عمود)]} مع تحديث تزايدي"""
+
+    VERSION = 1
+    EXCLUDED_DIRS = {'node_modules', '.git', 'dist', 'build', '.cache', 'bundles', 'reports'}
+
+    def __init__(self, project_root: Path, index_dir: Optional[Path] = None):
+        self.project_root = Path(project_root)
+        self.index_path = self.path_for(self.project_root, index_dir)
+        # لكل ملف: الحجم ووقت التعديل والرموز التي يحتويها
+        self.files: Dict[str, Dict[str, Any]] = {}
+        # لكل رمز: الملفات ومواقع الاستخدام فيها
+        self.postings: Dict[str, Dict[str, List[List[int]]]] = {}
+        self._analyzer: Optional[DependencyAnalyzer] = None
+
+    # ==================== التحميل والحفظ ====================
+    @staticmethod
+    def path_for(project_root: Path, index_dir: Optional[Path] = None) -> Path:
+        """ملف الفهرس في مجلد الذاكرة المؤقتة للتطبيق (لا يُكتب شيء داخل المشروع الممسوح)"""
+        if index_dir is None:
+            cfg = get_config()
+            index_dir = cfg.get('cache_settings', {}).get('usage_index_dir') or \
+                Path(cfg['paths']['cache']) / 'usage_index'
+        project_root = Path(project_root).resolve()
+        key = hashlib.sha1(str(project_root).encode('utf-8')).hexdigest()[:12]
+        return Path(index_dir) / f'{project_root.name}-{key}.json'
+
+    @classmethod
+    def load(cls, project_root: Path, index_dir: Optional[Path] = None) -> 'UsageIndex':
+        """تحميل الفهرس المحفوظ (أو فهرس فارغ)"""
+        index = cls(project_root, index_dir)
+        try:
+            with open(index.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == cls.VERSION:
+                index.files = data.get('files', {})
+                index.postings = data.get('postings', {})
+        except (OSError, ValueError):
+            pass
+        return index
+
+    def save(self):
+        """حفظ الفهرس بصيغة JSON مضغوطة"""
+        data = {
+            'version': self.VERSION,
+            'files': self.files,
+            'postings': self.postings
+        }
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    # ==================== التحديث التزايدي ====================
+    def update_file(self, rel_path: str, usages: Iterable, size: int = 0, mtime: float = 0.0):
+        """استبدال مدخلات ملف واحد في الفهرس"""
+        self.remove_file(rel_path)
+
+        symbols = []
+        for symbol, line, col in usages:
+            per_file = self.postings.setdefault(symbol, {})
+            locations = per_file.get(rel_path)
+            if locations is None:
+                locations = per_file[rel_path] = []
+                symbols.append(symbol)
+            locations.append([line, col])
+
+        self.files[rel_path] = {'size': size, 'mtime': mtime, 'symbols': symbols}
+
+    def remove_file(self, rel_path: str):
+        """حذف مدخلات ملف من الفهرس"""
+        entry = self.files.pop(rel_path, None)
+        if not entry:
+            return
+        for symbol in entry['symbols']:
+            per_file = self.postings.get(symbol)
+            if per_file is None:
+                continue
+            per_file.pop(rel_path, None)
+            if not per_file:
+                del self.postings[symbol]
+
+    def add_analysis(self, rel_path: str, analysis: Dict[str, Any]):
+        """إضافة نتيجة تحليل ملف (من DependencyAnalyzer.analyze_file)"""
+        size, mtime = self._stat(rel_path)
+        self.update_file(rel_path, analysis.get('usages', []), size, mtime)
+
+    def refresh(self, files: Optional[Iterable[Path]] = None) -> Dict[str, int]:
+        """إعادة فهرسة الملفات المتغيرة فقط وحذف الملفات المحذوفة"""
+        if files is None:
+            files = self.discover_files()
+
+        stats = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+        seen = set()
+
+        for file_path in files:
+            file_path = Path(file_path)
+            if file_path.suffix.lower() not in SCRIPT_EXTENSIONS:
+                continue
+            try:
+                rel_path = file_path.relative_to(self.project_root).as_posix()
+            except ValueError:
+                continue
+            seen.add(rel_path)
+
+            size, mtime = self._stat(rel_path)
+            entry = self.files.get(rel_path)
+            if entry and entry['size'] == size and entry['mtime'] == mtime:
+                stats['unchanged'] += 1
+                continue
+
+            try:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read()
+            except OSError:
+                continue
+
+            analysis = self.analyzer.analyze_file(file_path, content)
+            self.update_file(rel_path, analysis['usages'], size, mtime)
+            stats['indexed'] += 1
+
+        for rel_path in list(self.files):
+            if rel_path not in seen:
+                self.remove_file(rel_path)
+                stats['removed'] += 1
+
+        return stats
+
+    def discover_files(self) -> List[Path]:
+        """ملفات السكربت في المشروع مع استبعاد المجلدات المعروفة"""
+        found = []
+        for root, dirs, filenames in os.walk(self.project_root):
+            dirs[:] = [d for d in dirs if d not in self.EXCLUDED_DIRS]
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() in SCRIPT_EXTENSIONS and \
+                        not filename.endswith('.min.js'):
+                    found.append(Path(root) / filename)
+        return found
+
+    @property
+    def analyzer(self) -> DependencyAnalyzer:
+        if self._analyzer is None:
+            self._analyzer = DependencyAnalyzer(self.project_root)
+        return self._analyzer
+
+    def _stat(self, rel_path: str):
+        try:
+            st = os.stat(self.project_root / rel_path)
+            return st.st_size, st.st_mtime
+        except OSError:
+            return 0, 0.0
+
+    # ==================== الاستعلام ====================
+    def normalize_symbol(self, symbol: str) -> str:
+        """تحويل الأسماء المستعارة مثل $.ajax إلى jquery.ajax"""
+        symbol = symbol.strip()
+        obj, _, member = symbol.partition('.')
+        lib_name = self.analyzer.global_aliases.get(obj)
+        if lib_name and member:
+            return f'{lib_name}.{member}'
+        return symbol
+
+    def lookup(self, symbol: str) -> List[Dict[str, Any]]:
+        """جميع مواقع استخدام الرمز"""
+        symbol = self.normalize_symbol(symbol)
+        results = []
+        for rel_path, locations in sorted(self.postings.get(symbol, {}).items()):
+            for line, col in locations:
+                results.append({'file': rel_path, 'line': line, 'column': col + 1})
+        return results
+
+    def symbols(self, prefix: str = '') -> Dict[str, int]:
+        """الرموز المفهرسة (مع عدد مرات الاستخدام) التي تبدأ بالبادئة"""
+        prefix = self.normalize_symbol(prefix) if prefix else ''
+        return {
+            symbol: sum(len(locations) for locations in per_file.values())
+            for symbol, per_file in sorted(self.postings.items())
+            if symbol.startswith(prefix)
+        }
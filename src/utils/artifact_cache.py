@@ -0,0 +1,374 @@
+"""
+ذاكرة محلية للملفات المنزلة معنونة بالمحتوى (sha256) مع إعادة التحقق ووضع عدم الاتصال
+"""
+
+import os
+import re
+import json
+import time
+import base64
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class CacheMissError(Exception):
+    """الملف غير موجود في الذاكرة المحلية (وضع عدم الاتصال)"""
+
+
+class IntegrityError(Exception):
+    """المحتوى لا يطابق قيمة SRI المتوقعة"""
+
+
+# روابط بإصدار ثابت (jquery-3.6.0.min.js، bootstrap@5.3.0، /3.3.0/) لا يتغير محتواها
+_VERSIONED_URL_RE = re.compile(r'[@/-]v?\d+\.\d+\.\d+')
+
+
+class ArtifactCache:
+    """مخزن ملفات محلي: objects/<sha256> + فهرس URL مع ETag/Last-Modified وإخلاء LRU"""
+
+    INDEX_FILENAME = 'index.json'
+    SRI_ALGORITHMS = ('sha512', 'sha384', 'sha256')
+    # خوارزمية البصمة المسجلة عند أول تنزيل لرابط بإصدار ثابت
+    PIN_ALGORITHM = 'sha384'
+
+    def __init__(self, cache_dir: Path, http_client=None, max_bytes: int = 200 * 1024 * 1024,
+                 max_age: int = 24 * 3600, offline: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.index_path = self.cache_dir / self.INDEX_FILENAME
+        self.http = http_client
+        self.max_bytes = max_bytes
+        # المدة (بالثواني) التي يُستخدم فيها الملف بدون إعادة التحقق من الخادم
+        self.max_age = max_age
+        self.offline = offline
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        # الكائنات التي تُقرأ حالياً (لا يحذفها الإخلاء): {sha256: عدد القراء}
+        self._readers: Dict[str, int] = {}
+        self.entries: Dict[str, Dict[str, Any]] = self._load_index()
+
+    # ==================== الفهرس ====================
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """حفظ الفهرس بشكل ذري إذا تغير"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def object_path(self, digest: str) -> Path:
+        """مسار الكائن حسب بصمة المحتوى"""
+        return self.objects_dir / digest[:2] / digest
+
+    def total_size(self) -> int:
+        """الحجم الكلي للكائنات المخزنة (كل كائن مرة واحدة)"""
+        sizes = {entry['sha256']: entry['size'] for entry in self.entries.values()}
+        return sum(sizes.values())
+
+    # ==================== SRI ====================
+    @classmethod
+    def parse_integrity(cls, integrity: Optional[str]) -> Dict[str, List[str]]:
+        """تحليل قيمة integrity (مثل "sha384-abc... sha256-xyz...") إلى {خوارزمية: [قيم]}"""
+        parsed: Dict[str, List[str]] = {}
+        for token in (integrity or '').split():
+            algorithm, _, value = token.partition('-')
+            if algorithm in cls.SRI_ALGORITHMS and value:
+                parsed.setdefault(algorithm, []).append(value.split('?')[0])
+        return parsed
+
+    @classmethod
+    def _strongest(cls, parsed: Dict[str, List[str]]) -> Optional[str]:
+        for algorithm in cls.SRI_ALGORITHMS:
+            if algorithm in parsed:
+                return algorithm
+        return None
+
+    def _sri_digest(self, entry: Dict[str, Any], algorithm: str) -> str:
+        """بصمة SRI للكائن (تُحسب مرة واحدة وتُحفظ في الفهرس)"""
+        digests = entry.setdefault('sri', {})
+        if algorithm not in digests:
+            hasher = hashlib.new(algorithm)
+            with open(self.object_path(entry['sha256']), 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+            digests[algorithm] = base64.b64encode(hasher.digest()).decode('ascii')
+            self._dirty = True
+        return digests[algorithm]
+
+    def _verify(self, entry: Dict[str, Any], integrity: Optional[str]):
+        """التحقق من SRI بأقوى خوارزمية مذكورة (مع حفظ البصمات المحسوبة)"""
+        parsed = self.parse_integrity(integrity)
+        algorithm = self._strongest(parsed)
+        if algorithm is None:
+            return
+        if self._sri_digest(entry, algorithm) not in parsed[algorithm]:
+            raise IntegrityError(f'فشل التحقق من السلامة ({algorithm})')
+
+    def _discard_object(self, digest: str):
+        """حذف كائن لم يعد أي رابط يشير إليه (يُستدعى مع القفل)"""
+        if digest in self._readers or any(e['sha256'] == digest for e in self.entries.values()):
+            return
+        try:
+            self.object_path(digest).unlink()
+        except OSError:
+            pass
+
+    @staticmethod
+    def is_versioned(url: str) -> bool:
+        return bool(_VERSIONED_URL_RE.search(urlparse(url).path))
+
+    # ==================== الجلب ====================
+    def fetch(self, url: str, integrity: Optional[str] = None, hold: bool = False) -> Dict[str, Any]:
+        """إرجاع مسار الملف من الذاكرة أو تنزيله، مع إعادة تحقق شرطية عند انتهاء المدة
+
+        روابط الإصدارات الثابتة تُسجل بصمتها عند أول تنزيل ويُرفض أي محتوى لاحق لا يطابقها.
+        hold: يمنع الإخلاء من حذف الكائن حتى release (انظر reading)
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+            pinned = entry.get('pinned_sri') if entry else None
+            if entry and not self.object_path(entry['sha256']).exists():
+                # الكائن حُذف من القرص: نعامله كأنه غير موجود
+                del self.entries[url]
+                self._dirty = True
+                entry = None
+
+        if entry is None:
+            if self.offline or self.http is None:
+                raise CacheMissError(f'غير موجود في الذاكرة المحلية: {url}')
+            entry = self._download(url)
+            status = 'downloaded'
+        elif self.offline or self.http is None or time.time() - entry['validated_at'] < self.max_age:
+            status = 'cached'
+        else:
+            entry, status = self._revalidate(url, entry)
+
+        with self._lock:
+            if not self.object_path(entry['sha256']).exists():
+                # حذفه الإخلاء من خيط آخر بعد القراءة الأولى: نجلبه من جديد
+                self.entries.pop(url, None)
+                entry = None
+            else:
+                self._store(url, entry, integrity, pinned, hold)
+        if entry is None:
+            return self.fetch(url, integrity, hold)
+
+        self._evict(keep=entry['sha256'])
+        return {
+            'url': url,
+            'path': str(self.object_path(entry['sha256'])),
+            'sha256': entry['sha256'],
+            'size': entry['size'],
+            'status': status
+        }
+
+    def _store(self, url: str, entry: Dict[str, Any], integrity: Optional[str], pinned: Optional[str],
+               hold: bool):
+        """تسجيل المدخل بعد التحقق من SRI والبصمة المسجلة (يُستدعى مع القفل)"""
+        previous = self.entries.get(url)
+        entry['last_used'] = time.time()
+        self.entries[url] = entry
+        self._dirty = True
+        try:
+            self._verify(entry, integrity)
+            self._verify(entry, pinned)
+        except IntegrityError:
+            if previous is not None and previous is not entry:
+                # محتوى جديد لا يطابق: نبقي النسخة الموثوقة السابقة
+                self.entries[url] = previous
+            else:
+                # لا نحتفظ بمحتوى غير موثوق لهذا الرابط
+                del self.entries[url]
+            self._discard_object(entry['sha256'])
+            raise
+        if previous is not None and previous['sha256'] != entry['sha256']:
+            # المحتوى القديم لم يعد مرتبطاً بأي رابط (لا يراه الإخلاء)
+            self._discard_object(previous['sha256'])
+        if pinned:
+            entry['pinned_sri'] = pinned
+        elif self.is_versioned(url):
+            entry['pinned_sri'] = f'{self.PIN_ALGORITHM}-{self._sri_digest(entry, self.PIN_ALGORITHM)}'
+        if hold:
+            self._readers[entry['sha256']] = self._readers.get(entry['sha256'], 0) + 1
+
+    def _request_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _revalidate(self, url: str, entry: Dict[str, Any]):
+        """طلب شرطي: 304 يعني أن النسخة المحلية ما زالت صالحة"""
+        try:
+            new_entry = self._download(url, entry)
+        except Exception:
+            # الخادم غير متاح: نستخدم النسخة المحلية القديمة
+            return entry, 'stale'
+        if new_entry is entry:
+            return entry, 'revalidated'
+        return new_entry, 'updated'
+
+    def _download(self, url: str, entry: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """تنزيل بالبث مع حساب sha256 ثم النقل إلى مخزن الكائنات"""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        with self.http.get(url, headers=self._request_headers(entry), stream=True) as response:
+            if response.status_code == 304 and entry is not None:
+                entry['validated_at'] = time.time()
+                return entry
+            response.raise_for_status()
+
+            hasher = hashlib.sha256()
+            size = 0
+            fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        if chunk:
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            size += len(chunk)
+                if size == 0:
+                    raise ValueError('الملف المنزل فارغ')
+
+                digest = hasher.hexdigest()
+                target = self.object_path(digest)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+
+            now = time.time()
+            return {
+                'sha256': digest,
+                'size': size,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_type': response.headers.get('Content-Type'),
+                'fetched_at': now,
+                'validated_at': now,
+                'last_used': now
+            }
+
+    def release(self, digest: str):
+        """انتهاء قراءة كائن محجوز بـ fetch(hold=True)"""
+        with self._lock:
+            count = self._readers.get(digest, 0) - 1
+            if count > 0:
+                self._readers[digest] = count
+            else:
+                self._readers.pop(digest, None)
+
+    @contextmanager
+    def reading(self, url: str, integrity: Optional[str] = None):
+        """جلب الملف مع منع حذفه من مخزن الكائنات أثناء قراءته"""
+        result = self.fetch(url, integrity, hold=True)
+        try:
+            yield result
+        finally:
+            self.release(result['sha256'])
+
+    def copy_to(self, url: str, output_dir: Path, filename: str,
+                integrity: Optional[str] = None) -> Dict[str, Any]:
+        """جلب الملف ونسخه إلى مجلد الإخراج"""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        target = output_dir / filename
+        with self.reading(url, integrity) as result:
+            # نسخ ثم استبدال: الهدف قد يكون رابطاً صلباً إلى مخزن الحزم ولا يجوز الكتابة فوقه
+            fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+            os.close(fd)
+            try:
+                shutil.copyfile(result['path'], tmp_path)
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+        result['path'] = str(target)
+        return result
+
+    def fetch_many(self, jobs: Iterable[Dict[str, Any]], max_workers: int = 8) -> List[Dict[str, Any]]:
+        """جلب قائمة مهام {'url', 'output_dir', 'filename', 'integrity'?} بالتوازي"""
+        jobs = list(jobs)
+        if not jobs:
+            return []
+
+        def run(job):
+            result = {'url': job['url'], 'filename': job['filename'], 'path': None,
+                      'size': 0, 'success': False, 'error': None, 'status': None, 'job': job}
+            try:
+                copied = self.copy_to(job['url'], job['output_dir'], job['filename'], job.get('integrity'))
+                result.update(path=copied['path'], size=copied['size'], status=copied['status'], success=True)
+            except Exception as e:
+                result['error'] = str(e)
+            return result
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)), thread_name_prefix='cache') as executor:
+                return list(executor.map(run, jobs))
+        finally:
+            self.save()
+
+    # ==================== الإخلاء ====================
+    def _evict(self, keep: Optional[str] = None):
+        """حذف الكائنات الأقل استخداماً حتى يصبح الحجم ضمن الحد (عدا الكائن المطلوب حالياً وما يُقرأ)"""
+        with self._lock:
+            total = self.total_size()
+            if total <= self.max_bytes:
+                return
+
+            # آخر استخدام لكل كائن (قد يشترك أكثر من URL في نفس المحتوى)
+            last_used: Dict[str, float] = {}
+            sizes: Dict[str, int] = {}
+            for entry in self.entries.values():
+                digest = entry['sha256']
+                last_used[digest] = max(last_used.get(digest, 0), entry['last_used'])
+                sizes[digest] = entry['size']
+
+            evicted = set()
+            for digest in sorted(last_used, key=last_used.get):
+                if total <= self.max_bytes:
+                    break
+                if digest == keep or digest in self._readers:
+                    continue
+                try:
+                    self.object_path(digest).unlink()
+                except OSError:
+                    pass
+                total -= sizes[digest]
+                evicted.add(digest)
+
+            for url in [u for u, e in self.entries.items() if e['sha256'] in evicted]:
+                del self.entries[url]
+            self._dirty = True
+
+    def clear(self):
+        """حذف جميع الملفات المخزنة"""
+        with self._lock:
+            shutil.rmtree(self.objects_dir, ignore_errors=True)
+            self.entries = {}
+            self._dirty = True
+        self.save()
@@ -4,15 +4,31 @@
 
 import asyncio
 import threading
-import queue
 import time
 import json
-from typing import Dict, Any, Callable, Optional
+import multiprocessing
+from collections import deque
+from typing import Dict, Any, Callable, List, Optional
 from datetime import datetime
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
 import uuid
 
+try:
+    from config import get_config
+except ImportError:
+    import sys
+    sys.path.append('.')
+    from config import get_config
+
+# الإعدادات الافتراضية إذا لم تحدد WORKER_SETTINGS نوع المهمة
+DEFAULT_TASK_SETTINGS = {'pool': 'thread', 'max_concurrent': 1}
+
+
+class TaskQueueFull(Exception):
+    """طابور المهام المنتظرة ممتلئ"""
+
+
 class TaskStatus:
     """حالة المهمة"""
     PENDING = 'pending'
@@ -37,6 +53,8 @@ class BackgroundTask:
         self.started_at = None
         self.completed_at = None
         self.callback_url = None
+        # في عملية منفصلة: قاموس مشترك يُكتب فيه التقدم لتقرأه العملية الرئيسية
+        self.progress_sink = None
     
     def to_dict(self) -> Dict[str, Any]:
         """تحويل إلى قاموس"""
@@ -58,21 +76,29 @@ class BackgroundTask:
         self.progress = progress
         if message:
             self.message = message
+        if self.progress_sink is not None:
+            self.progress_sink[self.task_id] = (self.progress, self.message)
     
     def mark_running(self):
         """وضع علامة التشغيل"""
+        if self.status == TaskStatus.CANCELLED:
+            return
         self.status = TaskStatus.RUNNING
         self.started_at = datetime.now()
     
     def mark_completed(self, result: Any = None):
-        """وضع علامة الإكمال"""
+        """وضع علامة الإكمال (المهمة الملغاة تبقى ملغاة وتُهمل نتيجتها)"""
+        if self.status == TaskStatus.CANCELLED:
+            return
         self.status = TaskStatus.COMPLETED
         self.progress = 100
         self.result = result
         self.completed_at = datetime.now()
     
     def mark_failed(self, error: str):
-        """وضع علامة الفشل"""
+        """وضع علامة الفشل (لا يغير حالة مهمة ملغاة)"""
+        if self.status == TaskStatus.CANCELLED:
+            return
         self.status = TaskStatus.FAILED
         self.error = error
         self.completed_at = datetime.now()
@@ -100,10 +126,28 @@ class BackgroundWorker:
         if self._initialized:
             return
         
-        self.task_queue = queue.Queue()
+        # الإعدادات تُقرأ مرة واحدة هنا وتُمرر إلى المنفذ (وإلى عمليات المجمع مع كل مهمة)
+        self.config = get_config()
+        settings = self.config.get('worker_settings', {})
+        self.max_queue_size = settings.get('max_queue_size', 100)
+        self.thread_workers = settings.get('thread_workers', 4)
+        self.process_workers = settings.get('process_workers', 2)
+        self.task_settings = settings.get('task_types', {})
+
+        # المهام المنتظرة بترتيب الإرسال (محدودة بـ max_queue_size) وعدد المهام الجارية لكل نوع
+        self.pending = deque()
+        self.running_counts: Dict[str, int] = {}
+        # مهمة واحدة فقط من كل نوع لكل مشروع في الوقت نفسه (حزمتان متزامنتان تكتبان في المجلد نفسه)
+        self.running_projects = set()
+        self.runner = TaskRunner(self.config)
+        self._condition = threading.Condition()
         self.worker_thread = None
         self.running = False
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # المجمعات تُنشأ عند أول مهمة تحتاجها
+        self.executor = None
+        self.process_executor = None
+        self._progress = None
+        self._manager = None
         self._initialized = True
     
     def start(self):
@@ -116,29 +160,194 @@ class BackgroundWorker:
     
     def stop(self):
         """إيقاف العامل"""
-        self.running = False
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
         if self.worker_thread:
             self.worker_thread.join(timeout=5)
-        self.executor.shutdown(wait=False)
+        for executor in (self.executor, self.process_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self.process_executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = self._progress = None
         print("🛑 عامل الخلفية توقف")
-    
+
+    def _settings_for(self, task_type: str) -> Dict[str, Any]:
+        """المجمع (thread/process) وحد التزامن لنوع المهمة"""
+        return dict(DEFAULT_TASK_SETTINGS, **self.task_settings.get(task_type, {}))
+
+    def _executor_for(self, pool: str):
+        if pool == 'process':
+            if self.process_executor is None:
+                # spawn بدل fork: العملية الرئيسية تشغل خيوطاً (الخادم والعامل)
+                self._manager = multiprocessing.get_context('spawn').Manager()
+                self._progress = self._manager.dict()
+                self.process_executor = ProcessPoolExecutor(
+                    max_workers=self.process_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.process_executor
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix='task')
+        return self.executor
+
+    @staticmethod
+    def _project_key(task: BackgroundTask) -> Optional[tuple]:
+        """مفتاح (النوع، المشروع) للمهام التي تعمل على مشروع"""
+        if task.data.get('project_path'):
+            return (task.task_type, str(Path(task.data['project_path']).resolve()))
+        if task.data.get('project_id'):
+            return (task.task_type, str(task.data['project_id']))
+        return None
+
+    def _next_task(self) -> Optional[BackgroundTask]:
+        """أقدم مهمة منتظرة لم يبلغ نوعها حد التزامن ولا تعمل مهمة مثلها على المشروع نفسه (يُستدعى مع القفل)"""
+        for task in list(self.pending):
+            if task.status == TaskStatus.CANCELLED:
+                self.pending.remove(task)
+                continue
+            limit = self._settings_for(task.task_type)['max_concurrent']
+            key = self._project_key(task)
+            if self.running_counts.get(task.task_type, 0) < limit and key not in self.running_projects:
+                self.pending.remove(task)
+                self.running_counts[task.task_type] = self.running_counts.get(task.task_type, 0) + 1
+                if key is not None:
+                    self.running_projects.add(key)
+                return task
+        return None
+
     def _worker_loop(self):
-        """حلقة عمل العامل"""
-        while self.running:
+        """حلقة التوزيع: كل مهمة تُرسل إلى مجمع نوعها فلا تنتظر مهمة طويلة من نوع آخر"""
+        while True:
+            with self._condition:
+                task = self._next_task() if self.running else None
+                while self.running and task is None:
+                    self._condition.wait(timeout=1)
+                    task = self._next_task()
+                if not self.running:
+                    return
             try:
-                task = self.task_queue.get(timeout=1)
-                if task:
-                    self._process_task(task)
-            except queue.Empty:
-                continue
+                self._dispatch(task)
             except Exception as e:
                 print(f"❌ خطأ في عامل الخلفية: {e}")
+                task.mark_failed(str(e))
+                self._task_finished(task)
+
+    def _dispatch(self, task: BackgroundTask):
+        """تشغيل المهمة في مجمع الخيوط أو العمليات حسب نوعها"""
+        task.mark_running()
+        pool = self._settings_for(task.task_type)['pool']
+        executor = self._executor_for(pool)
+        if pool == 'process':
+            future = executor.submit(_run_in_process, task.task_id, task.task_type, task.data,
+                                     self.config, self._progress)
+        else:
+            future = executor.submit(self.runner.run, task)
+        future.add_done_callback(lambda f: self._on_done(task, f, pool == 'process'))
+
+    def _on_done(self, task: BackgroundTask, future: Future, in_process: bool):
+        try:
+            if in_process:
+                outcome = future.result()
+                if task.status != TaskStatus.CANCELLED:
+                    task.progress, task.message = outcome['progress'], outcome['message']
+                    if outcome['status'] == TaskStatus.COMPLETED:
+                        task.mark_completed(outcome['result'])
+                    else:
+                        task.mark_failed(outcome['error'] or 'فشلت المهمة')
+            else:
+                future.result()
+        except Exception as e:
+            # عملية انهارت (BrokenProcessPool) أو إلغاء المجمع عند الإيقاف
+            if task.status == TaskStatus.RUNNING:
+                task.mark_failed(str(e) or type(e).__name__)
+        finally:
+            if self._progress is not None:
+                self._progress.pop(task.task_id, None)
+            self._task_finished(task)
+
+    def _task_finished(self, task: BackgroundTask):
+        with self._condition:
+            self.running_counts[task.task_type] = max(self.running_counts.get(task.task_type, 1) - 1, 0)
+            self.running_projects.discard(self._project_key(task))
+            self._condition.notify_all()
+
+    def submit_task(self, task_type: str, data: Dict[str, Any]) -> str:
+        """إرسال مهمة جديدة (TaskQueueFull إذا بلغت المهام المنتظرة الحد)"""
+        task_id = str(uuid.uuid4())
+        task = BackgroundTask(task_id, task_type, data)
+        
+        with self._condition:
+            waiting = sum(1 for t in self.pending if t.status == TaskStatus.PENDING)
+            if waiting >= self.max_queue_size:
+                raise TaskQueueFull(f"طابور المهام ممتلئ ({self.max_queue_size} مهمة منتظرة)")
+            self.pending.append(task)
+            self._tasks[task_id] = task
+            self._condition.notify_all()
+        
+        return task_id
+    
+    def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """الحصول على حالة المهمة"""
+        if task_id in self._tasks:
+            task = self._tasks[task_id]
+            self._sync_progress(task)
+            return task.to_dict()
+        return None
+
+    def _sync_progress(self, task: BackgroundTask):
+        """تقدم المهام الجارية في عملية منفصلة"""
+        if self._progress is None or task.status != TaskStatus.RUNNING:
+            return
+        try:
+            progress = self._progress.get(task.task_id)
+        except Exception:
+            return
+        if progress is not None:
+            task.progress, task.message = progress
     
-    def _process_task(self, task: BackgroundTask):
+    def cancel_task(self, task_id: str) -> bool:
+        """إلغاء مهمة (المهمة الجارية تكتمل في الخلفية لكن نتيجتها تُهمل)"""
+        if task_id in self._tasks:
+            task = self._tasks[task_id]
+            if task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
+                task.mark_cancelled()
+                with self._condition:
+                    self._condition.notify_all()
+                return True
+        return False
+    
+    def get_all_tasks(self) -> List[Dict[str, Any]]:
+        """الحصول على جميع المهام"""
+        for task in list(self._tasks.values()):
+            self._sync_progress(task)
+        return [task.to_dict() for task in list(self._tasks.values())]
+    
+    def cleanup_old_tasks(self, older_than_hours: int = 24):
+        """تنظيف المهام القديمة"""
+        now = datetime.now()
+        to_remove = []
+        
+        for task_id, task in self._tasks.items():
+            age = now - task.created_at
+            if age.total_seconds() > older_than_hours * 3600:
+                to_remove.append(task_id)
+        
+        for task_id in to_remove:
+            del self._tasks[task_id]
+
+class TaskRunner:
+    """تنفيذ المهام بإعدادات ممررة صراحة (في خيط من العامل أو في عملية من مجمع العمليات)"""
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+
+    def run(self, task: BackgroundTask):
         """معالجة المهمة"""
         try:
-            task.mark_running()
-            self._tasks[task.task_id] = task
+            if task.status != TaskStatus.RUNNING:
+                task.mark_running()
             
             # تنفيذ المهمة حسب النوع
             if task.task_type == 'scan_project':
@@ -210,7 +419,9 @@ class BackgroundWorker:
     def _execute_analyze_project(self, task: BackgroundTask):
         """تنفيذ تحليل المشروع"""
         try:
-            from src.analyzer import DependencyAnalyzer
+            from src.analyzer import DependencyAnalyzer, AnalysisAggregate
+            from src.usage_index import UsageIndex
+            from src.aggregate_cache import AggregateCache
             
             project_path = Path(task.data['project_path'])
             files_data = task.data.get('files', [])
@@ -219,39 +430,102 @@ class BackgroundWorker:
             print(f"📁 عدد الملفات للتحليل: {len(files_data)}")
             
             task.update_progress(10, "جاري تهيئة المحلل...")
-            analyzer = DependencyAnalyzer()
+            analyzer = DependencyAnalyzer(project_path)
             
             task.update_progress(30, "جاري تحليل الملفات...")
-            files_analysis = []
+            cache_settings = self.settings.get('cache_settings', {})
+            usage_index = UsageIndex.load(project_path, cache_settings.get('usage_index_dir'))
+            aggregate_cache = AggregateCache(project_path, cache_settings.get('aggregate_cache_dir'))
+            # نحتفظ فقط بالواردات لكل ملف لبناء الرسم البياني
+            files_imports = []
             
-            # تحليل الملفات
-            for i, file_info in enumerate(files_data[:50]):  # تحليل أول 50 ملف فقط لأداء أفضل
+            # تجميع الملفات حسب المجلد (أول 50 ملف فقط لأداء أفضل)
+            selected = files_data[:50]
+            directories: Dict[str, List[Path]] = {}
+            for file_info in selected:
                 file_path = project_path / file_info['path']
-                
                 if file_path.exists():
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                        
-                        analysis = analyzer.analyze_file(file_path, content)
-                        analysis['file'] = str(file_path.relative_to(project_path))
-                        files_analysis.append(analysis)
+                    directory = file_path.parent.relative_to(project_path).as_posix()
+                    directories.setdefault(directory, []).append(file_path)
+            
+            # تجميع جزئي لكل مجلد: من الذاكرة المؤقتة إذا لم تتغير ملفاته وإلا بتحليلها
+            parts = []
+            processed = cached_files = 0
+            for directory, dir_files in directories.items():
+                key = aggregate_cache.key_for(dir_files)
+                cached = aggregate_cache.get(directory, key)
+                if cached is not None:
+                    part, part_imports = cached
+                    cached_files += len(dir_files)
+                    processed += len(dir_files)
+                else:
+                    part, part_imports = AnalysisAggregate(), []
+                    for file_path in dir_files:
+                        try:
+                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                                content = f.read()
+                            
+                            analysis = analyzer.analyze_file(file_path, content)
+                            analysis['file'] = str(file_path.relative_to(project_path))
+                            part.add(analysis)
+                            part_imports.append({
+                                'file': analysis['file'],
+                                'imports': analysis['imports'],
+                                'unused_imports': analysis['unused_imports']
+                            })
+                            usage_index.add_analysis(file_path.relative_to(project_path).as_posix(), analysis)
+                            
+                            print(f"✓ تم تحليل: {file_path.name}")
+                        except Exception as e:
+                            print(f"⚠️ خطأ في تحليل {file_path}: {e}")
                         
-                        print(f"✓ تم تحليل: {file_path.name}")
-                    except Exception as e:
-                        print(f"⚠️ خطأ في تحليل {file_path}: {e}")
+                        processed += 1
+                        # تحديث التقدم
+                        progress = 30 + (processed / len(selected)) * 50
+                        task.update_progress(int(progress), f"جاري تحليل الملف {processed}/{len(selected)}")
+                    
+                    try:
+                        aggregate_cache.put(directory, key, part, part_imports)
+                    except OSError as e:
+                        print(f"⚠️ فشل في حفظ تجميع المجلد {directory}: {e}")
                 
-                # تحديث التقدم
-                progress = 30 + ((i + 1) / min(len(files_data), 50)) * 50
-                task.update_progress(int(progress), f"جاري تحليل الملف {i+1}/{min(len(files_data), 50)}")
+                parts.append(part)
+                files_imports.extend(part_imports)
             
-            print(f"📊 تم تحليل {len(files_analysis)} ملف")
+            aggregate = AnalysisAggregate.merge_all(parts)
+            print(f"📊 تم تحليل {aggregate.total_files} ملف ({cached_files} من الذاكرة المؤقتة)")
             
             task.update_progress(90, "جاري تجميع النتائج...")
-            aggregated = analyzer.aggregate_analysis(files_analysis)
-            
+            aggregated = analyzer.finalize_aggregate(aggregate)
+
+            # بناء الرسم البياني للوحدات
+            module_graph = analyzer.build_module_graph(project_path, files_imports)
+            aggregated['module_graph'] = module_graph.summary()
+
+            # الواردات غير المستخدمة والملفات الميتة
+            dead_code = analyzer.find_dead_code(project_path, files_imports, graph=module_graph)
+            # الملفات الميتة موثوقة فقط إذا تم تحليل جميع الملفات
+            dead_code['complete'] = len(files_data) <= 50
+            aggregated['dead_code'] = dead_code
+            print(f"🧹 واردات غير مستخدمة: {len(dead_code['unused_imports'])}، "
+                  f"ملفات غير مستخدمة: {len(dead_code['dead_files'])}")
+
+            # تحديث فهرس الاستخدام تزايدياً لبقية الملفات ثم حفظه
+            usage_stats = usage_index.refresh(project_path / f['path'] for f in files_data)
+            try:
+                usage_index.save()
+                print(f"🗂️ فهرس الاستخدام: {len(usage_index.postings)} رمز "
+                      f"({usage_stats['indexed']} ملف جديد، {usage_stats['unchanged']} بدون تغيير)")
+            except OSError as e:
+                print(f"⚠️ فشل في حفظ فهرس الاستخدام: {e}")
+            aggregated['usage_index'] = {
+                'symbols': len(usage_index.postings),
+                'files': len(usage_index.files),
+                **usage_stats
+            }
+
             # إضافة معلومات إضافية
-            aggregated['total_analyzed_files'] = len(files_analysis)
+            aggregated['total_analyzed_files'] = aggregate.total_files
             aggregated['analysis_date'] = datetime.now().isoformat()
             
             # حفظ النتائج
@@ -270,7 +544,7 @@ class BackgroundWorker:
             result = {
                 'analysis': aggregated,
                 'output_file': str(output_file),
-                'total_analyzed': len(files_analysis),
+                'total_analyzed': aggregate.total_files,
                 'libraries_found': len(aggregated.get('libraries', {})),
                 'success': True
             }
@@ -298,18 +572,16 @@ class BackgroundWorker:
         task.update_progress(30, "جاري إنشاء الحزم...")
         bundles = bundler.create_bundles()
         
-        task.update_progress(90, "جاري إنشاء الأرشيف...")
-        
-        # إنشاء ZIP للحزم
-        from src.utils.file_manager import FileManager
-        file_manager = FileManager()
-        zip_path = file_manager.create_bundle_zip(project_path.name, bundles)
-        
         task.update_progress(100, "اكتمل إنشاء الحزم")
         
+        # الأرشيف يُنشأ متدفقاً عند التنزيل ولا يُكتب على القرص
         result = {
             'bundles': bundles,
-            'zip_path': str(zip_path),
+            'download_url': f'/api/projects/{project_path.name}/bundles/download',
+            'sizes': bundler.compression_report,
+            'budget': bundler.budget_report,
+            'self_host': bundler.self_host_report,
+            'manifest': bundler.asset_manifest.assets,
             'output_dir': str(bundler.output_dir),
             'total_bundles': len(bundles)
         }
@@ -377,48 +649,22 @@ class BackgroundWorker:
         
         return imports
     
-    def submit_task(self, task_type: str, data: Dict[str, Any]) -> str:
-        """إرسال مهمة جديدة"""
-        task_id = str(uuid.uuid4())
-        task = BackgroundTask(task_id, task_type, data)
-        
-        self.task_queue.put(task)
-        self._tasks[task_id] = task
-        
-        return task_id
-    
-    def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """الحصول على حالة المهمة"""
-        if task_id in self._tasks:
-            task = self._tasks[task_id]
-            return task.to_dict()
-        return None
-    
-    def cancel_task(self, task_id: str) -> bool:
-        """إلغاء مهمة"""
-        if task_id in self._tasks:
-            task = self._tasks[task_id]
-            if task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
-                task.mark_cancelled()
-                return True
-        return False
-    
-    def get_all_tasks(self) -> List[Dict[str, Any]]:
-        """الحصول على جميع المهام"""
-        return [task.to_dict() for task in self._tasks.values()]
-    
-    def cleanup_old_tasks(self, older_than_hours: int = 24):
-        """تنظيف المهام القديمة"""
-        now = datetime.now()
-        to_remove = []
-        
-        for task_id, task in self._tasks.items():
-            age = now - task.created_at
-            if age.total_seconds() > older_than_hours * 3600:
-                to_remove.append(task_id)
-        
-        for task_id in to_remove:
-            del self._tasks[task_id]
+def _run_in_process(task_id: str, task_type: str, data: Dict[str, Any], settings: Dict[str, Any],
+                    progress_sink) -> Dict[str, Any]:
+    """تنفيذ مهمة داخل عملية من مجمع العمليات وإرجاع حالتها النهائية (الكائنات لا تُشارك بين العمليات)"""
+    task = BackgroundTask(task_id, task_type, data)
+    task.progress_sink = progress_sink
+    task.mark_running()
+    TaskRunner(settings).run(task)
+    if task.status == TaskStatus.RUNNING:
+        task.mark_completed(task.result)
+    return {
+        'status': task.status,
+        'progress': task.progress,
+        'message': task.message,
+        'result': task.result,
+        'error': task.error
+    }
 
 # وظائف مساعدة للوصول إلى Singleton
 _worker_instance = None
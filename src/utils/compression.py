@@ -0,0 +1,106 @@
+"""
+نسخ مضغوطة مسبقاً (gzip و brotli إن توفر) لملفات الحزم ليخدمها الخادم دون ضغط أثناء الطلب
+"""
+
+import os
+import gzip
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        # brotli اختياري: بدونه تُنشأ نسخ gzip فقط
+        brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = {'.js', '.mjs', '.cjs', '.css'}
+PRECOMPRESSED_SUFFIXES = ('.gz', '.br')
+
+
+def brotli_available() -> bool:
+    return brotli is not None
+
+
+def gzip_bytes(data: bytes, level: int = 9) -> bytes:
+    """gzip بأعلى مستوى ودون وقت تعديل في الترويسة (ناتج ثابت لنفس المحتوى)"""
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data: bytes, quality: int = 11) -> Optional[bytes]:
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=quality)
+
+
+def _is_fresh(variant: Path, source_mtime: int) -> bool:
+    try:
+        return variant.stat().st_mtime_ns >= source_mtime
+    except OSError:
+        return False
+
+
+def compress_file(path: Path, gzip_level: int = 9, brotli_quality: int = 11) -> Dict[str, Any]:
+    """كتابة path.gz و path.br بجانب الملف (يتخطى النسخ الأحدث من الملف) وإرجاع الأحجام"""
+    path = Path(path)
+    stat = path.stat()
+    row = {'file': str(path), 'raw': stat.st_size, 'gzip': None, 'brotli': None}
+
+    encoders = [('gzip', '.gz', lambda data: gzip_bytes(data, gzip_level))]
+    if brotli is not None:
+        encoders.append(('brotli', '.br', lambda data: brotli_bytes(data, brotli_quality)))
+
+    data = None
+    for name, suffix, encode in encoders:
+        variant = path.with_name(path.name + suffix)
+        if _is_fresh(variant, stat.st_mtime_ns):
+            row[name] = variant.stat().st_size
+            continue
+        if data is None:
+            data = path.read_bytes()
+        compressed = encode(data)
+        tmp_path = variant.with_name(variant.name + '.tmp')
+        tmp_path.write_bytes(compressed)
+        os.replace(tmp_path, variant)
+        row[name] = len(compressed)
+    return row
+
+
+def precompress_files(paths: Iterable[Path], max_workers: Optional[int] = None,
+                      gzip_level: int = 9, brotli_quality: int = 11) -> List[Dict[str, Any]]:
+    """ضغط الملفات بالتوازي (zlib و brotli يحرران GIL أثناء الضغط)"""
+    paths = [Path(p) for p in paths if Path(p).suffix.lower() in COMPRESSIBLE_EXTENSIONS]
+    if not paths:
+        return []
+
+    def run(path: Path) -> Dict[str, Any]:
+        try:
+            return compress_file(path, gzip_level, brotli_quality)
+        except OSError as e:
+            return {'file': str(path), 'raw': None, 'gzip': None, 'brotli': None, 'error': str(e)}
+
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compress') as executor:
+        return list(executor.map(run, paths))
+
+
+def summarize_sizes(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """مجموع الأحجام لكل صيغة"""
+    valid = [r for r in rows if r.get('raw') is not None]
+    total = {'files': len(valid), 'raw': sum(r['raw'] for r in valid)}
+    for name in ('gzip', 'brotli'):
+        sizes = [r[name] for r in valid if r.get(name) is not None]
+        total[name] = sum(sizes) if sizes else None
+    return total
+
+
+def remove_variants(path: Path):
+    """حذف النسخ المضغوطة لملف محذوف"""
+    for suffix in PRECOMPRESSED_SUFFIXES:
+        variant = Path(path).with_name(Path(path).name + suffix)
+        if variant.is_file():
+            variant.unlink()
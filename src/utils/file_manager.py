@@ -14,6 +14,11 @@ import asyncio
 from datetime import datetime
 import hashlib
 
+try:
+    from .zip_stream import ZipStream
+except ImportError:
+    from zip_stream import ZipStream
+
 class FileManager:
     """فئة إدارة الملفات والمجلدات"""
     
@@ -163,14 +168,12 @@ class FileManager:
         
         return total_size
     
-    def create_bundle_zip(self, project_id: str, bundles: Dict[str, str]) -> Path:
-        """إنشاء ملف ZIP للحزم"""
-        zip_path = self.bundles_dir / f'{project_id}_bundles.zip'
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for lib_name, bundle_path in bundles.items():
-                bundle_file = Path(bundle_path)
-                if bundle_file.exists():
-                    zipf.write(bundle_file, f'bundles/{bundle_file.name}')
-        
-        return zip_path
\ No newline at end of file
+    def bundle_zip_stream(self, bundles: Dict[str, str]) -> ZipStream:
+        """أرشيف ZIP متدفق للحزم (ملفات ومجلدات) يُرسل مباشرة دون كتابته على القرص"""
+        stream = ZipStream()
+        for lib_name, bundle_path in bundles.items():
+            bundle_file = Path(bundle_path)
+            if bundle_file.exists():
+                stream.add_path(bundle_file, f'bundles/{bundle_file.name}')
+        
+        return stream
\ No newline at end of file
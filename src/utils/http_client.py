@@ -0,0 +1,152 @@
+"""
+عميل HTTP مشترك مع تجميع الاتصالات وتنزيل متزامن محدود لكل مضيف
+"""
+
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpClient:
+    """جلسة requests واحدة (keep-alive) مع إعادة المحاولة وتنزيل متوازٍ"""
+
+    DEFAULT_SETTINGS = {
+        'max_workers': 8,
+        'per_host_limit': 4,
+        'retries': 3,
+        'backoff_factor': 0.5,
+        'timeout': 30,
+        'chunk_size': 64 * 1024,
+        'user_agent': 'WebScanner/1.0'
+    }
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+
+        retry_strategy = Retry(
+            total=self.settings['retries'],
+            backoff_factor=self.settings['backoff_factor'],
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET', 'HEAD']
+        )
+        pool_size = max(self.settings['max_workers'], self.settings['per_host_limit'])
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry_strategy
+        )
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = self.settings['user_agent']
+
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """إشارة تحد من عدد الاتصالات المتزامنة لكل مضيف"""
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._host_limits.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.settings['per_host_limit'])
+                self._host_limits[host] = semaphore
+            return semaphore
+
+    @staticmethod
+    def filename_from_url(url: str) -> str:
+        """اسم ملف آمن من آخر جزء في URL"""
+        filename = urlparse(url).path.rsplit('/', 1)[-1] or 'downloaded_file'
+        return re.sub(r'[^\w\.\-]', '_', filename)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """طلب GET عبر الجلسة المشتركة"""
+        kwargs.setdefault('timeout', self.settings['timeout'])
+        with self._host_semaphore(url):
+            return self.session.get(url, **kwargs)
+
+    def download(self, url: str, output_dir: Path, filename: Optional[str] = None) -> Dict[str, Any]:
+        """تنزيل ملف بالبث إلى ملف مؤقت ثم إعادة تسميته (كتابة ذرية)"""
+        output_dir = Path(output_dir)
+        filename = filename or self.filename_from_url(url)
+        result = {'url': url, 'filename': filename, 'path': None, 'size': 0, 'success': False, 'error': None}
+
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+            result['error'] = 'رابط غير صالح'
+            return result
+
+        tmp_path = None
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            with self._host_semaphore(url):
+                with self.session.get(url, timeout=self.settings['timeout'], stream=True) as response:
+                    response.raise_for_status()
+                    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=f'.{filename}.', suffix='.part')
+                    size = 0
+                    with os.fdopen(fd, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=self.settings['chunk_size']):
+                            if chunk:
+                                f.write(chunk)
+                                size += len(chunk)
+
+            if size == 0:
+                raise ValueError('الملف المنزل فارغ')
+
+            file_path = output_dir / filename
+            os.replace(tmp_path, file_path)
+            tmp_path = None
+            result.update(path=str(file_path), size=size, success=True)
+        except Exception as e:
+            result['error'] = str(e)
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        return result
+
+    def download_many(self, jobs: Iterable[Dict[str, Any]],
+                      progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """تنزيل قائمة مهام {'url', 'output_dir', 'filename'?} بالتوازي مع الحفاظ على الترتيب"""
+        jobs = list(jobs)
+        if not jobs:
+            return []
+
+        def run(job):
+            result = self.download(job['url'], job['output_dir'], job.get('filename'))
+            result['job'] = job
+            if progress_callback:
+                progress_callback(result)
+            return result
+
+        workers = min(self.settings['max_workers'], len(jobs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='download') as executor:
+            return list(executor.map(run, jobs))
+
+    def close(self):
+        """إغلاق الجلسة وتحرير الاتصالات"""
+        self.session.close()
+
+
+# عميل مشترك على مستوى العملية
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client(settings: Optional[Dict[str, Any]] = None) -> HttpClient:
+    """الحصول على العميل المشترك (يُنشأ مرة واحدة)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(settings)
+        return _client
@@ -4,7 +4,7 @@
 
 from .file_manager import FileManager
 from .background_worker import (
-    BackgroundWorker, BackgroundTask, TaskStatus,
+    BackgroundWorker, BackgroundTask, TaskStatus, TaskQueueFull,
     get_worker, start_worker, stop_worker,
     submit_task, get_task_status, cancel_task,
     get_all_tasks, cleanup_old_tasks
@@ -15,6 +15,7 @@ __all__ = [
     'BackgroundWorker',
     'BackgroundTask',
     'TaskStatus',
+    'TaskQueueFull',
     'get_worker',
     'start_worker',
     'stop_worker',
@@ -0,0 +1,202 @@
+"""
+مخزن كائنات معنون بالمحتوى لمجلد الحزم: ملفات المشاريع روابط صلبة (أو reflink) إلى bundles/.objects
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # ويندوز: لا يوجد reflink
+    fcntl = None
+
+
+# FICLONE في لينكس (btrfs / xfs): نسخ بمشاركة الكتل دون ربط صلب
+_FICLONE = 0x40049409
+
+
+def write_atomic(target: Path, data: bytes):
+    """كتابة ملف جديد ثم استبداله؛ الكتابة فوق الملف مباشرة كانت ستعدل الكائن المشترك عبر الرابط الصلب"""
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        if target.exists():
+            target.unlink()
+        return False
+
+
+class ObjectStore:
+    """objects/<sha256[:2]>/<sha256>؛ الكائن الذي لا يشير إليه أي مشروع (st_nlink == 1) يُحذف عند التنظيف"""
+
+    OBJECTS_DIRNAME = '.objects'
+    _lock = threading.RLock()
+
+    def __init__(self, root: Path, objects_dirname: Optional[str] = None):
+        self.root = Path(root)
+        self.objects_dir = self.root / (objects_dirname or self.OBJECTS_DIRNAME)
+
+    def object_path(self, sha: str) -> Path:
+        return self.objects_dir / sha[:2] / sha
+
+    @staticmethod
+    def file_digest(path: Path) -> str:
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    # ==================== الربط ====================
+    def _link(self, source: Path, target: Path) -> str:
+        """ربط target بالكائن source بشكل ذري؛ يعيد طريقة الربط أو '' إذا لم يكن ممكناً"""
+        tmp_path = target.with_name(f'.{target.name}.{os.getpid()}.{threading.get_ident()}.link')
+        if tmp_path.exists():
+            tmp_path.unlink()
+        try:
+            os.link(source, tmp_path)
+            method = 'hardlink'
+        except OSError:
+            if not _reflink(source, tmp_path):
+                return ''
+            method = 'reflink'
+        os.replace(tmp_path, target)
+        return method
+
+    def adopt(self, path: Path) -> Dict[str, Any]:
+        """إدخال ملف في المخزن واستبداله برابط إلى الكائن (إن وُجد كائن مطابق يُحذف التكرار)"""
+        path = Path(path)
+        stat = path.stat()
+        result = {'file': str(path), 'size': stat.st_size, 'method': None, 'deduplicated': False}
+        if stat.st_nlink > 1:
+            # مرتبط بالمخزن مسبقاً
+            result['method'] = 'hardlink'
+            return result
+
+        sha = self.file_digest(path)
+        obj = self.object_path(sha)
+        with self._lock:
+            if obj.exists():
+                if not os.path.samefile(obj, path):
+                    result['method'] = self._link(obj, path) or None
+                    result['deduplicated'] = result['method'] is not None
+                return result
+
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp_obj = obj.with_name(f'{sha}.{os.getpid()}.tmp')
+            try:
+                os.link(path, tmp_obj)
+                os.replace(tmp_obj, obj)
+                result['method'] = 'hardlink'
+            except OSError:
+                # نظام ملفات بدون روابط صلبة: نحتفظ بنسخة في المخزن ونحاول reflink
+                if tmp_obj.exists():
+                    tmp_obj.unlink()
+                shutil.copyfile(path, obj)
+                result['method'] = self._link(obj, path) or None
+        return result
+
+    def adopt_tree(self, directory: Path, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """إدخال كل ملفات المجلد في المخزن (عدا الأسماء المستثناة مثل التقارير التي تُكتب فوقها مباشرة)"""
+        exclude = set(exclude)
+        stats = {'files': 0, 'linked': 0, 'deduplicated': 0, 'saved_bytes': 0}
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if name in exclude or name.startswith('.'):
+                    continue
+                path = Path(root) / name
+                if path.is_symlink() or path.stat().st_size == 0:
+                    continue
+                result = self.adopt(path)
+                stats['files'] += 1
+                if result['method']:
+                    stats['linked'] += 1
+                if result['deduplicated']:
+                    stats['deduplicated'] += 1
+                    stats['saved_bytes'] += result['size']
+        return stats
+
+    # ==================== التنظيف ====================
+    def gc(self) -> Dict[str, int]:
+        """حذف الكائنات التي لم يعد أي مشروع يشير إليها (عدد الروابط = 1)"""
+        removed = {'objects': 0, 'bytes': 0}
+        if not self.objects_dir.exists():
+            return removed
+        with self._lock:
+            for obj in self.objects_dir.glob('*/*'):
+                try:
+                    stat = obj.stat()
+                except FileNotFoundError:
+                    continue
+                if obj.name.endswith('.tmp') or stat.st_nlink > 1:
+                    continue
+                obj.unlink()
+                removed['objects'] += 1
+                removed['bytes'] += stat.st_size
+        return removed
+
+    def disk_usage(self) -> int:
+        """المساحة الفعلية لمجلد الحزم (كل inode يُحسب مرة واحدة)"""
+        seen = set()
+        total = 0
+        for root, dirs, files in os.walk(self.root):
+            for name in files:
+                try:
+                    stat = os.lstat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                if (stat.st_dev, stat.st_ino) in seen:
+                    continue
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+        return total
+
+    def enforce_budget(self, max_bytes: int, protected: Iterable[Path] = (),
+                       min_age: int = 3600) -> Dict[str, Any]:
+        """حذف مجلدات الحزم الأقدم (غير المحمية والتي لم تُعدل مؤخراً) حتى تصبح المساحة ضمن الحد"""
+        result = {'removed': [], 'usage': 0}
+        with self._lock:
+            self.gc()
+            usage = self.disk_usage()
+            if usage > max_bytes:
+                protected = {Path(p).resolve() for p in protected}
+                now = time.time()
+                candidates = sorted(
+                    (d for d in self.root.iterdir()
+                     if d.is_dir() and d != self.objects_dir and d.resolve() not in protected
+                     and now - d.stat().st_mtime >= min_age),
+                    key=lambda d: d.stat().st_mtime
+                )
+                for directory in candidates:
+                    if usage <= max_bytes:
+                        break
+                    shutil.rmtree(directory, ignore_errors=True)
+                    result['removed'].append(directory.name)
+                    self.gc()
+                    usage = self.disk_usage()
+            result['usage'] = usage
+        return result
@@ -0,0 +1,231 @@
+"""
+كتابة أرشيف ZIP بشكل متدفق (قطعة بقطعة) مع ضغط الملفات بالتوازي ودون ملفات مؤقتة
+"""
+
+import os
+import time
+import zlib
+import struct
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# ملفات مضغوطة أصلاً: ضغطها مرة أخرى يهدر المعالج دون توفير يذكر
+STORED_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico', '.heic',
+    '.gz', '.tgz', '.br', '.zst', '.bz2', '.xz', '.zip', '.7z', '.rar',
+    '.woff', '.woff2', '.mp3', '.mp4', '.webm', '.ogg', '.pdf'
+}
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+_FLAG_UTF8 = 0x800
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_RECORD = struct.Struct('<IHHHHIIH')
+_ZIP64_END_RECORD = struct.Struct('<IQHHIIQQQQ')
+_ZIP64_LOCATOR = struct.Struct('<IIQI')
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """تحويل وقت التعديل إلى صيغة DOS المستخدمة في ZIP (تبدأ من 1980)"""
+    t = time.localtime(max(timestamp, 315532800))
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 4) | t.tm_mday
+    return dos_time, dos_date
+
+
+class ZipStream:
+    """أرشيف ZIP يُنتج كمولد بايتات؛ الملفات تُضغط في مجمع خيوط وتُكتب بالترتيب"""
+
+    def __init__(self, compresslevel: int = 6, max_workers: Optional[int] = None,
+                 chunk_size: int = 64 * 1024, buffer_limit: int = 1024 * 1024):
+        self.compresslevel = compresslevel
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        # الملفات المخزنة الأكبر من هذا الحد تُقرأ من القرص أثناء الإرسال بدل الاحتفاظ بها في الذاكرة
+        self.buffer_limit = buffer_limit
+        self.entries: List[Tuple[Path, str]] = []
+
+    # ==================== إضافة الملفات ====================
+    def add_file(self, path: Path, arcname: str):
+        """إضافة ملف باسم محدد داخل الأرشيف"""
+        self.entries.append((Path(path), arcname.replace(os.sep, '/').lstrip('/')))
+
+    def add_path(self, path: Path, arcname: str):
+        """إضافة ملف أو مجلد كامل (بشكل متكرر) تحت الاسم المحدد"""
+        path = Path(path)
+        if path.is_dir():
+            for file in sorted(path.rglob('*')):
+                if file.is_file():
+                    relative = file.relative_to(path).as_posix()
+                    self.add_file(file, f"{arcname}/{relative}" if arcname else relative)
+        elif path.is_file():
+            self.add_file(path, arcname)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def method_for(self, path: Path, size: int) -> int:
+        """طريقة التخزين: بدون ضغط للملفات المضغوطة أصلاً والفارغة"""
+        if size == 0 or path.suffix.lower() in STORED_EXTENSIONS:
+            return ZIP_STORED
+        return ZIP_DEFLATED
+
+    # ==================== التحضير (داخل الخيوط) ====================
+    def _prepare(self, path: Path, arcname: str) -> Dict[str, Any]:
+        """حساب CRC وضغط الملف؛ zlib يحرر GIL لذلك تعمل الخيوط بالتوازي فعلاً"""
+        stat = path.stat()
+        entry = {
+            'path': path,
+            'name': arcname.encode('utf-8'),
+            'flags': 0 if arcname.isascii() else _FLAG_UTF8,
+            'method': self.method_for(path, stat.st_size),
+            'mtime': _dos_datetime(stat.st_mtime),
+            'mode': stat.st_mode & 0xFFFF,
+            'size': stat.st_size,
+            'data': None
+        }
+
+        if entry['method'] == ZIP_DEFLATED:
+            raw = path.read_bytes()
+            compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+            data = compressor.compress(raw) + compressor.flush()
+            entry['crc'] = zlib.crc32(raw)
+            entry['size'] = len(raw)
+            if len(data) >= len(raw):
+                # الضغط لم يوفر شيئاً
+                entry['method'], data = ZIP_STORED, raw
+            entry['data'] = data
+        elif entry['size'] <= self.buffer_limit:
+            entry['data'] = path.read_bytes()
+            entry['size'] = len(entry['data'])
+            entry['crc'] = zlib.crc32(entry['data'])
+        else:
+            crc = 0
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    crc = zlib.crc32(chunk, crc)
+            entry['crc'] = crc
+
+        entry['compressed_size'] = len(entry['data']) if entry['data'] is not None else entry['size']
+        return entry
+
+    # ==================== الإخراج ====================
+    def __iter__(self) -> Iterator[bytes]:
+        """إنتاج الأرشيف قطعة بقطعة؛ عدد الملفات قيد التحضير محدود لحصر استهلاك الذاكرة"""
+        central: List[Dict[str, Any]] = []
+        offset = 0
+        pending = deque()
+        entries = iter(self.entries)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='zip')
+
+        def submit_next():
+            item = next(entries, None)
+            if item is not None:
+                pending.append(executor.submit(self._prepare, *item))
+
+        try:
+            for _ in range(self.max_workers * 2):
+                submit_next()
+
+            while pending:
+                entry = pending.popleft().result()
+                submit_next()
+
+                entry['offset'] = offset
+                central.append(entry)
+                header = self._local_header(entry)
+                offset += len(header) + entry['compressed_size']
+                yield header
+                yield from self._entry_data(entry)
+                entry['data'] = None
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        yield from self._central_directory(central, offset)
+
+    def _entry_data(self, entry: Dict[str, Any]) -> Iterator[bytes]:
+        data = entry['data']
+        if data is not None:
+            for start in range(0, len(data), self.chunk_size):
+                yield data[start:start + self.chunk_size]
+            return
+
+        remaining = entry['size']
+        with open(entry['path'], 'rb') as f:
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        if remaining:
+            raise IOError(f"تغير حجم الملف أثناء الأرشفة: {entry['path']}")
+
+    @staticmethod
+    def _needs_zip64(entry: Dict[str, Any]) -> bool:
+        return entry['size'] >= _ZIP64_LIMIT or entry['compressed_size'] >= _ZIP64_LIMIT
+
+    def _local_header(self, entry: Dict[str, Any]) -> bytes:
+        extra = b''
+        size, compressed_size = entry['size'], entry['compressed_size']
+        if self._needs_zip64(entry):
+            extra = struct.pack('<HHQQ', 0x0001, 16, size, compressed_size)
+            size = compressed_size = _ZIP64_LIMIT
+        version = 45 if extra else 20
+        dos_time, dos_date = entry['mtime']
+        return _LOCAL_HEADER.pack(
+            0x04034b50, version, entry['flags'], entry['method'], dos_time, dos_date,
+            entry['crc'], compressed_size, size, len(entry['name']), len(extra)
+        ) + entry['name'] + extra
+
+    def _central_directory(self, central: List[Dict[str, Any]], start: int) -> Iterator[bytes]:
+        size = 0
+        for entry in central:
+            fields = []
+            usize, csize, offset = entry['size'], entry['compressed_size'], entry['offset']
+            if usize >= _ZIP64_LIMIT:
+                fields.append(usize)
+                usize = _ZIP64_LIMIT
+            if csize >= _ZIP64_LIMIT:
+                fields.append(csize)
+                csize = _ZIP64_LIMIT
+            if offset >= _ZIP64_LIMIT:
+                fields.append(offset)
+                offset = _ZIP64_LIMIT
+            extra = struct.pack(f'<HH{len(fields)}Q', 0x0001, 8 * len(fields), *fields) if fields else b''
+            version = 45 if extra else 20
+            dos_time, dos_date = entry['mtime']
+            record = _CENTRAL_HEADER.pack(
+                0x02014b50, (3 << 8) | version, version, entry['flags'], entry['method'],
+                dos_time, dos_date, entry['crc'], csize, usize, len(entry['name']), len(extra),
+                0, 0, 0, entry['mode'] << 16, offset
+            ) + entry['name'] + extra
+            size += len(record)
+            yield record
+
+        count = len(central)
+        if count >= _ZIP64_COUNT_LIMIT or size >= _ZIP64_LIMIT or start >= _ZIP64_LIMIT:
+            zip64_offset = start + size
+            yield _ZIP64_END_RECORD.pack(0x06064b50, 44, (3 << 8) | 45, 45, 0, 0, count, count, size, start)
+            yield _ZIP64_LOCATOR.pack(0x07064b50, 0, zip64_offset, 1)
+            yield _END_RECORD.pack(0x06054b50, 0, 0, _ZIP64_COUNT_LIMIT, _ZIP64_COUNT_LIMIT,
+                                   _ZIP64_LIMIT, _ZIP64_LIMIT, 0)
+        else:
+            yield _END_RECORD.pack(0x06054b50, 0, 0, count, count, size, start, 0)
+
+    def write_to(self, target: Path) -> Path:
+        """كتابة الأرشيف إلى ملف (للاستخدام من سطر الأوامر)"""
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, 'wb') as f:
+            for chunk in self:
+                f.write(chunk)
+        return target
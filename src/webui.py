@@ -3,7 +3,7 @@
 """
 
 from fastapi import FastAPI, Request, Form, File, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
@@ -27,10 +27,11 @@ import hashlib
 
 
 from .utils.file_manager import FileManager
+from .usage_index import UsageIndex
 from .utils.background_worker import (
     get_worker, start_worker, stop_worker,
     submit_task, get_task_status, cancel_task,
-    get_all_tasks, cleanup_old_tasks
+    get_all_tasks, cleanup_old_tasks, TaskQueueFull
 )
 
 app = Flask(__name__)
@@ -1290,7 +1291,7 @@ def create_default_templates():
                 message += `• ${lib}: ${path}\n`;
             });
             
-            message += `\nيمكنك تنزيل جميع الحزم من: ${result.zip_path}`;
+            message += `\nيمكنك تنزيل جميع الحزم من: ${result.download_url}`;
             
             Swal.fire({
                 title: 'الحزم المنشأة',
@@ -2062,6 +2063,38 @@ async def get_project_analysis(project_id: str):
         logger.error(f"Error getting analysis: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/projects/{project_id}/usage")
+async def get_symbol_usage(project_id: str, symbol: str = "", prefix: Optional[str] = None):
+    """البحث عن مواقع استخدام رمز مكتبة (مثل lodash.debounce أو $.ajax)"""
+    try:
+        project_path = file_manager.projects_dir / project_id
+        
+        if not project_path.exists():
+            raise HTTPException(status_code=404, detail="المشروع غير موجود")
+        
+        usage_index = UsageIndex.load(project_path)
+        if not usage_index.files:
+            raise HTTPException(status_code=404, detail="لم يتم تحليل المشروع بعد")
+        
+        if prefix is not None:
+            return {'prefix': prefix, 'symbols': usage_index.symbols(prefix)}
+        
+        if not symbol:
+            raise HTTPException(status_code=400, detail="يجب تحديد الرمز المطلوب")
+        
+        locations = usage_index.lookup(symbol)
+        return {
+            'symbol': usage_index.normalize_symbol(symbol),
+            'total': len(locations),
+            'files': len({loc['file'] for loc in locations}),
+            'locations': locations
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting symbol usage: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/projects/{project_id}/analyze")
 async def analyze_project(project_id: str):
     """بدء تحليل مشروع"""
@@ -2100,6 +2133,10 @@ async def analyze_project(project_id: str):
             "message": "تم بدء تحليل المشروع",
             "analysis_id": f"analysis_{project_id}_{int(time.time())}"
         }
+    except HTTPException:
+        raise
+    except TaskQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error analyzing project: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2187,6 +2224,8 @@ async def create_project_bundles(project_id: str):
         }
     except HTTPException:
         raise
+    except TaskQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating bundles: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2224,26 +2263,31 @@ async def create_project_report(project_id: str):
         }
     except HTTPException:
         raise
+    except TaskQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating report: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/projects/{project_id}/bundles/download")
 async def download_bundles(project_id: str):
-    """تنزيل حزم المشروع"""
+    """تنزيل حزم المشروع (أرشيف ZIP متدفق يُنشأ أثناء الإرسال)"""
     try:
-        bundles_dir = file_manager.bundles_dir
+        from .bundler import Bundler
         
-        # إنشاء أرشيف ZIP
-        zip_path = bundles_dir / f"{project_id}_bundles.zip"
+        output_dir = Bundler.output_dir_for(project_id)
+        bundles = {}
+        if output_dir.is_dir():
+            bundles = {item.name: str(item) for item in sorted(output_dir.iterdir())}
         
-        if not zip_path.exists():
+        stream = file_manager.bundle_zip_stream(bundles)
+        if not len(stream):
             raise HTTPException(status_code=404, detail="لا توجد حزم للتنزيل")
         
-        return FileResponse(
-            zip_path,
+        return StreamingResponse(
+            iter(stream),
             media_type='application/zip',
-            filename=f"{project_id}_bundles.zip"
+            headers={'Content-Disposition': f'attachment; filename="{project_id}_bundles.zip"'}
         )
     except HTTPException:
         raise
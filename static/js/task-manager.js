@@ -156,9 +156,9 @@ class TaskManager {
         console.log('نتيجة الحزم:', result);
         
         // عرض روابط التنزيل
-        if (result.zip_path && window.showNotification) {
+        if (result.download_url && window.showNotification) {
             window.showNotification(
-                `✅ تم إنشاء ${result.total_bundles} حزمة. <a href="/api/download/bundles/${result.zip_path}" target="_blank">انقر للتنزيل</a>`,
+                `✅ تم إنشاء ${result.total_bundles} حزمة. <a href="${result.download_url}" target="_blank">انقر للتنزيل</a>`,
                 'success'
             );
         }
@@ -0,0 +1,115 @@
+"""
+اختبارات التجميع الجزئي القابل للدمج وذاكرته المؤقتة لكل مجلد
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.analyzer import AnalysisAggregate
+from src.aggregate_cache import AggregateCache
+
+
+def _analysis(file, libraries, functions_used):
+    return {
+        'file': file,
+        'libraries': {
+            lib_name: [{'original_import': lib_name, 'package': lib_name, 'version': version, 'entry': None}]
+            for lib_name, version in libraries.items()
+        },
+        'functions_used': functions_used
+    }
+
+
+FILES = [
+    _analysis('js/a.js', {'jquery': None}, ['jquery.ajax', 'jquery.each']),
+    _analysis('js/b.js', {'jquery': '3.6.3', 'lodash': None}, ['jquery.each', 'lodash.map', 'lodash.filter']),
+    _analysis('lib/c.js', {'lodash': '4.17.21'}, ['lodash.debounce', 'jquery.fake']),
+    _analysis('lib/d.js', {}, []),
+    _analysis('app.js', {'jquery': '3.7.0', 'dayjs': None}, ['dayjs.format', 'jquery.ajax']),
+]
+
+
+def _build(analyses):
+    aggregate = AnalysisAggregate()
+    for analysis in analyses:
+        aggregate.add(analysis)
+    return aggregate
+
+
+class AnalysisAggregateTest(unittest.TestCase):
+
+    def test_merge_equals_single_aggregate(self):
+        whole = _build(FILES)
+        merged = _build(FILES[:2]).merge(_build(FILES[2:]))
+        self.assertEqual(merged.to_dict(), whole.to_dict())
+        self.assertEqual(merged.finalize(), whole.finalize())
+
+    def test_merge_all_is_tree_wise_and_ordered(self):
+        whole = _build(FILES)
+        parts = [_build([analysis]) for analysis in FILES]
+        self.assertEqual(AnalysisAggregate.merge_all(parts).to_dict(), whole.to_dict())
+        self.assertEqual(AnalysisAggregate.merge_all([]).to_dict(), AnalysisAggregate().to_dict())
+
+    def test_package_info_keeps_first_known(self):
+        data = _build(FILES).to_dict()['libraries']
+        self.assertEqual(data['jquery']['version'], '3.6.3')
+        self.assertEqual(data['lodash']['functions_used'], ['lodash.debounce', 'lodash.filter', 'lodash.map'])
+
+    def test_dumps_loads_round_trip(self):
+        aggregate = _build(FILES)
+        restored = AnalysisAggregate.loads(aggregate.dumps())
+        self.assertEqual(restored.to_dict(), aggregate.to_dict())
+        self.assertEqual(restored.total_files, aggregate.total_files)
+        # بعد الاستعادة يبقى قابلاً للدمج
+        restored.merge(_build(FILES[:1]))
+        self.assertEqual(restored.total_files, len(FILES) + 1)
+
+    def test_pickles(self):
+        aggregate = _build(FILES)
+        self.assertEqual(pickle.loads(pickle.dumps(aggregate)).to_dict(), aggregate.to_dict())
+
+
+class AggregateCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.project = self.tmp / 'project'
+        (self.project / 'js').mkdir(parents=True)
+        self.files = [self.project / 'js' / 'a.js', self.project / 'js' / 'b.js']
+        for path in self.files:
+            path.write_text('var x = 1;', encoding='utf-8')
+        self.cache = AggregateCache(self.project, self.tmp / 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_round_trip_and_invalidation(self):
+        key = self.cache.key_for(self.files)
+        aggregate = _build(FILES[:2])
+        imports = [{'file': 'js/a.js', 'imports': [], 'unused_imports': []}]
+        self.cache.put('js', key, aggregate, imports)
+
+        cached_aggregate, cached_imports = self.cache.get('js', self.cache.key_for(self.files))
+        self.assertEqual(cached_aggregate.to_dict(), aggregate.to_dict())
+        self.assertEqual(cached_imports, imports)
+        self.assertIsNone(self.cache.get('lib', key))
+
+        # تعديل ملف يغير المفتاح
+        stat = os.stat(self.files[0])
+        os.utime(self.files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        new_key = self.cache.key_for(self.files)
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(self.cache.get('js', new_key))
+
+    def test_package_json_changes_key(self):
+        key = self.cache.key_for(self.files)
+        (self.project / 'package.json').write_text('{}', encoding='utf-8')
+        self.assertNotEqual(AggregateCache(self.project, self.tmp / 'cache').key_for(self.files), key)
+
+
+if __name__ == '__main__':
+    unittest.main()
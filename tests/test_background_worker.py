@@ -0,0 +1,91 @@
+"""
+اختبارات عامل الخلفية: إلغاء المهام الجارية وتسلسل مهام المشروع الواحد
+"""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.utils import background_worker as bw
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class BackgroundTaskTest(unittest.TestCase):
+
+    def test_cancelled_task_is_not_completed_or_failed(self):
+        task = bw.BackgroundTask('t', 'generate_report', {})
+        task.mark_running()
+        task.mark_cancelled()
+        task.mark_completed({'report': 'x'})
+        task.mark_failed('error')
+        task.mark_running()
+        self.assertEqual(task.status, bw.TaskStatus.CANCELLED)
+        self.assertIsNone(task.result)
+        self.assertIsNone(task.error)
+
+
+class BackgroundWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = bw.get_worker()
+        self.worker.start()
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def test_cancel_running_thread_task(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow(runner, task):
+            started.set()
+            release.wait(5)
+            task.mark_completed({'report': 'done'})
+
+        self.assertEqual(self.worker._settings_for('generate_report')['pool'], 'thread')
+        with mock.patch.object(bw.TaskRunner, '_execute_generate_report', slow):
+            task_id = self.worker.submit_task('generate_report', {'project_path': '/tmp/project'})
+            self.assertTrue(started.wait(5))
+            self.assertTrue(self.worker.cancel_task(task_id))
+            release.set()
+            self.assertTrue(_wait_for(lambda: self.worker.running_counts.get('generate_report') == 0))
+
+        status = self.worker.get_task_status(task_id)
+        self.assertEqual(status['status'], bw.TaskStatus.CANCELLED)
+        self.assertIsNone(status['result'])
+
+    def test_same_project_tasks_do_not_overlap(self):
+        active = []
+        overlap = []
+        lock = threading.Lock()
+
+        def slow(runner, task):
+            with lock:
+                if task.data['project_path'] in active:
+                    overlap.append(task.data['project_path'])
+                active.append(task.data['project_path'])
+            time.sleep(0.2)
+            with lock:
+                active.remove(task.data['project_path'])
+            task.mark_completed({})
+
+        with mock.patch.object(bw.TaskRunner, '_execute_create_bundles', slow):
+            ids = [self.worker.submit_task('create_bundles', {'project_path': '/tmp/project', 'analysis': {}})
+                   for _ in range(2)]
+            self.assertTrue(_wait_for(
+                lambda: all(self.worker.get_task_status(i)['status'] == bw.TaskStatus.COMPLETED for i in ids)
+            ))
+        self.assertEqual(overlap, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
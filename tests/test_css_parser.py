@@ -0,0 +1,64 @@
+"""
+اختبارات تصغير CSS: الوحدات الصفرية، دمج الخصائص المختصرة ودمج القواعد
+"""
+
+import unittest
+
+from src.css_parser import minify_css
+
+
+class CssMinifyTest(unittest.TestCase):
+
+    def test_zero_units(self):
+        self.assertEqual(minify_css('.a{margin:0px 0em;height:0.0px}'), '.a{margin:0;height:0}')
+        # 0% و 0s ليست أطوالاً: flex-basis و transition تتغير بدون الوحدة
+        self.assertEqual(minify_css('.a{flex:1 1 0%;transition:opacity 0s;animation-delay:0ms}'),
+                         '.a{flex:1 1 0%;transition:opacity 0s;animation-delay:0ms}')
+        # 0px داخل calc() ضروري
+        self.assertEqual(minify_css('.a{width:calc(100% - 0px)}'), '.a{width:calc(100% - 0px)}')
+        self.assertEqual(minify_css('.a{content:"0px  x"}'), '.a{content:"0px  x"}')
+
+    def test_shorthand_needs_all_four_longhands(self):
+        self.assertEqual(
+            minify_css('.a{margin-top:1px;margin-right:2px;margin-bottom:1px;margin-left:2px}'),
+            '.a{margin:1px 2px}'
+        )
+        three = '.a{margin-top:1px;margin-right:2px;margin-bottom:1px}'
+        self.assertEqual(minify_css(three), three)
+
+    def test_shorthand_needs_matching_importance(self):
+        mixed = '.a{margin-top:1px!important;margin-right:2px;margin-bottom:1px;margin-left:2px}'
+        self.assertEqual(minify_css(mixed), mixed)
+        self.assertEqual(
+            minify_css('.a{padding-top:1px !important;padding-right:1px !important;'
+                       'padding-bottom:1px !important;padding-left:1px !important}'),
+            '.a{padding:1px!important}'
+        )
+
+    def test_shorthand_not_merged_next_to_existing_shorthand(self):
+        css = '.a{margin-top:1px;margin-right:2px;margin-bottom:1px;margin-left:2px;margin:0}'
+        self.assertEqual(minify_css(css), css)
+
+    def test_values_and_rules(self):
+        self.assertEqual(minify_css('.a{color:#FFFFFF;background:url( "a b.png" )}'),
+                         '.a{color:#fff;background:url("a b.png")}')
+        self.assertEqual(minify_css('/* c */ .a { color : red } .a { background : blue }'),
+                         '.a{color:red;background:blue}')
+        self.assertEqual(
+            minify_css('@media (max-width: 600px) { .a { color: red } } @media (max-width: 600px) { .b { color: blue } }'),
+            '@media (max-width:600px){.a{color:red}.b{color:blue}}'
+        )
+
+    def test_merge_only_widely_supported_selectors(self):
+        self.assertEqual(minify_css('.a{color:red}.b:hover{color:red}'), '.a,.b:hover{color:red}')
+        self.assertEqual(minify_css('.a{color:red}li:not(.x)::before{color:red}'), '.a,li:not(.x)::before{color:red}')
+        self.assertEqual(minify_css('.sm\\:flex{display:flex}.b{display:flex}'), '.sm\\:flex,.b{display:flex}')
+        for selector in ('.b:focus-visible', '.b:has(img)', ':is(.b,.c)', '.b::-moz-selection',
+                         'input::placeholder', '.b:not(.c .d)'):
+            with self.subTest(selector):
+                self.assertEqual(minify_css(f'.a{{color:red}}{selector}{{color:red}}'),
+                                 f'.a{{color:red}}{selector}{{color:red}}')
+
+
+if __name__ == '__main__':
+    unittest.main()
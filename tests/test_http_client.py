@@ -0,0 +1,116 @@
+"""
+اختبارات عميل HTTP المشترك مقابل خادم http.server محلي
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src.utils.artifact_cache import ArtifactCache
+from src.utils.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep-alive: اتصال واحد يخدم عدة طلبات
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.server.state
+        with state['lock']:
+            state['ports'].add(self.client_address[1])
+            state['hits'][self.path] = state['hits'].get(self.path, 0) + 1
+            hits = state['hits'][self.path]
+
+        if self.path == '/flaky.js':
+            # أول طلبين يفشلان بخطأ مؤقت
+            if hits <= 2:
+                self._send(503)
+            else:
+                self._send(200, b'var ok = true;')
+        elif self.path == '/etag.js':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self._send(304, headers={'ETag': '"v1"'})
+            else:
+                self._send(200, b'var etag = 1;', {'ETag': '"v1"'})
+        elif self.path.startswith('/slow/'):
+            with state['lock']:
+                state['active'] += 1
+                state['max_active'] = max(state['max_active'], state['active'])
+            time.sleep(0.2)
+            with state['lock']:
+                state['active'] -= 1
+            self._send(200, b'slow')
+        else:
+            self._send(200, b'var lib = 1;')
+
+
+class HttpClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.state = {'lock': threading.Lock(), 'ports': set(), 'hits': {}, 'active': 0, 'max_active': 0}
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        self.tmp = Path(tempfile.mkdtemp())
+        self.client = HttpClient({'backoff_factor': 0, 'timeout': 5})
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_connection_is_reused(self):
+        for _ in range(5):
+            response = self.client.get(f'{self.base}/lib.js')
+            self.assertEqual(response.status_code, 200)
+            response.close()
+        self.assertEqual(len(self.server.state['ports']), 1)
+
+    def test_retries_transient_errors(self):
+        result = self.client.download(f'{self.base}/flaky.js', self.tmp)
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(self.server.state['hits']['/flaky.js'], 3)
+        self.assertEqual((self.tmp / 'flaky.js').read_bytes(), b'var ok = true;')
+
+    def test_per_host_limit(self):
+        client = HttpClient({'max_workers': 8, 'per_host_limit': 2, 'timeout': 5})
+        try:
+            jobs = [{'url': f'{self.base}/slow/{i}.js', 'output_dir': self.tmp} for i in range(6)]
+            results = client.download_many(jobs)
+        finally:
+            client.close()
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertEqual([r['filename'] for r in results], [f'{i}.js' for i in range(6)])
+        self.assertLessEqual(self.server.state['max_active'], 2)
+
+    def test_etag_revalidation(self):
+        cache = ArtifactCache(self.tmp / 'cache', self.client, max_age=0)
+        first = cache.fetch(f'{self.base}/etag.js')
+        second = cache.fetch(f'{self.base}/etag.js')
+        self.assertEqual(first['status'], 'downloaded')
+        self.assertEqual(second['status'], 'revalidated')
+        self.assertEqual(second['sha256'], first['sha256'])
+        self.assertEqual(self.server.state['hits']['/etag.js'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
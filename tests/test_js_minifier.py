@@ -0,0 +1,86 @@
+"""
+اختبارات مصغر JavaScript: الفاصلة المنقوطة التلقائية، التعابير النمطية، القوالب، التفكيك و eval
+"""
+
+import shutil
+import subprocess
+import unittest
+
+from src.js_minifier import minify_js
+
+NODE = shutil.which('node')
+
+
+def _run_node(code: str) -> str:
+    result = subprocess.run([NODE, '-e', code], capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return result.stdout
+
+
+class JsMinifierTest(unittest.TestCase):
+
+    CASES = {
+        'asi_return': 'function f() {\n  return\n  42;\n}\nconsole.log(f());',
+        'asi_increment': 'var a = 1, b = 2\na\n++b\nconsole.log(a, b);',
+        'asi_no_semicolons': 'let a = 1\nlet b = 2\nconsole.log(a + b)',
+        'regex_division': 'var a = 10, g = 2, i = 1;\nvar r = a / g / i;\n'
+                          'var re = /ab+c/gi.test("xABBC");\nvar s = "a/b".replace(/\\//g, "-");\n'
+                          'console.log(r, re, s, [4].map(x => x / 2), (a) / 2);',
+        'regex_after_paren': 'if (true) /foo/.test("foo") && console.log("re");',
+        'template': 'function f(longName, other) {\n'
+                    '  var inner = `a ${longName + 1} b ${`nested ${other}`} c`;\n'
+                    '  return inner + `  two   spaces  `;\n}\nconsole.log(f(1, 2));',
+        'destructuring': 'function f({alpha, beta: gamma = 3}, [first, ...rest]) {\n'
+                         '  const {x: {y}} = {x: {y: alpha}};\n  return [alpha, gamma, first, rest, y];\n}\n'
+                         'console.log(JSON.stringify(f({alpha: 1}, [4, 5, 6])));',
+        'shorthand_property': 'function f(value) { var o = {value}; return o.value; }\nconsole.log(f(7));',
+        'eval': 'function f(longName) { var other = 1; return eval("longName + other"); }\nconsole.log(f(41));',
+    }
+
+    def test_asi_keeps_restricted_newlines(self):
+        self.assertIn('return\n42', minify_js(self.CASES['asi_return']))
+        self.assertIn('a\n++b', minify_js(self.CASES['asi_increment']))
+        self.assertEqual(minify_js(self.CASES['asi_no_semicolons']), 'let a=1\nlet b=2\nconsole.log(a+b)')
+
+    def test_regex_and_division(self):
+        out = minify_js(self.CASES['regex_division'])
+        self.assertIn('=a/g/i;', out)
+        self.assertIn('/ab+c/gi.test(', out)
+        self.assertIn('replace(/\\//g,', out)
+        self.assertIn('if(true)/foo/.test(', minify_js(self.CASES['regex_after_paren']))
+
+    def test_template_literals(self):
+        out = minify_js(self.CASES['template'])
+        # الأسماء داخل ${} تُعاد تسميتها والنص الثابت لا يُمس
+        self.assertIn('`a ${a+1} b ${`nested ${b}`} c`', out)
+        self.assertIn('`  two   spaces  `', out)
+
+    def test_destructuring_and_shorthand(self):
+        out = minify_js(self.CASES['destructuring'])
+        # مفاتيح التفكيك المختصرة ({alpha}) تبقى لأنها أسماء خصائص أيضاً
+        self.assertIn('{alpha,beta:', out)
+        self.assertIn('{x:{y}}', out)
+        self.assertIn('{value}', minify_js(self.CASES['shorthand_property']))
+
+    def test_eval_disables_mangling(self):
+        out = minify_js(self.CASES['eval'])
+        self.assertIn('function f(longName){var other=1;', out)
+        sibling = minify_js('function g(p1) { var q1 = p1; return q1; }\n'
+                            'function f(longName) { return eval("longName"); }')
+        # eval في دالة لا يمنع إعادة التسمية في دالة أخرى
+        self.assertIn('function g(a){var b=a;return b;}', sibling)
+        self.assertIn('function f(longName)', sibling)
+
+    def test_no_mangle(self):
+        self.assertIn('longName', minify_js(self.CASES['template'], mangle=False))
+
+    @unittest.skipUnless(NODE, 'node غير متوفر')
+    def test_same_output_in_node(self):
+        for name, code in self.CASES.items():
+            with self.subTest(name):
+                self.assertEqual(_run_node(minify_js(code)), _run_node(code))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+اختبارات محلل الوحدات: حدود جذر المشروع و package.json
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.resolver import ModuleResolver
+
+
+def _write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+class ModuleResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        # حزمة خارج المشروع: يجب ألا يصل إليها البحث
+        _write(self.tmp / 'node_modules' / 'outside' / 'package.json', '{"version": "9.9.9"}')
+        self.real = self.tmp / 'real' / 'project'
+        _write(self.real / 'package.json', json.dumps({'main': 'src/app.js', 'dependencies': {'inside': '^1.2.0'}}))
+        _write(self.real / 'src' / 'app.js', "import x from 'inside';")
+        _write(self.real / 'node_modules' / 'inside' / 'package.json', '{"version": "1.2.3", "main": "index.js"}')
+        _write(self.real / 'node_modules' / 'inside' / 'index.js', 'module.exports = 1;')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _check_project(self, root: Path):
+        resolver = ModuleResolver(root)
+        importer = root / 'src' / 'app.js'
+
+        inside = resolver.resolve('inside', importer)
+        self.assertTrue(inside['installed'])
+        self.assertEqual(inside['version'], '1.2.3')
+        self.assertEqual(Path(inside['entry']).relative_to(root).as_posix(), 'node_modules/inside/index.js')
+
+        outside = resolver.resolve('outside', importer)
+        self.assertFalse(outside['installed'])
+        self.assertIsNone(outside['version'])
+
+        local = resolver.resolve('./app', root / 'src' / 'index.js')
+        self.assertEqual(Path(local['path']).relative_to(root).as_posix(), 'src/app.js')
+
+    def test_walk_stops_at_project_root(self):
+        self._check_project(self.real)
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), 'الروابط الرمزية غير مدعومة')
+    def test_walk_stops_at_symlinked_project_root(self):
+        (self.tmp / 'links').mkdir()
+        link = self.tmp / 'links' / 'project'
+        os.symlink(self.real, link, target_is_directory=True)
+        # node_modules بجانب الرابط: خارج المشروع أيضاً
+        _write(self.tmp / 'links' / 'node_modules' / 'outside' / 'package.json', '{"version": "8.8.8"}')
+        self._check_project(link)
+
+    def test_read_package_json(self):
+        resolver = ModuleResolver(self.real)
+        self.assertEqual(resolver.read_package_json(str(self.real))['main'], 'src/app.js')
+        self.assertIsNone(resolver.read_package_json(str(self.real / 'src')))
+        _write(self.real / 'broken' / 'package.json', '[1, 2]')
+        self.assertIsNone(resolver.read_package_json(str(self.real / 'broken')))
+
+    def test_declared_dependencies(self):
+        self.assertEqual(ModuleResolver(self.real).declared_dependencies(), {'inside': '^1.2.0'})
+
+
+if __name__ == '__main__':
+    unittest.main()
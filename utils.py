@@ -13,9 +13,6 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 
 # ==================== إعدادات التسجيل ====================
 def setup_logger(name: str, log_file: str = "scanner.log", level: str = 'INFO') -> logging.Logger:
@@ -171,30 +168,16 @@ def detect_file_type(file_path: Path) -> Dict[str, str]:
 # ==================== التعامل مع الشبكة ====================
 def download_file(url: str, output_dir: Path, timeout: int = 30) -> Optional[Path]:
     """تنزيل ملف من URL بأمان"""
+    tmp_path = None
     try:
         # التحقق من URL
         parsed = urlparse(url)
         if not parsed.scheme or not parsed.netloc:
             return None
         
-        # إنشاء جلسة مع إعادة المحاولة
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        # إعدادات الطلب
-        headers = {
-            'User-Agent': 'WebScanner/1.0'
-        }
-        
-        # تنزيل الملف
-        response = session.get(url, headers=headers, timeout=timeout, stream=True)
+        # تنزيل الملف عبر عميل HTTP المشترك (اتصالات دائمة وإعادة محاولة)
+        from src.utils.http_client import get_http_client
+        response = get_http_client().get(url, timeout=timeout, stream=True)
         response.raise_for_status()
         
         # تحديد اسم الملف
@@ -211,23 +194,29 @@ def download_file(url: str, output_dir: Path, timeout: int = 30) -> Optional[Pat
         output_dir.mkdir(parents=True, exist_ok=True)
         file_path = output_dir / filename
         
-        # حفظ الملف
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
+        # حفظ الملف في ملف مؤقت ثم إعادة تسميته
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=f'.{filename}.', suffix='.part')
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
                 if chunk:
                     f.write(chunk)
+        response.close()
         
         # التحقق من صحة الملف
-        if file_path.stat().st_size == 0:
-            file_path.unlink()
+        if os.path.getsize(tmp_path) == 0:
             return None
         
+        os.replace(tmp_path, file_path)
+        tmp_path = None
         return file_path
         
     except Exception as e:
         logger = setup_logger(__name__)
         logger.error(f"خطأ في تنزيل {url}: {e}")
         return None
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
 
 # ==================== معالجة النصوص ====================
 def clean_dependency_name(dep: str) -> str: